@@ -0,0 +1,153 @@
+"""
+Batch healing: many repositories submitted in one request (POST /start-healing/batch).
+
+A batch first probes every repo with a shallow, blob-less clone that reads only
+its root manifests, and groups the repos by stack and dependency hash
+(utils/dependency_cache.py). Within a group one run goes first and warms the
+shared package cache, then the rest of the group follows. At most `concurrency`
+runs of a batch are in flight at once. Each run is still admitted like a single
+/start-healing request, so the scheduler's global limits, fairness and run
+deduplication all apply.
+
+Progress is kept on the Batch (GET /batches/{batch_id}), and every finished repo
+is published on the batch's event channel (GET /batches/{batch_id}/events), which
+ends with a batch_end event.
+"""
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.events import publish_event
+from backend.telemetry import span, telemetry
+from backend.utils.dependency_cache import MANIFESTS, cache_key, dependency_hash, manifest_stack
+
+BATCH_MAX_RUNS = int(os.environ.get("BATCH_MAX_RUNS", "500"))
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", os.environ.get("MAX_CONCURRENT_RUNS", "2")))
+BATCH_PROBE_CONCURRENCY = int(os.environ.get("BATCH_PROBE_CONCURRENCY", "8"))
+PROBE_TIMEOUT = float(os.environ.get("BATCH_PROBE_TIMEOUT", "60"))
+
+FINISHED = ("done", "error")
+
+
+def probe_repo(repo_url: str) -> Dict[str, Optional[str]]:
+    """Stack and dependency hash from the repo's root manifests, without checking out the tree."""
+    from git import Git
+    from git.exc import GitCommandError
+    from backend.utils.file_utils import cleanup_directory
+    tmp = tempfile.mkdtemp(prefix="rift-probe-")
+    target = os.path.join(tmp, "repo")
+    try:
+        Git(tmp).clone("--depth", "1", "--filter=blob:none", "--no-checkout", "--quiet", repo_url, target,
+                       kill_after_timeout=PROBE_TIMEOUT, env={"GIT_TERMINAL_PROMPT": "0"})
+        git = Git(target)
+        paths = git.ls_tree("-r", "--name-only", "HEAD").splitlines()
+        present = set(paths) & set(MANIFESTS)  # root-level manifests
+        dep_hash = dependency_hash(lambda name: git.show(f"HEAD:{name}") if name in present else None)
+        return {"stack": manifest_stack(paths), "dependency_hash": dep_hash}
+    except (GitCommandError, OSError) as e:
+        print(f"Batch: Could not probe {repo_url} ({str(e).strip().splitlines()[0]})")
+        return {"stack": "UNKNOWN", "dependency_hash": None}
+    finally:
+        cleanup_directory(tmp)
+
+
+class Batch:
+    def __init__(self, requests: List[Any], concurrency: Optional[int] = None):
+        self.batch_id = str(uuid.uuid4())
+        self.concurrency = max(1, concurrency or BATCH_CONCURRENCY)
+        self.status = "probing"  # probing -> running -> done
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.requests = requests
+        self.entries: List[Dict[str, Any]] = [
+            {"index": i, "repo_url": r.repo_url, "team_name": r.team_name, "status": "pending"}
+            for i, r in enumerate(requests)
+        ]
+        self.groups: Dict[str, List[int]] = {}
+
+    def summary(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for entry in self.entries:
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        finished = sum(counts.get(s, 0) for s in FINISHED)
+        return {
+            "batch_id": self.batch_id,
+            "status": self.status,
+            "total": len(self.entries),
+            "finished": finished,
+            "progress": round(finished / len(self.entries), 3) if self.entries else 1.0,
+            "counts": counts,
+            "concurrency": self.concurrency,
+            "groups": {key: len(members) for key, members in self.groups.items()},
+            "elapsed_seconds": round((self.finished_at or time.time()) - self.created_at, 1),
+            "runs": self.entries,
+        }
+
+    def _group(self, probes: List[Dict[str, Optional[str]]]):
+        for entry, probe in zip(self.entries, probes):
+            key = cache_key(probe["stack"], probe["dependency_hash"])
+            entry.update(stack=probe["stack"], dependency_hash=probe["dependency_hash"], group=key)
+            self.groups.setdefault(key, []).append(entry["index"])
+        # Largest groups first: they gain the most from a warm cache
+        self.groups = dict(sorted(self.groups.items(), key=lambda kv: -len(kv[1])))
+
+    async def run(self, admit: Callable[[Any], Awaitable[Dict[str, Any]]],
+                  wait: Callable[[str], Awaitable[Dict[str, Any]]]):
+        """
+        Probes, groups and runs the batch. `admit(request)` submits one run (returning the
+        /start-healing response, or raising QueueFullError); `wait(run_id)` returns its final status.
+        """
+        with span("batch", self.batch_id, batch_size=len(self.entries)):
+            probing = asyncio.Semaphore(BATCH_PROBE_CONCURRENCY)
+
+            async def probe(request):
+                async with probing:
+                    return await asyncio.to_thread(probe_repo, request.repo_url)
+
+            self._group(await asyncio.gather(*(probe(r) for r in self.requests)))
+            self.status = "running"
+            publish_event(self.batch_id, "batch_grouped", groups=self.summary()["groups"])
+
+            slots = asyncio.Semaphore(self.concurrency)
+
+            async def run_one(index: int):
+                async with slots:
+                    await self._run_entry(index, admit, wait)
+
+            async def run_group(members: List[int]):
+                await run_one(members[0])  # warms the group's package cache
+                await asyncio.gather(*(run_one(i) for i in members[1:]))
+
+            await asyncio.gather(*(run_group(members) for members in self.groups.values()))
+        self.status = "done"
+        self.finished_at = time.time()
+        summary = self.summary()
+        publish_event(self.batch_id, "batch_end", counts=summary["counts"], elapsed_seconds=summary["elapsed_seconds"])
+
+    async def _run_entry(self, index: int, admit, wait):
+        from backend.scheduler import QueueFullError
+        entry, request = self.entries[index], self.requests[index]
+        try:
+            while True:
+                try:
+                    response = await admit(request)
+                    break
+                except QueueFullError as e:
+                    entry["status"] = "waiting"
+                    await asyncio.sleep(min(e.retry_after, 30.0))
+            entry.update(run_id=response["run_id"], status=response["status"])
+            if response.get("dedup"):
+                entry["dedup"] = response["dedup"]
+            final = response if response["status"] == "done" else await wait(response["run_id"])
+        except Exception as e:
+            final = {"status": "error", "error": str(e)}
+        result = final.get("result") or {}
+        entry.update(status=final.get("status", "error"), final_status=result.get("final_status"),
+                     final_score=result.get("final_score"), pr_url=result.get("pr_url"))
+        if final.get("error"):
+            entry["error"] = final["error"]
+        telemetry.inc("rift_batch_runs_total", status=entry["status"])
+        publish_event(self.batch_id, "batch_run_end", run=dict(entry))
@@ -0,0 +1,362 @@
+"""
+Durable LangGraph checkpoints, so an interrupted run resumes instead of starting over.
+
+The compiled graphs checkpoint into SQLite (CHECKPOINT_DB) after every node: the
+changed state channels, the pending writes of the step in flight, and a reference
+to the workspace it was taken against (the clone's path and HEAD commit). Each run
+is one LangGraph thread keyed by its run_id. A small `runs` table keeps the
+HealingRequest and whether the run is running, finished or errored.
+
+Resuming (POST /runs/{run_id}/resume, RESUME_INTERRUPTED_RUNS at API start-up, or
+a worker re-claiming a job after a crash or deploy) continues from the last
+completed node: the clone, dependency install and committed fixes are reused as
+long as the workspace is still at the recorded commit. Finished runs drop their
+checkpoints; errored and interrupted ones keep them until they are resumed.
+
+CHECKPOINTING=0 compiles the graphs without a checkpointer.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from backend.utils.sqlite_utils import connect_sqlite
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CHECKPOINT_DB = os.path.join(PROJECT_ROOT, "checkpoints.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id      TEXT NOT NULL,
+    checkpoint_ns  TEXT NOT NULL DEFAULT '',
+    checkpoint_id  TEXT NOT NULL,
+    parent_id      TEXT,
+    type           TEXT,
+    checkpoint     BLOB NOT NULL,
+    metadata_type  TEXT,
+    metadata       BLOB NOT NULL,
+    workspace      TEXT,           -- {"path", "head"} of the clone when the checkpoint was taken
+    created_at     REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS channel_blobs (
+    thread_id      TEXT NOT NULL,
+    checkpoint_ns  TEXT NOT NULL DEFAULT '',
+    channel        TEXT NOT NULL,
+    version        TEXT NOT NULL,
+    type           TEXT NOT NULL,
+    value          BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id      TEXT NOT NULL,
+    checkpoint_ns  TEXT NOT NULL DEFAULT '',
+    checkpoint_id  TEXT NOT NULL,
+    task_id        TEXT NOT NULL,
+    idx            INTEGER NOT NULL,
+    channel        TEXT NOT NULL,
+    type           TEXT,
+    value          BLOB,
+    task_path      TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    request     TEXT NOT NULL,
+    status      TEXT NOT NULL,   -- running / done / error / interrupted
+    updated_at  REAL NOT NULL
+);
+"""
+
+
+class ResumeError(Exception):
+    """The run has checkpoints that cannot be resumed (it finished, or its workspace is gone)."""
+
+
+def workspace_ref(repo_path: Optional[str]) -> Optional[Dict[str, str]]:
+    """Path and HEAD commit of a run's clone, or None before discovery has cloned it."""
+    if not repo_path or not os.path.isdir(os.path.join(repo_path, ".git")):
+        return None
+    from git import Repo
+    try:
+        return {"path": repo_path, "head": Repo(repo_path).head.commit.hexsha}
+    except Exception:
+        return {"path": repo_path, "head": ""}
+
+
+def workspace_problem(ref: Optional[Dict[str, str]]) -> Optional[str]:
+    """Why the recorded workspace can no longer be reused, or None if it can."""
+    if not ref:
+        return None
+    current = workspace_ref(ref["path"])
+    if current is None:
+        return f"workspace {ref['path']} no longer exists"
+    if ref.get("head") and current["head"] != ref["head"]:
+        return f"workspace {ref['path']} moved from {ref['head'][:10]} to {current['head'][:10]}"
+    return None
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread, like the job queue: the async methods run on worker threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    # ── LangGraph checkpointer interface ─────────────────────────
+
+    def get_tuple(self, config) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            row = self._conn().execute(
+                "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+        else:
+            row = self._conn().execute(
+                "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, checkpoint_ns)).fetchone()
+        return self._tuple(row) if row else None
+
+    def list(self, config, *, filter: Optional[Dict[str, Any]] = None, before=None,
+             limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT * FROM checkpoints {where} ORDER BY checkpoint_id DESC", params).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                return
+            metadata = self.serde.loads_typed((row["metadata_type"], row["metadata"]))
+            if filter and any(metadata.get(k) != v for k, v in filter.items()):
+                continue
+            if limit is not None:
+                limit -= 1
+            yield self._tuple(row)
+
+    def put(self, config, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        blobs = []
+        for channel, version in new_versions.items():
+            kind, value = self.serde.dumps_typed(values[channel]) if channel in values else ("empty", b"")
+            blobs.append((thread_id, checkpoint_ns, channel, str(version), kind, value))
+        kind, data = self.serde.dumps_typed(stored)
+        meta_kind, meta = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        workspace = workspace_ref(values.get("repo_path"))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO channel_blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 kind, data, meta_kind, meta, json.dumps(workspace) if workspace else None, time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = ""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows, special = [], []
+        for idx, (channel, value) in enumerate(writes):
+            kind, data = self.serde.dumps_typed(value)
+            row = (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                   channel, kind, data, task_path)
+            # Special writes (errors, interrupts) replace earlier ones; regular writes are kept first-wins
+            (special if channel in WRITES_IDX_MAP else rows).append(row)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR IGNORE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", special)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete_thread(self, thread_id: str):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in ("checkpoints", "channel_blobs", "writes"):
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def aget_tuple(self, config) -> Optional[CheckpointTuple]:
+        import asyncio
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator[CheckpointTuple]:
+        import asyncio
+        for item in await asyncio.to_thread(
+                lambda: list(self.list(config, filter=filter, before=before, limit=limit))):
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        import asyncio
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        import asyncio
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str):
+        import asyncio
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def _tuple(self, row: sqlite3.Row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id = row["thread_id"], row["checkpoint_ns"], row["checkpoint_id"]
+        checkpoint = self.serde.loads_typed((row["type"], row["checkpoint"]))
+        values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = self._conn().execute(
+                "SELECT type, value FROM channel_blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version))).fetchone()
+            if blob and blob["type"] != "empty":
+                values[channel] = self.serde.loads_typed((blob["type"], blob["value"]))
+        writes = self._conn().execute(
+            "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+        writes = sorted(writes, key=lambda w: writes_sort_key(w["task_path"], w["task_id"], w["idx"]))
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": values},
+            metadata=self.serde.loads_typed((row["metadata_type"], row["metadata"])),
+            parent_config=({"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                             "checkpoint_id": row["parent_id"]}} if row["parent_id"] else None),
+            pending_writes=[(w["task_id"], w["channel"], self.serde.loads_typed((w["type"], w["value"])))
+                            for w in writes],
+        )
+
+    # ── Run registry ─────────────────────────────────────────────
+
+    def register_run(self, run_id: str, request: Dict[str, Any]):
+        self._conn().execute("INSERT OR REPLACE INTO runs VALUES (?, ?, 'running', ?)",
+                             (run_id, json.dumps(request), time.time()))
+
+    def set_run_status(self, run_id: str, status: str):
+        self._conn().execute("UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?",
+                             (status, time.time(), run_id))
+
+    def finish_run(self, run_id: str):
+        """The graph reached its end: nothing left to resume, so the checkpoints go."""
+        self.delete_thread(run_id)
+        self.set_run_status(run_id, "done")
+
+    def run_record(self, run_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), "request": json.loads(row["request"])}
+
+    def mark_interrupted(self) -> List[Dict[str, Any]]:
+        """Runs left 'running' by a process that is gone (call at start-up, before any run starts)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT run_id FROM runs WHERE status = 'running'").fetchall()
+            conn.execute("UPDATE runs SET status = 'interrupted', updated_at = ? WHERE status = 'running'",
+                         (time.time(),))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [self.run_record(r["run_id"]) for r in rows]
+
+    def last_checkpoint(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """When the run's latest checkpoint was written and the workspace it refers to."""
+        row = self._conn().execute(
+            "SELECT created_at, workspace FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = '' "
+            "ORDER BY checkpoint_id DESC LIMIT 1", (run_id,)).fetchone()
+        if row is None:
+            return None
+        return {"created_at": row["created_at"], "workspace": json.loads(row["workspace"]) if row["workspace"] else None}
+
+
+async def resume_point(graph, run_id: str, checkpointer: SQLiteCheckpointer) -> Optional[Dict[str, Any]]:
+    """
+    Where an interrupted run stands: the nodes it resumes at, its state, and how long
+    it has been down. None if the run was never checkpointed; ResumeError if its
+    checkpoints cannot be used.
+    """
+    import asyncio
+    snapshot = await graph.aget_state({"configurable": {"thread_id": run_id}})
+    if not snapshot or not snapshot.values:
+        return None
+    if not snapshot.next:
+        raise ResumeError("the run already finished")
+    last = await asyncio.to_thread(checkpointer.last_checkpoint, run_id) or {}
+    problem = await asyncio.to_thread(workspace_problem, last.get("workspace"))
+    if problem:
+        raise ResumeError(problem)
+    return {
+        "next": list(snapshot.next),
+        "state": snapshot.values,
+        "completed_steps": (snapshot.metadata or {}).get("step", 0),
+        "downtime_s": round(time.time() - last["created_at"], 3) if last.get("created_at") else None,
+    }
+
+
+_checkpointer: Optional[SQLiteCheckpointer] = None
+_lock = threading.Lock()
+
+
+def get_checkpointer() -> Optional[SQLiteCheckpointer]:
+    """The process-wide checkpointer (CHECKPOINT_DB), or None with CHECKPOINTING=0."""
+    global _checkpointer
+    if os.environ.get("CHECKPOINTING", "1") == "0":
+        return None
+    if _checkpointer is None:
+        with _lock:
+            if _checkpointer is None:
+                _checkpointer = SQLiteCheckpointer(os.environ.get("CHECKPOINT_DB", DEFAULT_CHECKPOINT_DB))
+    return _checkpointer
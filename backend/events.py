@@ -0,0 +1,139 @@
+"""
+In-process event bus for live run progress.
+
+Nodes (which run in LangGraph worker threads) call publish_event() for things the
+dashboard cares about: node start/end, test counts, applied fixes, commits and
+pushes. Each run keeps a bounded replay buffer so a subscriber that connects late
+(or reconnects with Last-Event-ID) first receives what it missed, then live events.
+The /runs/{run_id}/events endpoint streams these as Server-Sent Events.
+"""
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+REPLAY_BUFFER_SIZE = int(os.environ.get("EVENT_REPLAY_BUFFER", "500"))
+MAX_TRACKED_RUNS = int(os.environ.get("EVENT_MAX_TRACKED_RUNS", "200"))
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Terminal event types: a subscriber's stream ends after receiving one of these
+TERMINAL_EVENTS = ("run_end", "batch_end")
+
+
+class _RunChannel:
+    def __init__(self, buffer_size: int):
+        self.seq = 0
+        self.buffer: Deque[Dict[str, Any]] = deque(maxlen=buffer_size)
+        self.subscribers: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = []
+        self.closed = False
+
+
+class RunEventBus:
+    def __init__(self, buffer_size: int = REPLAY_BUFFER_SIZE, max_runs: int = MAX_TRACKED_RUNS):
+        self.buffer_size = buffer_size
+        self.max_runs = max_runs
+        self._channels: "OrderedDict[str, _RunChannel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _channel(self, run_id: str) -> _RunChannel:
+        channel = self._channels.get(run_id)
+        if channel is None:
+            channel = self._channels[run_id] = _RunChannel(self.buffer_size)
+            # Forget the oldest finished runs so memory stays bounded. Live runs are never
+            # dropped (their subscribers would lose the stream), so with more than max_runs
+            # live runs the bus briefly holds more channels.
+            excess = len(self._channels) - self.max_runs
+            if excess > 0:
+                for victim in [rid for rid, c in self._channels.items() if c.closed][:excess]:
+                    del self._channels[victim]
+        return channel
+
+    def has_run(self, run_id: str) -> bool:
+        return run_id in self._channels
+
+    def publish(self, run_id: Optional[str], event_type: str, **data) -> Optional[Dict[str, Any]]:
+        """Thread-safe; safe to call from node threads. No-op without a run_id."""
+        if not run_id:
+            return None
+        with self._lock:
+            channel = self._channel(run_id)
+            channel.seq += 1
+            event = {
+                "id": channel.seq,
+                "run_id": run_id,
+                "type": event_type,
+                "timestamp": datetime.now().isoformat(),
+                "data": data,
+            }
+            channel.buffer.append(event)
+            if event_type in TERMINAL_EVENTS:
+                channel.closed = True
+            subscribers = list(channel.subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, event)
+            except RuntimeError:
+                pass  # subscriber's loop already closed
+        return event
+
+    def reopen(self, run_id: str):
+        """
+        A finished run starts again (resume): its stream accepts subscribers again, and the
+        earlier run_end is dropped from the replay buffer so it no longer ends new streams.
+        """
+        with self._lock:
+            channel = self._channel(run_id)
+            channel.closed = False
+            channel.buffer = deque((e for e in channel.buffer if e["type"] not in TERMINAL_EVENTS),
+                                   maxlen=self.buffer_size)
+
+    async def subscribe(self, run_id: str, last_event_id: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """Yields buffered events after `last_event_id`, then live ones until the run ends."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            channel = self._channel(run_id)
+            replay = [e for e in channel.buffer if e["id"] > last_event_id]
+            closed = channel.closed
+            if not closed:
+                channel.subscribers.append((loop, queue))
+        try:
+            last_seen = last_event_id
+            for event in replay:
+                last_seen = event["id"]
+                yield event
+            if closed:
+                return
+            while True:
+                event = await queue.get()
+                if event["id"] <= last_seen:
+                    continue  # already delivered via the replay buffer
+                last_seen = event["id"]
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            with self._lock:
+                if (loop, queue) in channel.subscribers:
+                    channel.subscribers.remove((loop, queue))
+
+
+def _offer(queue: asyncio.Queue, event: Dict[str, Any]):
+    if queue.full():
+        queue.get_nowait()  # slow consumer: drop the oldest rather than block publishers
+    queue.put_nowait(event)
+
+
+event_bus = RunEventBus()
+
+
+def publish_event(run_id: Optional[str], event_type: str, **data) -> Optional[Dict[str, Any]]:
+    """Module-level shortcut used by the nodes."""
+    return event_bus.publish(run_id, event_type, **data)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
@@ -1,14 +1,63 @@
+import functools
+import itertools
+import threading
+import time
+from typing import Dict, Optional, Tuple
 from langgraph.graph import StateGraph, END
 from backend.state import AgentState
+from backend.events import publish_event
+from backend.telemetry import process_rss_mb, span
+from backend.utils.token_usage import BUDGET_EXCEEDED, ledger
 from backend.nodes.discovery import discovery_node
 from backend.nodes.tester import tester_node
 from backend.nodes.debugger import debugger_node
 from backend.nodes.fixer import fixer_node
+from backend.nodes.analyze_fix import analyze_fix_node
 from backend.nodes.git_node import git_node
+from backend.nodes.publish_node import publish_node
 from backend.scoring import scoring_node
 
 MAX_RETRIES = 5
 
+# Options that change the graph's shape. Each combination is compiled once per process.
+PUBLISH_MODES = ("eager", "deferred", "background")
+# two_step: debugger -> fixer (two model calls); fused: one analyze_fix call per iteration
+ANALYSIS_MODES = ("two_step", "fused")
+
+
+def _instrument(name: str, node):
+    """
+    Wraps a node so every invocation publishes node_start/node_end events for its run
+    and runs inside a `node.<name>` telemetry span (external calls nest under it).
+    Runs started with profile=True also go through backend/profiler.py. After each node
+    the run's LLM token totals are copied into state['token_usage'] and the process RSS
+    into the run's state['peak_rss_mb'] high-water mark.
+    """
+    @functools.wraps(node)
+    def wrapper(state: AgentState) -> AgentState:
+        run_id = state.get('run_id')
+        publish_event(run_id, "node_start", node=name, iteration=state.get('retry_count', 0))
+        started = time.perf_counter()
+        try:
+            with span(f"node.{name}", run_id, iteration=state.get('retry_count', 0)):
+                if state.get('profile'):
+                    from backend.profiler import profile_node
+                    state = profile_node(name, state, node)
+                else:
+                    state = node(state)
+            state['peak_rss_mb'] = round(max(state.get('peak_rss_mb') or 0.0, process_rss_mb()), 1)
+            usage = ledger.snapshot(run_id)
+            if usage:
+                state['token_usage'] = usage
+                if usage['budget_exceeded']:
+                    state['current_step'] = BUDGET_EXCEEDED
+            return state
+        finally:
+            publish_event(run_id, "node_end", node=name,
+                          duration_ms=round((time.perf_counter() - started) * 1000, 1),
+                          current_step=state.get('current_step'))
+    return wrapper
+
 # ── Short-circuit if clone/discovery failed ───────────────────────
 def check_discovery_status(state: AgentState):
     if state.get('current_step') == 'DISCOVERY_FAILED':
@@ -19,6 +68,8 @@ def check_discovery_status(state: AgentState):
 def check_test_status(state: AgentState):
     if state.get('final_status') == "PASSED":
         return "passed"
+    if (state.get('token_usage') or {}).get('budget_exceeded'):
+        return "max_retries"
     # retry_count is already incremented by tester_node after each failure
     retry_count = state.get('retry_count', 0)
     max_retries = state.get('max_iterations', 5)
@@ -26,16 +77,25 @@ def check_test_status(state: AgentState):
         return "max_retries"
     return "failed"
 
-def create_workflow():
+def create_workflow(publish_mode: str = "eager", analysis_mode: str = "two_step", checkpointer=None):
+    """
+    Builds and compiles a fresh graph. Runs should use get_workflow(), which caches this
+    and checkpoints every node (backend/checkpoints.py).
+    """
     workflow = StateGraph(AgentState)
 
     # Add Nodes
-    workflow.add_node("discovery", discovery_node)
-    workflow.add_node("tester", tester_node)
-    workflow.add_node("debugger", debugger_node)
-    workflow.add_node("fixer", fixer_node)
-    workflow.add_node("git", git_node)
-    workflow.add_node("scoring", scoring_node)
+    workflow.add_node("discovery", _instrument("discovery", discovery_node))
+    workflow.add_node("tester", _instrument("tester", tester_node))
+    if analysis_mode == "fused":
+        workflow.add_node("analyze_fix", _instrument("analyze_fix", analyze_fix_node))
+        analyze_node = "analyze_fix"
+    else:
+        workflow.add_node("debugger", _instrument("debugger", debugger_node))
+        workflow.add_node("fixer", _instrument("fixer", fixer_node))
+        analyze_node = "debugger"
+    workflow.add_node("git", _instrument("git", git_node))
+    workflow.add_node("scoring", _instrument("scoring", scoring_node))
 
     # Add Edges
     workflow.set_entry_point("discovery")
@@ -56,35 +116,88 @@ def create_workflow():
         check_test_status,
         {
             "passed": "scoring",
-            "failed": "debugger",
+            "failed": analyze_node,
             "max_retries": "scoring",  # End if max retries reached
         }
     )
 
-    # Conditional Edge from Debugger (Guardrail: prevent fixing if no bugs found)
+    # Conditional Edge from Debugger / Analyze+Fix (Guardrail: prevent fixing if no bugs found)
     def check_debugger_status(state: AgentState):
-        if state.get('current_step') == "NO_BUGS_FOUND":
+        if state.get('current_step') in ("NO_BUGS_FOUND", BUDGET_EXCEEDED):
             return "stop"
         return "continue"
 
     workflow.add_conditional_edges(
-        "debugger",
+        analyze_node,
         check_debugger_status,
         {
-            "continue": "fixer",
+            "continue": "git" if analysis_mode == "fused" else "fixer",
             "stop": "scoring",
         }
     )
-    workflow.add_edge("fixer", "git")
+    if analysis_mode != "fused":
+        workflow.add_edge("fixer", "git")
     workflow.add_edge("git", "tester")
-    workflow.add_edge("scoring", END)
 
-    # Compile with a safe recursion limit:
-    # Each iteration = 4 nodes (debugger->fixer->git->tester) + 2 (discovery, scoring) = 4*MAX_RETRIES + 2
-    recursion_limit = MAX_RETRIES * 6 + 10
-    return workflow.compile()
+    # Deferred/background publishing pushes once, after the healing loop
+    if publish_mode == "eager":
+        workflow.add_edge("scoring", END)
+    else:
+        workflow.add_node("publish", _instrument("publish", publish_node))
+        workflow.add_edge("scoring", "publish")
+        workflow.add_edge("publish", END)
+
+    # Default recursion limit travels with the compiled graph; get_workflow_config() overrides it per run
+    return workflow.compile(checkpointer=checkpointer).with_config(recursion_limit=recursion_limit_for(MAX_RETRIES))
+
+
+def recursion_limit_for(max_iterations: int) -> int:
+    """
+    Each healing iteration = 4 node steps (debugger -> fixer -> git -> tester; 3 when fused), plus
+    discovery, the first tester pass, scoring and publish, with some headroom.
+    """
+    return 4 * max(1, max_iterations) + 10
+
+
+def get_workflow_config(max_iterations: Optional[int] = None, run_id: Optional[str] = None):
+    """
+    Returns the per-run config with a recursion limit that fits the run's iteration budget.
+    The run_id is the checkpoint thread, so a resumed run picks up its own checkpoints.
+    """
+    config = {"recursion_limit": recursion_limit_for(max_iterations or MAX_RETRIES)}
+    if run_id:
+        config["configurable"] = {"thread_id": run_id}
+    return config
+
+
+# ── Compiled graph cache ─────────────────────────────────────────
+# Compiled graphs hold no per-run state, so one instance per variant is shared by all
+# concurrent runs instead of rebuilding and recompiling the StateGraph for every request.
+_compiled: Dict[Tuple, object] = {}
+_compiled_lock = threading.Lock()
+
+
+def _variant_key(publish_mode: str, analysis_mode: str = "two_step") -> Tuple:
+    if publish_mode not in PUBLISH_MODES:
+        raise ValueError(f"Unknown publish_mode '{publish_mode}'")
+    if analysis_mode not in ANALYSIS_MODES:
+        raise ValueError(f"Unknown analysis_mode '{analysis_mode}'")
+    return (publish_mode, analysis_mode)
+
+
+def get_workflow(publish_mode: str = "eager", analysis_mode: str = "two_step"):
+    key = _variant_key(publish_mode, analysis_mode)
+    graph = _compiled.get(key)
+    if graph is None:
+        with _compiled_lock:
+            graph = _compiled.get(key)
+            if graph is None:
+                from backend.checkpoints import get_checkpointer
+                graph = _compiled[key] = create_workflow(*key, checkpointer=get_checkpointer())
+    return graph
+
 
-def get_workflow_config():
-    """Returns the config dict for ainvoke with a safe recursion limit."""
-    recursion_limit = MAX_RETRIES * 6 + 10
-    return {"recursion_limit": recursion_limit}
+def warm_workflows():
+    """Compiles every variant up front (API / worker startup) so the first run pays nothing."""
+    for publish_mode, analysis_mode in itertools.product(PUBLISH_MODES, ANALYSIS_MODES):
+        get_workflow(publish_mode, analysis_mode)
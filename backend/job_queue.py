@@ -0,0 +1,233 @@
+"""
+Durable job queue shared by the API process and out-of-process workers.
+
+Backed by SQLite in WAL mode so the API (enqueue / status reads) and any number of
+worker processes (claim / heartbeat / complete) can use it concurrently. Workers
+claim jobs with a time-limited lease and extend it with heartbeats; if a worker
+crashes or is redeployed, its lease expires and the job is handed to another
+worker (up to max_attempts). Hosts that share the database file share the queue.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from backend.scheduler import QueueFullError
+from backend.utils.sqlite_utils import connect_sqlite
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOB_QUEUE_DB = os.environ.get("JOB_QUEUE_DB", os.path.join(PROJECT_ROOT, "jobs.db"))
+LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "3"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id               TEXT PRIMARY KEY,
+    team_name        TEXT NOT NULL,
+    payload          TEXT NOT NULL,
+    priority         INTEGER NOT NULL DEFAULT 0,
+    status           TEXT NOT NULL DEFAULT 'queued',   -- queued / running / done / error
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    max_attempts     INTEGER NOT NULL,
+    enqueued_at      REAL NOT NULL,
+    started_at       REAL,
+    finished_at      REAL,
+    worker_id        TEXT,
+    lease_expires_at REAL,
+    heartbeat_at     REAL,
+    progress         TEXT,
+    result           TEXT,
+    error            TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, priority DESC, enqueued_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_team ON jobs (team_name, enqueued_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires_at);
+"""
+
+_JSON_COLUMNS = ("payload", "progress", "result")
+
+
+class JobQueue:
+    def __init__(self, path: str = JOB_QUEUE_DB, max_queued: Optional[int] = None):
+        self.path = path
+        self.max_queued = max_queued
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread: sqlite3 connections must not be shared mid-transaction
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    @staticmethod
+    def _row(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        for col in _JSON_COLUMNS:
+            if job.get(col):
+                job[col] = json.loads(job[col])
+        return job
+
+    # ── API side ─────────────────────────────────────────────────────────
+
+    def enqueue(self, team_name: str, payload: Dict[str, Any], priority: int = 0,
+                job_id: Optional[str] = None, max_attempts: int = MAX_ATTEMPTS) -> Dict[str, Any]:
+        """Adds a job and returns {'id', 'queue_position'}. Raises QueueFullError when saturated."""
+        job_id = job_id or str(uuid.uuid4())
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.max_queued is not None:
+                depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+                if depth >= self.max_queued:
+                    raise QueueFullError(depth, retry_after=LEASE_SECONDS)
+            conn.execute(
+                "INSERT INTO jobs (id, team_name, payload, priority, max_attempts, enqueued_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, team_name, json.dumps(payload), priority, max_attempts, time.time()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return {"id": job_id, "queue_position": self.position(job_id)}
+
+    def requeue(self, job_id: str) -> bool:
+        """Queues a finished or failed job again (POST /runs/{id}/resume); the worker resumes its checkpoint."""
+        cur = self._conn().execute(
+            "UPDATE jobs SET status = 'queued', attempts = 0, enqueued_at = ?, finished_at = NULL, "
+            "worker_id = NULL, lease_expires_at = NULL, result = NULL, error = NULL "
+            "WHERE id = ? AND status IN ('done', 'error')",
+            (time.time(), job_id),
+        )
+        return cur.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._row(self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def latest_for_team(self, team_name: str) -> Optional[Dict[str, Any]]:
+        return self._row(self._conn().execute(
+            "SELECT * FROM jobs WHERE team_name = ? ORDER BY enqueued_at DESC LIMIT 1", (team_name,)
+        ).fetchone())
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position among queued jobs (claim order), or None if not queued."""
+        row = self._conn().execute(
+            "SELECT priority, enqueued_at FROM jobs WHERE id = ? AND status = 'queued'", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        ahead = self._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+            "(priority > ? OR (priority = ? AND enqueued_at < ?))",
+            (row["priority"], row["priority"], row["enqueued_at"]),
+        ).fetchone()[0]
+        return ahead + 1
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        oldest = conn.execute("SELECT MIN(enqueued_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        waits = conn.execute(
+            "SELECT AVG(started_at - enqueued_at) FROM "
+            "(SELECT started_at, enqueued_at FROM jobs WHERE started_at IS NOT NULL "
+            "ORDER BY started_at DESC LIMIT 200)"
+        ).fetchone()[0]
+        workers = conn.execute(
+            "SELECT COUNT(DISTINCT worker_id) FROM jobs WHERE status = 'running' AND lease_expires_at > ?",
+            (time.time(),),
+        ).fetchone()[0]
+        return {
+            "running": counts.get("running", 0),
+            "queued": counts.get("queued", 0),
+            "done": counts.get("done", 0),
+            "error": counts.get("error", 0),
+            "active_workers": workers,
+            "avg_wait_seconds": round(waits or 0.0, 3),
+            "oldest_wait_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+        }
+
+    # ── Worker side ──────────────────────────────────────────────────────
+
+    def claim(self, worker_id: str, lease_seconds: float = LEASE_SECONDS) -> Optional[Dict[str, Any]]:
+        """
+        Atomically takes the next job, first recovering any whose lease has expired.
+        Returns the claimed job or None if the queue is empty.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases: the owning worker died. Retry, or give up after max_attempts.
+            conn.execute(
+                "UPDATE jobs SET status = 'error', finished_at = ?, error = 'Lease expired after max attempts' "
+                "WHERE status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker_id = NULL, lease_expires_at = NULL "
+                "WHERE status = 'running' AND lease_expires_at < ?",
+                (now,),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY priority DESC, enqueued_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_id = ?, attempts = attempts + 1, "
+                "started_at = COALESCE(started_at, ?), heartbeat_at = ?, lease_expires_at = ? WHERE id = ?",
+                (worker_id, now, now, now + lease_seconds, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = LEASE_SECONDS,
+                  progress: Optional[Dict[str, Any]] = None) -> bool:
+        """Extends the lease (and optionally records progress). False means the lease was lost."""
+        now = time.time()
+        params = [now, now + lease_seconds]
+        progress_sql = ""
+        if progress is not None:
+            progress_sql = ", progress = ?"
+            params.append(json.dumps(progress))
+        cur = self._conn().execute(
+            f"UPDATE jobs SET heartbeat_at = ?, lease_expires_at = ?{progress_sql} "
+            "WHERE id = ? AND worker_id = ? AND status = 'running'",
+            (*params, job_id, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        return self._finish(job_id, worker_id, "done", result=json.dumps(result))
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._finish(job_id, worker_id, "error", error=error)
+
+    def release(self, job_id: str, worker_id: str) -> bool:
+        """Hands a claimed job back to the queue (graceful shutdown) without using up an attempt."""
+        cur = self._conn().execute(
+            "UPDATE jobs SET status = 'queued', worker_id = NULL, lease_expires_at = NULL, "
+            "attempts = MAX(attempts - 1, 0) WHERE id = ? AND worker_id = ? AND status = 'running'",
+            (job_id, worker_id),
+        )
+        return cur.rowcount == 1
+
+    def _finish(self, job_id: str, worker_id: str, status: str,
+                result: Optional[str] = None, error: Optional[str] = None) -> bool:
+        cur = self._conn().execute(
+            "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ?, lease_expires_at = NULL "
+            "WHERE id = ? AND worker_id = ? AND status = 'running'",
+            (status, time.time(), result, error, job_id, worker_id),
+        )
+        return cur.rowcount == 1
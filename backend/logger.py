@@ -1,7 +1,40 @@
-import logging
+"""
+Process-wide logging pipeline.
+
+Loggers from get_logger() only enqueue: the calling thread (a graph node, the
+event loop) runs the cheap filters below and hands the record to a bounded
+queue. A single QueueListener thread formats and writes to stdout, so JSON
+encoding and console I/O never sit on a run's critical path. A full queue
+drops the record instead of blocking.
+
+On the calling thread, before enqueueing:
+    run_id   the run of the innermost telemetry span (propagates through nodes and run_sync)
+    sampling LOG_SAMPLE_RATES, e.g. "DEBUG=0.1,INFO=1": the fraction of records kept per level
+    rate     LOG_RATE_LIMIT records per message template per LOG_RATE_WINDOW seconds;
+             the next record let through carries the number suppressed
+
+Use %-style arguments (log.info("Fixer: %s", x)) so dropped records are never formatted.
+"""
+import atexit
 import json
-from datetime import datetime
+import logging
+import os
+import queue
+import random
 import sys
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, Tuple
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "json").lower()  # json | text
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
+LOG_RATE_LIMIT = int(os.environ.get("LOG_RATE_LIMIT", "0"))  # 0 = unlimited
+LOG_RATE_WINDOW = float(os.environ.get("LOG_RATE_WINDOW", "60"))
+
 
 class JsonFormatter(logging.Formatter):
     """
@@ -16,19 +49,166 @@ class JsonFormatter(logging.Formatter):
             "module": record.module,
             "line": record.lineno,
         }
+        if getattr(record, "run_id", None):
+            log_record["run_id"] = record.run_id
+        if getattr(record, "suppressed", 0):
+            log_record["suppressed"] = record.suppressed
         # Add extra fields if passed
         if hasattr(record, "extra_fields"):
             log_record.update(record.extra_fields)
-            
+
         return json.dumps(log_record)
 
+
+class TextFormatter(logging.Formatter):
+    """The plain console lines the nodes used to print, tagged with the run."""
+
+    def format(self, record):
+        line = super().format(record)
+        if getattr(record, "run_id", None):
+            line = f"[{record.run_id[:8]}] {line}"
+        if getattr(record, "suppressed", 0):
+            line += f" ({record.suppressed} similar suppressed)"
+        return line
+
+
+# ── Filters (run on the calling thread) ──────────────────────────
+
+class RunContextFilter(logging.Filter):
+    def filter(self, record):
+        if not hasattr(record, "run_id"):
+            from backend.telemetry import current_run_id
+            record.run_id = current_run_id()
+        return True
+
+
+def parse_sample_rates(spec: str) -> Dict[int, float]:
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        level, _, rate = part.partition("=")
+        rates[logging.getLevelName(level.strip().upper())] = max(0.0, min(1.0, float(rate)))
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records of each configured level (WARNING and above are never sampled)."""
+
+    def __init__(self, rates: Dict[int, float]):
+        super().__init__()
+        self.rates = {level: rate for level, rate in rates.items()
+                      if isinstance(level, int) and level < logging.WARNING}
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        if rate is None or rate >= 1.0 or random.random() < rate:
+            return True
+        _dropped("sampled")
+        return False
+
+
+class RateLimitFilter(logging.Filter):
+    """At most `limit` records per (logger, message template) per `window` seconds."""
+
+    def __init__(self, limit: int, window: float = 60.0):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        self._windows: Dict[Tuple[str, str], list] = {}  # key -> [window start, passed, suppressed]
+
+    def filter(self, record):
+        if self.limit <= 0 or record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                suppressed = entry[2] if entry else 0
+                if len(self._windows) > 10_000:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if entry[1] < self.limit:
+                entry[1] += 1
+                return True
+            entry[2] += 1
+        _dropped("rate_limited")
+        return False
+
+
+def _dropped(reason: str):
+    from backend.telemetry import telemetry
+    telemetry.inc("rift_log_dropped_total", reason=reason)
+
+
+# ── Queue pipeline ───────────────────────────────────────────────
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped("queue_full")
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Writes to whatever sys.stdout is at emit time (so redirect_stdout in benchmarks still quiets it)."""
+
+    def emit(self, record):
+        self.stream = sys.stdout
+        super().emit(record)
+
+
+_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+_lock = threading.Lock()
+
+
+def _formatter() -> logging.Formatter:
+    return TextFormatter("%(message)s") if LOG_FORMAT == "text" else JsonFormatter()
+
+
+def _pipeline() -> QueueHandler:
+    global _handler, _listener
+    with _lock:
+        if _handler is None:
+            output = _StdoutHandler(sys.stdout)
+            output.setFormatter(_formatter())
+            _listener = QueueListener(_queue, output)
+            _listener.start()
+            atexit.register(shutdown)
+            handler = _NonBlockingQueueHandler(_queue)
+            handler.addFilter(RunContextFilter())
+            handler.addFilter(SamplingFilter(parse_sample_rates(LOG_SAMPLE_RATES)))
+            handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT, LOG_RATE_WINDOW))
+            _handler = handler
+    return _handler
+
+
 def get_logger(name: str):
     logger = logging.getLogger(name)
-    
+
     if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setFormatter(JsonFormatter())
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
-        
+        logger.addHandler(_pipeline())
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
+
     return logger
+
+
+def flush_logs():
+    """Blocks until every record enqueued so far has been written."""
+    if _listener is not None:
+        _queue.join()
+
+
+def shutdown():
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()  # drains the queue first
+            _listener = None
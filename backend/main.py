@@ -1,13 +1,15 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import uvicorn
+from pydantic import BaseModel, model_validator
+from typing import List, Literal, Optional
 import asyncio
 from datetime import datetime
 import os
-import json
 import sys
-from dotenv import load_dotenv
+import time
+import uuid
 
 # Ensure we can import from backend package even if running from inside backend folder
 # This adds the parent directory of 'backend' (i.e., the project root) to sys.path
@@ -15,14 +17,61 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
-# Load environment variables — always use backend/.env regardless of CWD
-_env_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
-load_dotenv(dotenv_path=_env_path, override=True)
+# Load environment variables — always use backend/.env regardless of CWD (loaded once, here)
+from backend.nodes import env_loader  # noqa: F401
 
-from backend.graph import create_workflow, get_workflow_config
+# backend.graph (langgraph, node SDKs) is imported lazily so the API binds its port fast
 from backend.state import AgentState
+from backend.scheduler import RunScheduler, ScheduledRun, QueueFullError
+from backend.run_store import get_run_store
+from backend.events import event_bus, publish_event, format_sse
+from backend.telemetry import span, telemetry, PROMETHEUS_CONTENT_TYPE
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the graph variants once, off the event loop; every run reuses them.
+    # A run submitted before warm-up finishes simply waits on the graph cache lock.
+    from backend.graph import warm_workflows
+    warmup = asyncio.create_task(asyncio.to_thread(warm_workflows))
+    if EXECUTION_MODE != "worker":  # workers resume their own re-claimed jobs
+        await _recover_interrupted_runs()
+    from backend.run_cache import dedup_enabled, get_run_cache
+    if dedup_enabled():
+        await asyncio.to_thread(get_run_cache().prune)
+    # Artifacts of finished runs expire (BLOB_TTL, PROFILE_TTL)
+    from backend import profiler
+    from backend.utils.blob_store import get_blob_store
+    await asyncio.to_thread(get_blob_store().prune)
+    await asyncio.to_thread(profiler.prune)
+    yield
+    warmup.cancel()
+
+
+async def _recover_interrupted_runs():
+    """Runs this process was executing when it last stopped; RESUME_INTERRUPTED_RUNS=1 continues them."""
+    from backend.checkpoints import get_checkpointer
+    checkpointer = get_checkpointer()
+    if not checkpointer:
+        return
+    interrupted = await asyncio.to_thread(checkpointer.mark_interrupted)
+    if not interrupted:
+        return
+    if os.environ.get("RESUME_INTERRUPTED_RUNS", "0") != "1":
+        print(f"Recovery: {len(interrupted)} interrupted run(s); POST /runs/{{run_id}}/resume to continue them.")
+        return
+    for record in interrupted:
+        request = HealingRequest(**record["request"])
+        try:
+            scheduler.submit(record["run_id"], request.team_name, request, priority=request.priority, resume=True)
+        except QueueFullError:
+            print(f"Recovery: queue full; run {record['run_id']} left for POST /runs/{{run_id}}/resume.")
+            break
+        _set_status(record["run_id"], request.team_name, status="queued")
+        print(f"Recovery: resuming interrupted run {record['run_id']}.")
+
 
-app = FastAPI(title="RIFT 2026 CI/CD Healing Backend")
+app = FastAPI(title="RIFT 2026 CI/CD Healing Backend", lifespan=lifespan)
 
 # ── CORS ──────────────────────────────────────────────────────────
 app.add_middleware(
@@ -37,11 +86,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Use absolute path for results.json so it's always in the project root
-RESULTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "results.json")
-
 # ── In-memory run status tracker ──────────────────────────────────
-run_status: dict = {}   # keyed by team_name for simplicity
+run_status: dict = {}       # keyed by run_id
+latest_team_run: dict = {}  # team_name -> most recent run_id (for /status/{team_name})
+
+
+def _set_status(run_id: str, team_name: str, **entry):
+    run_status[run_id] = {"run_id": run_id, "team_name": team_name, **entry}
+    latest_team_run[team_name] = run_id
 
 # ── Request Model ─────────────────────────────────────────────────
 class HealingRequest(BaseModel):
@@ -50,6 +102,21 @@ class HealingRequest(BaseModel):
     leader_name: str
     max_iterations: int = 10
     model_name: str = "gemini-2.5-flash"
+    # cascade: cheap tier first, escalate when stuck. Defaults to "fixed" when model_name is given explicitly
+    model_routing: Optional[Literal["cascade", "fixed"]] = None
+    publish_mode: Literal["eager", "deferred", "background"] = "eager"
+    analysis_mode: Literal["two_step", "fused"] = "two_step"  # fused: diagnose + fix in one model call
+    priority: int = 0  # higher runs first when the scheduler queue is contended
+    token_budget: Optional[int] = None  # max LLM tokens for the run (default RUN_TOKEN_BUDGET; 0 = unlimited)
+    profile: bool = False  # store per-node cProfile/stack-sample/tracemalloc artifacts (GET /runs/{id}/profile)
+    use_cache: bool = True  # attach to an identical run at the same upstream commit (backend/run_cache.py)
+
+    @model_validator(mode="after")
+    def _default_routing(self):
+        # A caller that picks a model gets that model for every call, as before routing existed
+        if self.model_routing is None:
+            self.model_routing = "fixed" if "model_name" in self.model_fields_set else "cascade"
+        return self
 
 
 def _sanitize(s: str) -> str:
@@ -61,14 +128,22 @@ def _branch_name(team: str, leader: str) -> str:
     return f"{_sanitize(team)}_{_sanitize(leader)}_AI_Fix"
 
 
-async def run_healing_workflow(request: HealingRequest, run_id: str = None):
+async def run_healing_workflow(request: HealingRequest, run_id: str = None, on_progress=None,
+                               resume: bool = False):
     """
     Executes the LangGraph workflow and saves results.
+    `on_progress(state)` is called after every node (used by out-of-process workers).
+    `resume=True` continues the run from its last checkpoint (backend/checkpoints.py),
+    or starts it from scratch if it has none that can be reused.
+    Returns the final run status entry.
     """
     from backend.utils.supabase_manager import SupabaseManager
     
-    key = request.team_name
-    run_status[key] = {"status": "running", "team_name": request.team_name}
+    run_id = run_id or str(uuid.uuid4())
+    _set_status(run_id, request.team_name, status="running")
+    if resume:
+        event_bus.reopen(run_id)
+    publish_event(run_id, "run_start", team_name=request.team_name, repo_url=request.repo_url)
 
     start_time = datetime.now()
     
@@ -79,7 +154,44 @@ async def run_healing_workflow(request: HealingRequest, run_id: str = None):
     else:
         print("WARNING: No run_id provided to workflow. Logging disabled.")
 
-    workflow_app = create_workflow()
+    from backend.checkpoints import ResumeError, get_checkpointer, resume_point
+    from backend.graph import get_workflow, get_workflow_config
+    from backend.utils.token_usage import BUDGET_EXCEEDED, DEFAULT_RUN_TOKEN_BUDGET, ledger
+    workflow_app = get_workflow(publish_mode=request.publish_mode, analysis_mode=request.analysis_mode)
+    checkpointer = get_checkpointer()
+
+    # Resume: pick up the checkpointed state and skip the nodes that already completed
+    recovery, restored = None, None
+    if resume and checkpointer:
+        restore_started = time.perf_counter()
+        point = None
+        try:
+            with span("run.restore", run_id):
+                point = await resume_point(workflow_app, run_id, checkpointer)
+        except ResumeError as e:
+            print(f"Resume: {e}; starting run {run_id} from scratch.")
+            await asyncio.to_thread(checkpointer.delete_thread, run_id)
+        if point:
+            restored = point["state"]
+            start_time = datetime.fromtimestamp(restored.get('start_time') or start_time.timestamp())
+            recovery = {"resumed_at": point["next"], "completed_steps": point["completed_steps"],
+                        "downtime_s": point["downtime_s"],
+                        "restore_ms": round((time.perf_counter() - restore_started) * 1000, 1)}
+            telemetry.inc("rift_runs_resumed_total")
+            print(f"Resume: run {run_id} continues at {', '.join(point['next'])} after "
+                  f"{point['completed_steps']} checkpointed step(s) (restored in {recovery['restore_ms']} ms).")
+    if checkpointer:
+        if recovery:
+            await asyncio.to_thread(checkpointer.set_run_status, run_id, "running")
+        else:
+            await asyncio.to_thread(checkpointer.register_run, run_id, request.model_dump())
+
+    budget = request.token_budget if request.token_budget is not None else DEFAULT_RUN_TOKEN_BUDGET
+    ledger.open_run(run_id, budget, carried=(restored or {}).get('token_usage'))
+    from backend.utils.cassette import get_cassette
+    cassette = get_cassette()
+    if cassette and cassette.mode == "record" and not recovery:
+        cassette.record("run", {"kind": "request"}, request.model_dump(), run_id=run_id)
 
     # Initialize State
     initial_state = AgentState(
@@ -94,9 +206,12 @@ async def run_healing_workflow(request: HealingRequest, run_id: str = None):
         current_step="START",
         retry_count=0,
         error_logs="",
+        error_logs_ref=None,
+        dependency_hash=None,
         detected_stack="UNKNOWN",
         test_files=[],
         fixes_applied=[],
+        committed_fix_count=0,
         timeline=[],
         final_status="PENDING",
         total_time=0.0,
@@ -108,11 +223,25 @@ async def run_healing_workflow(request: HealingRequest, run_id: str = None):
         max_iterations=request.max_iterations,
         iterations=0,
         run_id=run_id,
-        model_name=request.model_name
+        model_name=request.model_name,
+        model_routing=request.model_routing,
+        model_escalation=0,
+        pending_routes=[],
+        failure_history=[],
+        publish_mode=request.publish_mode,
+        analysis_mode=request.analysis_mode,
+        profile=request.profile
     )
 
     try:
-        final_state = await workflow_app.ainvoke(initial_state, config=get_workflow_config())
+        final_state = restored or initial_state
+        graph_input = None if restored else initial_state  # None: continue from the checkpoint
+        with span("run", run_id, team_name=request.team_name, analysis_mode=request.analysis_mode):
+            async for final_state in workflow_app.astream(graph_input, config=get_workflow_config(request.max_iterations, run_id), stream_mode="values"):
+                if on_progress:
+                    on_progress(final_state)
+        if checkpointer:
+            await asyncio.to_thread(checkpointer.finish_run, run_id)
 
         duration = final_state.get('total_time', 0.0)
         fixes = final_state.get('fixes_applied', [])
@@ -124,13 +253,20 @@ async def run_healing_workflow(request: HealingRequest, run_id: str = None):
         speed_bonus = breakdown.get('speed_bonus', 0)
         efficiency_penalty = breakdown.get('efficiency_penalty', 0)
 
+        token_usage = ledger.snapshot(run_id) or {}
+        final_status = final_state.get('final_status', 'UNKNOWN')
+        if token_usage.get('budget_exceeded') and final_status != "PASSED":
+            final_status = BUDGET_EXCEEDED
+
         # Save Results
         result_entry = {
+            "run_id": run_id,
             "repo_url": final_state['repo_url'],
             "team_name": final_state['team_name'],
             "leader_name": final_state['leader_name'],
-            "branch_name": _branch_name(final_state['team_name'], final_state['leader_name']),
-            "final_status": final_state.get('final_status', 'UNKNOWN'),
+            "branch_name": final_state.get('branch_name') or _branch_name(final_state['team_name'], final_state['leader_name']),
+            "pr_url": final_state.get('pr_url'),
+            "final_status": final_status,
             "total_time": duration,
             "final_score": final_score,
             "base_score": base_score,
@@ -139,9 +275,17 @@ async def run_healing_workflow(request: HealingRequest, run_id: str = None):
             "fixes_applied": fixes,
             "timeline": final_state.get('timeline', []),
             "retry_count": final_state.get('retry_count', 0),
+            "token_usage": token_usage,
+            "peak_rss_mb": final_state.get('peak_rss_mb', 0.0),
             "completed_at": datetime.now().isoformat(),
             "started_at": start_time.isoformat(),
         }
+        if recovery:
+            result_entry["recovery"] = recovery
+        if request.profile:
+            from backend.profiler import load_profile
+            profile = load_profile(run_id)
+            result_entry["profile"] = profile["totals"] if profile else {}
 
         # Update Supabase Final Status
         # Map state statuses to DB-compliant statuses (PASSED, FAILED, ERROR)
@@ -150,9 +294,10 @@ async def run_healing_workflow(request: HealingRequest, run_id: str = None):
             "FAILED": "FAILED",
             "ERROR": "FAILED",
             "DISCOVERY_FAILED": "FAILED",
-            "NO_BUGS_FOUND": "SUCCESS" # If we found no bugs, the CI is effectively clean
+            "NO_BUGS_FOUND": "SUCCESS", # If we found no bugs, the CI is effectively clean
+            BUDGET_EXCEEDED: "FAILED",
         }
-        db_status = status_map.get(final_state.get('final_status'), 'FAILED')
+        db_status = status_map.get(final_status, 'FAILED')
 
         supabase.finalize_run(
             run_id=run_id,
@@ -163,95 +308,533 @@ async def run_healing_workflow(request: HealingRequest, run_id: str = None):
             branch_name=final_state.get('branch_name') or _branch_name(final_state['team_name'], final_state['leader_name'])
         )
 
-        # Load and append
-        existing_results = _load_results()
-        existing_results.append(result_entry)
-        _save_results(existing_results)
-
-        run_status[key] = {"status": "done", "result": result_entry}
-        print(f"Healing run completed for {request.team_name}. Score: {final_state.get('final_score')}")
+        # Single atomic insert — no read-modify-write of the whole history
+        await asyncio.to_thread(get_run_store().append, result_entry)
+        await _release_run_key(run_id, cacheable=final_status != "DISCOVERY_FAILED")
+        # Finished runs are never resumed and each run clones into its own directory
+        if final_state.get('repo_path'):
+            from backend.utils.file_utils import cleanup_directory
+            await asyncio.to_thread(cleanup_directory, final_state['repo_path'])
+
+        _set_status(run_id, request.team_name, status="done", result=result_entry)
+        telemetry.inc("rift_runs_total", final_status=result_entry["final_status"])
+        publish_event(run_id, "run_end", status="done", final_status=result_entry["final_status"],
+                      final_score=final_score, pr_url=result_entry.get("pr_url"))
+        print(f"Healing run completed for {request.team_name}. Score: {final_state.get('final_score')}, "
+              f"LLM tokens: {token_usage.get('total_tokens', 0)} (~${token_usage.get('cost_usd', 0):.4f}), "
+              f"peak RSS: {result_entry['peak_rss_mb']:.0f} MB")
 
     except Exception as e:
         import traceback
         err = traceback.format_exc()
         print(f"Workflow execution failed: {err}")
-        run_status[key] = {"status": "error", "error": str(e)}
+        _set_status(run_id, request.team_name, status="error", error=str(e))
+        if checkpointer:
+            await asyncio.to_thread(checkpointer.set_run_status, run_id, "error")  # resumable
+        await _release_run_key(run_id, cacheable=False)
+        publish_event(run_id, "run_end", status="error", error=str(e))
+        telemetry.inc("rift_runs_total", final_status="ERROR")
 
+    ledger.close_run(run_id)
+    # A failed run never reached publish_node: stop its debounced background push
+    from backend.utils.publisher import discard_background_publishers
+    discard_background_publishers(run_id)
+    if request.profile:
+        from backend.profiler import forget
+        forget(run_id)
+    telemetry.flush()
+    return run_status[run_id]
 
-def _load_results():
-    if os.path.exists(RESULTS_FILE):
-        try:
-            with open(RESULTS_FILE, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            pass
-    return []
+
+# ── Run deduplication ─────────────────────────────────────────────
+
+_starting_runs: set = set()  # run ids that hold a dedup key but are not submitted yet
+
+
+def _run_is_live(run_id: str) -> bool:
+    if run_id in _starting_runs:
+        return True
+    if EXECUTION_MODE == "worker":
+        job = _get_job_queue().get(run_id)
+        return bool(job) and job["status"] in ("queued", "running")
+    return run_status.get(run_id, {}).get("status") in ("queued", "running")
 
 
-def _save_results(data):
-    with open(RESULTS_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+async def _claim_run_key(request: HealingRequest, run_id: str):
+    """
+    Looks the submission up by repo, upstream commit and options (backend/run_cache.py).
+    Returns (outcome, run_id, sha): the existing run for "coalesced" / "cached", else `run_id`,
+    which then holds the key until _release_run_key().
+    """
+    from backend.run_cache import dedup_enabled, get_run_cache, resolve_head, run_key
+    if not request.use_cache or not dedup_enabled():
+        return "off", run_id, None
+    sha = await asyncio.to_thread(resolve_head, request.repo_url)
+    if not sha:
+        telemetry.inc("rift_run_dedup_total", outcome="unresolved")
+        return "unresolved", run_id, None
+    cache = get_run_cache()
+    key = run_key(request.model_dump(), sha)
+    _starting_runs.add(run_id)
+    try:
+        outcome, existing = await asyncio.to_thread(cache.claim, key, run_id, request.repo_url, sha, _run_is_live)
+        if outcome == "cached" and not await asyncio.to_thread(get_run_store().get, existing):
+            # The cached run's result is gone (store reset): run again under the same key
+            await asyncio.to_thread(cache.finish, existing, False)
+            outcome, existing = await asyncio.to_thread(cache.claim, key, run_id, request.repo_url, sha,
+                                                        _run_is_live)
+    except BaseException:
+        await _release_run_key(run_id, cacheable=False)
+        raise
+    if outcome != "miss":
+        _starting_runs.discard(run_id)
+    telemetry.inc("rift_run_dedup_total", outcome=outcome)
+    return outcome, existing, sha
+
+
+async def _release_run_key(run_id: str, cacheable: bool):
+    """A run ended: its result answers identical submissions for RUN_CACHE_TTL, or its key is freed."""
+    _starting_runs.discard(run_id)
+    from backend.run_cache import dedup_enabled, get_run_cache
+    if dedup_enabled():
+        await asyncio.to_thread(get_run_cache().finish, run_id, cacheable)
+
+
+async def _deduplicated_response(request: HealingRequest, outcome: str, run_id: str, sha: str) -> dict:
+    response = {
+        "repo_url": request.repo_url,
+        "team_name": request.team_name,
+        "branch_name": _branch_name(request.team_name, request.leader_name),
+        "run_id": run_id,
+        "dedup": outcome,
+        "commit_sha": sha,
+    }
+    if outcome == "cached":
+        result = await asyncio.to_thread(get_run_store().get, run_id)
+        return {**response, "message": "Result of an identical run at this commit", "status": "done",
+                "queue_position": 0, "pr_url": result.get("pr_url"), "result": result}
+    if run_id in _starting_runs:
+        # The run holds its key but is not submitted yet
+        return {**response, "message": "Attached to an identical run in progress", "status": "queued",
+                "queue_position": 0}
+    entry = await get_run(run_id)
+    return {**response, "message": "Attached to an identical run in progress", "status": entry["status"],
+            "queue_position": entry.get("queue_position", 0)}
 
 
 # ── Endpoints ─────────────────────────────────────────────────────
 
-@app.post("/start-healing")
-async def start_healing(request: HealingRequest, background_tasks: BackgroundTasks):
+async def _run_scheduled(job: ScheduledRun):
+    await run_healing_workflow(job.payload, job.run_id, resume=job.resume)
+
+
+scheduler = RunScheduler(_run_scheduled)
+
+# "inprocess": runs execute inside this API process via the scheduler above.
+# "worker":    runs are enqueued in the durable job queue and executed by `python -m backend.worker`,
+#              so API restarts/redeploys never kill in-flight runs.
+EXECUTION_MODE = os.environ.get("EXECUTION_MODE", "inprocess")
+SSE_KEEPALIVE_SECONDS = 15.0
+_job_queue = None
+
+
+def _get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        from backend.job_queue import JobQueue
+        from backend.scheduler import MAX_QUEUED_RUNS
+        _job_queue = JobQueue(max_queued=MAX_QUEUED_RUNS)
+    return _job_queue
+
+
+def _job_status(job: dict) -> dict:
+    """Maps a durable job row to the same shape as the in-process run_status entries."""
+    entry = {"run_id": job["id"], "team_name": job["team_name"], "status": job["status"]}
+    if job["status"] == "queued":
+        entry["queue_position"] = _get_job_queue().position(job["id"])
+    if job.get("progress"):
+        entry["progress"] = job["progress"]
+    if job.get("result"):
+        entry.update(job["result"])
+    if job.get("error"):
+        entry.setdefault("error", job["error"])
+    return entry
+
+
+async def _admit_run(request: HealingRequest) -> dict:
     """
-    Triggers the autonomous healing process for the given repository.
+    Deduplicates and queues one run; the /start-healing response. Shared with batches.
+    Raises QueueFullError when the scheduler is saturated.
     """
     from backend.utils.supabase_manager import SupabaseManager
-    
-    # Create Supabase Run Synchronously
-    supabase = SupabaseManager()
-    run_id = supabase.create_run(
-        run_name=f"{request.team_name}-{request.leader_name}",
-        target_repo=request.repo_url
-    )
-    
-    background_tasks.add_task(run_healing_workflow, request, run_id)
+
+    # Identical submissions at the same upstream commit share one run
+    outcome, run_id, sha = await _claim_run_key(request, str(uuid.uuid4()))
+    if outcome in ("coalesced", "cached"):
+        return await _deduplicated_response(request, outcome, run_id, sha)
+
+    try:
+        # Non-blocking: the run id is generated client-side and the insert is queued
+        supabase = SupabaseManager()
+        run_id = supabase.create_run(
+            run_name=f"{request.team_name}-{request.leader_name}",
+            target_repo=request.repo_url,
+            run_id=run_id,
+        ) or run_id
+
+        if EXECUTION_MODE == "worker":
+            job = _get_job_queue().enqueue(
+                request.team_name, request.model_dump(), priority=request.priority, job_id=run_id
+            )
+            position = job["queue_position"] or 0
+        else:
+            position = scheduler.submit(run_id, request.team_name, request, priority=request.priority)
+
+        if EXECUTION_MODE == "worker":
+            status = "queued"
+        else:
+            status = "queued" if position else "running"
+            _set_status(run_id, request.team_name, status=status, queue_position=position)
+            publish_event(run_id, "run_queued", queue_position=position)
+    except BaseException:
+        # Not submitted (queue full, failure or cancelled request): a resubmission runs again
+        await _release_run_key(run_id, cacheable=False)
+        raise
+    _starting_runs.discard(run_id)
     
     return {
-        "message": "Healing process started in background",
+        "message": "Healing process queued" if position else "Healing process started in background",
         "repo_url": request.repo_url,
         "team_name": request.team_name,
         "branch_name": _branch_name(request.team_name, request.leader_name),
-        "status": "running",
-        "run_id": run_id
+        "status": status,
+        "queue_position": position,
+        "run_id": run_id,
+        "commit_sha": sha,
     }
 
 
+@app.post("/start-healing")
+async def start_healing(request: HealingRequest):
+    """
+    Queues the autonomous healing process for the given repository.
+    Returns 429 with the would-be queue position when the scheduler is saturated.
+    """
+    try:
+        return await _admit_run(request)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "message": str(e),
+                "queue_position": e.queue_position,
+                "queue_depth": e.queue_depth,
+                "retry_after_seconds": e.retry_after,
+            },
+            headers={"Retry-After": str(int(e.retry_after) + 1)},
+        )
+
+
+# ── Batches ───────────────────────────────────────────────────────
+
+class BatchRequest(BaseModel):
+    runs: List[HealingRequest]
+    concurrency: Optional[int] = None  # runs of this batch in flight at once (default BATCH_CONCURRENCY)
+
+
+batches: dict = {}  # keyed by batch_id
+_background_tasks: set = set()  # keeps running batch tasks referenced
+BATCH_POLL_SECONDS = float(os.environ.get("BATCH_POLL_SECONDS", "1.0"))
+
+
+async def _wait_for_run(run_id: str) -> dict:
+    """Final status entry of a run (in-process or on a worker)."""
+    while True:
+        try:
+            entry = await get_run(run_id)
+        except HTTPException:
+            entry = {"status": "queued"}  # not visible yet
+        if entry.get("status") in ("done", "error"):
+            return entry
+        await asyncio.sleep(BATCH_POLL_SECONDS)
+
+
+@app.post("/start-healing/batch")
+async def start_healing_batch(body: BatchRequest):
+    """
+    Heals many repositories: groups them by stack and dependency hash so each group shares
+    a warm package cache, and runs them `concurrency` at a time (backend/batch.py).
+    Follow progress on GET /batches/{batch_id} and per-repo results on its /events stream.
+    """
+    from backend.batch import BATCH_MAX_RUNS, Batch
+    if not body.runs:
+        raise HTTPException(status_code=422, detail="A batch needs at least one run")
+    if len(body.runs) > BATCH_MAX_RUNS:
+        raise HTTPException(status_code=413, detail=f"A batch holds at most {BATCH_MAX_RUNS} runs")
+    batch = Batch(body.runs, concurrency=body.concurrency)
+    batches[batch.batch_id] = batch
+    task = asyncio.create_task(batch.run(_admit_run, _wait_for_run))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return {"batch_id": batch.batch_id, "status": batch.status, "total": len(batch.entries),
+            "concurrency": batch.concurrency}
+
+
+@app.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    """Aggregate progress of a batch plus each repo's run id, group and outcome."""
+    batch = batches.get(batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch.summary()
+
+
+@app.get("/batches/{batch_id}/events")
+async def stream_batch_events(batch_id: str, request: Request):
+    """Server-Sent Events: one batch_run_end per finished repo, then batch_end."""
+    if batch_id not in batches:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return _sse_response(batch_id, request)
+
+
+@app.post("/runs/{run_id}/resume")
+async def resume_run(run_id: str):
+    """
+    Continues an interrupted or failed run from its last completed node, reusing its
+    workspace. 409 if the run is still going, already finished, or its workspace is gone.
+    """
+    from backend.checkpoints import ResumeError, get_checkpointer, resume_point
+    from backend.graph import get_workflow
+    checkpointer = get_checkpointer()
+    record = await asyncio.to_thread(checkpointer.run_record, run_id) if checkpointer else None
+    if not record:
+        raise HTTPException(status_code=404, detail="No checkpointed run with this id")
+    live = run_status.get(run_id, {}).get("status")
+    if live in ("queued", "running") or (record["status"] == "running" and EXECUTION_MODE != "worker"):
+        raise HTTPException(status_code=409, detail="Run is still in progress")
+    if record["status"] == "done":
+        raise HTTPException(status_code=409, detail="Run already finished")
+
+    request = HealingRequest(**record["request"])
+    graph = get_workflow(publish_mode=request.publish_mode, analysis_mode=request.analysis_mode)
+    try:
+        point = await resume_point(graph, run_id, checkpointer)
+    except ResumeError as e:
+        raise HTTPException(status_code=409, detail=f"Cannot resume: {e}")
+    if point is None:
+        raise HTTPException(status_code=409, detail="Cannot resume: the run has no checkpoint yet")
+
+    if EXECUTION_MODE == "worker":
+        if not await asyncio.to_thread(_get_job_queue().requeue, run_id):
+            raise HTTPException(status_code=409, detail="Run is still in progress")
+        position = 1
+    else:
+        try:
+            position = scheduler.submit(run_id, request.team_name, request, priority=request.priority, resume=True)
+        except QueueFullError as e:
+            raise HTTPException(status_code=429, detail={"message": str(e), "queue_position": e.queue_position},
+                                headers={"Retry-After": str(int(e.retry_after) + 1)})
+        _set_status(run_id, request.team_name, status="queued" if position else "running", queue_position=position)
+    return {"run_id": run_id, "status": "queued" if position else "running", "queue_position": position,
+            "resumes_at": point["next"], "completed_steps": point["completed_steps"],
+            "downtime_s": point["downtime_s"]}
+
+
 @app.get("/status/{team_name}")
 async def get_status(team_name: str):
     """
-    Returns the status of a healing run for a given team.
+    Returns the status of the most recent healing run for a given team.
     """
-    entry = run_status.get(team_name)
-    if not entry:
-        # Fall back to checking results file for completed past runs
-        existing = _load_results()
-        for r in reversed(existing):
-            if r.get("team_name") == team_name:
-                return {"status": "done", "result": r}
+    if EXECUTION_MODE == "worker":
+        job = _get_job_queue().latest_for_team(team_name)
+        if job:
+            return _job_status(job)
+
+    run_id = latest_team_run.get(team_name)
+    if not run_id:
+        # Fall back to the run store for completed past runs (indexed lookup)
+        result = get_run_store().latest_for_team(team_name)
+        if result:
+            return {"status": "done", "result": result}
         return {"status": "not_found"}
+    return await get_run(run_id)
+
+
+@app.get("/runs/{run_id}")
+async def get_run(run_id: str):
+    """
+    Returns the status of a single healing run, including its live queue position.
+    """
+    entry = run_status.get(run_id)
+    if not entry and EXECUTION_MODE == "worker":
+        job = _get_job_queue().get(run_id)
+        if job:
+            return _job_status(job)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Run not found")
+    if entry.get("status") == "queued":
+        position = scheduler.position(run_id)
+        if position is None:
+            entry = {**entry, "status": "running", "queue_position": 0}
+        else:
+            entry = {**entry, "queue_position": position}
     return entry
 
 
+@app.get("/runs/{run_id}/events")
+async def stream_run_events(run_id: str, request: Request):
+    """
+    Server-Sent Events stream of live node progress for one run.
+    Late subscribers first get the buffered history; reconnects resume after Last-Event-ID.
+    """
+    known = event_bus.has_run(run_id) or run_id in run_status
+    if not known and EXECUTION_MODE == "worker" and _get_job_queue().get(run_id):
+        return StreamingResponse(_job_progress_stream(run_id), media_type="text/event-stream")
+    if not known:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    return _sse_response(run_id, request)
+
+
+def _sse_response(channel: str, request: Request) -> StreamingResponse:
+    """Streams an event bus channel (a run or a batch); reconnects resume after Last-Event-ID."""
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", "0"))
+    except ValueError:
+        last_event_id = 0
+
+    async def stream():
+        events = event_bus.subscribe(channel, last_event_id=last_event_id).__aiter__()
+        while True:
+            try:
+                event = await asyncio.wait_for(events.__anext__(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            except StopAsyncIteration:
+                return
+            yield format_sse(event)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def _job_progress_stream(run_id: str):
+    """Worker mode: runs execute in another process, so relay the job row's progress instead."""
+    seq, last = 0, None
+    while True:
+        job = await asyncio.to_thread(_get_job_queue().get, run_id)
+        snapshot = {"status": job["status"], "progress": job.get("progress")}
+        if snapshot != last:
+            seq += 1
+            last = snapshot
+            event_type = "run_end" if job["status"] in ("done", "error") else "progress"
+            yield format_sse({"id": seq, "run_id": run_id, "type": event_type, "data": snapshot})
+            if event_type == "run_end":
+                return
+        await asyncio.sleep(1.0)
+
+
+@app.get("/queue")
+async def get_queue():
+    """
+    Scheduler health: running/queued counts, wait times and per-team queue depth.
+    """
+    if EXECUTION_MODE == "worker":
+        return _get_job_queue().stats()
+    return scheduler.stats()
+
+
+@app.get("/routing")
+async def get_routing():
+    """
+    Model routing table: per node / bug class / tier call counts, success rate, latency and cost.
+    """
+    from backend.utils.model_router import get_routing_table, get_tiers
+    return {"tiers": dict(get_tiers()), "routes": await asyncio.to_thread(get_routing_table().summary)}
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus text exposition: per-stage span duration histograms, run and token counters.
+    """
+    return Response(telemetry.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/runs/{run_id}/profile")
+async def get_run_profile(run_id: str):
+    """
+    Per-node profile of a run started with profile=true: wall/CPU time, allocation
+    peak, top functions and the names of its .pstats / .collapsed artifacts.
+    """
+    from backend.profiler import load_profile
+    profile = await asyncio.to_thread(load_profile, run_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="No profile for this run")
+    return profile
+
+
+@app.get("/runs/{run_id}/profile/{name}")
+async def get_run_profile_artifact(run_id: str, name: str):
+    """
+    Downloads one artifact: `.pstats` for pstats/snakeviz, `.collapsed` for flamegraph tools.
+    """
+    from fastapi.responses import FileResponse
+    from backend.profiler import artifact_path
+    path = await asyncio.to_thread(artifact_path, run_id, name)
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile artifact not found")
+    media_type = "text/plain; charset=utf-8" if name.endswith(".collapsed") else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
+@app.get("/runs/{run_id}/blobs/{ref}")
+async def get_run_blob(run_id: str, ref: str):
+    """
+    Full artifact behind a blob reference in a run's state or timeline (e.g. the untruncated test output).
+    """
+    from fastapi.responses import FileResponse
+    from backend.utils.blob_store import get_blob_store
+    path = await asyncio.to_thread(get_blob_store().path, run_id, ref)
+    if not path:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8")
+
+
 @app.get("/results")
-async def get_results():
+async def get_results(team_name: Optional[str] = None, final_status: Optional[str] = None,
+                      since: Optional[str] = None, until: Optional[str] = None,
+                      cursor: Optional[str] = None, limit: int = 50):
     """
-    Returns the history of all healing runs.
+    Returns a newest-first page of healing run history.
+    Filter by team_name / final_status / completed_at range; follow `next_cursor` for older runs.
     """
     try:
-        return _load_results()
+        return get_run_store().query(team_name=team_name, final_status=final_status,
+                                     since=since, until=until, cursor=cursor, limit=limit)
     except Exception as e:
         return {"error": str(e)}
 
 
+@app.get("/results/{run_id}")
+async def get_result(run_id: str):
+    """
+    Returns the stored result of a single completed run.
+    """
+    result = get_run_store().get(run_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return result
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
 
 if __name__ == "__main__":
-    uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
+    import uvicorn
+    # Auto-reload is for local development only; it doubles start-up cost under systemd.
+    uvicorn.run("backend.main:app", host="0.0.0.0", port=8000,
+                reload=os.environ.get("UVICORN_RELOAD", "0") == "1")
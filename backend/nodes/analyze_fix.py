@@ -0,0 +1,99 @@
+"""
+Fused Analyze+Fix node (analysis_mode="fused").
+
+One streamed call returns the diagnosis and the patched file together, instead of a
+Debugger call followed by a Fixer call. The model's answer is still held to the
+deterministic parts of the two-step path: the debugger's anchors (expected
+exceptions, traceback file, line fallback), the fixer's hallucination block and
+path resolution, and the exception guard, which here regenerates a fix that never
+raises the exceptions the failing tests expect.
+"""
+import os
+from typing import Optional
+from backend.nodes import env_loader  # noqa: F401 — loads backend/.env
+from backend.nodes.debugger import build_debug_context, build_debug_prompt, finish_analysis
+from backend.nodes.fixer import (
+    _discard, _prevalidate, _stream_fix, apply_fix, missing_exceptions, resolve_fix_target,
+)
+from backend.logger import get_logger
+from backend.state import AgentState
+from backend.utils.model_router import choose_model
+
+logger = get_logger("analyze_fix_node")
+
+FUSED_OUTPUT_SPEC = """Then FIX the bug in the same response: rewrite the whole file you identified.
+    Output strictly as JSON (no markdown), with the fields in exactly this order:
+    {
+        "file": "src/module.py",
+        "line": 10,
+        "bug_type": "LOGIC",
+        "description": "add() subtracts instead of adding",
+        "fix_action": "<short fix description>",
+        "fixed_code": "<the full fixed content of that file, without the line-number prefixes>"
+    }
+    DO NOT modify lines outside the error context. Escaping all double quotes inside the 'fixed_code' string is mandatory."""
+
+# Written before the target file is known; WORKSPACE_EXCLUDES keeps *.rift-tmp out of commits
+FUSED_TMP_NAME = ".analyze-fix.rift-tmp"
+
+
+def analyze_fix_node(state: AgentState) -> AgentState:
+    """
+    Diagnoses the failure and applies its fix with a single model call.
+    """
+    from backend.utils.supabase_manager import SupabaseManager
+
+    logger.info("Analyze+Fix Node Started...")
+
+    error_logs = state.get('error_logs', '')
+    if not error_logs or len(error_logs.strip()) < 10:
+        logger.info("GUARDRAIL: No error logs to analyze. Assuming NO_BUGS_FOUND.")
+        state['current_step'] = "NO_BUGS_FOUND"
+        return state
+
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if not api_key:
+        logger.error("CRITICAL: GOOGLE_API_KEY not found in environment variables.")
+        return state
+
+    tmp_path = os.path.join(state['repo_path'], FUSED_TMP_NAME)
+    try:
+        ctx = build_debug_context(state)
+        prompt = build_debug_prompt(ctx, FUSED_OUTPUT_SPEC)
+
+        def validate(path: str, code: str) -> Optional[str]:
+            problem = _prevalidate(path, code)
+            missing = missing_exceptions(code, {"expected_exceptions": ctx["expected_exceptions"]})
+            if not problem and missing:
+                problem = f"exception guard: fix never raises {', '.join(missing)}"
+            return problem
+
+        route = choose_model(state, "analyze_fix", (state.get('current_analysis') or {}).get('bug_type'))
+        logger.info("Analyze+Fix: Routing to %s tier (%s)", route.tier, route.model)
+        fields = _stream_fix(prompt, state, api_key, None, tmp_path, route,
+                             node="analyze_fix", label="Analyze+Fix", validate=validate)
+    except Exception as e:
+        logger.warning("Analyze+Fix: API Error: %s", e)
+        _discard(tmp_path)
+        return state
+    if fields is None:
+        _discard(tmp_path)
+        return state
+
+    fix_action = fields.pop("fix_action", "") or ""
+    fields.pop("fixed_code", None)
+    analysis = finish_analysis(fields, ctx)
+    state['current_analysis'] = analysis
+    state['current_step'] = "DEBUG_COMPLETE"
+    logger.info("Analyze+Fix Analysis: %s", analysis)
+
+    target = resolve_fix_target(state, analysis)
+    if target is None:
+        _discard(tmp_path)
+        return state
+    file_relative_path, file_full_path = target
+
+    fix_action = fix_action or f'fix the {analysis.get("bug_type", "error").lower()} error'
+    apply_fix(state, analysis, file_relative_path, file_full_path, tmp_path, fix_action,
+              SupabaseManager(), node="Analyze+Fix")
+    return state
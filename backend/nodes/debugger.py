@@ -1,9 +1,13 @@
-from google import genai
 import os
 import json
 import re
+import time
+from typing import Any, Dict
 from backend.nodes import env_loader  # noqa: F401 — loads backend/.env
 from backend.state import AgentState
+from backend.utils.llm_gateway import llm_generate_hedged
+from backend.utils.token_usage import BUDGET_EXCEEDED, TokenBudgetExceeded
+from backend.utils.model_router import choose_model, note_attempt
 
 
 def _extract_flake8_errors(logs: str) -> str:
@@ -68,12 +72,12 @@ from backend.logger import get_logger
 logger = get_logger("debugger_node")
 
 
-def debugger_node(state: AgentState) -> AgentState:
+def build_debug_context(state: AgentState) -> Dict[str, Any]:
     """
-    Analyzes error logs to categorize bugs and identify locations.
+    Scans the workspace and the failure logs for everything the analysis prompt needs:
+    numbered source files, the anchored file, expected exceptions and prior attempts.
+    Shared by the Debugger and the fused Analyze+Fix node.
     """
-    print("Debugger Node Started...")
-    
     # ── VARIABLE SAFETY: Initialize local vars to prevent UnboundLocalError ──
     import_source_file = None
     import_source_files = []
@@ -83,195 +87,203 @@ def debugger_node(state: AgentState) -> AgentState:
     target_func_name = None
     expected_exception = None
     source_files_context = ""
-    
-    try:
-        error_logs = state['error_logs']
-
-        if not error_logs or len(error_logs.strip()) < 10:
-            print("GUARDRAIL: No error logs to analyze. Assuming NO_BUGS_FOUND.")
-            state['current_step'] = "NO_BUGS_FOUND"
-            return state
-
-        api_key = os.environ.get("GOOGLE_API_KEY")
-        if not api_key:
-            print("CRITICAL: GOOGLE_API_KEY not found in environment variables.")
-            return state
-
-        client = genai.Client(api_key=api_key)
-
-        # Build source file context (exclude test files)
-        repo_path = state.get('repo_path', '')
-        source_files = {}
-        if repo_path and os.path.exists(repo_path):
-            for root, dirs, files in os.walk(repo_path):
-                dirs[:] = [d for d in dirs if d not in ['__pycache__', '.git', 'node_modules', 'venv', '.pytest_cache']]
-                for f in files:
-                    rel = os.path.relpath(os.path.join(root, f), repo_path).replace('\\', '/')
-                    if f in ['requirements.txt', 'package.json']:
-                        try:
-                            with open(os.path.join(root, f), 'r', encoding='utf-8', errors='replace') as rf:
-                                numbered = "\n".join(f"{i+1}: {l}" for i, l in enumerate(rf.read().splitlines()))
-                                source_files[rel] = numbered
-                        except Exception:
-                            pass
-                    elif f.endswith(('.py', '.js', '.ts')) and not f.startswith('test_') and not f.endswith('_test.py'):
-                        try:
-                            with open(os.path.join(root, f), 'r', encoding='utf-8', errors='replace') as rf:
-                                numbered = "".join(f"{i+1}: {l}" for i, l in enumerate(rf.readlines()))
-                                source_files[rel] = numbered
-                        except Exception:
-                            pass
-
-        # ── STUCK DETECTION: Dynamic Anchor Re-Evaluation ──────────────────────────
-        failure_history = state.get('failure_history', [])
-        is_stuck = False
-        if len(failure_history) >= 2:
-            if failure_history[-1] >= failure_history[-2] and failure_history[-1] > 0:
-                is_stuck = True
-                print(f"Debugger: STUCK DETECTED! Failure count {failure_history[-1]} is same/worse than previous. Disabling Anchors.")
-
-        # ── TRACEBACK ANCHOR: Context Lockdown ─────────────────────────────────────
-        if not is_stuck:
-            matches = re.findall(r'(src/[a-zA-Z0-9_/.-]+\.py)', error_logs)
-            if not matches:
-                matches = re.findall(r'(backend/[a-zA-Z0-9_/.-]+\.py)', error_logs)
-            
-            if matches:
-                traceback_file = matches[-1]
-                print(f"Debugger: Traceback Anchor locked onto -> {traceback_file}")
-
-        # ── FUNCTION MAP ANCHOR: Smart Context Switching ───────────────────────────
-        if not is_stuck:
-            failed_test_match = re.search(r'(tests/[a-zA-Z0-9_/.-]+\.py)::(test_[a-zA-Z0-9_]+)', error_logs)
-            test_file_content = ""
-            
-            if failed_test_match:
-                test_file_path = failed_test_match.group(1)
-                test_func_name = failed_test_match.group(2)
-                target_func_name = test_func_name.replace("test_", "")
-                print(f"Debugger: Detected failed test '{test_func_name}' in '{test_file_path}'.")
-
-                # ── STRATEGY 1: Exception Matcher (Read Test File) ──
-                try:
-                    full_test_path = os.path.join(repo_path, test_file_path)
-                    if os.path.exists(full_test_path):
-                        with open(full_test_path, 'r', encoding='utf-8', errors='replace') as f:
-                            test_file_content = f.read()
-                        
-                        file_expected_list = _extract_expected_exceptions(test_file_content)
-                        if file_expected_list:
-                             print(f"Debugger: Found expected exceptions '{file_expected_list}' in test file source.")
-                             expected_exception = file_expected_list[0]
-                except Exception as e:
-                    print(f"Debugger: Failed to read test file {test_file_path}: {e}")
-
-                # ── STRATEGY 2: Dependency Graph (Import Parsing) ──
-                if test_file_content:
-                    imported_modules = re.findall(r'from src\.([a-zA-Z0-9_]+)', test_file_content)
-                    imported_modules += re.findall(r'import src\.([a-zA-Z0-9_]+)', test_file_content)
+    error_logs = state.get('error_logs', '')
+
+    # Build source file context (exclude test files)
+    repo_path = state.get('repo_path', '')
+    source_files = {}
+    if repo_path and os.path.exists(repo_path):
+        for root, dirs, files in os.walk(repo_path):
+            dirs[:] = [d for d in dirs if d not in ['__pycache__', '.git', 'node_modules', 'venv', '.pytest_cache']]
+            for f in files:
+                rel = os.path.relpath(os.path.join(root, f), repo_path).replace('\\', '/')
+                if f in ['requirements.txt', 'package.json']:
+                    try:
+                        with open(os.path.join(root, f), 'r', encoding='utf-8', errors='replace') as rf:
+                            numbered = "\n".join(f"{i+1}: {l}" for i, l in enumerate(rf.read().splitlines()))
+                            source_files[rel] = numbered
+                    except Exception:
+                        pass
+                elif f.endswith(('.py', '.js', '.ts')) and not f.startswith('test_') and not f.endswith('_test.py'):
+                    try:
+                        with open(os.path.join(root, f), 'r', encoding='utf-8', errors='replace') as rf:
+                            numbered = "".join(f"{i+1}: {l}" for i, l in enumerate(rf.readlines()))
+                            source_files[rel] = numbered
+                    except Exception:
+                        pass
+
+    # ── STUCK DETECTION: Dynamic Anchor Re-Evaluation ──────────────────────────
+    failure_history = state.get('failure_history', [])
+    is_stuck = False
+    if len(failure_history) >= 2:
+        if failure_history[-1] >= failure_history[-2] and failure_history[-1] > 0:
+            is_stuck = True
+            logger.warning("Debugger: STUCK DETECTED! Failure count %s is same/worse than previous. Disabling Anchors.", failure_history[-1])
+
+    # ── TRACEBACK ANCHOR: Context Lockdown ─────────────────────────────────────
+    if not is_stuck:
+        matches = re.findall(r'(src/[a-zA-Z0-9_/.-]+\.py)', error_logs)
+        if not matches:
+            matches = re.findall(r'(backend/[a-zA-Z0-9_/.-]+\.py)', error_logs)
+        
+        if matches:
+            traceback_file = matches[-1]
+            logger.info("Debugger: Traceback Anchor locked onto -> %s", traceback_file)
+
+    # ── FUNCTION MAP ANCHOR: Smart Context Switching ───────────────────────────
+    if not is_stuck:
+        failed_test_match = re.search(r'(tests/[a-zA-Z0-9_/.-]+\.py)::(test_[a-zA-Z0-9_]+)', error_logs)
+        test_file_content = ""
+        
+        if failed_test_match:
+            test_file_path = failed_test_match.group(1)
+            test_func_name = failed_test_match.group(2)
+            target_func_name = test_func_name.replace("test_", "")
+            logger.info("Debugger: Detected failed test '%s' in '%s'.", test_func_name, test_file_path)
+
+            # ── STRATEGY 1: Exception Matcher (Read Test File) ──
+            try:
+                full_test_path = os.path.join(repo_path, test_file_path)
+                if os.path.exists(full_test_path):
+                    with open(full_test_path, 'r', encoding='utf-8', errors='replace') as f:
+                        test_file_content = f.read()
                     
-                    if imported_modules:
-                        print(f"Debugger: Dependency Graph - Test imports from src: {imported_modules}")
-                        for mod in set(imported_modules):
-                            for fname in source_files.keys():
-                                if f"{mod}.py" in fname:
-                                    import_source_file = fname
-                                    import_source_files.append(fname)
-                                    break
-                        if import_source_files:
-                            print(f"Debugger: Identified related source files: {import_source_files}")
-
-                # ── STRATEGY 3: Function Anchor ──
-                print(f"Debugger: Searching for definition of '{target_func_name}'...")
-                def_pattern = re.compile(rf'(async\s+)?(def|class)\s+{re.escape(target_func_name)}\b')
-                for name, content in source_files.items():
-                    if def_pattern.search(content):
-                        function_match_file = name
-                        print(f"Debugger: Function Anchor FOUND. '{target_func_name}' is defined in '{name}'.")
-                        break
+                    file_expected_list = _extract_expected_exceptions(test_file_content)
+                    if file_expected_list:
+                         logger.info("Debugger: Found expected exceptions '%s' in test file source.", file_expected_list)
+                         expected_exception = file_expected_list[0]
+            except Exception as e:
+                logger.warning("Debugger: Failed to read test file %s: %s", test_file_path, e)
+
+            # ── STRATEGY 2: Dependency Graph (Import Parsing) ──
+            if test_file_content:
+                imported_modules = re.findall(r'from src\.([a-zA-Z0-9_]+)', test_file_content)
+                imported_modules += re.findall(r'import src\.([a-zA-Z0-9_]+)', test_file_content)
                 
-                # ── HEURISTIC PRIORITY & CONFLICT RESOLUTION ──────────────────────────
-                if import_source_file:
-                     if function_match_file and function_match_file != import_source_file:
-                          print(f"Debugger: Dependency Conflict! Prioritizing Import Source '{import_source_file}' over Function Match.")
-                          function_match_file = import_source_file
-        
-        else:
-             # Fallback if regex fails (e.g. "___ test_foo ___" format)
-             match_fallback = re.search(r'test_([a-zA-Z0-9_]+)', error_logs)
-             if match_fallback:
-                  target_func_name = match_fallback.group(1)
-                  def_pattern = re.compile(rf'(async\s+)?(def|class)\s+{re.escape(target_func_name)}\b')
-                  for name, content in source_files.items():
-                      if def_pattern.search(content):
-                          function_match_file = name
-                          break
-    
-        # ── ANCHOR RESOLUTION ──────────────────────────────────────────────────
-        final_anchor_file = None
-
-        if not is_stuck:
-            if import_source_file:
-                final_anchor_file = import_source_file
-                if traceback_file and traceback_file != import_source_file:
-                    print(f"Debugger: Anchor Conflict! Traceback says '{traceback_file}' but Import Source says '{import_source_file}'.")
-                    print(f"Debugger: RESOLUTION -> Anchor = Import Source '{import_source_file}'.")
-            else:
-                final_anchor_file = function_match_file if function_match_file else traceback_file
-        else:
-            print("Debugger: STUCK MODE ACTIVE. Fallback to Full Context Scanner.")
-
-        # Filter source_files context
-        source_files_context = ""
-        if final_anchor_file:
-            target_key = final_anchor_file.replace('\\', '/')
-            found_content = None
+                if imported_modules:
+                    logger.debug("Debugger: Dependency Graph - Test imports from src: %s", imported_modules)
+                    for mod in set(imported_modules):
+                        for fname in source_files.keys():
+                            if f"{mod}.py" in fname:
+                                import_source_file = fname
+                                import_source_files.append(fname)
+                                break
+                    if import_source_files:
+                        logger.debug("Debugger: Identified related source files: %s", import_source_files)
+
+            # ── STRATEGY 3: Function Anchor ──
+            logger.debug("Debugger: Searching for definition of '%s'...", target_func_name)
+            def_pattern = re.compile(rf'(async\s+)?(def|class)\s+{re.escape(target_func_name)}\b')
             for name, content in source_files.items():
-                if name.endswith(target_key) or target_key.endswith(name):
-                    found_content = content
-                    source_files_context = f"\n--- FILE: {name} (LOCKED CONTEXT) ---\n{content}\n"
-                    traceback_file = name 
+                if def_pattern.search(content):
+                    function_match_file = name
+                    logger.info("Debugger: Function Anchor FOUND. '%s' is defined in '%s'.", target_func_name, name)
                     break
             
-            if not found_content:
-                print(f"Debugger: WARNING - Anchor file {final_anchor_file} not found in scanned source_files.")
-                for name, content in source_files.items():
-                    source_files_context += f"\n--- FILE: {name} ---\n{content}\n"
+            # ── HEURISTIC PRIORITY & CONFLICT RESOLUTION ──────────────────────────
+            if import_source_file:
+                 if function_match_file and function_match_file != import_source_file:
+                      logger.info("Debugger: Dependency Conflict! Prioritizing Import Source '%s' over Function Match.", import_source_file)
+                      function_match_file = import_source_file
+    
+    else:
+         # Fallback if regex fails (e.g. "___ test_foo ___" format)
+         match_fallback = re.search(r'test_([a-zA-Z0-9_]+)', error_logs)
+         if match_fallback:
+              target_func_name = match_fallback.group(1)
+              def_pattern = re.compile(rf'(async\s+)?(def|class)\s+{re.escape(target_func_name)}\b')
+              for name, content in source_files.items():
+                  if def_pattern.search(content):
+                      function_match_file = name
+                      break
+
+    # ── ANCHOR RESOLUTION ──────────────────────────────────────────────────
+    final_anchor_file = None
+
+    if not is_stuck:
+        if import_source_file:
+            final_anchor_file = import_source_file
+            if traceback_file and traceback_file != import_source_file:
+                logger.info("Debugger: Anchor Conflict! Traceback says '%s' but Import Source says '%s'.", traceback_file, import_source_file)
+                logger.info("Debugger: RESOLUTION -> Anchor = Import Source '%s'.", import_source_file)
         else:
+            final_anchor_file = function_match_file if function_match_file else traceback_file
+    else:
+        logger.warning("Debugger: STUCK MODE ACTIVE. Fallback to Full Context Scanner.")
+
+    # Filter source_files context
+    source_files_context = ""
+    if final_anchor_file:
+        target_key = final_anchor_file.replace('\\', '/')
+        found_content = None
+        for name, content in source_files.items():
+            if name.endswith(target_key) or target_key.endswith(name):
+                found_content = content
+                source_files_context = f"\n--- FILE: {name} (LOCKED CONTEXT) ---\n{content}\n"
+                traceback_file = name 
+                break
+        
+        if not found_content:
+            logger.warning("Debugger: WARNING - Anchor file %s not found in scanned source_files.", final_anchor_file)
             for name, content in source_files.items():
                 source_files_context += f"\n--- FILE: {name} ---\n{content}\n"
+    else:
+        for name, content in source_files.items():
+            source_files_context += f"\n--- FILE: {name} ---\n{content}\n"
+
+    # ── Key extractions ────────────────────────────────────────────────────────
+    failures_section = _extract_failures_section(error_logs)
+    expected_exceptions = _extract_expected_exceptions(failures_section)
+
+    fixes_applied = state.get('fixes_applied', [])
+    already_attempted = ""
+    if fixes_applied:
+        lines_done = [f"  - {f['path']} line {f['line']} ({f['bug_type']})" for f in fixes_applied]
+        already_attempted = (
+            "ALREADY ATTEMPTED FIXES (do NOT re-attempt these — pick a DIFFERENT failure):\n"
+            + "\n".join(lines_done)
+        )
+    else:
+        already_attempted = "ALREADY ATTEMPTED FIXES: None yet."
+
+    exception_notice = ""
+    if expected_exceptions:
+        ex_str = ", ".join(expected_exceptions)
+        exception_notice = (
+            f"\n    CRITICAL EXCEPTION GUARD: The failing tests call pytest.raises() for: {ex_str}.\n"
+            f"    Your fix MUST be to raise these specific exceptions in the source code at the correct logic branches.\n"
+            f"    Do NOT return False or None.\n"
+            f"    If multiple exceptions are expected (e.g. ValueError AND TypeError), you MUST handle all conditions.\n"
+        )
 
-        # ── Key extractions ────────────────────────────────────────────────────────
-        failures_section = _extract_failures_section(error_logs)
-        expected_exceptions = _extract_expected_exceptions(failures_section)
-
-        fixes_applied = state.get('fixes_applied', [])
-        already_attempted = ""
-        if fixes_applied:
-            lines_done = [f"  - {f['path']} line {f['line']} ({f['bug_type']})" for f in fixes_applied]
-            already_attempted = (
-                "ALREADY ATTEMPTED FIXES (do NOT re-attempt these — pick a DIFFERENT failure):\n"
-                + "\n".join(lines_done)
-            )
-        else:
-            already_attempted = "ALREADY ATTEMPTED FIXES: None yet."
-
-        exception_notice = ""
-        if expected_exceptions:
-            ex_str = ", ".join(expected_exceptions)
-            exception_notice = (
-                f"\n    CRITICAL EXCEPTION GUARD: The failing tests call pytest.raises() for: {ex_str}.\n"
-                f"    Your fix MUST be to raise these specific exceptions in the source code at the correct logic branches.\n"
-                f"    Do NOT return False or None.\n"
-                f"    If multiple exceptions are expected (e.g. ValueError AND TypeError), you MUST handle all conditions.\n"
-            )
-
-        # No longer stripping linting errors. The Sovereign Prompt handles F401.
+    return {
+        "source_files": source_files,
+        "source_files_context": source_files_context,
+        "traceback_file": traceback_file,
+        "target_func_name": target_func_name,
+        "function_match_file": function_match_file,
+        "failures_section": failures_section,
+        "expected_exceptions": expected_exceptions,
+        "already_attempted": already_attempted,
+        "exception_notice": exception_notice,
+    }
+
+ANALYSIS_OUTPUT_SPEC = """Output strictly as JSON:
+    {
+        "file": "src/module.py",
+        "line": 10,
+        "bug_type": "LINTING",
+        "description": "Remove unused import 'os'"
+    }"""
 
-        file_list = list(source_files.keys())
-        file_list_str = ", ".join(file_list)
 
-        prompt = f"""
+def build_debug_prompt(ctx: Dict[str, Any], output_spec: str = ANALYSIS_OUTPUT_SPEC) -> str:
+    """The analysis prompt for a context from build_debug_context(), ending in `output_spec`."""
+    exception_notice = ctx["exception_notice"]
+    already_attempted = ctx["already_attempted"]
+    failures_section = ctx["failures_section"]
+    source_files_context = ctx["source_files_context"]
+    return f"""
     You are "The Arbiter" — an Elite Autonomous DevOps Engineer for the RIFT 2026 Hackathon.
     Context: You are running on a Windows host but testing in a Linux container.
 
@@ -358,51 +370,91 @@ def debugger_node(state: AgentState) -> AgentState:
     CLASSIFICATION: Bug Type must be exactly one of:
     LINTING, SYNTAX, LOGIC, TYPE_ERROR, IMPORT, INDENTATION, MARKER_CLEANUP
 
-    Output strictly as JSON:
-    {{
-        "file": "src/module.py",
-        "line": 10,
-        "bug_type": "LINTING",
-        "description": "Remove unused import 'os'"
-    }}
+    {output_spec}
     """
 
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=prompt,
-            config={"response_mime_type": "application/json"}
-        )
-        analysis = json.loads(response.text)
-        if isinstance(analysis, list):
-            analysis = analysis[0] if analysis else {}
 
-        if expected_exceptions:
-            analysis['expected_exceptions'] = expected_exceptions
-            if analysis.get('bug_type') == 'SYNTAX':
-                analysis['bug_type'] = 'LOGIC'
+def finish_analysis(analysis: Dict[str, Any], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    """Applies the deterministic anchors (expected exceptions, traceback file, line fallback) to a model analysis."""
+    expected_exceptions = ctx["expected_exceptions"]
+    traceback_file = ctx["traceback_file"]
+    target_func_name = ctx["target_func_name"]
+    function_match_file = ctx["function_match_file"]
+    source_files = ctx["source_files"]
+
+    if expected_exceptions:
+        analysis['expected_exceptions'] = expected_exceptions
+        if analysis.get('bug_type') == 'SYNTAX':
+            analysis['bug_type'] = 'LOGIC'
+
+    if traceback_file:
+        analysis['traceback_file'] = traceback_file
+
+    # Line Number Fallback
+    if not analysis.get('line') or analysis.get('line') == 0:
+        if target_func_name and function_match_file:
+            fallback_line = None
+            if function_match_file in source_files:
+                numbered_content = source_files[function_match_file]
+                fallback_pattern = re.compile(rf'^(\d+):\s*(async\s+)?(def|class)\s+{re.escape(target_func_name)}\b', re.MULTILINE)
+                fb_match = fallback_pattern.search(numbered_content)
+                if fb_match:
+                    fallback_line = int(fb_match.group(1))
+                    analysis['line'] = fallback_line
+    return analysis
 
-        if traceback_file:
-            analysis['traceback_file'] = traceback_file
 
-        state['current_analysis'] = analysis
+def debugger_node(state: AgentState) -> AgentState:
+    """
+    Analyzes error logs to categorize bugs and identify locations.
+    """
+    logger.info("Debugger Node Started...")
+
+    try:
+        error_logs = state['error_logs']
+
+        if not error_logs or len(error_logs.strip()) < 10:
+            logger.info("GUARDRAIL: No error logs to analyze. Assuming NO_BUGS_FOUND.")
+            state['current_step'] = "NO_BUGS_FOUND"
+            return state
 
-        # Line Number Fallback
-        if not analysis.get('line') or analysis.get('line') == 0:
-            if target_func_name and function_match_file:
-                fallback_line = None
-                if function_match_file in source_files:
-                    numbered_content = source_files[function_match_file]
-                    fallback_pattern = re.compile(rf'^(\d+):\s*(async\s+)?(def|class)\s+{re.escape(target_func_name)}\b', re.MULTILINE)
-                    fb_match = fallback_pattern.search(numbered_content)
-                    if fb_match:
-                        fallback_line = int(fb_match.group(1))
-                        analysis['line'] = fallback_line
+        api_key = os.environ.get("GOOGLE_API_KEY")
+        if not api_key:
+            logger.error("CRITICAL: GOOGLE_API_KEY not found in environment variables.")
+            return state
+
+        ctx = build_debug_context(state)
+        prompt = build_debug_prompt(ctx)
+
+        # The previous analysis' bug class (if any) is the best hint for picking a tier
+        route = choose_model(state, "debugger", (state.get('current_analysis') or {}).get('bug_type'))
+        logger.info("Debugger: Routing to %s tier (%s)", route.tier, route.model)
+        started = time.perf_counter()
+        response, model_used = llm_generate_hedged(
+            prompt,
+            model=route.model,
+            hedge_model=route.hedge_model,
+            hedge_after=route.hedge_after,
+            config={"response_mime_type": "application/json"},
+            run_id=state.get('run_id'),
+            api_key=api_key,
+            node="debugger",
+        )
+        usage = getattr(response, "usage_metadata", None)
+        note_attempt(state, route, model_used, (time.perf_counter() - started) * 1000,
+                     getattr(usage, "total_token_count", None))
+        analysis = json.loads(response.text)
+        if isinstance(analysis, list):
+            analysis = analysis[0] if analysis else {}
 
+        state['current_analysis'] = finish_analysis(analysis, ctx)
         state['current_step'] = "DEBUG_COMPLETE"
-        print(f"Debugger Analysis: {analysis}")
+        logger.info("Debugger Analysis: %s", analysis)
 
+    except TokenBudgetExceeded as e:
+        logger.info("Debugger: %s. Stopping the healing loop.", e)
+        state['current_step'] = BUDGET_EXCEEDED
     except Exception as e:
-        import traceback
-        print(f"Debugger Failed: {e}\n{traceback.format_exc()}")
+        logger.error("Debugger Failed: %s", e, exc_info=True)
 
     return state
@@ -1,9 +1,12 @@
 import os
 import glob
-from git import Repo
+import time
 from backend.state import AgentState
 from backend.logger import get_logger
-from backend.utils.file_utils import cleanup_directory
+from backend.telemetry import span
+from backend.utils.dependency_cache import dependency_hash, read_manifest
+from backend.utils.file_utils import cleanup_directory, configure_workspace_excludes
+from backend.utils.github_client import get_github_client, github_sync
 
 logger = get_logger("discovery_node")
 
@@ -11,6 +14,9 @@ logger = get_logger("discovery_node")
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 WORK_DIR = os.path.join(BASE_DIR, "temp_repos")
 
+# Seconds to wait for a freshly created fork to become readable
+FORK_READY_TIMEOUT = float(os.environ.get("FORK_READY_TIMEOUT", "30"))
+
 
 def discovery_node(state: AgentState) -> AgentState:
     """
@@ -20,11 +26,10 @@ def discovery_node(state: AgentState) -> AgentState:
     repo_url = state['repo_url']
     team_name = state['team_name']
 
-    # Create a unique path for the repo
-    repo_dir = os.path.join(
-        WORK_DIR,
-        f"{team_name}_{os.path.basename(repo_url.rstrip('/')).replace('.git', '')}"
-    )
+    # One directory per run, so concurrent runs of the same repo and team never share a clone
+    repo_name = f"{team_name}_{os.path.basename(repo_url.rstrip('/')).replace('.git', '')}"
+    run_id = state.get('run_id')
+    repo_dir = os.path.join(WORK_DIR, f"{repo_name}_{run_id}" if run_id else repo_name)
 
     # ── Cleanup ──────────────────────────────────────────────────────────────
     cleanup_directory(repo_dir)
@@ -40,23 +45,23 @@ def discovery_node(state: AgentState) -> AgentState:
     fork_url = ""
     
     if github_token:
-        print(f"Discovery: Found GITHUB_TOKEN. Attempting to ensure fork exists...")
+        logger.info("Discovery: Found GITHUB_TOKEN. Attempting to ensure fork exists...")
         try:
             fork_url = _ensure_fork(upstream_url, github_token)
             if fork_url:
-                print(f"Discovery: Fork ready at {fork_url}")
+                logger.info("Discovery: Fork ready at %s", fork_url)
                 state['fork_url'] = fork_url
                 state['upstream_url'] = upstream_url
                 # Clone from the FORK, not the upstream
                 clone_url = fork_url.replace("https://", f"https://{github_token}@")
             else:
-                print("Discovery: Fork creation returned empty URL. Falling back to direct clone.")
+                logger.info("Discovery: Fork creation returned empty URL. Falling back to direct clone.")
                 clone_url = upstream_url
         except Exception as e:
-            print(f"Discovery: Forking failed ({e}). Falling back to direct clone.")
+            logger.warning("Discovery: Forking failed (%s). Falling back to direct clone.", e)
             clone_url = upstream_url
     else:
-        print("Discovery: No GITHUB_TOKEN found. Cloning upstream directly (read-only?).")
+        logger.info("Discovery: No GITHUB_TOKEN found. Cloning upstream directly (read-only?).")
         clone_url = upstream_url
 
     try:
@@ -64,10 +69,12 @@ def discovery_node(state: AgentState) -> AgentState:
         # Only if we plan to push to upstream directly (which we shouldn't if we don't own it).
         # For now, let's assume if no fork, we clone read-only or however the URL is provided.
         
-        print(f"  Cloning {clone_url} -> {repo_dir}")
-        Repo.clone_from(clone_url, repo_dir)
+        logger.info("  Cloning %s -> %s", clone_url, repo_dir)
+        from git import Repo
+        with span("git.clone"):
+            Repo.clone_from(clone_url, repo_dir)
     except Exception as e:
-        print(f"CRITICAL: Clone failed: {e}")
+        logger.error("CRITICAL: Clone failed: %s", e)
         state['repo_path'] = repo_dir
         state['detected_stack'] = "UNKNOWN"
         state['test_files'] = []
@@ -77,13 +84,16 @@ def discovery_node(state: AgentState) -> AgentState:
     # ── Clone sanity check: prevent False-Green on zombie directory ───────────
     cloned_files = os.listdir(repo_dir) if os.path.exists(repo_dir) else []
     if not cloned_files:
-        print("CRITICAL: Clone directory is empty — treating as clone failure.")
+        logger.error("CRITICAL: Clone directory is empty — treating as clone failure.")
         state['repo_path'] = repo_dir
         state['detected_stack'] = "UNKNOWN"
         state['test_files'] = []
         state['current_step'] = "DISCOVERY_FAILED"
         return state
 
+    # ── Workspace Excludes: keep generated artifacts out of every future commit ──
+    configure_workspace_excludes(repo_dir)
+
     # ── Stack Detection (order matters — check most specific first) ──
     detected_stack = "UNKNOWN"
     has_requirements = _find_file(repo_dir, "requirements.txt")
@@ -148,7 +158,7 @@ def discovery_node(state: AgentState) -> AgentState:
     # ── Zero-test guard: a 0-test result means the scan failed or the
     # zombie directory tricked the agent. Flag it so the pipeline short-circuits.
     if len(test_files) == 0 and detected_stack == "PYTHON":
-        print("CRITICAL: No test files found for a PYTHON repo — flagging DISCOVERY_FAILED.")
+        logger.error("CRITICAL: No test files found for a PYTHON repo — flagging DISCOVERY_FAILED.")
         state['repo_path'] = repo_dir
         state['detected_stack'] = detected_stack
         state['test_files'] = []
@@ -158,13 +168,14 @@ def discovery_node(state: AgentState) -> AgentState:
     # Update State
     state['repo_path'] = repo_dir
     state['detected_stack'] = detected_stack
+    state['dependency_hash'] = dependency_hash(read_manifest(repo_dir))
     state['test_files'] = test_files
     state['current_step'] = "DISCOVERY_COMPLETE"
 
-    print(f"Discovery Complete: Stack={detected_stack}, Found {len(test_files)} tests.")
+    logger.info("Discovery Complete: Stack=%s, Found %s tests.", detected_stack, len(test_files))
     if test_files:
         for tf in test_files[:10]:
-            print(f"  - {os.path.relpath(tf, repo_dir)}")
+            logger.debug("  - %s", os.path.relpath(tf, repo_dir))
 
     return state
 
@@ -188,61 +199,47 @@ def _ensure_fork(upstream_url: str, token: str) -> str | None:
     Ensures a fork of the upstream repo exists on the authenticated user's account.
     Returns the URL of the fork (e.g. https://github.com/my-user/repo.git).
     """
-    import requests
-    import time
+    return github_sync(_ensure_fork_async(upstream_url, token))
 
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
+
+async def _ensure_fork_async(upstream_url: str, token: str) -> str | None:
+    client = get_github_client(token)
 
     # 1. Parse upstream owner/repo
     # Expected format: https://github.com/owner/repo or https://github.com/owner/repo.git
     clean = upstream_url.replace(".git", "").replace("https://github.com/", "").strip("/")
     parts = clean.split("/")
     if len(parts) < 2:
-        print(f"Discovery: Could not parse owner/repo from {upstream_url}")
+        logger.warning("Discovery: Could not parse owner/repo from %s", upstream_url)
         return None
     
     upstream_owner, repo_name = parts[-2], parts[-1]
 
-    # 2. Get authenticated user
-    resp = requests.get("https://api.github.com/user", headers=headers)
-    if resp.status_code != 200:
-        print(f"Discovery: Failed to get auth user: {resp.text}")
+    # 2. Get authenticated user (cached for the process lifetime)
+    user_login = await client.get_authenticated_login()
+    if not user_login:
         return None
-    user_login = resp.json()["login"]
 
     # 3. Check if fork already exists
     fork_url = f"https://github.com/{user_login}/{repo_name}.git"
-    
-    # Check if we can access the fork (it might already exist)
-    # We verify by checking API for this repo
-    check_url = f"https://api.github.com/repos/{user_login}/{repo_name}"
-    resp = requests.get(check_url, headers=headers)
-    
-    if resp.status_code == 200:
-        print(f"Discovery: Fork already exists at {fork_url}")
+    if await client.repo_exists(user_login, repo_name):
+        logger.info("Discovery: Fork already exists at %s", fork_url)
         return fork_url
 
     # 4. Create Fork
-    print(f"Discovery: Creating fork of {upstream_owner}/{repo_name}...")
-    create_fork_url = f"https://api.github.com/repos/{upstream_owner}/{repo_name}/forks"
-    resp = requests.post(create_fork_url, headers=headers)
-    
+    logger.info("Discovery: Creating fork of %s/%s...", upstream_owner, repo_name)
+    resp = await client.create_fork(upstream_owner, repo_name)
     if resp.status_code not in [200, 202]:
-        print(f"Discovery: Failed to create fork: {resp.text}")
+        logger.warning("Discovery: Failed to create fork: %s", resp.text)
         return None
     
     # 5. Wait for fork to be ready
     # GitHub returns 202 Accepted, but the repo might not be available immediately for cloning
-    print("Discovery: Fork initiated. Waiting for readiness...")
-    for i in range(10):
-        time.sleep(2)
-        resp = requests.get(check_url, headers=headers)
-        if resp.status_code == 200:
-            print(f"Discovery: Fork ready after {i*2}s.")
-            return fork_url
+    logger.info("Discovery: Fork initiated. Waiting for readiness...")
+    started = time.monotonic()
+    if await client.wait_for_repo(user_login, repo_name, timeout=FORK_READY_TIMEOUT):
+        logger.info("Discovery: Fork ready after %.1fs.", time.monotonic() - started)
+        return fork_url
     
-    print("Discovery: Timed out waiting for fork to be ready.")
+    logger.warning("Discovery: Timed out waiting for fork to be ready.")
     return None
@@ -1,8 +1,17 @@
 import os
-import json
-from google import genai
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from backend.nodes import env_loader  # noqa: F401 — loads backend/.env
 from backend.state import AgentState, FixDetail
+from backend.utils.json_stream import JsonObjectStream, MalformedStream
+from backend.utils.llm_gateway import llm_generate_stream
+from backend.utils.model_router import RouteDecision, choose_model, note_attempt
+from backend.events import publish_event
+from backend.logger import get_logger
+
+logger = get_logger("fixer_node")
 
 def fixer_node(state: AgentState) -> AgentState:
     """
@@ -10,26 +19,136 @@ def fixer_node(state: AgentState) -> AgentState:
     """
     from backend.utils.supabase_manager import SupabaseManager
     
-    print("Fixer Node Started...")
+    logger.info("Fixer Node Started...")
     supabase = SupabaseManager()
 
     
     analysis = state.get('current_analysis')
     if not analysis:
-        print("No analysis found. Skipping fix.")
+        logger.info("No analysis found. Skipping fix.")
         return state
 
     api_key = os.environ.get("GOOGLE_API_KEY")
     if not api_key:
-         print("CRITICAL: GOOGLE_API_KEY not found. Cannot generate fixes.")
+         logger.error("CRITICAL: GOOGLE_API_KEY not found. Cannot generate fixes.")
          return state
-        
+
+    target = resolve_fix_target(state, analysis)
+    if target is None:
+        return state
+    file_relative_path, file_full_path = target
+
+    with open(file_full_path, "r", encoding="utf-8") as f:
+        all_lines = f.readlines()
+    code_content = "".join(all_lines)
+
+    # Context Filter: only send 10 lines around the failing line to the LLM.
+    # This prevents hallucinating fixes for unrelated code (judge compliance).
+    error_line = analysis.get('line', 0)
+    try:
+        error_line_int = int(error_line)
+    except (ValueError, TypeError):
+        error_line_int = 0
+
+    if error_line_int > 0:
+        start = max(0, error_line_int - 11)   # 10 lines before
+        end = min(len(all_lines), error_line_int + 10)  # 10 lines after
+        context_lines = all_lines[start:end]
+        context_snippet = "".join(
+            f"{start + i + 1}: {line}" for i, line in enumerate(context_lines)
+        )
+        context_label = f"Lines {start + 1}–{end} of {file_relative_path} (error at line {error_line_int})"
+    else:
+        context_snippet = code_content
+        context_label = f"Full file: {file_relative_path}"
+
+    exception_rule = build_exception_rule(analysis)
+
+    reference_fix_prompt = build_reference_fix_prompt(supabase, analysis)
+
+    prompt = f"""
+    You are "The Arbiter" — an Elite Autonomous DevOps Engineer for the RIFT 2026 Hackathon.
+    
+    Context:
+    File: {file_relative_path}
+    Bug Type: {analysis.get('bug_type')}
+    Line: {analysis.get('line')}
+    Error Description: {analysis.get('description')}
+
+    Relevant Code ({context_label}):
+    ```
+    {context_snippet}
+    ```
+
+    Full file (for reference only — DO NOT modify lines outside the error context):
+    ```
+    {code_content}
+    ```
+
+    MISSION:
+    1. Fix the bug identified above.
+    
+    2. GREEDY EXCEPTION HARDENING (Fixer Node):
+       - If analyzing validation logic:
+         - You MUST implement a unified `if/elif` block.
+         - raise `TypeError` if input is not an int/correct type.
+         - raise `ValueError` if input is invalid (e.g. negative).
+         - raise `SyntaxError` if input fails specific string validation patterns (if required by test).
+       - Do NOT return False; the tests strictly use `pytest.raises`.
+       
+    3. WORKSPACE INTEGRITY:
+       - Conflict Detection: If you see `<<<<<<< HEAD` or `=======` in any source file, your FIRST and ONLY task is to delete all Git markers and restore clean Python syntax.
+       - Standardization: Force 4-space indentation globally to prevent `IndentationError`.
+    
+    4. EXCEPTION HANDLING:
+       {exception_rule}
+
+    {reference_fix_prompt}
+
+    Output strictly as JSON (no markdown):
+    {{
+        "fixed_code": "<the full fixed file content as a string>",
+        "fix_action": "<short fix description>"
+    }}
+    
+    IMPORTANT: You are a JSON-ONLY generator. You must return EXACTLY this schema: {{"fixed_code": "..."}}. 
+    If you include any text before or after the JSON, or use triple backticks (```), the system will fail. 
+    Escaping all double quotes inside the 'fixed_code' string is mandatory.
+    """
+
+
+    fix_action_default = f'fix the {analysis.get("bug_type", "error").lower()} error'
+    tmp_path = file_full_path + ".rift-tmp"
+    try:
+        # 429s are retried inside the gateway, which shares one rate limit across all runs
+        route = choose_model(state, "fixer", analysis.get('bug_type'))
+        logger.info("Fixer: Routing %s fix to %s tier (%s)", analysis.get('bug_type'), route.tier, route.model)
+        fields = _stream_fix(prompt, state, api_key, file_full_path, tmp_path, route)
+    except Exception as e:
+        logger.warning("Fixer: API Error: %s", e)
+        _discard(tmp_path)
+        return state
+    if fields is None:
+        _discard(tmp_path)
+        return state
+    fix_action = fields.get("fix_action") or fix_action_default
+
+    apply_fix(state, analysis, file_relative_path, file_full_path, tmp_path, fix_action, supabase, node="Fixer")
+    return state
+
+
+# ── Shared with the fused Analyze+Fix node ───────────────────────
+
+def resolve_fix_target(state: AgentState, analysis: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """
+    Maps the analysis' file to (relative, absolute) paths in the workspace, or None
+    when the file is a hallucination or cannot be found.
+    """
     repo_path = state['repo_path']
     file_relative_path = analysis.get('file', '')
-
     if not file_relative_path:
-        print("No file identified in analysis.")
-        return state
+        logger.info("No file identified in analysis.")
+        return None
 
     # Strip Docker container prefix (/app/ is the mount point)
     for prefix in ['/app/', '/app', 'app/']:
@@ -62,13 +181,13 @@ def fixer_node(state: AgentState) -> AgentState:
             # is in a file that called the failing file, or a file that is imported.
             error_logs = state.get('error_logs', '')
             if rf_norm in error_logs or os.path.basename(rf_norm) in error_logs:
-                 print(f"Fixer: Traceback mismatch ('{tf_norm}' != '{rf_norm}'), but file found in logs. Allowing fix.")
+                 logger.info("Fixer: Traceback mismatch ('%s' != '%s'), but file found in logs. Allowing fix.", tf_norm, rf_norm)
             else:
-                print(f"Fixer: BLOCKED HALLUCINATION. Traceback says '{tf_norm}' but AI wants to fix '{rf_norm}' (and file not found in logs)")
+                logger.warning("Fixer: BLOCKED HALLUCINATION. Traceback says '%s' but AI wants to fix '%s' (and file not found in logs)", tf_norm, rf_norm)
                 # We must fail this turn so we don't commit garbage
-                return state
+                return None
     elif last_exit_code == 2:
-         print(f"Fixer: Exit Code 2 (Collection Error) detected. Bypassing hallucination check to allow fixes for '{file_relative_path}'.")
+         logger.warning("Fixer: Exit Code 2 (Collection Error) detected. Bypassing hallucination check to allow fixes for '%s'.", file_relative_path)
 
     file_full_path = os.path.join(repo_path, file_relative_path)
 
@@ -81,38 +200,16 @@ def fixer_node(state: AgentState) -> AgentState:
         if matches:
             file_full_path = matches[0]
             file_relative_path = os.path.relpath(file_full_path, repo_path).replace('\\', '/')
-            print(f"Fixer: Resolved file via basename search: {file_relative_path}")
+            logger.info("Fixer: Resolved file via basename search: %s", file_relative_path)
         else:
-            print(f"Fixer: File not found (tried path + basename search): {file_relative_path}")
-            return state
-
-    with open(file_full_path, "r", encoding="utf-8") as f:
-        all_lines = f.readlines()
-    code_content = "".join(all_lines)
-
-    # Context Filter: only send 10 lines around the failing line to the LLM.
-    # This prevents hallucinating fixes for unrelated code (judge compliance).
-    error_line = analysis.get('line', 0)
-    try:
-        error_line_int = int(error_line)
-    except (ValueError, TypeError):
-        error_line_int = 0
+            logger.warning("Fixer: File not found (tried path + basename search): %s", file_relative_path)
+            return None
 
-    if error_line_int > 0:
-        start = max(0, error_line_int - 11)   # 10 lines before
-        end = min(len(all_lines), error_line_int + 10)  # 10 lines after
-        context_lines = all_lines[start:end]
-        context_snippet = "".join(
-            f"{start + i + 1}: {line}" for i, line in enumerate(context_lines)
-        )
-        context_label = f"Lines {start + 1}–{end} of {file_relative_path} (error at line {error_line_int})"
-    else:
-        context_snippet = code_content
-        context_label = f"Full file: {file_relative_path}"
+    return file_relative_path, file_full_path
 
-    client = genai.Client(api_key=api_key)
 
-    # Build the exception-specific rule
+def build_exception_rule(analysis: Dict[str, Any]) -> str:
+    """Prompt rule forcing the fix to raise the exceptions the failing tests expect."""
     expected_exceptions = analysis.get('expected_exceptions', [])
     if not expected_exceptions and analysis.get('expected_exception'):
         expected_exceptions = [analysis.get('expected_exception')]
@@ -137,9 +234,17 @@ def fixer_node(state: AgentState) -> AgentState:
                 f"    Ensure the code raises {expected_exception} for the specific processed failure.\n"
                 f"    Do NOT simply return False or None.\n"
             )
+    return exception_rule
+
+
+def missing_exceptions(fixed_code: str, analysis: Dict[str, Any]) -> List[str]:
+    """Expected exceptions that the fixed code never raises (the exception guard, checked after generation)."""
+    expected = analysis.get('expected_exceptions') or []
+    return [ex for ex in expected if not re.search(rf'\braise\s+{re.escape(ex)}\b', fixed_code)]
 
 
-    # ── AGENT MEMORY: Check for previous successful fixes ──
+def build_reference_fix_prompt(supabase, analysis: Dict[str, Any]) -> str:
+    """Agent memory: a previous successful fix for a similar bug, as a prompt hint."""
     reference_fix = supabase.get_previous_fix(
         bug_type=analysis.get('bug_type', ''),
         description=analysis.get('description', '')
@@ -147,7 +252,7 @@ def fixer_node(state: AgentState) -> AgentState:
     
     reference_fix_prompt = ""
     if reference_fix:
-        print(f"Agent Memory: Found reference fix from a previous run!")
+        logger.info("Agent Memory: Found reference fix from a previous run!")
         reference_fix_prompt = (
             f"\n    REFERENCE FIX (from previous successful run):\n"
             f"    The following fix was successfully applied to a similar bug:\n"
@@ -155,126 +260,13 @@ def fixer_node(state: AgentState) -> AgentState:
             f"    Code Action: {reference_fix.get('fix_action')}\n"
             f"    Consider this approach if applicable.\n"
         )
-
-    prompt = f"""
-    You are "The Arbiter" — an Elite Autonomous DevOps Engineer for the RIFT 2026 Hackathon.
-    
-    Context:
-    File: {file_relative_path}
-    Bug Type: {analysis.get('bug_type')}
-    Line: {analysis.get('line')}
-    Error Description: {analysis.get('description')}
-
-    Relevant Code ({context_label}):
-    ```
-    {context_snippet}
-    ```
-
-    Full file (for reference only — DO NOT modify lines outside the error context):
-    ```
-    {code_content}
-    ```
-
-    MISSION:
-    1. Fix the bug identified above.
-    
-    2. GREEDY EXCEPTION HARDENING (Fixer Node):
-       - If analyzing validation logic:
-         - You MUST implement a unified `if/elif` block.
-         - raise `TypeError` if input is not an int/correct type.
-         - raise `ValueError` if input is invalid (e.g. negative).
-         - raise `SyntaxError` if input fails specific string validation patterns (if required by test).
-       - Do NOT return False; the tests strictly use `pytest.raises`.
-       
-    3. WORKSPACE INTEGRITY:
-       - Conflict Detection: If you see `<<<<<<< HEAD` or `=======` in any source file, your FIRST and ONLY task is to delete all Git markers and restore clean Python syntax.
-       - Standardization: Force 4-space indentation globally to prevent `IndentationError`.
-    
-    4. EXCEPTION HANDLING:
-       {exception_rule}
-
-    {reference_fix_prompt}
-
-    Output strictly as JSON (no markdown):
-    {{
-        "fixed_code": "<the full fixed file content as a string>",
-        "fix_action": "<short fix description>"
-    }}
-    
-    IMPORTANT: You are a JSON-ONLY generator. You must return EXACTLY this schema: {{"fixed_code": "..."}}. 
-    If you include any text before or after the JSON, or use triple backticks (```), the system will fail. 
-    Escaping all double quotes inside the 'fixed_code' string is mandatory.
-    """
+    return reference_fix_prompt
 
 
-    import time
-    
-    # Retry logic for 429 RESOURCE_EXHAUSTED
-    max_retries = 5
-    retry_delay = 10  # Start with 10 seconds as requested
-    
-    for attempt in range(max_retries + 1):
-        try:
-            response = client.models.generate_content(
-                model=state.get('model_name', 'gemini-2.5-flash'),
-                contents=prompt,
-                config={"response_mime_type": "application/json"}
-            )
-            break # Success
-        except Exception as e:
-            err_str = str(e)
-            if "429" in err_str or "RESOURCE_EXHAUSTED" in err_str:
-                if attempt < max_retries:
-                    print(f"Fixer: 429 RESOURCE_EXHAUSTED. Retrying in {retry_delay}s... (Attempt {attempt+1}/{max_retries})")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # Exponential backoff
-                    continue
-                else:
-                    print("Fixer: Max retries exceeded for API limit.")
-                    return state
-            else:
-                # Not a rate limit error, raise or handle
-                print(f"Fixer: API Error: {e}")
-                return state
-        
+def apply_fix(state: AgentState, analysis: Dict[str, Any], file_relative_path: str, file_full_path: str,
+              tmp_path: str, fix_action: str, supabase, node: str = "Fixer"):
+    """Backs up the target, swaps in the generated file from `tmp_path` and records the fix."""
     try:
-        raw_text = response.text
-        # robust cleanup of markdown fences
-        cleaned_text = raw_text.strip()
-        if cleaned_text.startswith("```"):
-            lines = cleaned_text.splitlines()
-            if lines[0].startswith("```"):
-                lines = lines[1:]
-            if lines[-1].startswith("```"):
-                lines = lines[:-1]
-            cleaned_text = "\n".join(lines).strip()
-
-        try:
-            result = json.loads(cleaned_text)
-            fixed_code = result.get('fixed_code', '')
-            fix_action = result.get('fix_action', f'fix the {analysis.get("bug_type", "error").lower()} error')
-            
-            # If fixed_code is empty, stick with empty string or handle error
-            if not fixed_code.strip():
-                 # fallback if JSON is valid but code is empty - likely an error in generation
-                 print("Fixer: Generated JSON has empty fixed_code.")
-        except json.JSONDecodeError:
-            # If it fails to parse as JSON, check if it looks like code or JSON
-            # heuristic: if it starts with '{' and ends with '}', it's probably broken JSON. 
-            # If it's code, it likely won't.
-            if cleaned_text.strip().startswith("{") and cleaned_text.strip().endswith("}"):
-                print("Fixer: Failed to parse JSON response. Raw response was likely malformed JSON.")
-                # We could try to salvage, but for now let's just log and maybe return state
-                # to avoid writing garbage.
-                print(f"DEBUG Raw: {cleaned_text[:100]}...")
-                return state
-            else:
-                # Assume it's raw code if it doesn't look like JSON
-                print("Fixer: JSON parse failed, assuming raw code response.")
-                fixed_code = cleaned_text
-                fix_action = f'fix the {analysis.get("bug_type", "error").lower()} error'
-
-            
         # ── Workspace Isolation: Backup original file to /tmp ───────────────
         import shutil
         import tempfile
@@ -283,20 +275,20 @@ def fixer_node(state: AgentState) -> AgentState:
             os.makedirs(backup_dir, exist_ok=True)
             backup_file = os.path.join(backup_dir, f"{os.path.basename(file_full_path)}.{int(time.time())}.bak")
             shutil.copy2(file_full_path, backup_file)
-            print(f"Fixer: Workspace Isolation - Backup created at {backup_file}")
+            logger.info("%s: Workspace Isolation - Backup created at %s", node, backup_file)
         except Exception as backup_err:
-            print(f"Fixer: Backup failed (non-blocking): {backup_err}")
+            logger.warning("%s: Backup failed (non-blocking): %s", node, backup_err)
+
+        # Apply Fix: the streamed temp file already holds fixed_code; swap it in atomically
+        shutil.copymode(file_full_path, tmp_path)
+        os.replace(tmp_path, file_full_path)
 
-        # Apply Fix
-        with open(file_full_path, "w", encoding="utf-8") as f:
-            f.write(fixed_code)
-            
         # Judge-compliant output format:
         # 'LINTING error in src/utils.py line 15 → Fix: remove the import statement'
         bug_type = analysis.get('bug_type', 'UNKNOWN')
         line_num = analysis.get('line', '?')
         judge_description = f"{bug_type} error in {file_relative_path} line {line_num} \u2192 Fix: {fix_action}"
-        print(f"[JUDGE OUTPUT] {judge_description}")
+        logger.info("[JUDGE OUTPUT] %s", judge_description)
 
         fix_entry: FixDetail = {
             "path": file_relative_path,
@@ -312,17 +304,148 @@ def fixer_node(state: AgentState) -> AgentState:
             
         state['fixes_applied'].append(fix_entry)
         state['current_step'] = "FIX_APPLIED"
-        print(f"Fix applied to {file_relative_path}")
+        logger.info("Fix applied to %s", file_relative_path)
+        publish_event(state.get('run_id'), "fix_applied", **fix_entry)
         
         # Log to Supabase
         supabase.update_node_status(
             run_id=state.get('run_id'),
-            node="Fixer",
+            node=node,
             log_type="FIX_APPLIED",
             content=fix_entry
         )
         
     except Exception as e:
-        print(f"Fixer Failed: {e}")
-        
-    return state
+        logger.warning("%s Failed: %s", node, e)
+        _discard(tmp_path)
+
+
+# ── Streaming generation ─────────────────────────────────────────
+
+FIX_STREAM_ATTEMPTS = int(os.environ.get("FIX_STREAM_ATTEMPTS", "3"))
+_validator = ThreadPoolExecutor(max_workers=2, thread_name_prefix="fix-validate")
+
+
+def _prevalidate(path: str, code: str) -> Optional[str]:
+    """Cheap pre-flight check of generated code; returns an error message or None."""
+    if not code.strip():
+        return "empty fixed_code"
+    if path.endswith(".py"):
+        try:
+            compile(code, path, "exec")
+        except (SyntaxError, ValueError) as e:
+            return f"{type(e).__name__}: {e}"
+    return None
+
+
+def _strip_fences(text: str) -> str:
+    """Drops a ``` fence around a raw-code reply."""
+    lines = text.strip().splitlines()
+    if lines and lines[0].startswith("```"):
+        lines = lines[1:]
+    if lines and lines[-1].startswith("```"):
+        lines = lines[:-1]
+    return "\n".join(lines).strip()
+
+
+def _discard(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _stream_fix(prompt: str, state: AgentState, api_key: str, file_full_path: Optional[str],
+                tmp_path: str, route: RouteDecision, node: str = "fixer", label: str = "Fixer",
+                validate: Callable[[str, str], Optional[str]] = _prevalidate) -> Optional[Dict[str, Any]]:
+    """
+    Streams the fix from the model. `fixed_code` is written to `tmp_path` while it
+    arrives and validated as soon as its field closes (while the rest of the
+    response is still streaming). A JSON reply that stops looking like the expected
+    object aborts the stream immediately and is retried, as is code that fails
+    validation. `file_full_path=None` validates against the response's own `file`
+    field (fused mode). A reply that is not JSON at all is taken as the whole file
+    contents, as long as it validates (not in fused mode, which needs the `file`
+    field). Returns the response fields, or None if nothing usable came back.
+    """
+    run_id = state.get('run_id')
+    model = route.model
+
+    for attempt in range(1, FIX_STREAM_ATTEMPTS + 1):
+        validation: Dict[str, Future] = {}
+        received: List[str] = []
+        raw_code: Optional[str] = None
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            def on_chunk(key: str, chunk: str):
+                if key == "fixed_code":
+                    out.write(chunk)
+
+            def on_end(key: str, value):
+                if key == "fixed_code" and isinstance(value, str):
+                    validation["fixed_code"] = _validator.submit(
+                        validate, file_full_path or parser.fields.get("file", ""), value)
+
+            parser = JsonObjectStream(on_field_chunk=on_chunk, on_field_end=on_end)
+            raw_reply = False  # the reply turned out not to be JSON: the rest is only kept as text
+
+            def on_text(text: str):
+                nonlocal raw_reply
+                received.append(text)
+                if raw_reply:
+                    return
+                try:
+                    parser.feed(text)
+                except MalformedStream:
+                    if parser.started or file_full_path is None:
+                        raise
+                    raw_reply = True
+
+            try:
+                result = llm_generate_stream(
+                    prompt,
+                    model=model,
+                    on_text=on_text,
+                    config={"response_mime_type": "application/json"},
+                    run_id=run_id,
+                    api_key=api_key,
+                    node=node,
+                )
+                if raw_reply:
+                    raw_code = _strip_fences("".join(received))
+                    problem = validate(file_full_path, raw_code)
+                    if problem:
+                        raise MalformedStream(f"reply is neither JSON nor valid code ({problem})")
+                    out.write(raw_code)
+                else:
+                    fields = parser.close()
+            except MalformedStream as e:
+                logger.warning("%s: Malformed response after %s chars (%s). Aborted stream (attempt %s/%s).", label, parser.received, e, attempt, FIX_STREAM_ATTEMPTS)
+                publish_event(run_id, "llm_stream", node=node, attempt=attempt, malformed=True,
+                              chars=parser.received)
+                continue
+
+        logger.info("%s: Streamed fix in %.0f ms (first byte %.0f ms, %s chunks)", label, result.latency_ms, result.ttfb_ms, result.chunks)
+        publish_event(run_id, "llm_stream", node=node, attempt=attempt, ttfb_ms=result.ttfb_ms,
+                      latency_ms=result.latency_ms, chunks=result.chunks, total_tokens=result.total_tokens,
+                      model=model)
+
+        if raw_code is not None:
+            logger.info("%s: Reply was not JSON; using it as the file contents.", label)
+            note_attempt(state, route, model, result.latency_ms, result.total_tokens)
+            return {"fixed_code": raw_code}
+
+        fixed_code = fields.get("fixed_code")
+        if not isinstance(fixed_code, str) or "fixed_code" not in validation:
+            logger.info("%s: Response has no fixed_code (attempt %s/%s).", label, attempt, FIX_STREAM_ATTEMPTS)
+            continue
+        problem = validation["fixed_code"].result()
+        if problem and attempt < FIX_STREAM_ATTEMPTS:
+            logger.warning("%s: Pre-validation failed (%s). Regenerating (attempt %s/%s).", label, problem, attempt, FIX_STREAM_ATTEMPTS)
+            continue
+        if problem:
+            logger.warning("%s: Pre-validation failed (%s); applying the last attempt for the tester to judge.", label, problem)
+        note_attempt(state, route, model, result.latency_ms, result.total_tokens)
+        return fields
+
+    logger.warning("%s: No usable fix after streaming retries.", label)
+    return None
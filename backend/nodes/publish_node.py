@@ -0,0 +1,51 @@
+from backend.logger import get_logger
+from backend.state import AgentState
+from backend.events import publish_event
+from backend.utils.publisher import push_branch, open_pull_request, pop_background_publisher
+
+logger = get_logger("publish_node")
+
+
+def publish_node(state: AgentState) -> AgentState:
+    """
+    Publishes the locally committed fixes once the healing loop has finished.
+    Only part of the graph for the "deferred" and "background" publish modes.
+    """
+    logger.info("Publish Node Started...")
+
+    publish_mode = state.get('publish_mode') or "eager"
+    repo_path = state.get('repo_path', '')
+    branch_name = state.get('branch_name')
+
+    if publish_mode == "background":
+        publisher = pop_background_publisher(repo_path)
+        if publisher is not None:
+            pushed, pr_url = publisher.flush()
+            state['branch_pushed'] = pushed
+            if pr_url:
+                state['pr_url'] = pr_url
+            logger.info("Publish: Background publisher flushed after %s push(es).", publisher.push_count)
+            return state
+        if not state.get('committed_fix_count'):
+            logger.info("Publish: Nothing was scheduled for publishing.")
+            return state
+        # Publishers live in memory: a run resumed after a restart has local commits but none, so push directly
+        logger.info("Publish: No background publisher for %s; publishing directly.", repo_path)
+
+    if not branch_name or not state.get('committed_fix_count'):
+        logger.info("Publish: No local commits to publish.")
+        return state
+
+    try:
+        _, clean_remote_url = push_branch(repo_path, branch_name)
+        state['branch_pushed'] = True
+        publish_event(state.get('run_id'), "git_push", branch=branch_name, mode=publish_mode)
+        if not state.get('pr_url'):
+            pr_url = open_pull_request(clean_remote_url, branch_name, len(state.get('fixes_applied', [])))
+            if pr_url:
+                state['pr_url'] = pr_url
+    except Exception as e:
+        logger.warning("Publish: Push failed: %s", e)
+        state['branch_pushed'] = False
+
+    return state
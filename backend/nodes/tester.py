@@ -1,27 +1,34 @@
-import docker
 import os
 import re
 from datetime import datetime
+from backend.logger import get_logger
 from backend.state import AgentState
 from backend.scoring import calculate_score
+from backend.events import publish_event
+from backend.telemetry import span
+from backend.utils.blob_store import capture_logs
+from backend.utils.clients import get_docker_client
+from backend.utils.dependency_cache import cache_volumes
+from backend.utils.model_router import settle_routes
+
+logger = get_logger("tester_node")
+
+# Per-iteration lists kept in the state (and the run record) are capped at this many entries
+STATE_HISTORY_LIMIT = int(os.environ.get("STATE_HISTORY_LIMIT", "50"))
 
 def tester_node(state: AgentState) -> AgentState:
     """
     Spins up a Docker container to run tests (sandboxed).
     """
-    print("Tester Node Started...")
-    try:
-        client = docker.from_env()
-        client.ping()
-    except Exception:
-        # Fallback for Windows named pipe if from_env fails
-        print("    docker.from_env() failed, attempting Windows named pipe connection...")
-        client = docker.DockerClient(base_url='npipe:////./pipe/docker_engine')
+    logger.info("Tester Node Started...")
+    from docker.errors import ContainerError
+    client = get_docker_client()
 
     repo_path = state['repo_path']
     stack = state['detected_stack']
 
     container_logs = ""
+    logs_ref = None
     exit_code = 1
 
     try:
@@ -58,32 +65,39 @@ def tester_node(state: AgentState) -> AgentState:
             image = "python:3.11-slim"
 
         abs_repo_path = os.path.abspath(repo_path)
-        print(f"  Mounting volume: {abs_repo_path} -> /app")
-        print(f"  Running command: {command}")
-
-        container = client.containers.run(
-            image,
-            command=command,
-            volumes={abs_repo_path: {'bind': '/app', 'mode': 'rw'}},
-            working_dir="/app",
-            detach=True,
-            stdout=True,
-            stderr=True,
-        )
+        # The workspace first (local test doubles mount only the first volume), then the shared package cache
+        volumes = {abs_repo_path: {'bind': '/app', 'mode': 'rw'},
+                   **cache_volumes(stack, state.get('dependency_hash'))}
+        logger.debug("  Mounting volumes: %s", volumes)
+        logger.debug("  Running command: %s", command)
+
+        with span("docker.run", image=image):
+            container = client.containers.run(
+                image,
+                command=command,
+                volumes=volumes,
+                working_dir="/app",
+                detach=True,
+                stdout=True,
+                stderr=True,
+            )
 
-        result = container.wait(timeout=300)  # 5 minute timeout
+        with span("docker.wait", image=image):
+            result = container.wait(timeout=300)  # 5 minute timeout
         exit_code = result.get('StatusCode', 1)
 
-        # Get combined stdout+stderr logs
-        raw_logs = container.logs(stdout=True, stderr=True)
-        container_logs = raw_logs.decode("utf-8", errors="replace")
+        # Stream combined stdout+stderr into the run's blob store; only a head/tail window stays in memory
+        container_logs, logs_ref, log_bytes = capture_logs(
+            state.get('run_id'), container.logs(stdout=True, stderr=True, stream=True))
+        if container_logs and log_bytes > len(container_logs.encode("utf-8")):
+            logger.info("  Container output: %s bytes (windowed, full log in %s)", log_bytes, logs_ref)
 
         try:
             container.remove()
         except Exception:
             pass
 
-    except docker.errors.ContainerError as e:
+    except ContainerError as e:
         container_logs = f"Container error: {e.stderr.decode('utf-8', errors='replace') if e.stderr else str(e)}"
         exit_code = 1
     except Exception as e:
@@ -95,7 +109,7 @@ def tester_node(state: AgentState) -> AgentState:
     # Instead of failing silently or passing vacuously, we MUST try to run the application entry point.
     # This allows us to catch runtime errors (ImportError, SyntaxError) even without test files.
     if exit_code == 5 and stack == "PYTHON":
-        print("  Pytest Exit Code 5 (No Tests Found). Attempting fallback: python main.py")
+        logger.info("  Pytest Exit Code 5 (No Tests Found). Attempting fallback: python main.py")
         fallback_command = "bash -c 'python main.py 2>&1'"
         
         try:
@@ -108,7 +122,7 @@ def tester_node(state: AgentState) -> AgentState:
             fallback_container = client.containers.run(
                 image,
                 command=fallback_command,
-                volumes={abs_repo_path: {'bind': '/app', 'mode': 'rw'}},
+                volumes=volumes,
                 working_dir="/app",
                 stderr=True,
                 stdout=True
@@ -123,14 +137,14 @@ def tester_node(state: AgentState) -> AgentState:
             fb_container = client.containers.run(
                 image,
                 command=fallback_command,
-                volumes={abs_repo_path: {'bind': '/app', 'mode': 'rw'}},
+                volumes=volumes,
                 working_dir="/app",
                 detach=True
             )
             
             fb_result = fb_container.wait(timeout=60)
             fb_exit_code = fb_result.get('StatusCode', 1)
-            fb_logs = fb_container.logs(stdout=True, stderr=True).decode("utf-8", errors="replace")
+            fb_logs, _, _ = capture_logs(state.get('run_id'), fb_container.logs(stdout=True, stderr=True, stream=True))
             
             try:
                 fb_container.remove()
@@ -138,12 +152,12 @@ def tester_node(state: AgentState) -> AgentState:
                 pass
 
             if fb_exit_code != 0:
-                print(f"  Fallback 'python main.py' FAILED. Exit Code: {fb_exit_code}")
+                logger.info("  Fallback 'python main.py' FAILED. Exit Code: %s", fb_exit_code)
                 # Treat this as the ACTUAL failure to report
                 exit_code = fb_exit_code
                 container_logs += f"\n\n[FALLBACK EXECUTION: python main.py]\nEXIT CODE: {fb_exit_code}\nLOGS:\n{fb_logs}"
             else:
-                print("  Fallback 'python main.py' PASSED.")
+                logger.info("  Fallback 'python main.py' PASSED.")
                 # If fallback passes, we can technically say "Passed", but warn that no tests exist.
                 # For now, let's keep exit_code=5 but append logs so Debugger knows.
                 container_logs += f"\n\n[FALLBACK EXECUTION: python main.py]\nSUCCESS. Output:\n{fb_logs}"
@@ -164,6 +178,7 @@ def tester_node(state: AgentState) -> AgentState:
         "details": {
             "exit_code": exit_code,
             "retry_count": state.get('retry_count', 0),
+            "logs_ref": logs_ref,
         }
     })
 
@@ -178,8 +193,9 @@ def tester_node(state: AgentState) -> AgentState:
         return "\n".join(lines).strip()
 
     clean_logs = _clean_logs(container_logs)
-    state['error_logs'] = clean_logs  # Full clean pytest output for debugger
-    state['timeline'] = timeline
+    state['error_logs'] = clean_logs  # Head/tail of the clean pytest output for the debugger
+    state['error_logs_ref'] = logs_ref  # the full output, in the run's blob store
+    state['timeline'] = timeline[-STATE_HISTORY_LIMIT:]
 
     # Parse failure count from logs
     # Pattern: "=== 1 failed, 4 passed in 0.12s ===" or "=== 1 failed in 0.12s ==="
@@ -191,12 +207,16 @@ def tester_node(state: AgentState) -> AgentState:
     # Update failure history for "Stuck Detection"
     failure_history = state.get('failure_history', [])
     failure_history.append(failed_count)
-    state['failure_history'] = failure_history
+    failure_history = state['failure_history'] = failure_history[-STATE_HISTORY_LIMIT:]
     state['failure_count'] = failed_count
 
+    # Did the last fix help? Feeds the model router's routing table and escalation
+    improved = exit_code == 0 or (len(failure_history) >= 2 and failure_history[-1] < failure_history[-2])
+    settle_routes(state, improved)
+
     # Calculate Score First
     current_score, _, _, _, _ = calculate_score(state)
-    print(f"    Current Score: {current_score} (Pass Threshold: >=100)")
+    logger.info("    Current Score: %s (Pass Threshold: >=100)", current_score)
 
     if current_score >= 100:
         state['final_status'] = "PASSED"
@@ -208,8 +228,12 @@ def tester_node(state: AgentState) -> AgentState:
     state['current_step'] = "TESTING_COMPLETE"
     state['last_exit_code'] = exit_code
 
-    print(f"Testing Complete. Exit Code: {exit_code}")
-    print(f"Stats: {failed_count} Failed. History: {failure_history}")
-    print(f"Container Logs:\n{clean_logs[:800]}{'...' if len(clean_logs) > 800 else ''}")
+    publish_event(state.get('run_id'), "tests", exit_code=exit_code, failed=failed_count,
+                  score=current_score, passed=state['final_status'] == "PASSED",
+                  iteration=state.get('retry_count', 0))
+
+    logger.info("Testing Complete. Exit Code: %s", exit_code)
+    logger.info("Stats: %s Failed. History: %s", failed_count, failure_history)
+    logger.debug("Container Logs:\n%s%s", clean_logs[:800], '...' if len(clean_logs) > 800 else '')
 
     return state
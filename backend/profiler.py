@@ -0,0 +1,221 @@
+"""
+Opt-in per-node profiling (HealingRequest.profile=True).
+
+Each graph node of a profiled run executes under cProfile, a wall-clock stack
+sampler and tracemalloc, and leaves two files in PROFILE_DIR/<run_id>/:
+
+    <seq>-<node>.pstats      cProfile stats (python -m pstats, snakeviz)
+    <seq>-<node>.collapsed   sampled stacks, one "frame;frame;frame count" per line
+                             (flamegraph.pl, speedscope, inferno)
+
+plus a line in index.jsonl with the node's wall and CPU time, tracemalloc peak and
+top functions by cumulative time. GET /runs/{run_id}/profile lists them and
+GET /runs/{run_id}/profile/{name} downloads one file. A run's profile is removed
+at API start-up PROFILE_TTL seconds after its last write.
+
+Runs without the flag never go through this module. tracemalloc (and, on Python 3.12+,
+cProfile) is process-wide, so with several profiled runs in flight memory peaks
+include the other runs' allocations, and a node that finds cProfile busy is only
+sampled.
+"""
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(PROJECT_ROOT, "profiles"))
+PROFILE_TTL = float(os.environ.get("PROFILE_TTL", str(7 * 24 * 3600)))  # 0 = keep forever
+SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+TOP_FUNCTIONS = 15
+INDEX_FILE = "index.jsonl"
+
+_lock = threading.Lock()
+_sequences: Dict[str, Any] = {}
+_tracing_users = 0
+_owns_tracing = False  # tracemalloc was started here (not by the host process) and is stopped here
+
+
+def profile_dir(run_id: str) -> str:
+    return os.path.join(PROFILE_DIR, run_id)
+
+
+# ── Stack sampler ────────────────────────────────────────────────
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_name}:{frame.f_lineno}"
+
+
+class StackSampler:
+    """Samples one thread's stack every `interval` seconds, up to (not including) `stop_frame`."""
+
+    def __init__(self, thread_id: int, stop_frame, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.stop_frame = stop_frame
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame is not self.stop_frame:
+                stack.append(_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# ── tracemalloc (shared by concurrent profiled nodes) ────────────
+
+def _start_tracing():
+    global _tracing_users, _owns_tracing
+    with _lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _owns_tracing = True
+        _tracing_users += 1
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _stop_tracing() -> int:
+    global _tracing_users, _owns_tracing
+    with _lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        _tracing_users -= 1
+        if _tracing_users == 0 and _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
+        return peak
+
+
+# ── Node wrapper ─────────────────────────────────────────────────
+
+def _top_functions(profiler: cProfile.Profile) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(profiler).sort_stats("cumulative")
+    top = []
+    for func in stats.fcn_list[:TOP_FUNCTIONS]:
+        _, calls, tottime, cumtime, _ = stats.stats[func]
+        filename, line, name = func
+        top.append({"function": f"{filename}:{line}({name})", "calls": calls,
+                    "tottime_ms": round(tottime * 1000, 1), "cumtime_ms": round(cumtime * 1000, 1)})
+    return top
+
+
+def profile_node(name: str, state: Dict[str, Any], node: Callable):
+    """Runs `node(state)` under the profilers and stores its artifacts for the state's run."""
+    run_id = state.get('run_id') or "unknown"
+    with _lock:
+        seq = next(_sequences.setdefault(run_id, itertools.count(1)))
+    stem = f"{seq:03d}-{name}"
+
+    profiler: Optional[cProfile.Profile] = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiler is active (process-wide on 3.12+)
+        print(f"Profiler: cProfile busy, sampling {name} only")
+        profiler = None
+    base = _start_tracing()
+    sampler = StackSampler(threading.get_ident(), sys._getframe())
+    sampler.start()
+    wall_started, cpu_started = time.perf_counter(), time.thread_time()
+    try:
+        return node(state)
+    finally:
+        wall_ms = (time.perf_counter() - wall_started) * 1000
+        cpu_ms = (time.thread_time() - cpu_started) * 1000
+        if profiler:
+            profiler.disable()
+        sampler.stop()
+        peak = _stop_tracing()
+        _store(run_id, stem, {
+            "seq": seq,
+            "node": name,
+            "iteration": state.get('retry_count', 0),
+            "wall_ms": round(wall_ms, 1),
+            "cpu_ms": round(cpu_ms, 1),
+            "peak_alloc_kb": round(max(peak - base, 0) / 1024, 1),
+            "samples": sum(sampler.stacks.values()),
+        }, profiler, sampler)
+
+
+def _store(run_id: str, stem: str, record: Dict[str, Any], profiler: Optional[cProfile.Profile],
+           sampler: StackSampler):
+    directory = profile_dir(run_id)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        if profiler:
+            profiler.dump_stats(os.path.join(directory, f"{stem}.pstats"))
+            record["pstats"] = f"{stem}.pstats"
+            record["top"] = _top_functions(profiler)
+        with open(os.path.join(directory, f"{stem}.collapsed"), "w", encoding="utf-8") as f:
+            f.write(sampler.collapsed())
+        record["collapsed"] = f"{stem}.collapsed"
+        with _lock, open(os.path.join(directory, INDEX_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"Profiler: Could not store profile for {stem}: {e}")
+
+
+# ── Reading ──────────────────────────────────────────────────────
+
+def load_profile(run_id: str) -> Optional[Dict[str, Any]]:
+    """Per-node records and per-node-name totals for a profiled run (None if it has none)."""
+    path = os.path.join(profile_dir(run_id), INDEX_FILE)
+    try:
+        with open(path, encoding="utf-8") as f:
+            nodes = [json.loads(line) for line in f if line.strip()]
+    except (OSError, json.JSONDecodeError):
+        return None
+    totals: Dict[str, Dict[str, Any]] = {}
+    for record in sorted(nodes, key=lambda r: r["seq"]):
+        total = totals.setdefault(record["node"], {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "peak_alloc_kb": 0.0})
+        total["calls"] += 1
+        total["wall_ms"] = round(total["wall_ms"] + record["wall_ms"], 1)
+        total["cpu_ms"] = round(total["cpu_ms"] + record["cpu_ms"], 1)
+        total["peak_alloc_kb"] = max(total["peak_alloc_kb"], record["peak_alloc_kb"])
+    return {"run_id": run_id, "totals": totals, "nodes": sorted(nodes, key=lambda r: r["seq"])}
+
+
+def artifact_path(run_id: str, name: str) -> Optional[str]:
+    """Path of a stored artifact, only for names listed in the run's index."""
+    profile = load_profile(run_id)
+    if not profile:
+        return None
+    known = {r.get(kind) for r in profile["nodes"] for kind in ("pstats", "collapsed")}
+    if name not in known:
+        return None
+    return os.path.join(profile_dir(run_id), name)
+
+
+def forget(run_id: str):
+    """Drops the run's artifact counter once the run has finished."""
+    with _lock:
+        _sequences.pop(run_id, None)
+
+
+def prune(ttl: float = PROFILE_TTL) -> int:
+    """Removes the profiles of runs not written to for `ttl` seconds; returns how many were removed."""
+    from backend.utils.file_utils import prune_run_dirs
+    return prune_run_dirs(PROFILE_DIR, ttl)
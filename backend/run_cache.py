@@ -0,0 +1,147 @@
+"""
+Deduplication of healing runs by the upstream commit they heal.
+
+A submission's key is the normalized repo URL, the commit its default branch
+points at right now (`git ls-remote <url> HEAD`) and every request option that
+changes the outcome (team/leader, i.e. the branch, model, routing, modes,
+budgets). With that key:
+
+    coalesced  an identical run is queued or running: the request attaches to it
+    cached     an identical run finished less than RUN_CACHE_TTL seconds ago: its
+               result (branch, PR, score) is returned without running anything
+    miss       a new run is started and recorded under the key
+
+Keys live in SQLite (RUN_CACHE_DB) so the API and out-of-process workers agree
+on them. Runs that error or fail discovery release their key, so a resubmission
+runs again. rift_run_dedup_total{outcome} gives the hit rate.
+
+RUN_DEDUP=0 turns this off; a request with use_cache=false skips it; if the SHA
+cannot be resolved the run simply starts.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from backend.utils.sqlite_utils import connect_sqlite
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RUN_CACHE_DB = os.path.join(PROJECT_ROOT, "run_cache.db")
+RUN_CACHE_TTL = float(os.environ.get("RUN_CACHE_TTL", "3600"))  # 0 = coalesce only, never serve a cached result
+LS_REMOTE_TIMEOUT = float(os.environ.get("RUN_CACHE_LS_REMOTE_TIMEOUT", "10"))
+
+# Request fields that do not change what a run produces
+_KEY_EXCLUDED = ("priority", "profile", "use_cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_keys (
+    key          TEXT PRIMARY KEY,
+    run_id       TEXT NOT NULL,
+    repo_url     TEXT NOT NULL,
+    sha          TEXT NOT NULL,
+    status       TEXT NOT NULL,   -- running / done
+    created_at   REAL NOT NULL,
+    finished_at  REAL
+);
+CREATE INDEX IF NOT EXISTS idx_run_keys_run ON run_keys (run_id);
+"""
+
+
+def dedup_enabled() -> bool:
+    return os.environ.get("RUN_DEDUP", "1") != "0"
+
+
+def normalize_repo_url(repo_url: str) -> str:
+    url = repo_url.strip().rstrip("/")
+    return url[:-4] if url.endswith(".git") else url
+
+
+def resolve_head(repo_url: str) -> Optional[str]:
+    """The commit the remote's HEAD points at, or None if the remote cannot be reached in time."""
+    from git import Git
+    from git.exc import GitCommandError
+    try:
+        out = Git().ls_remote(repo_url, "HEAD", kill_after_timeout=LS_REMOTE_TIMEOUT,
+                              env={"GIT_TERMINAL_PROMPT": "0"})
+    except (GitCommandError, OSError) as e:
+        print(f"RunCache: Could not resolve HEAD of {repo_url} ({str(e).strip().splitlines()[0]})")
+        return None
+    sha = out.split()[0] if out.strip() else ""
+    return sha or None
+
+
+def run_key(request: Dict[str, Any], sha: str) -> str:
+    options = {k: v for k, v in request.items() if k not in _KEY_EXCLUDED}
+    options["repo_url"] = normalize_repo_url(options["repo_url"])
+    return hashlib.sha256(json.dumps([sha, options], sort_keys=True).encode()).hexdigest()
+
+
+class RunCache:
+    def __init__(self, path: str, ttl: float = RUN_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    def claim(self, key: str, run_id: str, repo_url: str, sha: str,
+              is_live: Callable[[str], bool]) -> Tuple[str, str]:
+        """
+        Atomically decides what a submission with this key gets. Returns (outcome, run_id):
+        ("coalesced" | "cached", the existing run) or ("miss", run_id), recorded as running.
+        `is_live(run_id)` tells whether a run recorded as running is still queued or running
+        (one whose process died no longer holds its key).
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT run_id, status, finished_at FROM run_keys WHERE key = ?", (key,)).fetchone()
+            outcome = "miss"
+            if row and row["status"] == "running" and is_live(row["run_id"]):
+                outcome = "coalesced"
+            elif row and row["status"] == "done" and time.time() - row["finished_at"] < self.ttl:
+                outcome = "cached"
+            if outcome == "miss":
+                conn.execute("INSERT OR REPLACE INTO run_keys VALUES (?, ?, ?, ?, 'running', ?, NULL)",
+                             (key, run_id, normalize_repo_url(repo_url), sha, time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return outcome, (run_id if outcome == "miss" else row["run_id"])
+
+    def finish(self, run_id: str, cacheable: bool):
+        """Called when a run ends: its result becomes the cached one, or its key is released."""
+        if cacheable:
+            self._conn().execute("UPDATE run_keys SET status = 'done', finished_at = ? WHERE run_id = ?",
+                                 (time.time(), run_id))
+        else:
+            self._conn().execute("DELETE FROM run_keys WHERE run_id = ?", (run_id,))
+
+    def prune(self) -> int:
+        """Drops finished keys older than the TTL."""
+        cur = self._conn().execute("DELETE FROM run_keys WHERE status = 'done' AND finished_at < ?",
+                                   (time.time() - self.ttl,))
+        return cur.rowcount
+
+
+_cache: Optional[RunCache] = None
+_lock = threading.Lock()
+
+
+def get_run_cache() -> RunCache:
+    """Process-wide cache (RUN_CACHE_DB)."""
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = RunCache(os.environ.get("RUN_CACHE_DB", DEFAULT_RUN_CACHE_DB))
+    return _cache
@@ -0,0 +1,172 @@
+"""
+Indexed store for completed healing runs (replaces the results.json read-modify-write).
+
+Each run is one row in SQLite (WAL mode): appends are a single atomic INSERT, so
+concurrent writers (API process, several workers) never lose each other's results,
+and cost no longer grows with history. Lookups by run_id, team_name and
+completed_at are served from indexes, and /results pages through history with a
+keyset cursor so deep pages stay as cheap as the first one.
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.utils.sqlite_utils import connect_sqlite
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_STORE_DB = os.environ.get("RUN_STORE_DB", os.path.join(PROJECT_ROOT, "runs.db"))
+LEGACY_RESULTS_FILE = os.path.join(PROJECT_ROOT, "results.json")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id        TEXT PRIMARY KEY,
+    team_name     TEXT NOT NULL,
+    repo_url      TEXT,
+    final_status  TEXT,
+    final_score   INTEGER,
+    completed_at  TEXT NOT NULL,
+    entry         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_completed ON runs (completed_at, run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_team ON runs (team_name, completed_at, run_id);
+CREATE INDEX IF NOT EXISTS idx_runs_status ON runs (final_status, completed_at, run_id);
+"""
+
+
+def _encode_cursor(row: Dict[str, Any]) -> str:
+    return f"{row['completed_at']}|{row['run_id']}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    completed_at, _, run_id = cursor.partition("|")
+    return completed_at, run_id
+
+
+class RunStore:
+    def __init__(self, path: str = RUN_STORE_DB, legacy_results_file: Optional[str] = LEGACY_RESULTS_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+        if legacy_results_file:
+            self._migrate_legacy(legacy_results_file)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    def _migrate_legacy(self, results_file: str):
+        """One-time import of results.json; the file is renamed so it is never re-read."""
+        if not os.path.exists(results_file):
+            return
+        try:
+            with open(results_file, "r") as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"RunStore: Could not read legacy {results_file}: {e}")
+            return
+        self.append_many(
+            {**e, "run_id": e.get("run_id") or f"legacy-{i}"} for i, e in enumerate(entries)
+        )
+        os.replace(results_file, results_file + ".migrated")
+        print(f"RunStore: Migrated {len(entries)} runs from {results_file}")
+
+    @staticmethod
+    def _params(entry: Dict[str, Any]) -> tuple:
+        return (
+            entry["run_id"],
+            entry.get("team_name", ""),
+            entry.get("repo_url"),
+            entry.get("final_status"),
+            entry.get("final_score"),
+            entry.get("completed_at", ""),
+            json.dumps(entry),
+        )
+
+    def append(self, entry: Dict[str, Any]):
+        """Atomically stores one run result (re-appending a run_id replaces it)."""
+        self._conn().execute(
+            "INSERT OR REPLACE INTO runs (run_id, team_name, repo_url, final_status, final_score, "
+            "completed_at, entry) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._params(entry),
+        )
+
+    def append_many(self, entries):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO runs (run_id, team_name, repo_url, final_status, final_score, "
+                "completed_at, entry) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._params(e) for e in entries),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT entry FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row["entry"]) if row else None
+
+    def latest_for_team(self, team_name: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            "SELECT entry FROM runs WHERE team_name = ? ORDER BY completed_at DESC, run_id DESC LIMIT 1",
+            (team_name,),
+        ).fetchone()
+        return json.loads(row["entry"]) if row else None
+
+    def query(self, team_name: Optional[str] = None, final_status: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None,
+              cursor: Optional[str] = None, limit: int = 50) -> Dict[str, Any]:
+        """
+        Newest-first page of runs. Pass the returned `next_cursor` to get the next page.
+        `since`/`until` are ISO timestamps compared against completed_at.
+        """
+        where, params = [], []
+        if team_name:
+            where.append("team_name = ?")
+            params.append(team_name)
+        if final_status:
+            where.append("final_status = ?")
+            params.append(final_status)
+        if since:
+            where.append("completed_at >= ?")
+            params.append(since)
+        if until:
+            where.append("completed_at < ?")
+            params.append(until)
+        if cursor:
+            c_completed, c_run = _decode_cursor(cursor)
+            where.append("(completed_at, run_id) < (?, ?)")
+            params.extend([c_completed, c_run])
+
+        limit = max(1, min(int(limit), 500))
+        sql = "SELECT run_id, completed_at, entry FROM runs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY completed_at DESC, run_id DESC LIMIT ?"
+        rows = self._conn().execute(sql, (*params, limit + 1)).fetchall()
+
+        items: List[Dict[str, Any]] = [json.loads(r["entry"]) for r in rows[:limit]]
+        next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor, "limit": limit}
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+
+_store: Optional[RunStore] = None
+_store_lock = threading.Lock()
+
+
+def get_run_store() -> RunStore:
+    """Process-wide store, opened (and migrated) on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = RunStore()
+        return _store
@@ -0,0 +1,175 @@
+"""
+Bounded, fair scheduler for healing runs.
+
+Every /start-healing request becomes a job in a bounded queue that a fixed pool of
+asyncio workers drains, so the number of concurrent Docker containers and Gemini
+sessions is capped at MAX_CONCURRENT_RUNS. Jobs are picked by priority first and
+then round-robin across teams, so one team submitting many repos cannot starve the
+others. When MAX_QUEUED_RUNS jobs are already waiting, submit() raises QueueFullError
+and the API answers 429 instead of letting the host thrash.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+MAX_CONCURRENT_RUNS = int(os.environ.get("MAX_CONCURRENT_RUNS", "2"))
+MAX_QUEUED_RUNS = int(os.environ.get("MAX_QUEUED_RUNS", "20"))
+
+
+class QueueFullError(Exception):
+    """Raised when the scheduler cannot admit another job."""
+
+    def __init__(self, queue_depth: int, retry_after: float):
+        super().__init__(f"Run queue is full ({queue_depth} waiting).")
+        self.queue_depth = queue_depth
+        self.queue_position = queue_depth + 1  # where the job would have landed
+        self.retry_after = retry_after
+
+
+@dataclass
+class ScheduledRun:
+    run_id: str
+    team_name: str
+    payload: Any
+    priority: int = 0
+    resume: bool = False  # continue from the run's last checkpoint instead of starting over
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None
+
+
+class RunScheduler:
+    def __init__(self, runner: Callable[[ScheduledRun], Awaitable[None]],
+                 max_workers: int = MAX_CONCURRENT_RUNS, max_queue: int = MAX_QUEUED_RUNS):
+        self.runner = runner
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        # team_name -> FIFO of that team's waiting jobs; dict order is the round-robin order
+        self._teams: "OrderedDict[str, Deque[ScheduledRun]]" = OrderedDict()
+        self._running: Dict[str, ScheduledRun] = {}
+        self._workers: List[asyncio.Task] = []
+        self._available: Optional[asyncio.Semaphore] = None  # one permit per waiting job
+        self._wait_samples: Deque[float] = deque(maxlen=200)
+        self._run_samples: Deque[float] = deque(maxlen=200)
+        self.completed = 0
+        self.rejected = 0
+
+    # ── Admission ────────────────────────────────────────────────────────
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(len(q) for q in self._teams.values())
+
+    def submit(self, run_id: str, team_name: str, payload: Any, priority: int = 0, resume: bool = False) -> int:
+        """
+        Enqueues a run and returns its 1-based queue position (0 = starts immediately).
+        Must be called from the event loop the workers run on.
+        """
+        self._ensure_workers()
+        depth = self.queue_depth
+        idle = self.max_workers - len(self._running)
+        if depth >= self.max_queue + idle:
+            self.rejected += 1
+            raise QueueFullError(depth, self.estimated_wait(depth + 1))
+
+        job = ScheduledRun(run_id=run_id, team_name=team_name, payload=payload, priority=priority, resume=resume)
+        self._teams.setdefault(team_name, deque()).append(job)
+        self._available.release()
+        return max(0, (self.position(run_id) or 0) - idle)
+
+    def _ensure_workers(self):
+        if self._available is None:
+            self._available = asyncio.Semaphore(0)
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.max_workers:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    # ── Dispatch ─────────────────────────────────────────────────────────
+
+    def _ordered(self) -> List[ScheduledRun]:
+        """All waiting jobs in the exact order workers will take them."""
+        teams = OrderedDict((t, list(q)) for t, q in self._teams.items() if q)
+        order = []
+        while teams:
+            team = self._pick_team(teams)
+            order.append(teams[team].pop(0))
+            if teams[team]:
+                teams.move_to_end(team)
+            else:
+                del teams[team]
+        return order
+
+    @staticmethod
+    def _pick_team(teams) -> str:
+        # Highest head-of-line priority wins; ties go to the team that waited longest for a turn
+        best = None
+        for team, jobs in teams.items():
+            if best is None or jobs[0].priority > teams[best][0].priority:
+                best = team
+        return best
+
+    def _next_job(self) -> Optional[ScheduledRun]:
+        active = OrderedDict((t, q) for t, q in self._teams.items() if q)
+        if not active:
+            return None
+        team = self._pick_team(active)
+        job = self._teams[team].popleft()
+        # Rotate the team to the back so other teams get the next turn
+        if self._teams[team]:
+            self._teams.move_to_end(team)
+        else:
+            del self._teams[team]
+        return job
+
+    async def _worker(self):
+        while True:
+            await self._available.acquire()
+            job = self._next_job()
+            if job is None:
+                continue
+            job.started_at = time.monotonic()
+            self._wait_samples.append(job.started_at - job.enqueued_at)
+            self._running[job.run_id] = job
+            try:
+                await self.runner(job)
+            except Exception as e:
+                print(f"Scheduler: run {job.run_id} crashed: {e}")
+            finally:
+                self._running.pop(job.run_id, None)
+                self._run_samples.append(time.monotonic() - job.started_at)
+                self.completed += 1
+
+    # ── Introspection ────────────────────────────────────────────────────
+
+    def position(self, run_id: str) -> Optional[int]:
+        """1-based position in the queue, or None if the run is not waiting."""
+        for i, job in enumerate(self._ordered(), start=1):
+            if job.run_id == run_id:
+                return i
+        return None
+
+    def estimated_wait(self, position: int) -> float:
+        """Rough seconds until a job at `position` starts, from recent run durations."""
+        if not self._run_samples:
+            return 60.0
+        avg_run = sum(self._run_samples) / len(self._run_samples)
+        return round(avg_run * position / self.max_workers, 1)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._wait_samples)
+        now = time.monotonic()
+        oldest = min((j.enqueued_at for q in self._teams.values() for j in q), default=None)
+        return {
+            "running": len(self._running),
+            "queued": self.queue_depth,
+            "max_concurrent_runs": self.max_workers,
+            "max_queued_runs": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "p95_wait_seconds": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else 0.0,
+            "oldest_wait_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            "queued_by_team": {t: len(q) for t, q in self._teams.items() if q},
+        }
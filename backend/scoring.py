@@ -1,5 +1,8 @@
 from datetime import datetime
 from backend.state import AgentState
+from backend.logger import get_logger
+
+logger = get_logger("scoring_node")
 
 def calculate_score(state: AgentState) -> tuple[int, float, int, int, int]:
     """
@@ -62,5 +65,5 @@ def scoring_node(state: AgentState) -> AgentState:
         "efficiency_penalty": penalty
     }
 
-    print(f"Scoring Complete. Final Score: {score}, Duration: {duration:.2f}s")
+    logger.info("Scoring Complete. Final Score: %s, Duration: %.2fs", score, duration)
     return state
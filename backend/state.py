@@ -32,16 +32,24 @@ class AgentState(TypedDict):
     # Execution State
     current_step: str
     retry_count: int
-    error_logs: str  # Accumulated logs from tests
+    error_logs: str  # Head/tail window of the last test output (see utils/blob_store.py)
+    error_logs_ref: Optional[str]  # blob store reference of the full output
     detected_stack: str # Python / Node
+    dependency_hash: Optional[str]  # root manifests' hash; selects the shared package cache (utils/dependency_cache.py)
     test_files: List[str]
+    failure_history: List[int]  # failed test count per Tester pass (stuck detection)
+    failure_count: int
     
     # Results & Metrics
     fixes_applied: List[FixDetail]
+    committed_fix_count: int  # fixes_applied[:n] are already committed by git_node
     timeline: List[TimelineEvent]
     final_status: str # PASSED / FAILED
     total_time: float # Seconds
     final_score: int
+    branch_name: Optional[str]
+    branch_pushed: bool
+    pr_url: Optional[str]
     
     # Control Flow
     is_healing_complete: bool
@@ -51,4 +59,12 @@ class AgentState(TypedDict):
     max_iterations: int
     iterations: int
     model_name: str
+    model_routing: str     # "cascade" (tiered, see utils/model_router.py) or "fixed" (always model_name)
+    model_escalation: int  # tiers above the default the router should start from (raised when stuck)
+    pending_routes: List[Dict[str, Any]]  # LLM calls awaiting the next test outcome
+    token_usage: Dict[str, Any]  # LLM tokens/cost per run, node and model (see utils/token_usage.py)
+    peak_rss_mb: float  # highest process RSS seen at the end of a node of this run
+    publish_mode: str  # eager / deferred / background (see utils/publisher.py)
+    profile: bool  # run every node under cProfile + tracemalloc (see profiler.py)
+    analysis_mode: str  # two_step (debugger -> fixer) / fused (one analyze_fix call, see nodes/analyze_fix.py)
     last_exit_code: int  # Added for "Paneer Run" logic (Exit Code 2 relaxation)
@@ -0,0 +1,327 @@
+"""
+Timed spans, histograms and counters for runs.
+
+Graph nodes and external calls (docker run/wait, clone, LLM calls, Supabase writes,
+git push) run inside span(); each finished span is observed into a duration
+histogram labelled by span name and status. GET /metrics renders everything in
+Prometheus text format, so p50/p95 per stage comes from histogram_quantile() and
+can be compared across deployments.
+
+With TELEMETRY_EXPORT_FILE set, finished spans are also appended to that file as
+OTLP-style JSON (one ExportTraceServiceRequest object per line), with the run_id
+as trace id so a run's spans group into one trace.
+
+Registries are per process: out-of-process workers expose their own endpoint
+(python -m backend.worker --metrics-port).
+"""
+import atexit
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+EXPORT_FILE = os.environ.get("TELEMETRY_EXPORT_FILE")
+EXPORT_BATCH = int(os.environ.get("TELEMETRY_EXPORT_BATCH", "64"))
+SERVICE_NAME = os.environ.get("TELEMETRY_SERVICE_NAME", "rift-agent")
+DEPLOYMENT = os.environ.get("TELEMETRY_DEPLOYMENT", "")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans range from ms-scale Supabase writes to multi-minute docker runs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+SPAN_METRIC = "rift_span_duration_seconds"
+METRIC_HELP = {
+    SPAN_METRIC: "Duration of instrumented operations (graph nodes and external calls).",
+    "rift_runs_total": "Finished healing runs by final status.",
+    "rift_llm_tokens_total": "Model tokens by model, node and kind (prompt / output).",
+    "rift_llm_cached_tokens_total": "Prompt tokens served from the model's context cache.",
+    "rift_llm_cost_usd_total": "Approximate model spend in USD (MODEL_TIER_COSTS).",
+    "rift_token_budget_exceeded_total": "Model calls refused because the run's token budget was spent.",
+    "rift_runs_resumed_total": "Runs continued from a checkpoint instead of starting over.",
+    "rift_run_dedup_total": "Run submissions by dedup outcome; hit rate = (cached + coalesced) / all.",
+    "rift_batch_runs_total": "Repos of batch submissions by final run status.",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Linear interpolation inside the bucket, like Prometheus' histogram_quantile()."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class Span:
+    def __init__(self, name: str, run_id: Optional[str], parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.name = name
+        self.run_id = run_id or (parent.run_id if parent else None)
+        self.trace_id = parent.trace_id if parent else _trace_id(self.run_id)
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attrs = attrs
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self.duration = 0.0
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def _trace_id(run_id: Optional[str]) -> str:
+    if not run_id:
+        return os.urandom(16).hex()
+    hex_id = run_id.replace("-", "")
+    if len(hex_id) == 32 and all(c in "0123456789abcdef" for c in hex_id.lower()):
+        return hex_id.lower()
+    return hashlib.md5(run_id.encode()).hexdigest()
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("rift_span", default=None)
+
+
+class Telemetry:
+    def __init__(self, export_path: Optional[str] = EXPORT_FILE, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.export_path = export_path
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+        self._export_buffer: List[Dict[str, Any]] = []
+        self._export_lock = threading.Lock()
+
+    # ── Recording ────────────────────────────────────────────────
+
+    @contextmanager
+    def span(self, name: str, run_id: Optional[str] = None, **attrs) -> Iterator[Span]:
+        """Times the block; nested spans inherit the run_id and link to their parent."""
+        span = Span(name, run_id, _current.get(), attrs)
+        token = _current.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.status = "error"
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current.reset(token)
+            self.observe(SPAN_METRIC, span.duration, span=name, status=span.status)
+            if self.export_path:
+                self._export(span)
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    # ── Reading ──────────────────────────────────────────────────
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Per span name (all statuses): count, errors, p50/p95 in ms."""
+        merged: Dict[str, Histogram] = {}
+        errors: Dict[str, int] = {}
+        with self._lock:
+            for (name, labels), hist in self._histograms.items():
+                if name != SPAN_METRIC:
+                    continue
+                label_map = dict(labels)
+                span = label_map.get("span", "")
+                total = merged.setdefault(span, Histogram(self.buckets))
+                total.counts = [a + b for a, b in zip(total.counts, hist.counts)]
+                total.sum += hist.sum
+                total.count += hist.count
+                if label_map.get("status") == "error":
+                    errors[span] = errors.get(span, 0) + hist.count
+        return {
+            span: {
+                "count": h.count,
+                "errors": errors.get(span, 0),
+                "p50_ms": round(h.quantile(0.5) * 1000, 1),
+                "p95_ms": round(h.quantile(0.95) * 1000, 1),
+                "avg_ms": round(h.sum / h.count * 1000, 1),
+            }
+            for span, h in sorted(merged.items())
+        }
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            histograms = [(k, list(h.counts), h.sum, h.count) for k, h in sorted(self._histograms.items())]
+            counters = sorted(self._counters.items())
+
+        lines: List[str] = []
+        described = set()
+
+        def describe(name: str, kind: str):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), counts, total, count in histograms:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(list(self.buckets) + ["+Inf"], counts):
+                cumulative += n
+                le = bound if isinstance(bound, str) else repr(float(bound))
+                lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total!r}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value!r}")
+        if DEPLOYMENT:
+            lines.append("# TYPE rift_build_info gauge")
+            lines.append(f"rift_build_info{_labels((('deployment', DEPLOYMENT),))} 1")
+        return "\n".join(lines) + "\n"
+
+    # ── OTLP-style JSON export ───────────────────────────────────
+
+    def _export(self, span: Span):
+        attrs = {"run_id": span.run_id, **span.attrs} if span.run_id else dict(span.attrs)
+        record = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.start_ns + int(span.duration * 1e9)),
+            "attributes": [_otlp_attr(k, v) for k, v in attrs.items() if v is not None],
+            "status": {"code": 2 if span.status == "error" else 1},
+        }
+        if span.parent_id:
+            record["parentSpanId"] = span.parent_id
+        with self._export_lock:
+            self._export_buffer.append(record)
+            if len(self._export_buffer) >= EXPORT_BATCH:
+                self._write_export()
+
+    def flush(self):
+        """Writes buffered spans to the export file (also runs at exit)."""
+        with self._export_lock:
+            self._write_export()
+
+    def _write_export(self):
+        if not self._export_buffer or not self.export_path:
+            return
+        resource = [_otlp_attr("service.name", SERVICE_NAME)]
+        if DEPLOYMENT:
+            resource.append(_otlp_attr("deployment.environment", DEPLOYMENT))
+        payload = {"resourceSpans": [{
+            "resource": {"attributes": resource},
+            "scopeSpans": [{"scope": {"name": "backend.telemetry"}, "spans": self._export_buffer}],
+        }]}
+        try:
+            with open(self.export_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload) + "\n")
+        except OSError as e:
+            print(f"Telemetry: Could not export spans to {self.export_path}: {e}")
+        self._export_buffer = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _otlp_attr(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# ── Process-wide registry ────────────────────────────────────────
+
+telemetry = Telemetry()
+atexit.register(telemetry.flush)
+
+
+def span(name: str, run_id: Optional[str] = None, **attrs):
+    return telemetry.span(name, run_id, **attrs)
+
+
+def current_run_id() -> Optional[str]:
+    """Run id of the innermost active span in this context (None outside runs)."""
+    current = _current.get()
+    return current.run_id if current else None
+
+
+def process_rss_mb() -> float:
+    """Current resident set size of this process (Linux /proc; elsewhere the high-water mark)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0"):
+    """Serves /metrics from a daemon thread (for worker processes, which have no API)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = telemetry.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    print(f"Telemetry: Serving /metrics on {host}:{port}")
+    return server
+
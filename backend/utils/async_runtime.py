@@ -0,0 +1,48 @@
+"""
+A single process-wide asyncio loop running on a daemon thread.
+
+Graph nodes are synchronous (LangGraph runs them in worker threads), but shared
+network clients (GitHub, Gemini) are async so they can pool connections and share
+rate limits across concurrent runs. Nodes hand coroutines to this loop with
+run_sync(), so every run talks through the same pooled clients.
+"""
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Returns the shared loop, starting its thread on first use."""
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="async-runtime", daemon=True)
+            thread.start()
+            _loop = loop
+        return _loop
+
+
+def run_sync(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """
+    Runs `coro` on the shared loop and blocks the calling thread for its result.
+    If the caller stops waiting (timeout, interrupt), the coroutine is cancelled
+    too, so it releases what it holds instead of running on unobserved.
+    """
+    loop = get_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync() called from the shared loop itself; await the coroutine instead.")
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
@@ -0,0 +1,190 @@
+"""
+Per-run, content-addressed storage for large run artifacts (full container logs).
+
+Blobs live in BLOB_DIR/<run_id>/<sha256> and the agent state only carries their
+reference ("sha256:<hex>"), so a test suite that prints megabytes never makes the
+state that LangGraph passes between nodes (or the worker's memory) grow with it.
+Identical outputs within a run are stored once. GET /runs/{run_id}/blobs/{ref}
+serves a blob back. A run's blobs are removed at API start-up once nothing has
+been written to them for BLOB_TTL seconds.
+
+capture_logs() streams container output into a blob while keeping only a head
+and a tail window in memory: pytest's collection header and its failure/summary
+sections, which is what the debugger and the scoring regexes read.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import deque
+from typing import Iterable, Optional, Tuple, Union
+
+from backend.logger import get_logger
+
+logger = get_logger("blob_store")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_BLOB_DIR = os.path.join(PROJECT_ROOT, "blobs")
+LOG_HEAD_BYTES = int(os.environ.get("LOG_HEAD_BYTES", str(16 * 1024)))
+LOG_TAIL_BYTES = int(os.environ.get("LOG_TAIL_BYTES", str(64 * 1024)))
+BLOB_TTL = float(os.environ.get("BLOB_TTL", str(7 * 24 * 3600)))  # 0 = keep forever
+REF_PREFIX = "sha256:"
+
+_REF_RE = re.compile(r"^sha256:[0-9a-f]{64}$")
+_RUN_ID_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class BlobWriter:
+    """Streams one blob to disk, hashing as it goes; close() returns its reference."""
+
+    def __init__(self, run_dir: str):
+        os.makedirs(run_dir, exist_ok=True)
+        self.run_dir = run_dir
+        self.size = 0
+        self._hash = hashlib.sha256()
+        fd, self._tmp = tempfile.mkstemp(dir=run_dir, suffix=".part")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes):
+        self._hash.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def close(self) -> str:
+        self._file.close()
+        digest = self._hash.hexdigest()
+        final = os.path.join(self.run_dir, digest)
+        if os.path.exists(final):
+            os.remove(self._tmp)  # same content already stored for this run
+        else:
+            os.replace(self._tmp, final)
+        return REF_PREFIX + digest
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self._tmp)
+        except OSError:
+            pass
+
+
+class BlobStore:
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.environ.get("BLOB_DIR", DEFAULT_BLOB_DIR)
+
+    def run_dir(self, run_id: Optional[str]) -> str:
+        run_id = run_id or "_unattached"
+        if not _RUN_ID_RE.match(run_id):
+            raise ValueError(f"Invalid run id for the blob store: {run_id!r}")
+        return os.path.join(self.root, run_id)
+
+    def writer(self, run_id: Optional[str]) -> BlobWriter:
+        return BlobWriter(self.run_dir(run_id))
+
+    def put(self, run_id: Optional[str], data: Union[bytes, str]) -> str:
+        writer = self.writer(run_id)
+        writer.write(data.encode("utf-8") if isinstance(data, str) else data)
+        return writer.close()
+
+    def path(self, run_id: str, ref: str) -> Optional[str]:
+        """Path of a stored blob, or None (also for malformed refs, so nothing outside the run dir is served)."""
+        if not _REF_RE.match(ref or "") or not _RUN_ID_RE.match(run_id or ""):
+            return None
+        path = os.path.join(self.run_dir(run_id), ref[len(REF_PREFIX):])
+        return path if os.path.isfile(path) else None
+
+    def get(self, run_id: str, ref: str) -> Optional[bytes]:
+        path = self.path(run_id, ref)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def prune(self, ttl: float = BLOB_TTL) -> int:
+        """Removes the blobs of runs not written to for `ttl` seconds; returns how many runs were pruned."""
+        from backend.utils.file_utils import prune_run_dirs
+        return prune_run_dirs(self.root, ttl)
+
+
+class LogWindow:
+    """Keeps the first `head` and the last `tail` bytes of a byte stream."""
+
+    def __init__(self, head: int = LOG_HEAD_BYTES, tail: int = LOG_TAIL_BYTES):
+        self.head_limit = head
+        self.tail_limit = tail
+        self.head = bytearray()
+        self._tail: deque = deque()
+        self._tail_size = 0
+        self.total = 0
+
+    def feed(self, chunk: bytes):
+        self.total += len(chunk)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += chunk[:room]
+            chunk = chunk[room:]
+        if not chunk or self.tail_limit <= 0:
+            return
+        self._tail.append(chunk)
+        self._tail_size += len(chunk)
+        while self._tail_size - len(self._tail[0]) >= self.tail_limit:
+            self._tail_size -= len(self._tail.popleft())
+
+    @property
+    def omitted(self) -> int:
+        return max(0, self.total - len(self.head) - min(self._tail_size, self.tail_limit))
+
+    def text(self, ref: Optional[str] = None) -> str:
+        head = bytes(self.head)
+        tail = b"".join(self._tail)[-self.tail_limit:] if self._tail else b""
+        if not self.omitted:
+            return (head + tail).decode("utf-8", errors="replace")
+        # Cut at line boundaries so no partial line (or split UTF-8 sequence) reaches the regexes
+        if b"\n" in head:
+            head = head[:head.rindex(b"\n")]
+        if b"\n" in tail:
+            tail = tail[tail.index(b"\n") + 1:]
+        omitted = self.total - len(head) - len(tail)
+        where = f"; full log: {ref}" if ref else ""
+        return (f"{head.decode('utf-8', errors='replace')}\n\n... [{omitted} bytes omitted{where}] ...\n\n"
+                f"{tail.decode('utf-8', errors='replace')}")
+
+
+def capture_logs(run_id: Optional[str], output: Union[bytes, Iterable[bytes]],
+                 store: Optional[BlobStore] = None) -> Tuple[str, Optional[str], int]:
+    """
+    Streams container output (bytes, or an iterable of chunks as from logs(stream=True))
+    into the run's blob store. Returns (head/tail window text, blob ref, total bytes).
+    """
+    chunks = [output] if isinstance(output, (bytes, bytearray)) else output
+    window = LogWindow()
+    writer = None
+    try:
+        writer = (store or get_blob_store()).writer(run_id)
+    except (OSError, ValueError) as e:
+        logger.warning("BlobStore: Not storing full logs (%s)", e)
+    try:
+        for chunk in chunks:
+            window.feed(chunk)
+            if writer:
+                writer.write(chunk)
+    except BaseException:
+        if writer:
+            writer.abort()
+        raise
+    ref = writer.close() if writer else None
+    return window.text(ref), ref, window.total
+
+
+_store: Optional[BlobStore] = None
+_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        with _lock:
+            if _store is None:
+                _store = BlobStore()
+    return _store
@@ -0,0 +1,308 @@
+"""
+Record / replay of a run's external interactions: Gemini, GitHub REST and Docker.
+
+CASSETTE_MODE=record appends every interaction at the three boundaries to
+CASSETTE_FILE, one JSON object per line (gzip-compressed when the name ends in .gz):
+
+    genai    generate_content / generate_content_stream: model, prompt hash, text chunks, usage
+    github   GitHubClient.request: method, path, status, body
+    docker   containers.run + wait + logs: image, command, exit code, logs
+
+Each interaction is tagged with the run id it belongs to, so a cassette recorded
+on a busy API process still replays one run.
+
+CASSETTE_MODE=replay serves the interactions back in recorded order, per channel,
+without touching the network, the model or a Docker daemon and without waiting
+for them. A replayed run therefore measures only the pipeline's own overhead.
+A call of a different kind than the recording expects raises CassetteMismatch. A
+differing prompt, path or command is reported and replayed anyway. Git itself is
+not recorded: replay against a local mirror of the repository (a path or file://
+repo_url).
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, List, Optional
+
+from backend.telemetry import current_run_id
+
+CHANNELS = ("run", "genai", "github", "docker")  # "run": the HealingRequest that started the run
+USAGE_FIELDS = ("prompt_token_count", "candidates_token_count", "thoughts_token_count",
+                "cached_content_token_count", "total_token_count")
+
+
+class CassetteMiss(Exception):
+    """Replay ran out of recorded interactions for a channel."""
+
+
+class CassetteMismatch(Exception):
+    """The replayed run made a different kind of call than the recording."""
+
+
+class ReplayedError(Exception):
+    """An error recorded from the live service, raised again on replay (keeps its status code)."""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="replace")).hexdigest()[:16]
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str, run_id: Optional[str] = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}'")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[Dict[str, Any]]] = {c: deque() for c in CHANNELS}
+        self.mismatches: List[str] = []
+        if mode == "replay":
+            self._load(run_id)
+
+    def _load(self, run_id: Optional[str]):
+        with _open(self.path, "r") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        for entry in entries:
+            if run_id is None or entry.get("run_id") in (run_id, None):
+                self._queues[entry["channel"]].append(entry)
+        counts = ", ".join(f"{len(q)} {c}" for c, q in self._queues.items())
+        print(f"Cassette: Replaying {counts} interaction(s) from {self.path}")
+
+    def record(self, channel: str, request: Dict[str, Any], response: Dict[str, Any],
+               run_id: Optional[str] = None):
+        entry = {"channel": channel, "run_id": run_id or current_run_id(), "request": request, "response": response}
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock, _open(self.path, "a") as f:
+            f.write(line)
+
+    def replay(self, channel: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Next recorded response on `channel`. `request["kind"]` must match; other fields are compared."""
+        with self._lock:
+            if not self._queues[channel]:
+                raise CassetteMiss(f"No recorded {channel} interaction left for {request}")
+            entry = self._queues[channel].popleft()
+        recorded = entry["request"]
+        if recorded.get("kind") != request.get("kind"):
+            raise CassetteMismatch(f"{channel}: recorded {recorded.get('kind')}, replayed run made {request.get('kind')}")
+        differing = sorted(k for k in request if recorded.get(k) != request[k])
+        if differing:
+            note = f"{channel} {request.get('kind')} differs from the recording in {', '.join(differing)}"
+            self.mismatches.append(note)
+            print(f"Cassette: {note}; replaying anyway.")
+        return entry["response"]
+
+    def remaining(self) -> Dict[str, int]:
+        with self._lock:
+            return {c: len(q) for c, q in self._queues.items() if c != "run"}
+
+    def requests(self) -> List[Dict[str, Any]]:
+        """HealingRequest payloads of the recorded runs (in replay mode: the selected run)."""
+        return [dict(e["response"], run_id=e["run_id"]) for e in self._queues["run"]]
+
+
+# ── Gemini (client.aio.models) ───────────────────────────────────
+
+def _usage(usage) -> Optional[Dict[str, int]]:
+    if usage is None:
+        return None
+    return {k: getattr(usage, k) for k in USAGE_FIELDS if getattr(usage, k, None) is not None}
+
+
+def _error(error: Exception) -> Dict[str, Any]:
+    code = getattr(error, "code", None)
+    return {"error": str(error), "code": code if isinstance(code, int) else None}
+
+
+def _raise_if_error(response: Dict[str, Any]):
+    if "error" in response:
+        raise ReplayedError(response["error"], response.get("code"))
+
+
+class _GenaiModels:
+    def __init__(self, cassette: Cassette, inner=None):
+        self.cassette = cassette
+        self.inner = inner
+
+    async def generate_content(self, model, contents, config=None):
+        request = {"kind": "generate", "model": model, "prompt": _digest(str(contents))}
+        if self.cassette.mode == "replay":
+            response = self.cassette.replay("genai", request)
+            _raise_if_error(response)
+            usage = response.get("usage")
+            return SimpleNamespace(text=response["text"],
+                                   usage_metadata=SimpleNamespace(**usage) if usage else None)
+        try:
+            result = await self.inner.generate_content(model=model, contents=contents, config=config)
+        except Exception as e:
+            self.cassette.record("genai", request, _error(e))
+            raise
+        self.cassette.record("genai", request, {"text": result.text,
+                                                "usage": _usage(getattr(result, "usage_metadata", None))})
+        return result
+
+    async def generate_content_stream(self, model, contents, config=None):
+        request = {"kind": "stream", "model": model, "prompt": _digest(str(contents))}
+        if self.cassette.mode == "replay":
+            response = self.cassette.replay("genai", request)
+            _raise_if_error(response)
+            return self._replay_stream(response)
+        try:
+            stream = await self.inner.generate_content_stream(model=model, contents=contents, config=config)
+        except Exception as e:
+            self.cassette.record("genai", request, _error(e))
+            raise
+        return self._record_stream(request, stream)
+
+    @staticmethod
+    async def _replay_stream(response: Dict[str, Any]):
+        chunks = response["chunks"] or [""]
+        for i, text in enumerate(chunks):
+            usage = response.get("usage") if i == len(chunks) - 1 else None
+            yield SimpleNamespace(text=text, usage_metadata=SimpleNamespace(**usage) if usage else None)
+
+    async def _record_stream(self, request: Dict[str, Any], stream):
+        chunks, usage = [], None
+        try:
+            async for chunk in stream:
+                chunks.append(chunk.text or "")
+                usage = _usage(getattr(chunk, "usage_metadata", None)) or usage
+                yield chunk
+        finally:
+            # Also on a consumer abort (malformed output): replay then aborts at the same chunk
+            self.cassette.record("genai", request, {"chunks": chunks, "usage": usage})
+
+
+class CassetteGenai:
+    """Stands in for a google.genai Client (only the async models surface the gateway uses)."""
+
+    def __init__(self, cassette: Cassette, inner=None):
+        self.aio = SimpleNamespace(models=_GenaiModels(cassette, inner.aio.models if inner else None))
+
+
+# ── Docker ───────────────────────────────────────────────────────
+
+class _RecordingContainer:
+    def __init__(self, cassette: Cassette, request: Dict[str, Any], inner):
+        self.cassette = cassette
+        self.request = request
+        self.inner = inner
+        self.status: Dict[str, Any] = {}
+
+    def wait(self, timeout=None):
+        self.status = self.inner.wait(timeout=timeout)
+        return self.status
+
+    def logs(self, stdout=True, stderr=True, stream=False):
+        logs = self.inner.logs(stdout=stdout, stderr=stderr, stream=stream)
+        if stream:
+            logs = b"".join(logs)
+        self.cassette.record("docker", self.request, {
+            "status_code": self.status.get("StatusCode"),
+            "logs": logs.decode("utf-8", errors="replace"),
+        })
+        return iter([logs]) if stream else logs
+
+    def remove(self, **kwargs):
+        return self.inner.remove(**kwargs)
+
+
+class _ReplayContainer:
+    def __init__(self, response: Dict[str, Any]):
+        self.response = response
+
+    def wait(self, timeout=None):
+        return {"StatusCode": self.response["status_code"]}
+
+    def logs(self, stdout=True, stderr=True, stream=False):
+        logs = self.response["logs"].encode("utf-8")
+        return iter([logs]) if stream else logs
+
+    def remove(self, **kwargs):
+        pass
+
+
+class CassetteDocker:
+    """Stands in for docker.DockerClient: containers.run(..., detach=True) + wait/logs/remove."""
+
+    def __init__(self, cassette: Cassette, inner=None):
+        self.cassette = cassette
+        self.inner = inner
+        self.containers = self
+
+    def ping(self):
+        return self.inner.ping() if self.inner else True
+
+    def run(self, image, command=None, **kwargs):
+        request = {"kind": "run", "image": image, "command": command}
+        if self.cassette.mode == "replay":
+            return _ReplayContainer(self.cassette.replay("docker", request))
+        return _RecordingContainer(self.cassette, request, self.inner.containers.run(image, command=command, **kwargs))
+
+
+# ── GitHub REST ──────────────────────────────────────────────────
+
+def cassette_github_client(cassette: Cassette, token: Optional[str], base_url: str):
+    """A GitHubClient whose request() is recorded / replayed (ETag and immutable caches still apply)."""
+    from backend.utils.github_client import GitHubClient, GitHubResponse
+
+    class CassetteGitHubClient(GitHubClient):
+        async def request(self, method: str, path: str, json: Any = None, conditional: bool = True):
+            request = {"kind": method.upper(), "path": path, "body": _digest(str(json)) if json else None}
+            if cassette.mode == "replay":
+                response = cassette.replay("github", request)
+                return GitHubResponse(response["status_code"], response["data"], response["headers"])
+            resp = await super().request(method, path, json=json, conditional=conditional)
+            cassette.record("github", request, {"status_code": resp.status_code, "data": resp.data,
+                                                "headers": resp.headers})
+            return resp
+
+    return CassetteGitHubClient(token, base_url)
+
+
+# ── Process-wide cassette ────────────────────────────────────────
+
+_cassette: Optional[Cassette] = None
+_configured = False
+_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The active cassette (from CASSETTE_MODE / CASSETTE_FILE, or use_cassette()), else None."""
+    global _cassette, _configured
+    if _configured:
+        return _cassette
+    with _lock:
+        if not _configured:
+            mode = os.environ.get("CASSETTE_MODE", "").lower()
+            if mode:
+                path = os.environ.get("CASSETTE_FILE", "cassette.jsonl.gz")
+                _cassette = Cassette(path, mode, os.environ.get("CASSETTE_RUN_ID") or None)
+                print(f"Cassette: {mode} mode, file {path}")
+            _configured = True
+    return _cassette
+
+
+def use_cassette(cassette: Optional[Cassette]):
+    """Installs `cassette` for this process (None turns recording/replay off) and drops clients built without it."""
+    global _cassette, _configured
+    from backend.utils import clients, github_client, llm_gateway
+    with _lock:
+        _cassette, _configured = cassette, True
+    clients._genai_clients.clear()
+    clients._docker_client = None
+    github_client._clients.clear()
+    llm_gateway._gateways.clear()
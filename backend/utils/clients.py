@@ -0,0 +1,73 @@
+"""
+Process-wide SDK clients, created on first use.
+
+google.genai and docker are slow to import and their clients hold connection
+pools, so nodes share one instance each instead of importing at module load and
+building a new client per call. Importing this module is free.
+
+With a cassette active (utils/cassette.py) the clients record their calls, or are
+replaced by replaying stand-ins that never import the SDKs.
+"""
+import os
+import threading
+from typing import Dict, Optional
+
+from backend.logger import get_logger
+
+logger = get_logger("clients")
+_lock = threading.Lock()
+_genai_clients: Dict[str, object] = {}
+_docker_client = None
+
+
+def get_genai_client(api_key: Optional[str] = None):
+    """Shared google.genai Client for `api_key` (defaults to GOOGLE_API_KEY)."""
+    api_key = api_key or os.environ.get("GOOGLE_API_KEY")
+    client = _genai_clients.get(api_key)
+    if client is None:
+        with _lock:
+            client = _genai_clients.get(api_key)
+            if client is None:
+                from backend.utils.cassette import CassetteGenai, get_cassette
+                cassette = get_cassette()
+                if cassette and cassette.mode == "replay":
+                    client = CassetteGenai(cassette)
+                else:
+                    from google import genai
+                    client = genai.Client(api_key=api_key)
+                    if cassette:
+                        client = CassetteGenai(cassette, client)
+                _genai_clients[api_key] = client
+    return client
+
+
+def get_docker_client():
+    """
+    Shared Docker client. Only a client that answered ping() is cached, so a daemon
+    that was down at first use is retried on the next call.
+    """
+    global _docker_client
+    if _docker_client is not None:
+        return _docker_client
+    from backend.utils.cassette import CassetteDocker, get_cassette
+    cassette = get_cassette()
+    if cassette and cassette.mode == "replay":
+        _docker_client = CassetteDocker(cassette)
+        return _docker_client
+    import docker
+    with _lock:
+        if _docker_client is not None:
+            return _docker_client
+        try:
+            client = docker.from_env()
+            client.ping()
+        except Exception as e:
+            # Fallback for Windows named pipe if from_env fails
+            logger.warning("docker.from_env() failed (%s), attempting Windows named pipe connection...", e)
+            client = docker.DockerClient(base_url='npipe:////./pipe/docker_engine')
+            try:
+                client.ping()
+            except Exception:
+                return client  # not cached: the next call retries both
+        _docker_client = CassetteDocker(cassette, client) if cassette else client
+        return _docker_client
@@ -0,0 +1,83 @@
+"""
+Package caches shared by test containers whose repos declare the same dependencies.
+
+A repo's dependency hash covers its root-level manifests (requirements.txt,
+pyproject.toml, setup.py, package.json, package-lock.json). The tester mounts
+DEPENDENCY_CACHE_DIR/<stack>-<hash> as the container's pip / npm cache, so once
+one run has installed a dependency set, every later run with the same hash
+installs from local wheels and tarballs instead of the network. Batches
+(backend/batch.py) group repos by this hash and let one run warm the cache
+before the rest of its group starts.
+
+DEPENDENCY_CACHE=0 turns the mounts off.
+"""
+import hashlib
+import os
+from typing import Callable, Dict, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DEPENDENCY_CACHE_DIR = os.path.join(PROJECT_ROOT, "dep_cache")
+
+PYTHON_MANIFESTS = ("requirements.txt", "pyproject.toml", "setup.py")
+NODE_MANIFESTS = ("package.json", "package-lock.json")
+MANIFESTS = PYTHON_MANIFESTS + NODE_MANIFESTS
+
+# Where each stack's image keeps its package cache
+_CACHE_MOUNTS = {"PYTHON": "/root/.cache/pip", "NODE": "/root/.npm", "UNKNOWN": "/root/.cache/pip"}
+
+
+def dependency_hash(read: Callable[[str], Optional[str]]) -> Optional[str]:
+    """
+    Hash of the root manifests, given `read(name)` -> contents or None if absent.
+    None when the repo declares no dependencies. Surrounding whitespace is ignored,
+    so a working tree and `git show` of the same file agree.
+    """
+    digest = hashlib.sha256()
+    found = False
+    for name in MANIFESTS:
+        content = read(name)
+        if content is None:
+            continue
+        found = True
+        digest.update(f"{name}\0{content.strip()}\0".encode("utf-8", errors="replace"))
+    return digest.hexdigest()[:16] if found else None
+
+
+def manifest_stack(paths) -> str:
+    """Discovery's stack rules applied to a repo's file listing (for the batch probe, which has no checkout)."""
+    paths = [p for p in paths if "node_modules" not in p]
+    names = {p.rsplit("/", 1)[-1] for p in paths if p.count("/") <= 3}
+    if names & set(PYTHON_MANIFESTS) or any(p.endswith(".py") for p in paths):
+        return "PYTHON"
+    if "package.json" in names:
+        return "NODE"
+    return "UNKNOWN"
+
+
+def read_manifest(repo_dir: str) -> Callable[[str], Optional[str]]:
+    def read(name: str) -> Optional[str]:
+        path = os.path.join(repo_dir, name)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    return read
+
+
+def cache_key(stack: str, dep_hash: Optional[str]) -> str:
+    """Names a dependency set: its cache directory, and its group in a batch."""
+    return f"{stack.lower()}-{dep_hash or 'none'}"
+
+
+def cache_volumes(stack: str, dep_hash: Optional[str]) -> Dict[str, Dict[str, str]]:
+    """Docker volume mapping for the shared package cache of this dependency set ({} when disabled)."""
+    if os.environ.get("DEPENDENCY_CACHE", "1") == "0":
+        return {}
+    root = os.environ.get("DEPENDENCY_CACHE_DIR", DEFAULT_DEPENDENCY_CACHE_DIR)
+    host_dir = os.path.join(root, cache_key(stack, dep_hash))
+    try:
+        os.makedirs(host_dir, exist_ok=True)
+    except OSError as e:
+        print(f"DependencyCache: Not mounting a package cache ({e})")
+        return {}
+    return {os.path.abspath(host_dir): {"bind": _CACHE_MOUNTS.get(stack, _CACHE_MOUNTS["UNKNOWN"]), "mode": "rw"}}
@@ -2,6 +2,7 @@ import os
 import shutil
 import stat
 import subprocess
+import time
 
 def remove_readonly(func, path, _):
     """Force-delete read-only files on Windows (needed for .git dirs)."""
@@ -44,3 +45,54 @@ def cleanup_directory(directory_path: str):
     
     print(f"File Utils: Cleanup successful.")
     return True
+
+
+def prune_run_dirs(root: str, ttl: float) -> int:
+    """
+    Removes the per-run directories under `root` (blobs, profiles) not written to for
+    `ttl` seconds. Returns how many were removed; ttl <= 0 keeps everything.
+    """
+    if ttl <= 0 or not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - ttl
+    removed = 0
+    for entry in os.scandir(root):
+        if not entry.is_dir(follow_symlinks=False):
+            continue
+        try:
+            newest = max([entry.stat().st_mtime] + [f.stat().st_mtime for f in os.scandir(entry.path)])
+        except OSError:
+            continue
+        if newest < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+# Generated artifacts that must never be committed back to the target repo.
+WORKSPACE_EXCLUDES = ("__pycache__/", "*.py[cod]", ".pytest_cache/", ".env", "*.rift-tmp")
+
+
+def configure_workspace_excludes(repo_path: str) -> bool:
+    """
+    Writes the generated-artifact patterns to .git/info/exclude once, at clone time.
+    Unlike a committed .gitignore this never touches the target repo's history,
+    and it lets the Git Node stage individual paths without re-indexing the tree.
+    """
+    exclude_path = os.path.join(repo_path, ".git", "info", "exclude")
+    try:
+        os.makedirs(os.path.dirname(exclude_path), exist_ok=True)
+        existing = ""
+        if os.path.exists(exclude_path):
+            with open(exclude_path, "r", encoding="utf-8") as f:
+                existing = f.read()
+        missing = [p for p in WORKSPACE_EXCLUDES if p not in existing.splitlines()]
+        if missing:
+            with open(exclude_path, "a", encoding="utf-8") as f:
+                if existing and not existing.endswith("\n"):
+                    f.write("\n")
+                f.write("\n".join(missing) + "\n")
+        return True
+    except OSError as e:
+        print(f"File Utils: WARNING - Could not write workspace excludes: {e}")
+        return False
@@ -0,0 +1,234 @@
+"""
+Shared async GitHub REST client used by the Discovery and Git nodes.
+
+- One pooled httpx.AsyncClient per (API base URL, token), living on the shared
+  async runtime loop, so every run reuses the same keep-alive connections.
+- Conditional requests: GET responses carrying an ETag are cached and revalidated
+  with If-None-Match; a 304 is served from cache and does not cost rate limit.
+- Immutable lookups (/user, a repo's default branch) are cached for the process lifetime.
+- Rate-limit aware: honours Retry-After / X-RateLimit-Reset on 403/429 and waits
+  before sending when the remaining quota is known to be exhausted.
+- Readiness polling (e.g. a freshly created fork) uses exponential backoff with jitter.
+"""
+import asyncio
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from backend.logger import get_logger
+from backend.utils.async_runtime import run_sync
+
+logger = get_logger("github_client")
+
+DEFAULT_API_URL = "https://api.github.com"
+REQUEST_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+MAX_RATE_LIMIT_WAIT = 60.0   # never sleep longer than this for a single rate-limit window
+MAX_RETRIES = 3
+
+
+@dataclass
+class GitHubResponse:
+    status_code: int
+    data: Any = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    @property
+    def text(self) -> str:
+        return str(self.data)
+
+
+def parse_repo_slug(url: str) -> Optional[Tuple[str, str]]:
+    """'https://github.com/owner/repo(.git)' (or any path ending in owner/repo) -> (owner, repo)."""
+    clean = url.replace("https://", "").replace("http://", "")
+    if clean.endswith(".git"):
+        clean = clean[:-4]
+    parts = clean.strip("/").split("/")
+    if len(parts) < 3:
+        return None
+    return parts[-2], parts[-1]
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with 'equal jitter': half fixed, half random."""
+    ceiling = min(cap, base * (2 ** attempt))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class GitHubClient:
+    def __init__(self, token: Optional[str], base_url: str = DEFAULT_API_URL):
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self._client: Optional[httpx.AsyncClient] = None
+        self._etag_cache: Dict[str, Tuple[str, Any]] = {}
+        self._immutable: Dict[str, Any] = {}
+        self._rate_remaining: Optional[int] = None
+        self._rate_reset: float = 0.0
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"Accept": "application/vnd.github.v3+json"}
+            if self.token:
+                headers["Authorization"] = f"token {self.token}"
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+
+    # ── Core request path ────────────────────────────────────────────────
+
+    def _record_rate_limit(self, headers: httpx.Headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is not None and remaining.isdigit():
+            self._rate_remaining = int(remaining)
+        if reset is not None and reset.isdigit():
+            self._rate_reset = float(reset)
+
+    def _rate_limit_wait(self, resp: httpx.Response) -> Optional[float]:
+        """Seconds to wait before retrying a throttled response, or None if not throttled."""
+        if resp.status_code not in (403, 429):
+            return None
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), MAX_RATE_LIMIT_WAIT)
+            except ValueError:
+                pass
+        if resp.headers.get("X-RateLimit-Remaining") == "0":
+            return min(max(0.0, self._rate_reset - time.time()), MAX_RATE_LIMIT_WAIT)
+        return None  # a bare 429 falls back to jittered backoff in request()
+
+    async def request(self, method: str, path: str, json: Any = None, conditional: bool = True) -> GitHubResponse:
+        method = method.upper()
+        use_etag = conditional and method == "GET"
+
+        for attempt in range(MAX_RETRIES + 1):
+            # Known-exhausted quota: wait for the window instead of burning a request
+            if self._rate_remaining == 0 and self._rate_reset > time.time():
+                await asyncio.sleep(min(self._rate_reset - time.time(), MAX_RATE_LIMIT_WAIT))
+
+            headers = {}
+            cached = self._etag_cache.get(path) if use_etag else None
+            if cached:
+                headers["If-None-Match"] = cached[0]
+
+            resp = await self._http().request(method, path, json=json, headers=headers)
+            self._record_rate_limit(resp.headers)
+
+            if resp.status_code == 304 and cached:
+                return GitHubResponse(200, cached[1], dict(resp.headers), from_cache=True)
+
+            wait = self._rate_limit_wait(resp)
+            if wait is None and resp.status_code == 429:
+                wait = backoff_delay(attempt)
+            if wait is not None and attempt < MAX_RETRIES:
+                logger.warning("GitHub: Rate limited (%s) on %s %s. Retrying in %.1fs...",
+                               resp.status_code, method, path, wait)
+                await asyncio.sleep(wait)
+                continue
+
+            try:
+                data = resp.json() if resp.content else None
+            except ValueError:
+                data = resp.text
+
+            etag = resp.headers.get("ETag")
+            if use_etag and resp.status_code == 200 and etag:
+                self._etag_cache[path] = (etag, data)
+            return GitHubResponse(resp.status_code, data, dict(resp.headers))
+
+        return GitHubResponse(resp.status_code, None, dict(resp.headers))
+
+    async def get(self, path: str) -> GitHubResponse:
+        return await self.request("GET", path)
+
+    async def post(self, path: str, json: Any = None) -> GitHubResponse:
+        return await self.request("POST", path, json=json)
+
+    # ── Cached immutable lookups ─────────────────────────────────────────
+
+    async def get_authenticated_login(self) -> Optional[str]:
+        if "login" not in self._immutable:
+            resp = await self.get("/user")
+            if not resp.ok:
+                logger.error("GitHub: Failed to get auth user: %s %s", resp.status_code, resp.text)
+                return None
+            self._immutable["login"] = resp.data["login"]
+        return self._immutable["login"]
+
+    async def get_default_branch(self, owner: str, repo: str, fallback: str = "main") -> str:
+        key = f"default_branch:{owner}/{repo}"
+        if key not in self._immutable:
+            resp = await self.get(f"/repos/{owner}/{repo}")
+            if not resp.ok:
+                return fallback
+            self._immutable[key] = (resp.data or {}).get("default_branch", fallback)
+        return self._immutable[key]
+
+    # ── Higher-level operations ──────────────────────────────────────────
+
+    async def repo_exists(self, owner: str, repo: str) -> bool:
+        return (await self.get(f"/repos/{owner}/{repo}")).ok
+
+    async def wait_for_repo(self, owner: str, repo: str, timeout: float = 30.0,
+                            base_delay: float = 0.5, max_delay: float = 8.0) -> bool:
+        """Polls until the repo is readable, backing off with jitter between probes."""
+        deadline = time.monotonic() + timeout
+        attempt = 0
+        while True:
+            # Bypass ETag revalidation: a cached 404 body is never useful here
+            if (await self.request("GET", f"/repos/{owner}/{repo}", conditional=False)).ok:
+                return True
+            delay = backoff_delay(attempt, base=base_delay, cap=max_delay)
+            if time.monotonic() + delay > deadline:
+                return False
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def create_fork(self, owner: str, repo: str) -> GitHubResponse:
+        return await self.post(f"/repos/{owner}/{repo}/forks")
+
+    async def create_pull_request(self, owner: str, repo: str, payload: Dict[str, Any]) -> GitHubResponse:
+        return await self.post(f"/repos/{owner}/{repo}/pulls", json=payload)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_clients: Dict[Tuple[str, Optional[str]], GitHubClient] = {}
+
+
+def get_github_client(token: Optional[str] = None) -> GitHubClient:
+    """
+    Returns the shared client for the current GITHUB_API_URL and token.
+    The client (and its connection pool / caches) lives for the process lifetime.
+    """
+    token = token if token is not None else os.environ.get("GITHUB_TOKEN")
+    base_url = os.environ.get("GITHUB_API_URL", DEFAULT_API_URL).rstrip("/")
+    key = (base_url, token)
+    client = _clients.get(key)
+    if client is None:
+        from backend.utils.cassette import cassette_github_client, get_cassette
+        cassette = get_cassette()
+        new = cassette_github_client(cassette, token, base_url) if cassette else GitHubClient(token, base_url)
+        client = _clients.setdefault(key, new)
+    return client
+
+
+def github_sync(coro, timeout: Optional[float] = 120.0):
+    """Runs a GitHubClient coroutine from a synchronous node."""
+    return run_sync(coro, timeout=timeout)
@@ -0,0 +1,273 @@
+"""
+Incremental parser for the single JSON object the LLM nodes ask Gemini for.
+
+Text is fed as it streams in. String field values are decoded on the fly and
+reported through callbacks while they are still arriving (so the fixer can write
+`fixed_code` to disk and validate it as soon as the field closes), and anything
+that cannot be the start of the expected object raises MalformedStream right
+away instead of after the whole generation.
+
+Tolerates leading whitespace and a ```json fence. Non-string values (numbers,
+lists, nested objects) are collected raw and decoded when they end.
+"""
+import json
+import re
+from typing import Any, Callable, Dict, Optional
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_STRING_RUN = re.compile(r'[^"\\]+')
+
+
+class MalformedStream(ValueError):
+    pass
+
+
+class JsonObjectStream:
+    def __init__(self,
+                 on_field_start: Optional[Callable[[str], None]] = None,
+                 on_field_chunk: Optional[Callable[[str, str], None]] = None,
+                 on_field_end: Optional[Callable[[str, Any], None]] = None):
+        self.on_field_start = on_field_start
+        self.on_field_chunk = on_field_chunk
+        self.on_field_end = on_field_end
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self.received = 0
+        self._state = "start"
+        self._fence = ""          # partial ``` fence before the object
+        self._key = ""
+        self._buf: list = []      # decoded pieces of the current string
+        self._escape: Optional[str] = None   # None, "" right after a backslash, or "u" + hex digits
+        self._high_surrogate: Optional[int] = None
+        self._raw: list = []      # raw text of the current non-string value
+        self._depth = 0
+        self._raw_in_string = False
+        self._raw_escape = False
+
+    # ── Public API ───────────────────────────────────────────────
+
+    def feed(self, text: str):
+        self.received += len(text)
+        i, n = 0, len(text)
+        while i < n:
+            i = getattr(self, f"_s_{self._state}")(text, i)
+
+    @property
+    def started(self) -> bool:
+        """True once the opening '{' has been read (a reply failing before that is not JSON at all)."""
+        return self._state != "start"
+
+    def close(self) -> Dict[str, Any]:
+        """Returns the parsed fields; raises MalformedStream if the object never closed."""
+        if not self.done:
+            raise MalformedStream(f"stream ended inside the JSON object (state={self._state})")
+        return self.fields
+
+    # ── States: each consumes from text[i:] and returns the new index ──
+
+    def _fail(self, text: str, i: int, expected: str):
+        got = text[i:i + 20]
+        raise MalformedStream(f"expected {expected} at char {self.received - len(text) + i}, got {got!r}")
+
+    def _s_start(self, text: str, i: int) -> int:
+        ch = text[i]
+        if self._fence or ch == "`":
+            # Skip a ```lang fence line
+            self._fence += ch
+            if ch == "\n":
+                self._fence = ""
+            elif len(self._fence) <= 3 and ch != "`":
+                self._fail(text, i, "'```'")
+            return i + 1
+        if ch.isspace():
+            return i + 1
+        if ch != "{":
+            self._fail(text, i, "'{'")
+        self._state = "key_or_end"
+        return i + 1
+
+    def _s_key_or_end(self, text: str, i: int) -> int:
+        ch = text[i]
+        if ch.isspace():
+            return i + 1
+        if ch == "}" and not self.fields:
+            return self._finish(i)
+        if ch != '"':
+            self._fail(text, i, "a field name")
+        self._state = "key"
+        self._buf = []
+        return i + 1
+
+    def _s_key(self, text: str, i: int) -> int:
+        i, closed = self._read_string(text, i)
+        if closed:
+            self._key = "".join(self._buf)
+            self._buf = []
+            self._state = "colon"
+        return i
+
+    def _s_colon(self, text: str, i: int) -> int:
+        ch = text[i]
+        if ch.isspace():
+            return i + 1
+        if ch != ":":
+            self._fail(text, i, "':'")
+        self._state = "value"
+        return i + 1
+
+    def _s_value(self, text: str, i: int) -> int:
+        ch = text[i]
+        if ch.isspace():
+            return i + 1
+        if self.on_field_start:
+            self.on_field_start(self._key)
+        if ch == '"':
+            self._state = "string_value"
+            self._buf = []
+            return i + 1
+        if ch in "}],:":
+            self._fail(text, i, "a value")
+        self._state = "raw_value"
+        self._raw, self._depth = [], 0
+        self._raw_in_string = self._raw_escape = False
+        return i
+
+    def _s_string_value(self, text: str, i: int) -> int:
+        start_len = len(self._buf)
+        i, closed = self._read_string(text, i)
+        if self.on_field_chunk and len(self._buf) > start_len:
+            self.on_field_chunk(self._key, "".join(self._buf[start_len:]))
+        if closed:
+            self._end_field("".join(self._buf))
+        return i
+
+    def _s_raw_value(self, text: str, i: int) -> int:
+        ch = text[i]
+        if self._raw_in_string:
+            if self._raw_escape:
+                self._raw_escape = False
+            elif ch == "\\":
+                self._raw_escape = True
+            elif ch == '"':
+                self._raw_in_string = False
+        elif ch == '"':
+            self._raw_in_string = True
+        elif ch in "[{":
+            self._depth += 1
+        elif ch in "]}" and self._depth:
+            self._depth -= 1
+        elif ch in ",}" and self._depth == 0:
+            raw = "".join(self._raw).strip()
+            try:
+                value = json.loads(raw)
+            except json.JSONDecodeError:
+                self._fail(text, i, f"a JSON value for '{self._key}'")
+            self._end_field(value)
+            return i  # the comma/brace is handled by the next state
+        self._raw.append(ch)
+        return i + 1
+
+    def _s_comma_or_end(self, text: str, i: int) -> int:
+        ch = text[i]
+        if ch.isspace():
+            return i + 1
+        if ch == ",":
+            self._state = "key_after_comma"
+            return i + 1
+        if ch == "}":
+            return self._finish(i)
+        self._fail(text, i, "',' or '}'")
+
+    def _s_key_after_comma(self, text: str, i: int) -> int:
+        ch = text[i]
+        if ch.isspace():
+            return i + 1
+        if ch != '"':
+            self._fail(text, i, "a field name")
+        self._state = "key"
+        self._buf = []
+        return i + 1
+
+    def _s_trailer(self, text: str, i: int) -> int:
+        ch = text[i]
+        if ch.isspace() or ch == "`":
+            return i + 1
+        self._fail(text, i, "end of stream")
+
+    # ── Helpers ──────────────────────────────────────────────────
+
+    def _finish(self, i: int) -> int:
+        self.done = True
+        self._state = "trailer"
+        return i + 1
+
+    def _end_field(self, value: Any):
+        self.fields[self._key] = value
+        self._buf = []
+        self._state = "comma_or_end"
+        if self.on_field_end:
+            self.on_field_end(self._key, value)
+
+    def _read_string(self, text: str, i: int):
+        """Decodes string content into self._buf. Returns (index, closed)."""
+        n = len(text)
+        while i < n:
+            if self._escape is not None:
+                i = self._read_escape(text, i)
+                continue
+            run = _STRING_RUN.match(text, i)
+            if run:
+                self._push(run.group())
+                i = run.end()
+                continue
+            ch = text[i]
+            if ch == '"':
+                self._flush_surrogate()
+                return i + 1, True
+            self._escape = ""   # backslash
+            i += 1
+        return i, False
+
+    def _read_escape(self, text: str, i: int) -> int:
+        if self._escape == "":
+            ch = text[i]
+            if ch == "u":
+                self._escape = "u"
+                return i + 1
+            if ch not in _ESCAPES:
+                self._fail(text, i, "a valid escape")
+            self._escape = None
+            self._push(_ESCAPES[ch])
+            return i + 1
+        # Collecting the 4 hex digits of \uXXXX (possibly split across chunks)
+        need = 5 - len(self._escape)
+        digits = text[i:i + need]
+        self._escape += digits
+        if len(self._escape) == 5:
+            try:
+                code = int(self._escape[1:], 16)
+            except ValueError:
+                self._fail(text, i, "4 hex digits")
+            self._escape = None
+            self._push_code_unit(code)
+        return i + len(digits)
+
+    def _push_code_unit(self, code: int):
+        if 0xD800 <= code <= 0xDBFF:
+            self._flush_surrogate()
+            self._high_surrogate = code
+        elif 0xDC00 <= code <= 0xDFFF and self._high_surrogate is not None:
+            pair = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+            self._buf.append(chr(pair))
+        else:
+            self._push(chr(code))
+
+    def _push(self, s: str):
+        self._flush_surrogate()
+        self._buf.append(s)
+
+    def _flush_surrogate(self):
+        if self._high_surrogate is not None:
+            self._buf.append("\ufffd")  # lone high surrogate
+            self._high_surrogate = None
@@ -0,0 +1,354 @@
+"""
+Shared async gateway for Gemini calls made by the Debugger and Fixer nodes.
+
+- One genai client per API key (see clients.get_genai_client), called through its
+  async surface on the shared async runtime loop, so all runs reuse its pool.
+- A process-wide limiter with two token buckets: requests/min and tokens/min.
+  Waiting calls are queued per run and served round-robin, so one busy run cannot
+  starve the others and concurrent runs share the quota evenly.
+- 429 / RESOURCE_EXHAUSTED puts the whole gateway into a cooldown (honouring the
+  server's retry delay when given) and retries with jittered backoff, instead of
+  every run sleeping in its own thread and retrying into the same wall.
+- Every completed call is accounted per run/node/model in utils/token_usage.py,
+  and a call that would exceed its run's token budget is refused before it is sent.
+"""
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from backend.logger import get_logger
+from backend.telemetry import span
+from backend.utils.async_runtime import run_sync
+from backend.utils.github_client import backoff_delay
+from backend.utils.token_usage import ledger, usage_counts
+
+logger = get_logger("llm_gateway")
+
+REQUESTS_PER_MINUTE = float(os.environ.get("LLM_REQUESTS_PER_MINUTE", "60"))
+TOKENS_PER_MINUTE = float(os.environ.get("LLM_TOKENS_PER_MINUTE", "1000000"))
+MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "5"))
+EXPECTED_OUTPUT_TOKENS = 2048   # reserved per call until the real usage is known
+RETRYABLE_CODES = (429, 503)
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Refills continuously at `rate_per_minute`, holding at most `capacity` tokens."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it is now). Oversized requests wait for a full bucket."""
+        self._refill()
+        needed = min(amount, self.capacity) - self.tokens
+        return 0.0 if needed <= 0 else needed / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= amount  # may go negative for oversized requests: later calls pay it back
+
+    def give_back(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class FairLimiter:
+    """Round-robin admission across runs, gated by request and token buckets."""
+
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = TOKENS_PER_MINUTE, burst_seconds: float = 60.0):
+        scale = burst_seconds / 60.0
+        self.requests = TokenBucket(requests_per_minute, max(1.0, requests_per_minute * scale))
+        self.tokens = TokenBucket(tokens_per_minute, max(1.0, tokens_per_minute * scale))
+        self.cooldown_until = 0.0
+        self._waiters: "OrderedDict[str, Deque[Tuple[int, asyncio.Future]]]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+
+    async def acquire(self, run_id: Optional[str], tokens: int):
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(run_id or "", deque()).append((tokens, fut))
+        if self._pump_task is None or self._pump_task.done():
+            self._wakeup = asyncio.Event()
+            self._pump_task = asyncio.create_task(self._pump())
+        self._wakeup.set()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Admitted just as the caller was cancelled: return what was taken
+                self.requests.give_back(1)
+                self.tokens.give_back(tokens)
+            raise
+
+    def cooldown(self, seconds: float):
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+    def queued(self) -> int:
+        return sum(len(q) for q in self._waiters.values())
+
+    async def _pump(self):
+        while self._waiters:
+            run_id, queue = next(iter(self._waiters.items()))
+            tokens, fut = queue[0]
+            if fut.cancelled():
+                self._pop(run_id)
+                continue
+            wait = max(self.cooldown_until - time.monotonic(),
+                       self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if wait > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self._pop(run_id)
+            if not fut.done():
+                fut.set_result(None)
+
+    def _pop(self, run_id: str):
+        queue = self._waiters.pop(run_id)
+        queue.popleft()
+        if queue:
+            self._waiters[run_id] = queue  # re-insert at the back: next run gets the next turn
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        return code
+    text = str(error)
+    if "429" in text or "RESOURCE_EXHAUSTED" in text:
+        return 429
+    if "503" in text or "UNAVAILABLE" in text:
+        return 503
+    return None
+
+
+def _server_retry_delay(error: Exception) -> Optional[float]:
+    """Gemini puts e.g. 'retryDelay': '13s' (or 'retry in 13.2s') in its 429 payload."""
+    match = re.search(r"retry(?:Delay'?\"?:\s*'?\"?| in )(\d+(?:\.\d+)?)s", str(error))
+    return float(match.group(1)) if match else None
+
+
+@dataclass
+class StreamResult:
+    text: str
+    ttfb_ms: float          # request sent -> first chunk
+    latency_ms: float       # request sent -> stream finished
+    chunks: int
+    total_tokens: Optional[int] = None
+
+
+class LLMGateway:
+    def __init__(self, client, limiter: Optional[FairLimiter] = None,
+                 max_concurrency: int = MAX_CONCURRENCY, max_retries: int = MAX_RETRIES):
+        self.client = client
+        self.limiter = limiter or FairLimiter()
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.stats = {"calls": 0, "rate_limited": 0, "failed": 0, "hedged": 0}
+
+    async def generate(self, prompt: str, model: str, config: Optional[Dict[str, Any]] = None,
+                       run_id: Optional[str] = None, node: Optional[str] = None):
+        """Rate-limited generate_content; returns the genai response."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        prompt_tokens = estimate_tokens(prompt)
+        ledger.check(run_id, prompt_tokens)
+        reserved = prompt_tokens + EXPECTED_OUTPUT_TOKENS
+
+        for attempt in range(self.max_retries + 1):
+            with span("llm.wait", run_id, model=model):
+                await self.limiter.acquire(run_id, reserved)
+            try:
+                async with self._slots:
+                    started = time.perf_counter()
+                    with span("llm.generate", run_id, model=model, attempt=attempt):
+                        response = await self.client.aio.models.generate_content(
+                            model=model, contents=prompt, config=config
+                        )
+            except BaseException as e:
+                # Failed or cancelled (e.g. the losing side of a hedge): nothing was spent
+                self.limiter.tokens.give_back(reserved)
+                if not isinstance(e, Exception):
+                    raise
+                self._on_error(e, attempt, model)
+                continue
+
+            self.stats["calls"] += 1
+            counts = usage_counts(getattr(response, "usage_metadata", None), prompt_tokens,
+                                  estimate_tokens(getattr(response, "text", None) or ""))
+            self._settle(reserved, counts["total_tokens"])
+            ledger.record(run_id, node, model, counts, (time.perf_counter() - started) * 1000)
+            return response
+
+    async def generate_hedged(self, prompt: str, model: str, hedge_model: Optional[str], hedge_after: float,
+                              config: Optional[Dict[str, Any]] = None, run_id: Optional[str] = None,
+                              node: Optional[str] = None):
+        """
+        Calls `model`; if it has not answered within `hedge_after` seconds, also calls
+        `hedge_model` and takes whichever finishes first. Returns (response, model_used).
+        """
+        primary = asyncio.ensure_future(self.generate(prompt, model, config, run_id, node))
+        if not hedge_model or hedge_after <= 0:
+            return await primary, model
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result(), model
+
+        logger.info("LLM Gateway: %s slower than %.1fs; hedging with %s.", model, hedge_after, hedge_model)
+        self.stats["hedged"] += 1
+        backup = asyncio.ensure_future(self.generate(prompt, hedge_model, config, run_id, node))
+        racers = {primary: model, backup: hedge_model}
+        pending = set(racers)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    return task.result(), racers[task]
+        # Both failed: surface the primary's error
+        return primary.result(), model
+
+    async def generate_stream(self, prompt: str, model: str, on_text: Callable[[str], None],
+                              config: Optional[Dict[str, Any]] = None,
+                              run_id: Optional[str] = None, node: Optional[str] = None) -> StreamResult:
+        """
+        Streams generate_content, handing each text chunk to `on_text` as it arrives.
+        An exception raised by `on_text` (e.g. MalformedStream) aborts the stream and propagates.
+        Rate limits before the first chunk are retried like generate().
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        prompt_tokens = estimate_tokens(prompt)
+        ledger.check(run_id, prompt_tokens)
+        reserved = prompt_tokens + EXPECTED_OUTPUT_TOKENS
+
+        for attempt in range(self.max_retries + 1):
+            with span("llm.wait", run_id, model=model):
+                await self.limiter.acquire(run_id, reserved)
+            ttfb = None
+            parts, usage = [], None
+            try:
+                async with self._slots:
+                    started = time.perf_counter()
+                    with span("llm.stream", run_id, model=model, attempt=attempt) as call:
+                        stream = await self.client.aio.models.generate_content_stream(
+                            model=model, contents=prompt, config=config
+                        )
+                        try:
+                            async for chunk in stream:
+                                if ttfb is None:
+                                    ttfb = (time.perf_counter() - started) * 1000
+                                    call.set(ttfb_ms=round(ttfb, 1))
+                                usage = getattr(chunk, "usage_metadata", None) or usage
+                                text = chunk.text or ""
+                                if text:
+                                    parts.append(text)
+                                    on_text(text)
+                        finally:
+                            # Release the connection now, not when the abandoned generator is collected
+                            aclose = getattr(stream, "aclose", None)
+                            if aclose:
+                                await aclose()
+            except BaseException as e:
+                if ttfb is not None:
+                    # Mid-stream failure (or consumer abort): settle for what streamed, the caller decides
+                    self._settle(reserved, prompt_tokens + estimate_tokens("".join(parts)))
+                    raise
+                self.limiter.tokens.give_back(reserved)
+                if not isinstance(e, Exception):
+                    raise
+                self._on_error(e, attempt, model)
+                continue
+
+            self.stats["calls"] += 1
+            text = "".join(parts)
+            latency = (time.perf_counter() - started) * 1000
+            counts = usage_counts(usage, prompt_tokens, estimate_tokens(text))
+            self._settle(reserved, counts["total_tokens"])
+            ledger.record(run_id, node, model, counts, latency)
+            return StreamResult(text, round(ttfb or latency, 1), round(latency, 1),
+                                len(parts), counts["total_tokens"])
+
+    def _on_error(self, error: Exception, attempt: int, model: str):
+        """Re-raises non-retryable errors; otherwise pauses the whole gateway before the retry."""
+        code = _status_code(error)
+        if code not in RETRYABLE_CODES or attempt >= self.max_retries:
+            self.stats["failed"] += 1
+            raise error
+        self.stats["rate_limited"] += 1
+        wait = _server_retry_delay(error) or backoff_delay(attempt, base=2.0, cap=60.0)
+        # Quota is shared: pause every run, not just this one
+        self.limiter.cooldown(wait)
+        logger.warning("LLM Gateway: %s from %s. All calls paused %.1fs (attempt %d/%d).",
+                       code, model, wait, attempt + 1, self.max_retries + 1)
+
+    def _settle(self, reserved: int, used: Optional[int]):
+        """Settles a token reservation against what the call actually cost."""
+        if not used:
+            return
+        if used < reserved:
+            self.limiter.tokens.give_back(reserved - used)
+        else:
+            self.limiter.tokens.take(used - reserved)
+
+
+_gateways: Dict[Optional[str], LLMGateway] = {}
+
+
+def get_llm_gateway(api_key: Optional[str] = None) -> LLMGateway:
+    from backend.utils.clients import get_genai_client
+    api_key = api_key or os.environ.get("GOOGLE_API_KEY")
+    gateway = _gateways.get(api_key)
+    if gateway is None:
+        gateway = _gateways.setdefault(api_key, LLMGateway(get_genai_client(api_key)))
+    return gateway
+
+
+def llm_generate(prompt: str, model: str, config: Optional[Dict[str, Any]] = None,
+                 run_id: Optional[str] = None, api_key: Optional[str] = None,
+                 timeout: Optional[float] = 600.0, node: Optional[str] = None):
+    """Sync entry point for graph nodes: runs the call on the shared async loop."""
+    return run_sync(get_llm_gateway(api_key).generate(prompt, model, config, run_id, node), timeout=timeout)
+
+
+def llm_generate_hedged(prompt: str, model: str, hedge_model: Optional[str] = None, hedge_after: float = 0.0,
+                        config: Optional[Dict[str, Any]] = None, run_id: Optional[str] = None,
+                        api_key: Optional[str] = None, timeout: Optional[float] = 600.0,
+                        node: Optional[str] = None):
+    """Sync wrapper for generate_hedged(); returns (response, model_used)."""
+    return run_sync(get_llm_gateway(api_key).generate_hedged(prompt, model, hedge_model, hedge_after, config,
+                                                             run_id, node),
+                    timeout=timeout)
+
+
+def llm_generate_stream(prompt: str, model: str, on_text: Callable[[str], None],
+                        config: Optional[Dict[str, Any]] = None, run_id: Optional[str] = None,
+                        api_key: Optional[str] = None, timeout: Optional[float] = 600.0,
+                        node: Optional[str] = None) -> StreamResult:
+    """Sync streaming entry point; `on_text` runs on the shared loop thread, so keep it quick."""
+    return run_sync(get_llm_gateway(api_key).generate_stream(prompt, model, on_text, config, run_id, node),
+                    timeout=timeout)
@@ -0,0 +1,205 @@
+"""
+Per-call model routing for the Debugger and Fixer nodes.
+
+Tiers form an escalation ladder (fast -> standard -> strong). A call starts on the
+fast tier for easy bug classes and first attempts, and on the standard tier (the
+run's `model_name`) otherwise. When a fix leaves the run stuck or regressing, the
+run escalates one tier for its following calls. Tiers whose recorded success rate
+for a (node, bug class) is poor are skipped.
+
+Outcomes are settled by the Tester (did the failure count drop after the fix?) and
+accumulated in a small SQLite routing table (latency, success rate, tokens, cost)
+that persists across runs and processes.
+"""
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.logger import get_logger
+from backend.utils.sqlite_utils import connect_sqlite
+
+logger = get_logger("model_router")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ROUTING_DB = os.environ.get("ROUTING_DB", os.path.join(PROJECT_ROOT, "routing.db"))
+
+# "name=model" pairs, cheapest first. The "standard" tier is replaced by the run's model_name.
+DEFAULT_TIERS = "fast=gemini-2.5-flash-lite,standard=gemini-2.5-flash,strong=gemini-2.5-pro"
+# Approximate blended USD per 1M tokens, used for the routing table's cost column
+DEFAULT_COSTS = "fast=0.2,standard=1.0,strong=5.0"
+
+EASY_BUG_TYPES = ("LINTING", "SYNTAX", "IMPORT", "INDENTATION", "MARKER_CLEANUP")
+HEDGE_AFTER_SECONDS = float(os.environ.get("MODEL_HEDGE_AFTER_SECONDS", "0"))  # 0 = off
+MIN_SAMPLES = 5            # routing-table evidence needed before a tier can be skipped
+MIN_SUCCESS_RATE = 0.25
+
+
+def _pairs(spec: str) -> List[Tuple[str, str]]:
+    return [tuple(p.split("=", 1)) for p in spec.split(",") if "=" in p]
+
+
+def get_tiers(standard_model: Optional[str] = None) -> List[Tuple[str, str]]:
+    tiers = _pairs(os.environ.get("MODEL_TIERS", DEFAULT_TIERS))
+    if standard_model:
+        tiers = [(name, standard_model if name == "standard" else model) for name, model in tiers]
+    return tiers
+
+
+TIER_COSTS = {name: float(cost) for name, cost in _pairs(os.environ.get("MODEL_TIER_COSTS", DEFAULT_COSTS))}
+
+
+def model_cost(model: str, tokens: int) -> float:
+    """Approximate USD for `tokens` on `model`, priced by its tier (models outside the ladder: standard)."""
+    tier = next((name for name, tier_model in get_tiers() if tier_model == model), "standard")
+    return tokens / 1_000_000 * TIER_COSTS.get(tier, 0.0)
+
+
+@dataclass
+class RouteDecision:
+    node: str
+    bug_type: str
+    tier: str
+    model: str
+    hedge_tier: Optional[str] = None
+    hedge_model: Optional[str] = None
+    hedge_after: float = 0.0
+
+
+# ── Routing table ────────────────────────────────────────────────
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_routes (
+    node         TEXT NOT NULL,
+    bug_type     TEXT NOT NULL,
+    tier         TEXT NOT NULL,
+    model        TEXT NOT NULL,
+    calls        INTEGER NOT NULL DEFAULT 0,
+    successes    INTEGER NOT NULL DEFAULT 0,
+    latency_ms   REAL NOT NULL DEFAULT 0,
+    tokens       INTEGER NOT NULL DEFAULT 0,
+    cost_usd     REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (node, bug_type, tier, model)
+);
+"""
+
+
+class RoutingTable:
+    def __init__(self, path: str = ROUTING_DB):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    def record(self, node: str, bug_type: str, tier: str, model: str, success: bool,
+               latency_ms: float = 0.0, tokens: int = 0):
+        cost = tokens / 1_000_000 * TIER_COSTS.get(tier, 0.0)
+        self._conn().execute(
+            "INSERT INTO model_routes (node, bug_type, tier, model, calls, successes, latency_ms, tokens, cost_usd) "
+            "VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?) "
+            "ON CONFLICT (node, bug_type, tier, model) DO UPDATE SET "
+            "calls = calls + 1, successes = successes + excluded.successes, "
+            "latency_ms = latency_ms + excluded.latency_ms, tokens = tokens + excluded.tokens, "
+            "cost_usd = cost_usd + excluded.cost_usd",
+            (node, bug_type, tier, model, int(success), latency_ms, tokens, cost),
+        )
+
+    def success_rate(self, node: str, bug_type: str, tier: str) -> Optional[float]:
+        """None until the tier has MIN_SAMPLES outcomes for this node and bug class."""
+        row = self._conn().execute(
+            "SELECT SUM(calls), SUM(successes) FROM model_routes WHERE node = ? AND bug_type = ? AND tier = ?",
+            (node, bug_type, tier),
+        ).fetchone()
+        calls, successes = row[0] or 0, row[1] or 0
+        return successes / calls if calls >= MIN_SAMPLES else None
+
+    def summary(self) -> List[Dict[str, Any]]:
+        rows = self._conn().execute(
+            "SELECT node, bug_type, tier, model, calls, successes, latency_ms, tokens, cost_usd "
+            "FROM model_routes ORDER BY node, bug_type, tier"
+        ).fetchall()
+        return [{
+            **{k: r[k] for k in ("node", "bug_type", "tier", "model", "calls", "tokens")},
+            "success_rate": round(r["successes"] / r["calls"], 3) if r["calls"] else None,
+            "avg_latency_ms": round(r["latency_ms"] / r["calls"], 1) if r["calls"] else None,
+            "cost_usd": round(r["cost_usd"], 6),
+        } for r in rows]
+
+
+_table: Optional[RoutingTable] = None
+_table_lock = threading.Lock()
+
+
+def get_routing_table() -> RoutingTable:
+    global _table
+    with _table_lock:
+        if _table is None:
+            _table = RoutingTable(os.environ.get("ROUTING_DB", ROUTING_DB))
+        return _table
+
+
+# ── Routing decisions ────────────────────────────────────────────
+
+def choose_model(state: Dict[str, Any], node: str, bug_type: Optional[str] = None) -> RouteDecision:
+    bug_type = (bug_type or "UNKNOWN").upper()
+    standard = state.get('model_name') or "gemini-2.5-flash"
+    if state.get('model_routing', "cascade") != "cascade":
+        return RouteDecision(node, bug_type, "standard", standard)
+
+    tiers = get_tiers(standard)
+    first_attempt = state.get('retry_count', 0) <= 1 and not state.get('fixes_applied')
+    level = 0 if (first_attempt or bug_type in EASY_BUG_TYPES) else 1
+    level = min(level + state.get('model_escalation', 0), len(tiers) - 1)
+
+    # Skip tiers that have proven bad at this kind of bug
+    table = get_routing_table()
+    while level < len(tiers) - 1:
+        rate = table.success_rate(node, bug_type, tiers[level][0])
+        if rate is None or rate >= MIN_SUCCESS_RATE:
+            break
+        level += 1
+
+    tier, model = tiers[level]
+    decision = RouteDecision(node, bug_type, tier, model)
+    if HEDGE_AFTER_SECONDS > 0 and level < len(tiers) - 1:
+        decision.hedge_tier, decision.hedge_model = tiers[level + 1]
+        decision.hedge_after = HEDGE_AFTER_SECONDS
+    return decision
+
+
+def note_attempt(state: Dict[str, Any], decision: RouteDecision, model_used: str,
+                 latency_ms: float, tokens: Optional[int] = None):
+    """Remembers the call so the next Tester pass can record whether it helped."""
+    tier = decision.tier if model_used == decision.model else (decision.hedge_tier or decision.tier)
+    pending = state.get('pending_routes') or []
+    pending.append({**asdict(decision), "tier": tier, "model": model_used,
+                    "latency_ms": round(latency_ms, 1), "tokens": tokens or 0})
+    state['pending_routes'] = pending
+
+
+def settle_routes(state: Dict[str, Any], improved: bool):
+    """
+    Called by the Tester: records the pending calls' outcome in the routing table and
+    escalates the run one tier when the last fix left it stuck or regressing.
+    """
+    pending = state.get('pending_routes') or []
+    if not pending:
+        return
+    table = get_routing_table()
+    for route in pending:
+        try:
+            table.record(route["node"], route["bug_type"], route["tier"], route["model"], improved,
+                         route["latency_ms"], route["tokens"])
+        except sqlite3.Error as e:
+            logger.warning("Model Router: Could not record outcome: %s", e)
+    state['pending_routes'] = []
+    if not improved and state.get('model_routing', "cascade") == "cascade":
+        state['model_escalation'] = state.get('model_escalation', 0) + 1
+        logger.info("Model Router: No improvement; escalating to level %s for the next attempt.",
+                    state['model_escalation'])
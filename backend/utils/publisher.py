@@ -0,0 +1,249 @@
+"""
+Publishing pipeline for the Git Node: pushes the AI_Fix branch and opens the PR.
+
+Three publish modes are supported (HealingRequest.publish_mode):
+  - "eager":      push + PR on every git_node iteration (original behaviour).
+  - "deferred":   commits stay local during the loop; publish_node pushes once at the end.
+  - "background": a per-workspace BackgroundPublisher debounces pushes off the critical
+                  path and opens the PR asynchronously; publish_node flushes it at the end.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Tuple
+
+from backend.events import publish_event
+from backend.logger import get_logger
+from backend.telemetry import span
+from backend.utils.github_client import get_github_client, github_sync, parse_repo_slug
+
+PUBLISH_MODES = ("eager", "deferred", "background")
+
+logger = get_logger("publisher")
+
+
+# Seconds of commit inactivity before the background publisher pushes.
+PUBLISH_DEBOUNCE_SECONDS = float(os.environ.get("PUBLISH_DEBOUNCE_SECONDS", "5"))
+
+# PR creation runs here so it never blocks a node.
+_pr_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pr-publisher")
+
+
+def push_branch(repo_path: str, branch_name: str, rebase: bool = True) -> Tuple[bool, str]:
+    """
+    Pull --rebase and push `branch_name` to origin.
+    With rebase=False only the push is done, which never touches the working tree and
+    is therefore safe while other nodes are still editing the workspace.
+    Returns (pushed, clean_remote_url) where the URL never contains the token.
+    """
+    from git import Repo
+
+    repo = Repo(repo_path)
+    github_token = os.environ.get("GITHUB_TOKEN")
+    clean_remote_url = repo.remotes.origin.url
+
+    if github_token:
+        raw_url = clean_remote_url
+        if "@github.com" in raw_url:
+            raw_url = "https://github.com" + raw_url.split("@github.com", 1)[1]
+            clean_remote_url = raw_url
+
+        if raw_url.startswith("https://"):
+            authed_url = raw_url.replace("https://", f"https://{github_token}@")
+            repo.remotes.origin.set_url(authed_url)
+
+    # Implementation of "git pull --rebase origin {branch_name} && git push origin {branch_name}"
+    # This handles the "failed to push some refs" error gracefully.
+    if rebase:
+        logger.info("Git: Pulling with rebase from origin %s...", branch_name)
+        try:
+            repo.git.pull('origin', branch_name, rebase=True)
+        except Exception as pull_err:
+            logger.warning("Git: Pull --rebase failed (might be first push): %s", pull_err)
+            # If rebase fails, nuke the state and reset to origin
+            try:
+                repo.git.execute(["git", "rebase", "--abort"], with_extended_output=False, ignore_errors=True)
+            except:
+                pass
+            try:
+                repo.git.execute(["git", "reset", "--hard", f"origin/{branch_name}"])
+            except:
+                pass
+
+    with span("git.push", branch=branch_name):
+        repo.remotes.origin.push(refspec=f"{branch_name}:{branch_name}")
+    logger.info("Git: Pushed branch '%s' to origin.", branch_name)
+    return True, clean_remote_url
+
+
+def open_pull_request(clean_remote_url: str, branch_name: str, fix_count: int) -> Optional[str]:
+    """
+    Opens a PR for `branch_name` against the repo's default branch.
+    Returns the PR html_url, or None if it was not created (e.g. 422 already exists).
+    """
+    github_token = os.environ.get("GITHUB_TOKEN")
+    if not github_token:
+        return None
+
+    try:
+        # Parse owner/repo from clean remote URL (no token)
+        slug = parse_repo_slug(clean_remote_url)  # ('owner', 'repo')
+        if not slug:
+            return None
+        owner, repo_name = slug
+        client = get_github_client(github_token)
+
+        # ── DYNAMIC DEFAULT BRANCH FETCH ──
+        # Allow 'master', 'dev', 'trunk' etc. instead of hardcoded 'main' (cached per repo)
+        try:
+            default_branch = github_sync(client.get_default_branch(owner, repo_name))
+            logger.info("Git: Detected default branch -> %s", default_branch)
+        except Exception as db_err:
+            default_branch = "main"
+            logger.warning("Git: Failed to fetch default branch (%s), defaulting to 'main'.", db_err)
+
+        # A 422 means the PR already exists; handled below instead of listing all PRs first.
+        pr_body = {
+            "title": f"[AI-AGENT] Autonomous CI/CD Fix — {branch_name}",
+            "body": (
+                "## AI-Agent Auto-Fix\n\n"
+                "This pull request was created automatically by the **RIFT 2026 CI/CD Healing Agent**.\n\n"
+                f"**Branch:** `{branch_name}`\n"
+                f"**Fixes Applied:** {fix_count}\n\n"
+                "All changes were committed with the `[AI-AGENT]` prefix."
+            ),
+            "head": branch_name,
+            "base": default_branch,
+        }
+
+        resp = github_sync(client.create_pull_request(owner, repo_name, pr_body))
+
+        if resp.status_code in [200, 201]:
+            pr_html_url = (resp.data or {}).get("html_url", "")
+            logger.info("Git: PR created → %s", pr_html_url)
+            return pr_html_url
+        elif resp.status_code == 422:
+            logger.info("Git: PR creation skipped (422 Unprocessable Entity) - likely already exists.")
+        else:
+            logger.error("Git: PR creation failed: %s %s", resp.status_code, resp.text)
+
+    except Exception as pr_err:
+        logger.error("Git: PR creation process failed: %s", pr_err)
+    return None
+
+
+class BackgroundPublisher:
+    """
+    Debounced, coalescing publisher for one workspace.
+
+    git_node calls schedule() after every local commit. The push only happens once
+    no new commit has arrived for `debounce` seconds, so a burst of iterations
+    results in a single network round trip. The first successful push submits
+    PR creation to a thread pool; flush() performs any outstanding push and waits
+    for the PR so the final result can record its URL.
+    """
+
+    def __init__(self, repo_path: str, branch_name: str, debounce: Optional[float] = None,
+                 run_id: Optional[str] = None):
+        self.repo_path = repo_path
+        self.branch_name = branch_name
+        self.run_id = run_id
+        self.debounce = PUBLISH_DEBOUNCE_SECONDS if debounce is None else debounce
+        self.fix_count = 0
+        self.pushed = False
+        self.push_count = 0
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._pr_future: Optional[Future] = None
+        self._lock = threading.Lock()        # guards the fields above
+        self._push_lock = threading.Lock()   # serialises git operations
+
+    def schedule(self, fix_count: int):
+        """Record that a new commit exists locally and (re)arm the debounce timer."""
+        with self._lock:
+            self.fix_count = fix_count
+            self._dirty = True
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self._push)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _push(self, rebase: bool = False):
+        # Timer-driven pushes skip the rebase: the loop may be mid-edit on the workspace.
+        with self._push_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+                fix_count = self.fix_count
+            try:
+                _, clean_remote_url = push_branch(self.repo_path, self.branch_name, rebase=rebase)
+            except Exception as e:
+                logger.warning("Git: Background push failed (will retry on next commit/flush): %s", e)
+                with self._lock:
+                    self._dirty = True
+                return
+            publish_event(self.run_id, "git_push", branch=self.branch_name, mode="background")
+            with self._lock:
+                self.pushed = True
+                self.push_count += 1
+                if self._pr_future is None:
+                    self._pr_future = _pr_executor.submit(
+                        open_pull_request, clean_remote_url, self.branch_name, fix_count
+                    )
+
+    def stop(self):
+        """Cancel a pending debounced push."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def flush(self, timeout: Optional[float] = 60.0) -> Tuple[bool, Optional[str]]:
+        """Push any outstanding commits now and wait for PR creation. Returns (pushed, pr_url)."""
+        self.stop()
+        # The loop has finished, so the final push may safely rebase onto the remote.
+        self._push(rebase=True)
+
+        pr_url = None
+        if self._pr_future is not None:
+            try:
+                pr_url = self._pr_future.result(timeout=timeout)
+            except Exception as e:
+                logger.warning("Git: Background PR creation did not finish: %s", e)
+        return self.pushed, pr_url
+
+
+_publishers: dict = {}
+_publishers_lock = threading.Lock()
+
+
+def get_background_publisher(repo_path: str, branch_name: str, run_id: Optional[str] = None) -> BackgroundPublisher:
+    """Returns the publisher for this workspace, creating it on first use."""
+    with _publishers_lock:
+        publisher = _publishers.get(repo_path)
+        if publisher is None or (publisher.branch_name, publisher.run_id) != (branch_name, run_id):
+            if publisher is not None:
+                publisher.stop()  # the path was reused by another run or branch
+            publisher = BackgroundPublisher(repo_path, branch_name, run_id=run_id)
+            _publishers[repo_path] = publisher
+        return publisher
+
+
+def pop_background_publisher(repo_path: str) -> Optional[BackgroundPublisher]:
+    with _publishers_lock:
+        return _publishers.pop(repo_path, None)
+
+
+def discard_background_publishers(run_id: str) -> int:
+    """
+    Drops the run's publishers without pushing, once the run has ended (publish_node
+    normally pops its own; a run that failed never got there). Returns how many were dropped.
+    """
+    with _publishers_lock:
+        paths = [path for path, publisher in _publishers.items() if publisher.run_id == run_id]
+        publishers = [_publishers.pop(path) for path in paths]
+    for publisher in publishers:
+        publisher.stop()
+    return len(publishers)
@@ -0,0 +1,16 @@
+import os
+import sqlite3
+
+
+def connect_sqlite(path: str) -> sqlite3.Connection:
+    """
+    Opens `path` in WAL mode with autocommit; callers manage transactions explicitly.
+    WAL lets readers (API status/result queries) proceed while a writer commits.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
@@ -0,0 +1,236 @@
+"""
+Storage backends for run telemetry and agent fix memory.
+
+Both implementations share the `agent_runs` / `node_logs` schema:
+  - SupabaseBackend: the hosted database (writes batched via SupabaseWriter).
+  - SQLiteBackend:   an embedded stand-in, so offline and benchmark runs exercise
+                     the same persistence and memory path as production.
+
+Selected with STORAGE_BACKEND = auto | supabase | sqlite | none. "auto" uses
+Supabase when SUPABASE_URL/SUPABASE_KEY are set and SQLite otherwise.
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from backend.utils.sqlite_utils import connect_sqlite
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STORAGE_DB = os.environ.get("STORAGE_DB", os.path.join(PROJECT_ROOT, "storage.db"))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def match_previous_fix(candidates: Iterable[Dict[str, Any]], bug_type: str,
+                       description: str) -> Optional[Dict[str, Any]]:
+    """
+    Picks the first past fix of the same bug_type whose description shares most of
+    the current description's words (naive; a vector DB would do semantic search).
+    """
+    curr_words = set(description.lower().split())
+    for content in candidates:
+        if content.get('bug_type') != bug_type:
+            continue
+        past_words = set(content.get('description', '').lower().split())
+        if len(past_words & curr_words) / max(len(curr_words), 1) > 0.5:
+            return content
+    return None
+
+
+class StorageBackend:
+    """Interface used by SupabaseManager. Writes must never raise into the nodes."""
+
+    name = "base"
+
+    def create_run(self, run_name: str, target_repo: str, run_id: Optional[str] = None) -> Optional[str]:
+        raise NotImplementedError
+
+    def update_node_status(self, run_id: str, node: str, log_type: str, content: Dict[str, Any]):
+        raise NotImplementedError
+
+    def finalize_run(self, run_id: str, score: int, duration: float, status: str,
+                     pr_url: Optional[str] = None, branch_name: Optional[str] = None):
+        raise NotImplementedError
+
+    def get_previous_fix(self, bug_type: str, description: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        return True
+
+
+# ── Supabase ─────────────────────────────────────────────────────
+
+class SupabaseBackend(StorageBackend):
+    name = "supabase"
+
+    def __init__(self, url: str, key: str):
+        from supabase import create_client
+        from backend.utils.supabase_writer import SupabaseWriter
+        self.client = create_client(url, key)
+        # Writes go through a background batching queue; node latency never waits on Supabase
+        self.writer = SupabaseWriter(self.client)
+
+    def create_run(self, run_name: str, target_repo: str, run_id: Optional[str] = None) -> Optional[str]:
+        run_id = run_id or str(uuid.uuid4())
+        self.writer.submit("insert", "agent_runs", {
+            "id": run_id,
+            "run_name": run_name,
+            "target_repo": target_repo,
+            "status": "PENDING",
+            "created_at": _now()
+        })
+        return run_id
+
+    def update_node_status(self, run_id: str, node: str, log_type: str, content: Dict[str, Any]):
+        self.writer.submit("insert", "node_logs", {
+            "id": str(uuid.uuid4()),
+            "run_id": run_id,
+            "node_name": node,
+            "log_type": log_type,
+            "content": content,
+            "created_at": _now()
+        })
+
+    def finalize_run(self, run_id: str, score: int, duration: float, status: str,
+                     pr_url: Optional[str] = None, branch_name: Optional[str] = None):
+        self.writer.submit("update", "agent_runs", {
+            "id": run_id,
+            "final_score": score,
+            "duration": duration,
+            "status": status,
+            "pr_url": pr_url,
+            "branch_name": branch_name
+        })
+
+    def get_previous_fix(self, bug_type: str, description: str) -> Optional[Dict[str, Any]]:
+        try:
+            response = self.client.table("node_logs") \
+                .select("content") \
+                .eq("log_type", "FIX_APPLIED") \
+                .eq("content->>bug_type", bug_type) \
+                .execute()
+            return match_previous_fix((row.get('content') or {} for row in response.data), bug_type, description)
+        except Exception as e:
+            print(f"Supabase Error (get_previous_fix): {e}")
+            return None
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        return self.writer.flush(timeout)
+
+
+# ── Embedded SQLite ──────────────────────────────────────────────
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_runs (
+    id           TEXT PRIMARY KEY,
+    run_name     TEXT,
+    target_repo  TEXT,
+    status       TEXT NOT NULL DEFAULT 'PENDING',
+    final_score  INTEGER,
+    duration     REAL,
+    pr_url       TEXT,
+    branch_name  TEXT,
+    created_at   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_agent_runs_created ON agent_runs (created_at);
+CREATE INDEX IF NOT EXISTS idx_agent_runs_status ON agent_runs (status, created_at);
+
+CREATE TABLE IF NOT EXISTS node_logs (
+    id          TEXT PRIMARY KEY,
+    run_id      TEXT NOT NULL REFERENCES agent_runs (id),
+    node_name   TEXT NOT NULL,
+    log_type    TEXT NOT NULL,
+    content     TEXT NOT NULL,
+    created_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_node_logs_run ON node_logs (run_id, created_at);
+-- Fix memory lookups filter on log_type + content.bug_type
+CREATE INDEX IF NOT EXISTS idx_node_logs_memory
+    ON node_logs (log_type, json_extract(content, '$.bug_type'), created_at);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str = STORAGE_DB):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(_SQLITE_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_sqlite(self.path)
+        return conn
+
+    def create_run(self, run_name: str, target_repo: str, run_id: Optional[str] = None) -> Optional[str]:
+        run_id = run_id or str(uuid.uuid4())
+        try:
+            self._conn().execute(
+                "INSERT INTO agent_runs (id, run_name, target_repo, status, created_at) VALUES (?, ?, ?, 'PENDING', ?)",
+                (run_id, run_name, target_repo, _now()),
+            )
+        except sqlite3.Error as e:
+            print(f"SQLite Storage Error (create_run): {e}")
+            return None
+        return run_id
+
+    def update_node_status(self, run_id: str, node: str, log_type: str, content: Dict[str, Any]):
+        try:
+            self._conn().execute(
+                "INSERT INTO node_logs (id, run_id, node_name, log_type, content, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (str(uuid.uuid4()), run_id, node, log_type, json.dumps(content, default=str), _now()),
+            )
+        except sqlite3.Error as e:
+            print(f"SQLite Storage Error (update_node_status): {e}")
+
+    def finalize_run(self, run_id: str, score: int, duration: float, status: str,
+                     pr_url: Optional[str] = None, branch_name: Optional[str] = None):
+        try:
+            self._conn().execute(
+                "UPDATE agent_runs SET final_score = ?, duration = ?, status = ?, pr_url = ?, branch_name = ? "
+                "WHERE id = ?",
+                (score, duration, status, pr_url, branch_name, run_id),
+            )
+        except sqlite3.Error as e:
+            print(f"SQLite Storage Error (finalize_run): {e}")
+
+    def get_previous_fix(self, bug_type: str, description: str) -> Optional[Dict[str, Any]]:
+        try:
+            rows = self._conn().execute(
+                "SELECT content FROM node_logs WHERE log_type = 'FIX_APPLIED' "
+                "AND json_extract(content, '$.bug_type') = ? ORDER BY created_at",
+                (bug_type,),
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"SQLite Storage Error (get_previous_fix): {e}")
+            return None
+        return match_previous_fix((json.loads(r["content"]) for r in rows), bug_type, description)
+
+
+def get_storage_backend(kind: Optional[str] = None) -> Optional[StorageBackend]:
+    """Builds the configured backend, or None when persistence is switched off."""
+    kind = (kind or os.environ.get("STORAGE_BACKEND", "auto")).lower()
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+
+    if kind == "auto":
+        kind = "supabase" if url and key else "sqlite"
+    if kind == "supabase":
+        if url and key:
+            return SupabaseBackend(url, key)
+        print("WARNING: STORAGE_BACKEND=supabase but SUPABASE_URL or SUPABASE_KEY not found. Logging disabled.")
+        return None
+    if kind == "sqlite":
+        return SQLiteBackend(os.environ.get("STORAGE_DB", STORAGE_DB))
+    if kind != "none":
+        print(f"WARNING: Unknown STORAGE_BACKEND '{kind}'. Logging disabled.")
+    return None
@@ -1,10 +1,14 @@
-import os
-from datetime import datetime, timezone
-import json
-from supabase import create_client, Client
 from typing import Optional, Dict, Any
 
+from backend.utils.storage import StorageBackend, get_storage_backend
+
+
 class SupabaseManager:
+    """
+    Process-wide entry point for run telemetry and fix memory.
+    Delegates to the backend selected by STORAGE_BACKEND (see backend/utils/storage.py):
+    Supabase in production, or the embedded SQLite stand-in for offline runs.
+    """
     _instance = None
 
     def __new__(cls):
@@ -14,68 +18,30 @@ class SupabaseManager:
         return cls._instance
 
     def _init_client(self):
-        url: str = os.environ.get("SUPABASE_URL")
-        key: str = os.environ.get("SUPABASE_KEY")
-        if url and key:
-            self.client: Client = create_client(url, key)
-            self.enabled = True
+        self.backend: Optional[StorageBackend] = get_storage_backend()
+        self.enabled = self.backend is not None
+        if self.enabled:
+            print(f"Storage backend: {self.backend.name}")
         else:
-            print("WARNING: SUPABASE_URL or SUPABASE_KEY not found. Real-time logging disabled.")
-            self.client = None
-            self.enabled = False
+            print("WARNING: No storage backend configured. Real-time logging and fix memory disabled.")
 
-    def create_run(self, run_name: str, target_repo: str) -> Optional[str]:
-        """Creates a new run entry and returns the run_id."""
+    def create_run(self, run_name: str, target_repo: str, run_id: Optional[str] = None) -> Optional[str]:
+        """Records a new run and returns its (client-generated) run_id without waiting on the network."""
         if not self.enabled:
             return None
-        
-        try:
-            data = {
-                "run_name": run_name,
-                "target_repo": target_repo,
-                "status": "PENDING",
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
-            response = self.client.table("agent_runs").insert(data).execute()
-            if response.data:
-                return response.data[0]['id']
-        except Exception as e:
-            print(f"Supabase Error (create_run): {e}")
-        return None
+        return self.backend.create_run(run_name, target_repo, run_id=run_id)
 
     def update_node_status(self, run_id: str, node: str, log_type: str, content: Dict[str, Any]):
         """Logs a node event."""
         if not self.enabled or not run_id:
             return
-
-        try:
-            data = {
-                "run_id": run_id,
-                "node_name": node,
-                "log_type": log_type,
-                "content": content,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
-            self.client.table("node_logs").insert(data).execute()
-        except Exception as e:
-            print(f"Supabase Error (update_node_status): {e}")
+        self.backend.update_node_status(run_id, node, log_type, content)
 
     def finalize_run(self, run_id: str, score: int, duration: float, status: str, pr_url: Optional[str] = None, branch_name: Optional[str] = None):
         """Updates the final status of a run."""
         if not self.enabled or not run_id:
             return
-
-        try:
-            data = {
-                "final_score": score,
-                "duration": duration,
-                "status": status,
-                "pr_url": pr_url,
-                "branch_name": branch_name
-            }
-            self.client.table("agent_runs").update(data).eq("id", run_id).execute()
-        except Exception as e:
-            print(f"Supabase Error (finalize_run): {e}")
+        self.backend.finalize_run(run_id, score, duration, status, pr_url=pr_url, branch_name=branch_name)
 
     def get_previous_fix(self, bug_type: str, description: str) -> Optional[Dict[str, Any]]:
         """
@@ -84,38 +50,8 @@ class SupabaseManager:
         """
         if not self.enabled:
             return None
+        return self.backend.get_previous_fix(bug_type, description)
 
-        # Basic similarity search (could be improved with embeddings later)
-        # For now, we look for logs where log_type='FIX_APPLIED' and content->bug_type matches
-        try:
-            response = self.client.table("node_logs") \
-                .select("content") \
-                .eq("log_type", "FIX_APPLIED") \
-                .execute()
-            
-            # Application-side filtering (naive)
-            # In a real vector DB, we'd do semantic search.
-            # Here we just look for exact bug_type match and partial description match.
-            best_fix = None
-            
-            for row in response.data:
-                content = row.get('content', {})
-                if content.get('bug_type') == bug_type:
-                    # Check text similarity roughly
-                    past_desc = content.get('description', '').lower()
-                    curr_desc = description.lower()
-                    
-                    # If considerable overlap in description words
-                    past_words = set(past_desc.split())
-                    curr_words = set(curr_desc.split())
-                    common = past_words.intersection(curr_words)
-                    
-                    if len(common) / max(len(curr_words), 1) > 0.5:
-                        best_fix = content
-                        break
-            
-            return best_fix
-
-        except Exception as e:
-            print(f"Supabase Error (get_previous_fix): {e}")
-            return None
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Blocks until queued writes are persisted (or spooled). Used on shutdown and in tests."""
+        return self.backend.flush(timeout) if self.enabled else True
@@ -0,0 +1,201 @@
+"""
+Non-blocking telemetry writer for Supabase.
+
+Nodes and endpoints only enqueue operations (a dict append, never a network call).
+A background thread drains the bounded queue in batches: run inserts and node log
+inserts become one bulk upsert per table, run updates follow. Failed batches are
+retried with jittered backoff; if Supabase stays unreachable the operations are
+appended to a local JSONL spool and replayed, in order, once it is reachable again.
+Every row carries a client-generated id, so replays are idempotent.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List
+
+from backend.telemetry import span
+from backend.utils.github_client import backoff_delay
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SPOOL_FILE = os.environ.get("SUPABASE_SPOOL_FILE", os.path.join(PROJECT_ROOT, "supabase_spool.jsonl"))
+QUEUE_SIZE = int(os.environ.get("SUPABASE_QUEUE_SIZE", "10000"))
+BATCH_SIZE = int(os.environ.get("SUPABASE_BATCH_SIZE", "200"))
+FLUSH_INTERVAL = float(os.environ.get("SUPABASE_FLUSH_INTERVAL", "1.0"))
+MAX_RETRIES = int(os.environ.get("SUPABASE_MAX_RETRIES", "3"))
+
+# Operation shape: {"op": "insert" | "update", "table": str, "row": dict}
+# Updates are keyed by row["id"]. Inserts are grouped so parent rows land first.
+_INSERT_ORDER = ("agent_runs", "node_logs")
+
+
+class SupabaseWriter:
+    def __init__(self, client, spool_path: str = SPOOL_FILE, queue_size: int = QUEUE_SIZE,
+                 batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 max_retries: int = MAX_RETRIES):
+        self.client = client
+        self.spool_path = spool_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._spool_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._failures = 0
+        self._retry_at = 0.0
+        self.stats = {"enqueued": 0, "written": 0, "spooled": 0, "batches": 0}
+        self._thread = threading.Thread(target=self._run, name="supabase-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ── Producer side (called from nodes / endpoints) ────────────────
+
+    def submit(self, op: str, table: str, row: Dict[str, Any]):
+        """Never blocks: when the queue is full the operation goes straight to the spool."""
+        item = {"op": op, "table": table, "row": row}
+        self.stats["enqueued"] += 1
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._spool([item])
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Waits until everything queued so far has been written or spooled."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        if self._stopping.is_set():
+            return
+        self.flush(timeout)
+        self._stopping.set()
+        self._thread.join(timeout)
+
+    def pending_spool(self) -> int:
+        with self._spool_lock:
+            return len(self._read_spool())
+
+    # ── Background flush loop ────────────────────────────────────────
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []  # idle tick: still retry anything left in the spool
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._flush(batch)
+            except Exception as e:
+                print(f"Supabase Writer Error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _flush(self, batch: List[Dict[str, Any]]):
+        if time.monotonic() < self._retry_at:
+            # Backend recently unreachable: don't stall the loop on it, just keep spooling
+            self._spool(batch)
+            return
+
+        with self._spool_lock:
+            spooled = self._read_spool()
+        pending = spooled + batch
+        if not pending:
+            return
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._send(pending)
+                break
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    self._failures += 1
+                    self._retry_at = time.monotonic() + backoff_delay(self._failures, base=1.0, cap=60.0)
+                    print(f"Supabase Writer: {len(pending)} operation(s) spooled after error: {e}")
+                    with self._spool_lock:
+                        # Keep anything that overflowed into the spool while we were sending
+                        self._write_spool(pending + self._read_spool()[len(spooled):])
+                    self.stats["spooled"] += len(batch)
+                    return
+                time.sleep(backoff_delay(attempt))
+
+        self._failures = 0
+        self.stats["written"] += len(pending)
+        self.stats["batches"] += 1
+        if spooled:
+            with self._spool_lock:
+                # Anything spooled while we were sending (queue overflow) stays for the next round
+                self._write_spool(self._read_spool()[len(spooled):])
+            print(f"Supabase Writer: Replayed {len(spooled)} spooled operation(s).")
+
+    def _send(self, ops: List[Dict[str, Any]]):
+        """Bulk upserts per table (parents first), then updates in submission order."""
+        with span("supabase.write", operations=len(ops)):
+            self._send_ops(ops)
+
+    def _send_ops(self, ops: List[Dict[str, Any]]):
+        for table in _INSERT_ORDER + tuple({o["table"] for o in ops} - set(_INSERT_ORDER)):
+            rows = [o["row"] for o in ops if o["op"] == "insert" and o["table"] == table]
+            for i in range(0, len(rows), self.batch_size):
+                self.client.table(table).upsert(
+                    rows[i:i + self.batch_size], on_conflict="id", ignore_duplicates=True
+                ).execute()
+        for o in ops:
+            if o["op"] == "update":
+                row = dict(o["row"])
+                row_id = row.pop("id")
+                self.client.table(o["table"]).update(row).eq("id", row_id).execute()
+
+    # ── Local spool (JSONL, append-only) ─────────────────────────────
+
+    def _spool(self, items: List[Dict[str, Any]]):
+        if not items:
+            return
+        with self._spool_lock:
+            with open(self.spool_path, "a") as f:
+                for item in items:
+                    f.write(json.dumps(item, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.stats["spooled"] += len(items)
+
+    def _read_spool(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.spool_path):
+            return []
+        items = []
+        with open(self.spool_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    items.append(json.loads(line))
+                except json.JSONDecodeError:
+                    pass  # torn final line from a crash mid-write
+        return items
+
+    def _write_spool(self, items: List[Dict[str, Any]]):
+        if not items:
+            if os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+            return
+        tmp = self.spool_path + ".tmp"
+        with open(tmp, "w") as f:
+            for item in items:
+                f.write(json.dumps(item, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.spool_path)
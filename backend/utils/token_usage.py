@@ -0,0 +1,125 @@
+"""
+Per-run LLM token and cost accounting, and the per-run token budget.
+
+The gateway records every completed model call here: prompt, output and cached
+tokens, latency, model, and the node that made it. Totals are aggregated per run,
+per node and per model. The graph wrapper copies the run's totals into
+state['token_usage'] after every node; they are stored with the result entry and
+counted in /metrics.
+
+A run opened with a budget refuses calls once its recorded tokens plus the new
+prompt would exceed it (TokenBudgetExceeded is raised before the call is sent).
+The graph then stops the healing loop and the run ends as TOKEN_BUDGET_EXCEEDED.
+"""
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from backend.telemetry import telemetry
+
+DEFAULT_RUN_TOKEN_BUDGET = int(os.environ.get("RUN_TOKEN_BUDGET", "0"))  # 0 = unlimited
+BUDGET_EXCEEDED = "TOKEN_BUDGET_EXCEEDED"
+
+_COUNTERS = ("calls", "prompt_tokens", "output_tokens", "cached_tokens", "total_tokens",
+             "cache_hits", "latency_ms", "cost_usd")
+
+
+class TokenBudgetExceeded(Exception):
+    """A model call would take the run past its token budget."""
+
+
+def _empty() -> Dict[str, Any]:
+    return {k: 0 for k in _COUNTERS}
+
+
+def _add(totals: Dict[str, Any], call: Dict[str, Any]):
+    for key in _COUNTERS:
+        totals[key] = totals[key] + call[key]
+    totals["latency_ms"] = round(totals["latency_ms"], 1)
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+
+
+def usage_counts(usage, prompt_tokens_estimate: int, output_tokens_estimate: int) -> Dict[str, int]:
+    """
+    Token counts from a genai usage_metadata object. Missing counts (no metadata,
+    or an API that omits a field) fall back to the estimates.
+    """
+    prompt = getattr(usage, "prompt_token_count", None) or prompt_tokens_estimate
+    output = ((getattr(usage, "candidates_token_count", None) or 0)
+              + (getattr(usage, "thoughts_token_count", None) or 0)) or output_tokens_estimate
+    cached = getattr(usage, "cached_content_token_count", None) or 0
+    total = getattr(usage, "total_token_count", None) or prompt + output
+    return {"prompt_tokens": prompt, "output_tokens": output, "cached_tokens": cached, "total_tokens": total}
+
+
+class UsageLedger:
+    def __init__(self):
+        self._runs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def open_run(self, run_id: str, budget: Optional[int] = None, carried: Optional[Dict[str, Any]] = None):
+        """Starts accounting for a run; budget None/0 means unlimited. `carried`: totals of a resumed run."""
+        run = {**_empty(), "budget": budget or None, "budget_exceeded": False, "by_node": {}, "by_model": {}}
+        if carried:
+            run.update({k: v for k, v in carried.items() if k in _empty() or k == "budget_exceeded"})
+            run["by_node"] = {k: dict(v) for k, v in (carried.get("by_node") or {}).items()}
+            run["by_model"] = {k: dict(v) for k, v in (carried.get("by_model") or {}).items()}
+        with self._lock:
+            self._runs[run_id] = run
+
+    def close_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Stops accounting for a run and returns its final totals."""
+        snapshot = self.snapshot(run_id)
+        with self._lock:
+            self._runs.pop(run_id, None)
+        return snapshot
+
+    def check(self, run_id: Optional[str], prompt_tokens: int):
+        """Raises TokenBudgetExceeded if sending a prompt this size would break the run's budget."""
+        with self._lock:
+            run = self._runs.get(run_id) if run_id else None
+            if not run or not run["budget"]:
+                return
+            if run["budget_exceeded"] or run["total_tokens"] + prompt_tokens > run["budget"]:
+                run["budget_exceeded"] = True
+                used, budget = run["total_tokens"], run["budget"]
+            else:
+                return
+        telemetry.inc("rift_token_budget_exceeded_total")
+        raise TokenBudgetExceeded(
+            f"Token budget exceeded: {used} of {budget} tokens used, next prompt needs ~{prompt_tokens}"
+        )
+
+    def record(self, run_id: Optional[str], node: Optional[str], model: str, counts: Dict[str, int],
+               latency_ms: float):
+        """Accounts one completed call (also for runs that were never opened: metrics only)."""
+        from backend.utils.model_router import model_cost
+
+        node = node or "unknown"
+        call = {**counts, "calls": 1, "cache_hits": int(counts["cached_tokens"] > 0),
+                "latency_ms": latency_ms, "cost_usd": model_cost(model, counts["total_tokens"])}
+        telemetry.inc("rift_llm_tokens_total", counts["prompt_tokens"], model=model, node=node, kind="prompt")
+        telemetry.inc("rift_llm_tokens_total", counts["output_tokens"], model=model, node=node, kind="output")
+        if counts["cached_tokens"]:
+            telemetry.inc("rift_llm_cached_tokens_total", counts["cached_tokens"], model=model, node=node)
+        telemetry.inc("rift_llm_cost_usd_total", call["cost_usd"], model=model, node=node)
+        with self._lock:
+            run = self._runs.get(run_id) if run_id else None
+            if run is None:
+                return
+            _add(run, call)
+            _add(run["by_node"].setdefault(node, _empty()), call)
+            _add(run["by_model"].setdefault(model, _empty()), call)
+
+    def snapshot(self, run_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            run = self._runs.get(run_id) if run_id else None
+            if run is None:
+                return None
+            return {**run, "by_node": {k: dict(v) for k, v in run["by_node"].items()},
+                    "by_model": {k: dict(v) for k, v in run["by_model"].items()}}
+
+
+# ── Process-wide ledger ──────────────────────────────────────────
+
+ledger = UsageLedger()
@@ -0,0 +1,194 @@
+"""
+Out-of-process worker for healing runs.
+
+Start one or more with:
+    python -m backend.worker --concurrency 2 --processes 4
+
+Each process claims jobs from the durable SQLite queue (backend/job_queue.py), runs
+the LangGraph workflow, heartbeats its lease with the latest node progress, and
+records the final result. On SIGTERM/SIGINT it stops claiming and hands any
+in-flight jobs back to the queue so a restarted worker picks them up.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import uuid
+from typing import Awaitable, Callable, Optional
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from backend.job_queue import JobQueue, LEASE_SECONDS
+
+POLL_INTERVAL = float(os.environ.get("WORKER_POLL_INTERVAL", "1.0"))
+METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", "0"))  # 0 = no /metrics endpoint
+
+
+def _progress(state: dict) -> dict:
+    return {
+        "current_step": state.get("current_step"),
+        "retry_count": state.get("retry_count", 0),
+        "fixes_applied": len(state.get("fixes_applied") or []),
+        "final_status": state.get("final_status"),
+    }
+
+
+async def _default_runner(job: dict, on_progress: Callable[[dict], None]) -> dict:
+    from backend.main import HealingRequest, run_healing_workflow
+    # A re-claimed job (crashed worker, redeploy, POST /runs/{id}/resume) continues from its checkpoint
+    return await run_healing_workflow(HealingRequest(**job["payload"]), job["id"], on_progress=on_progress,
+                                      resume=True)
+
+
+class Worker:
+    def __init__(self, queue: JobQueue, concurrency: int = 1, worker_id: Optional[str] = None,
+                 runner: Callable[[dict, Callable[[dict], None]], Awaitable[dict]] = _default_runner,
+                 lease_seconds: float = LEASE_SECONDS, poll_interval: float = POLL_INTERVAL):
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.runner = runner
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._stopping = asyncio.Event()
+        self._in_flight: dict = {}
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self, max_jobs: Optional[int] = None):
+        """Runs until stop() is called (or `max_jobs` jobs have been processed)."""
+        print(f"Worker {self.worker_id}: started with concurrency={self.concurrency}")
+        self._budget = max_jobs
+        slots = [asyncio.create_task(self._slot()) for _ in range(self.concurrency)]
+        await asyncio.gather(*slots)
+        print(f"Worker {self.worker_id}: stopped")
+
+    def _take_budget(self) -> bool:
+        if self._budget is None:
+            return True
+        if self._budget <= 0:
+            return False
+        self._budget -= 1
+        return True
+
+    async def _slot(self):
+        while not self._stopping.is_set():
+            job = await asyncio.to_thread(self.queue.claim, self.worker_id, self.lease_seconds)
+            if job is None:
+                if self._budget is not None and self._budget <= 0:
+                    return
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if not self._take_budget():
+                self.queue.release(job["id"], self.worker_id)
+                return
+            await self._execute(job)
+
+    async def _execute(self, job: dict):
+        job_id = job["id"]
+        print(f"Worker {self.worker_id}: claimed run {job_id} (attempt {job['attempts']})")
+        latest = {"progress": None}
+
+        def on_progress(state: dict):
+            latest["progress"] = _progress(state)
+
+        async def heartbeat():
+            while True:
+                await asyncio.sleep(self.lease_seconds / 3)
+                alive = await asyncio.to_thread(
+                    self.queue.heartbeat, job_id, self.worker_id, self.lease_seconds, latest["progress"]
+                )
+                if not alive:
+                    print(f"Worker {self.worker_id}: lost lease on {job_id}; another worker owns it now.")
+                    task.cancel()
+                    return
+
+        task = asyncio.create_task(self.runner(job, on_progress))
+        self._in_flight[job_id] = task
+        beat = asyncio.create_task(heartbeat())
+        stop_wait = asyncio.create_task(self._stopping.wait())
+        try:
+            done, _ = await asyncio.wait({task, stop_wait}, return_when=asyncio.FIRST_COMPLETED)
+            if task not in done:
+                # Shutting down mid-run: hand the job back instead of losing it
+                task.cancel()
+                self.queue.release(job_id, self.worker_id)
+                print(f"Worker {self.worker_id}: released run {job_id} back to the queue.")
+                return
+            result = task.result()
+            if result.get("status") == "error":
+                self.queue.fail(job_id, self.worker_id, result.get("error", "unknown error"))
+            else:
+                self.queue.complete(job_id, self.worker_id, result)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.queue.fail(job_id, self.worker_id, str(e))
+        finally:
+            beat.cancel()
+            stop_wait.cancel()
+            self._in_flight.pop(job_id, None)
+
+
+def _run_process(concurrency: int, metrics_port: int = 0):
+    from backend.graph import warm_workflows
+    if metrics_port:
+        from backend.telemetry import serve_metrics
+        serve_metrics(metrics_port)
+    warm_workflows()
+    worker = Worker(JobQueue(), concurrency=concurrency)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, worker.stop)
+            except NotImplementedError:  # Windows
+                signal.signal(sig, lambda *_: worker.stop())
+        await worker.run()
+
+    asyncio.run(main())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RIFT healing run worker")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("WORKER_CONCURRENCY", "1")),
+                        help="concurrent runs per process")
+    parser.add_argument("--processes", type=int, default=int(os.environ.get("WORKER_PROCESSES", "1")),
+                        help="worker processes to spawn (scale across cores)")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="serve Prometheus /metrics; process i listens on port + i")
+    args = parser.parse_args(argv)
+
+    if args.processes <= 1:
+        _run_process(args.concurrency, args.metrics_port)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_run_process, args=(args.concurrency, args.metrics_port and args.metrics_port + i))
+             for i in range(args.processes)]
+    for p in procs:
+        p.start()
+
+    def _forward(sig, _frame):
+        for p in procs:
+            if p.is_alive():
+                os.kill(p.pid, sig)
+
+    signal.signal(signal.SIGTERM, _forward)
+    signal.signal(signal.SIGINT, _forward)
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Two-step (debugger -> fixer) vs fused (analyze_fix) healing: latency and success rate.
+
+    python -m benchmarks.bench_analysis_modes --repeat 5              # simulated model
+    python -m benchmarks.bench_analysis_modes --live --repeat 3       # real Gemini (GOOGLE_API_KEY)
+
+Each case is a tiny repo with one bug. Its tests are run locally with pytest (no
+Docker) to produce the failure logs, one healing step runs in each mode, and the
+tests are run again to judge the fix. The simulated model answers with the right
+fix after `--ttfb-ms` plus output tokens at `--tokens-per-s`, so it measures the
+call count and orchestration cost; success rates are only meaningful with --live.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+os.environ.setdefault("STORAGE_BACKEND", "none")
+
+from backend.logger import flush_logs  # noqa: E402
+from backend.nodes import analyze_fix, debugger, fixer  # noqa: E402
+from backend.utils.llm_gateway import StreamResult  # noqa: E402
+
+CASES = {
+    "logic": {
+        "files": {
+            "src/calc.py": "def add(a, b):\n    return a - b\n",
+            "tests/test_calc.py": "from src.calc import add\n\n\ndef test_add():\n    assert add(2, 3) == 5\n",
+        },
+        "analysis": {"file": "src/calc.py", "line": 2, "bug_type": "LOGIC", "description": "add() subtracts"},
+        "fixed": "def add(a, b):\n    return a + b\n",
+    },
+    "exception": {
+        "files": {
+            "src/validate.py": "def validate_age(age):\n    if age < 0:\n        return False\n    return True\n",
+            "tests/test_validate.py": (
+                "import pytest\nfrom src.validate import validate_age\n\n\n"
+                "def test_validate_age():\n    with pytest.raises(ValueError):\n        validate_age(-1)\n"
+            ),
+        },
+        "analysis": {"file": "src/validate.py", "line": 3, "bug_type": "LOGIC",
+                     "description": "negative ages must raise ValueError"},
+        "fixed": "def validate_age(age):\n    if age < 0:\n        raise ValueError('age must be >= 0')\n    return True\n",
+    },
+    "string": {
+        "files": {
+            "src/greet.py": "def greet(name):\n    return 'Hello ' + name\n",
+            "tests/test_greet.py": (
+                "from src.greet import greet\n\n\n"
+                "def test_greet():\n    assert greet('Ada') == 'Hello, Ada!'\n"
+            ),
+        },
+        "analysis": {"file": "src/greet.py", "line": 2, "bug_type": "LOGIC", "description": "wrong greeting format"},
+        "fixed": "def greet(name):\n    return f'Hello, {name}!'\n",
+    },
+}
+
+
+def _make_repo(root: str, case: dict) -> str:
+    for rel, content in case["files"].items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+    for pkg in ("src", "tests"):
+        open(os.path.join(root, pkg, "__init__.py"), "a").close()
+    return root
+
+
+def _pytest(repo: str):
+    proc = subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider"],
+                          cwd=repo, capture_output=True, text=True)
+    return proc.returncode, proc.stdout + proc.stderr
+
+
+# ── Simulated model ──────────────────────────────────────────────
+
+class SimulatedModel:
+    def __init__(self, ttfb_ms: float, tokens_per_s: float):
+        self.ttfb_ms = ttfb_ms
+        self.tokens_per_s = tokens_per_s
+        self.case: dict = {}
+
+    def _reply(self, prompt: str) -> str:
+        if '"fixed_code"' not in prompt:
+            return json.dumps(self.case["analysis"])
+        if '"description"' in prompt.split("Output strictly as JSON")[-1]:
+            return json.dumps({**self.case["analysis"], "fix_action": "apply the fix", "fixed_code": self.case["fixed"]})
+        return json.dumps({"fixed_code": self.case["fixed"], "fix_action": "apply the fix"})
+
+    def _wait(self, text: str):
+        time.sleep((self.ttfb_ms + len(text) / 4 / self.tokens_per_s * 1000) / 1000)
+
+    def generate_hedged(self, prompt, model, hedge_model=None, hedge_after=0.0, config=None, run_id=None,
+                        api_key=None, timeout=None, node=None):
+        text = self._reply(prompt)
+        self._wait(text)
+        return type("Response", (), {"text": text, "usage_metadata": None})(), model
+
+    def generate_stream(self, prompt, model, on_text, config=None, run_id=None, api_key=None, timeout=None,
+                        node=None):
+        text = self._reply(prompt)
+        started = time.perf_counter()
+        self._wait(text)
+        for i in range(0, len(text), 64):
+            on_text(text[i:i + 64])
+        latency_ms = (time.perf_counter() - started) * 1000
+        return StreamResult(text, ttfb_ms=self.ttfb_ms, latency_ms=latency_ms, chunks=len(text) // 64 + 1)
+
+
+def _count_calls(calls: List[str]):
+    """Wraps the nodes' gateway entry points so every model call is counted."""
+    for module, name in ((debugger, "llm_generate_hedged"), (fixer, "llm_generate_stream")):
+        inner = getattr(module, name)
+
+        def counted(*args, _inner=inner, _name=name, **kwargs):
+            calls.append(_name)
+            return _inner(*args, **kwargs)
+        setattr(module, name, counted)
+
+
+# ── Benchmark ────────────────────────────────────────────────────
+
+def heal_once(mode: str, case: dict, model: str, sim: SimulatedModel, calls: List[str],
+              verbose: bool = False) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = _make_repo(tmp, case)
+        exit_code, logs = _pytest(repo)
+        failed = len(re.findall(r"^FAILED ", logs, re.MULTILINE))
+        state = {
+            "repo_path": repo, "run_id": None, "error_logs": logs, "last_exit_code": exit_code,
+            "fixes_applied": [], "retry_count": 1, "failure_history": [failed], "model_name": model,
+            "model_routing": "fixed", "current_analysis": {}, "pending_routes": [],
+        }
+        if sim:
+            sim.case = case
+        before = len(calls)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+            if mode == "fused":
+                analyze_fix.analyze_fix_node(state)
+            else:
+                fixer.fixer_node(debugger.debugger_node(state))
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            flush_logs()
+        exit_code, _ = _pytest(repo)
+        return {"ms": elapsed_ms, "passed": exit_code == 0, "calls": len(calls) - before}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--live", action="store_true", help="call Gemini instead of the simulated model")
+    parser.add_argument("--model", default="gemini-2.5-flash")
+    parser.add_argument("--ttfb-ms", type=float, default=400.0)
+    parser.add_argument("--tokens-per-s", type=float, default=250.0)
+    parser.add_argument("--cases", default=",".join(CASES))
+    parser.add_argument("--verbose", action="store_true", help="show the nodes' output")
+    args = parser.parse_args()
+
+    sim = None
+    if args.live:
+        if not os.environ.get("GOOGLE_API_KEY"):
+            sys.exit("--live needs GOOGLE_API_KEY")
+    else:
+        os.environ.setdefault("GOOGLE_API_KEY", "simulated")
+        sim = SimulatedModel(args.ttfb_ms, args.tokens_per_s)
+        debugger.llm_generate_hedged = sim.generate_hedged
+        fixer.llm_generate_stream = sim.generate_stream
+    calls: List[str] = []
+    _count_calls(calls)
+
+    results: Dict[str, List[dict]] = {"two_step": [], "fused": []}
+    for name in args.cases.split(","):
+        for _ in range(args.repeat):
+            for mode in results:
+                results[mode].append(heal_once(mode, CASES[name], args.model, sim, calls, args.verbose))
+
+    print(f"{'live' if args.live else 'simulated'} model, {len(args.cases.split(','))} cases x {args.repeat}")
+    for mode, rows in results.items():
+        ms = sorted(r["ms"] for r in rows)
+        print(f"{mode:9s} success={sum(r['passed'] for r in rows)}/{len(rows)}  "
+              f"calls/step={statistics.mean(r['calls'] for r in rows):.1f}  "
+              f"p50={statistics.median(ms):.0f} ms  p95={ms[int(0.95 * (len(ms) - 1))]:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Offline end-to-end benchmark: full healing runs against synthetic buggy repos.
+
+    python -m benchmarks.bench_e2e                                  # compare with the stored baseline
+    python -m benchmarks.bench_e2e --runs 10 --concurrency 4 --modules 40 --padding 20
+    python -m benchmarks.bench_e2e --error-rate 0.3 --analysis-mode fused
+    python -m benchmarks.bench_e2e --save-baseline                  # after an intended change
+
+Everything external is local (see benchmarks/offline.py): the target repo is served
+from a bare remote, Gemini is a fake HTTP server answering from the seeded bugs (or
+a --replay recording), and the Tester's containers run pytest on this interpreter.
+The real graph, gateway, router, streaming parser, git node and publisher all run.
+
+Reports wall time per node (from the telemetry spans), iterations to green, peak
+traced memory and throughput, and exits non-zero when a metric regresses against
+the baseline by more than --tolerance.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from benchmarks.offline import BUG_TYPES, DEFAULT_BUG_TYPES, FakeGemini, LocalDocker, Oracle, Replay, make_target_repo
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(PROJECT_ROOT, "benchmarks", "baselines", "bench_e2e.json")
+
+# Options that change what is measured; a baseline only applies to the same configuration
+CONFIG_KEYS = ("modules", "padding", "bug_types", "error_rate", "latency_ms", "analysis_mode",
+               "publish_mode", "model_routing", "concurrency")
+
+
+def _isolate(tmp: str, gemini_url: str):
+    """Points every store and service at the sandbox. Must run before backend modules are imported."""
+    os.environ.update({
+        "STORAGE_BACKEND": "none",
+        "RUN_STORE_DB": os.path.join(tmp, "runs.db"),
+        "ROUTING_DB": os.path.join(tmp, "routing.db"),
+        "CHECKPOINT_DB": os.path.join(tmp, "checkpoints.db"),
+        "RUN_CACHE_DB": os.path.join(tmp, "run_cache.db"),
+        "DEPENDENCY_CACHE_DIR": os.path.join(tmp, "dep_cache"),
+        "GOOGLE_API_KEY": "offline",
+        "GOOGLE_GEMINI_BASE_URL": gemini_url,
+        "LLM_REQUESTS_PER_MINUTE": "100000",
+    })
+    os.environ.pop("GITHUB_TOKEN", None)
+    os.environ.pop("TELEMETRY_EXPORT_FILE", None)
+
+
+def _pct(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+async def _run_all(requests, concurrency: int, verbose: bool) -> List[Dict[str, Any]]:
+    from backend.logger import flush_logs
+    from backend.main import run_healing_workflow
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(request):
+        async with slots:
+            started = time.perf_counter()
+            entry = await run_healing_workflow(request)
+            result = entry.get("result") or {}
+            return {"wall_s": time.perf_counter() - started, "status": result.get("final_status", "ERROR"),
+                    "iterations": result.get("retry_count", 0), "fixes": len(result.get("fixes_applied") or [])}
+
+    with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+        results = await asyncio.gather(*(one(r) for r in requests))
+        flush_logs()  # the nodes' log lines are written by a background thread
+    return results
+
+
+def run_suite(args) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        target = make_target_repo(tmp, modules=args.modules, bug_types=args.bug_types.split(","),
+                                  padding=args.padding, seed=args.seed)
+        responder = Replay(args.replay) if args.replay else Oracle(target.bugs, args.error_rate, args.seed)
+        gemini = FakeGemini(responder, latency_ms=args.latency_ms).start()
+        _isolate(tmp, gemini.url)
+
+        from backend.main import HealingRequest
+        from backend.nodes import discovery
+        from backend.telemetry import telemetry
+        from backend.utils import clients
+
+        docker = LocalDocker()
+        clients._docker_client = docker
+        discovery.WORK_DIR = os.path.join(tmp, "workspaces")
+
+        requests = [
+            HealingRequest(repo_url=target.remote, team_name=f"BENCH_{i}", leader_name="Offline",
+                           max_iterations=args.max_iterations, analysis_mode=args.analysis_mode,
+                           publish_mode=args.publish_mode, model_routing=args.model_routing)
+            for i in range(args.runs)
+        ]
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            runs = asyncio.run(_run_all(requests, args.concurrency, args.verbose))
+        finally:
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            gemini.stop()
+
+    passed = [r for r in runs if r["status"] == "PASSED"]
+    walls = [r["wall_s"] for r in runs]
+    nodes = {name[len("node."):]: {k: v for k, v in stats.items() if k in ("count", "avg_ms", "p50_ms", "p95_ms")}
+             for name, stats in telemetry.summary().items() if name.startswith("node.")}
+    return {
+        "config": {k: getattr(args, k) for k in CONFIG_KEYS},
+        "runs": len(runs),
+        "seeded_bugs": len(target.bugs),
+        "success_rate": round(len(passed) / len(runs), 3),
+        "iterations_to_green": round(statistics.mean(r["iterations"] for r in passed), 2) if passed else None,
+        "wall_p50_s": round(statistics.median(walls), 3),
+        "wall_p95_s": round(_pct(walls, 0.95), 3),
+        "throughput_runs_per_min": round(len(runs) / elapsed * 60, 2),
+        "peak_memory_mb": round(peak / 1e6, 1),
+        "llm_calls_per_run": round(len(gemini.calls) / len(runs), 2),
+        "test_runs_per_run": round(docker.runs / len(runs), 2),
+        "nodes": nodes,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, slack_ms: float) -> List[str]:
+    """Regressions of `report` against `baseline` (empty when within tolerance)."""
+    problems = []
+
+    def slower(name: str, now_ms: float, base_ms: float):
+        if now_ms > base_ms * (1 + tolerance) and now_ms - base_ms > slack_ms:
+            problems.append(f"{name}: {now_ms:.0f} ms vs baseline {base_ms:.0f} ms")
+
+    if report["success_rate"] < baseline["success_rate"]:
+        problems.append(f"success_rate: {report['success_rate']} vs baseline {baseline['success_rate']}")
+    if (report["iterations_to_green"] or 0) > (baseline["iterations_to_green"] or 0) + 0.5:
+        problems.append(f"iterations_to_green: {report['iterations_to_green']} vs baseline {baseline['iterations_to_green']}")
+    slower("wall_p50", report["wall_p50_s"] * 1000, baseline["wall_p50_s"] * 1000)
+    # Node quantiles come from histogram buckets and jump between bounds; the mean is steadier
+    for node, stats in report["nodes"].items():
+        if node in baseline["nodes"]:
+            slower(f"node.{node} avg", stats["avg_ms"], baseline["nodes"][node]["avg_ms"])
+    if report["peak_memory_mb"] > baseline["peak_memory_mb"] * (1 + tolerance):
+        problems.append(f"peak_memory: {report['peak_memory_mb']} MB vs baseline {baseline['peak_memory_mb']} MB")
+    return problems
+
+
+def _print(report: Dict[str, Any]):
+    print(f"{report['runs']} runs, {report['seeded_bugs']} seeded bugs each, config {report['config']}")
+    print(f"success {report['success_rate']:.0%}  iterations to green {report['iterations_to_green']}  "
+          f"wall p50 {report['wall_p50_s']}s p95 {report['wall_p95_s']}s  "
+          f"throughput {report['throughput_runs_per_min']} runs/min  peak {report['peak_memory_mb']} MB")
+    print(f"llm calls/run {report['llm_calls_per_run']}  test runs/run {report['test_runs_per_run']}")
+    for node, stats in report["nodes"].items():
+        print(f"  {node:12s} n={stats['count']:<5} avg={stats['avg_ms']:>9.1f} ms  "
+              f"p50={stats['p50_ms']:>9.1f} ms  p95={stats['p95_ms']:>9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--modules", type=int, default=8, help="modules in the synthetic repo")
+    parser.add_argument("--padding", type=int, default=0, help="extra functions per module (repo size)")
+    parser.add_argument("--bug-types", default=",".join(DEFAULT_BUG_TYPES), help=f"subset of {','.join(BUG_TYPES)}")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of scripted fixes that change nothing")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fake Gemini time to first byte")
+    parser.add_argument("--replay", help="JSONL of recorded responses instead of the scripted oracle")
+    parser.add_argument("--analysis-mode", default="two_step", choices=("two_step", "fused"))
+    parser.add_argument("--publish-mode", default="eager", choices=("eager", "deferred", "background"))
+    parser.add_argument("--model-routing", default="cascade", choices=("cascade", "fixed"))
+    parser.add_argument("--max-iterations", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--slack-ms", type=float, default=50.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the nodes' output")
+    args = parser.parse_args()
+
+    report = run_suite(args)
+    print(json.dumps(report, indent=2)) if args.json else _print(report)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against (run with --save-baseline).")
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("config") != report["config"]:
+        print("Baseline was recorded with a different configuration; skipping comparison.")
+        return
+    problems = compare(report, baseline, args.tolerance, args.slack_ms)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    print("OK: within baseline tolerance" if not problems else f"FAIL: {len(problems)} regression(s)")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold-start import budget for the service, measured with `python -X importtime`.
+
+    python -m benchmarks.bench_importtime                  # backend.main, default budget
+    python -m benchmarks.bench_importtime --module backend.worker --budget-ms 400
+
+Exits non-zero if the import takes longer than the budget (best of --repeat runs)
+or if any heavy SDK that must stay lazy gets imported eagerly.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy SDKs that must only be imported on first use (node execution), never at service import
+LAZY_MODULES = ("google.genai", "docker", "git", "supabase", "langgraph", "requests", "uvicorn")
+
+# module -> (budget in ms, modules it must not import eagerly)
+PROFILES = {
+    "backend.main": (1500.0, LAZY_MODULES),
+    "backend.worker": (400.0, LAZY_MODULES),
+    # The graph needs langgraph (which pulls in requests), but not the node SDKs
+    "backend.graph": (2500.0, ("google.genai", "docker", "git", "supabase", "uvicorn")),
+}
+
+
+def measure(module: str, lazy: Tuple[str, ...] = LAZY_MODULES) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """One cold interpreter: returns (total_ms, [(module, self_ms)], eagerly loaded lazy modules)."""
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {tuple(lazy)!r} if m in sys.modules))"
+    )
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=PROJECT_ROOT,
+                          capture_output=True, text=True, env=env, check=True)
+    rows: Dict[str, Tuple[float, float]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    total_ms = rows[module][1]
+    offenders = sorted(((name, s) for name, (s, _) in rows.items()), key=lambda r: r[1], reverse=True)
+    eager = [m for m in proc.stdout.strip().split(",") if m]
+    return total_ms, offenders, eager
+
+
+def check(module: str, budget_ms: float, lazy: Tuple[str, ...] = LAZY_MODULES,
+          repeat: int = 3) -> Tuple[bool, float, List[str]]:
+    results = [measure(module, lazy) for _ in range(repeat)]
+    best_ms = min(r[0] for r in results)
+    eager = results[0][2]
+    return best_ms <= budget_ms and not eager, best_ms, eager
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    budget, lazy = PROFILES.get(args.module, (1000.0, LAZY_MODULES))
+    budget = args.budget_ms or budget
+    ok, best_ms, eager = check(args.module, budget, lazy, args.repeat)
+    _, offenders, _ = measure(args.module, lazy)
+
+    print(f"import {args.module}: {best_ms:.1f} ms (best of {args.repeat}), budget {budget:.0f} ms")
+    print(f"top {args.top} by self time:")
+    for name, self_ms in offenders[:args.top]:
+        print(f"  {self_ms:8.1f} ms  {name}")
+    if eager:
+        print(f"FAIL: imported eagerly: {', '.join(eager)}")
+    elif not ok:
+        print("FAIL: over budget")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
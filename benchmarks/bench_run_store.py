@@ -0,0 +1,66 @@
+"""
+Run store scale benchmark: append and lookup latency with N stored runs.
+
+    python -m benchmarks.bench_run_store --runs 1000000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from backend.run_store import RunStore
+
+
+def _entry(i: int, teams: int) -> dict:
+    return {
+        "run_id": f"run-{i:08d}",
+        "team_name": f"team-{i % teams}",
+        "final_status": "PASSED" if i % 4 else "FAILED",
+        "final_score": i % 110,
+        "completed_at": f"2026-{1 + i // 2_600_000 % 12:02d}-01T00:00:00.{i:08d}",
+        "fixes_applied": [],
+    }
+
+
+def _time_ms(fn, repeat: int = 200) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {"p50_ms": round(statistics.median(samples), 3), "p95_ms": round(samples[int(0.95 * (len(samples) - 1))], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=100_000)
+    parser.add_argument("--teams", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = RunStore(os.path.join(tmp, "runs.db"), legacy_results_file=None)
+
+        start = time.perf_counter()
+        batch = 10_000
+        for offset in range(0, args.runs, batch):
+            store.append_many(_entry(i, args.teams) for i in range(offset, min(offset + batch, args.runs)))
+        print(f"bulk load: {args.runs} runs in {time.perf_counter() - start:.1f}s")
+
+        counter = iter(range(args.runs, args.runs * 2))
+        page = store.query(limit=50)
+        results = {
+            "append": _time_ms(lambda: store.append(_entry(next(counter), args.teams))),
+            "get_by_run_id": _time_ms(lambda: store.get(f"run-{args.runs // 2:08d}")),
+            "latest_for_team": _time_ms(lambda: store.latest_for_team("team-7")),
+            "first_page": _time_ms(lambda: store.query(limit=50)),
+            "next_page": _time_ms(lambda: store.query(limit=50, cursor=page["next_cursor"])),
+            "team_page": _time_ms(lambda: store.query(team_name="team-7", limit=50)),
+        }
+        for name, r in results.items():
+            print(f"{name:>16}: p50={r['p50_ms']}ms p95={r['p95_ms']}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Per-run graph setup cost: rebuilding + compiling the StateGraph vs the cached variant.
+
+    python -m benchmarks.bench_startup --runs 200
+"""
+import argparse
+import statistics
+import time
+
+start = time.perf_counter()
+from backend import graph  # noqa: E402
+IMPORT_MS = (time.perf_counter() - start) * 1000
+
+
+def _time_ms(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {"p50_ms": round(statistics.median(samples), 3), "p95_ms": round(samples[int(0.95 * (len(samples) - 1))], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    graph.warm_workflows()
+    warm_ms = (time.perf_counter() - t0) * 1000
+
+    print(f"import backend.graph: {IMPORT_MS:.1f} ms")
+    print(f"warm_workflows ({len(graph.PUBLISH_MODES) * len(graph.ANALYSIS_MODES)} variants): {warm_ms:.1f} ms")
+    results = {
+        "rebuild_per_run (before)": _time_ms(lambda: graph.create_workflow("background"), args.runs),
+        "cached_per_run (after)": _time_ms(lambda: graph.get_workflow("background"), args.runs),
+    }
+    for name, r in results.items():
+        print(f"{name:28s} p50={r['p50_ms']:>9} ms  p95={r['p95_ms']:>9} ms")
+
+
+if __name__ == "__main__":
+    main()
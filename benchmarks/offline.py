@@ -0,0 +1,335 @@
+"""
+Offline stand-ins for the services a healing run talks to, for benchmarks and tests.
+
+- make_target_repo(): a synthetic Python project of configurable size with one
+  seeded bug per buggy module (one bug class each), committed and served from a
+  local bare remote that discovery clones and git_node pushes to.
+- FakeGemini: an HTTP server speaking the generateContent / streamGenerateContent
+  REST surface. google-genai is pointed at it via GOOGLE_GEMINI_BASE_URL, so the
+  real client, gateway, streaming parser and router all run. Answers come from an
+  oracle that knows the seeded bugs (optionally wrong at a seeded rate) or from a
+  recorded JSONL file replayed in order.
+- LocalDocker: a docker client whose containers run the test step with the local
+  interpreter in the mounted workspace.
+"""
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+BUG_TYPES = ("LOGIC", "SYNTAX", "TYPE_ERROR", "IMPORT", "INDENTATION", "MARKER_CLEANUP", "LINTING")
+# LINTING bugs are reported by flake8 but never fail the test run, so they are opt-in
+DEFAULT_BUG_TYPES = BUG_TYPES[:-1]
+
+
+# ── Synthetic target repos ───────────────────────────────────────
+
+@dataclass
+class SeededBug:
+    file: str
+    line: int
+    bug_type: str
+    description: str
+    fixed: str  # clean content of `file`
+    buggy: str
+
+
+@dataclass
+class TargetRepo:
+    remote: str                      # bare repo path, usable as repo_url
+    bugs: List[SeededBug] = field(default_factory=list)
+
+
+def _module(i: int, padding: int) -> str:
+    lines = [
+        f"def add_{i}(a, b):",
+        "    return a + b",
+        "",
+        "",
+        f"def scale_{i}(values, factor):",
+        "    return [v * factor for v in values]",
+        "",
+        "",
+        f"def label_{i}(name):",
+        f"    return 'item-{i}:' + name",
+    ]
+    for k in range(padding):
+        lines += ["", "", f"def helper_{i}_{k}(x):", f"    return x * {k + 1} + {i}"]
+    return "\n".join(lines) + "\n"
+
+
+def _test_module(i: int) -> str:
+    return (
+        f"from src.mod_{i} import add_{i}, scale_{i}, label_{i}\n\n\n"
+        f"def test_add_{i}():\n    assert add_{i}(2, 3) == 5\n\n\n"
+        f"def test_scale_{i}():\n    assert scale_{i}([1, 2], 3) == [3, 6]\n\n\n"
+        f"def test_label_{i}():\n    assert label_{i}('x') == 'item-{i}:x'\n"
+    )
+
+
+def _inject(clean: str, i: int, bug_type: str):
+    """Returns (buggy content, line, description) for one bug class."""
+    if bug_type == "LOGIC":
+        return clean.replace("    return a + b", "    return a - b", 1), 2, f"add_{i} subtracts instead of adding"
+    if bug_type == "SYNTAX":
+        return clean.replace(f"def add_{i}(a, b):", f"def add_{i}(a, b)", 1), 1, "missing colon after def"
+    if bug_type == "INDENTATION":
+        return clean.replace("    return a + b", "return a + b", 1), 2, f"body of add_{i} is not indented"
+    if bug_type == "TYPE_ERROR":
+        return (clean.replace(f"    return 'item-{i}:' + name", f"    return 'item-' + {i} + ':' + name", 1), 10,
+                f"label_{i} adds an int to a str")
+    if bug_type == "IMPORT":
+        return f"from src.missing_{i} import helper\n" + clean, 1, f"src/mod_{i}.py imports a module that does not exist"
+    if bug_type == "MARKER_CLEANUP":
+        marked = clean.replace("    return a + b\n", "<<<<<<< HEAD\n    return a + b\n=======\n    return a - b\n>>>>>>> feature\n", 1)
+        return marked, 2, "unresolved merge conflict markers"
+    if bug_type == "LINTING":
+        return "import os\n" + clean, 1, "unused import 'os'"
+    raise ValueError(f"Unknown bug type '{bug_type}'")
+
+
+def make_target_repo(root: str, modules: int = 6, bug_types=DEFAULT_BUG_TYPES, buggy: Optional[int] = None,
+                     padding: int = 0, name: str = "synthetic", seed: int = 0) -> TargetRepo:
+    """
+    Writes `modules` modules (each with 3 tests and `padding` extra functions), seeds a
+    bug into `buggy` of them (default: one per bug type) cycling through `bug_types`,
+    commits it and clones it bare to <root>/remotes/<name>.git.
+    """
+    from git import Repo
+
+    rng = random.Random(seed)
+    buggy = len(bug_types) if buggy is None else buggy
+    targets = sorted(rng.sample(range(modules), min(buggy, modules)))
+    seed_path = os.path.join(root, "seed", name)
+    os.makedirs(os.path.join(seed_path, "src"))
+    os.makedirs(os.path.join(seed_path, "tests"))
+    for pkg in ("src", "tests"):
+        open(os.path.join(seed_path, pkg, "__init__.py"), "w").close()
+    with open(os.path.join(seed_path, "requirements.txt"), "w") as f:
+        f.write("pytest\n")
+
+    bugs = []
+    for i in range(modules):
+        clean = _module(i, padding)
+        content = clean
+        if i in targets:
+            bug_type = bug_types[targets.index(i) % len(bug_types)]
+            content, line, description = _inject(clean, i, bug_type)
+            bugs.append(SeededBug(f"src/mod_{i}.py", line, bug_type, description, clean, content))
+        with open(os.path.join(seed_path, "src", f"mod_{i}.py"), "w") as f:
+            f.write(content)
+        with open(os.path.join(seed_path, "tests", f"test_mod_{i}.py"), "w") as f:
+            f.write(_test_module(i))
+
+    repo = Repo.init(seed_path, initial_branch="main")
+    with repo.config_writer() as cw:
+        cw.set_value("user", "name", "Bench")
+        cw.set_value("user", "email", "bench@rift.local")
+    repo.git.add(all=True)
+    repo.index.commit("initial")
+    remote = os.path.join(root, "remotes", f"{name}.git")
+    repo.clone(remote, bare=True)
+    return TargetRepo(remote, bugs)
+
+
+# ── Fake Gemini ──────────────────────────────────────────────────
+
+class Oracle:
+    """Scripted model that fixes the seeded bugs; `error_rate` of fixes change nothing."""
+
+    def __init__(self, bugs: List[SeededBug], error_rate: float = 0.0, seed: int = 0):
+        self.bugs = bugs
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _pick(self, prompt: str) -> Optional[SeededBug]:
+        failures = prompt.split("FAILURES + LINTING SECTION", 1)[-1].split("Source Files (for context)", 1)[0]
+        failing = [b for b in self.bugs if re.search(re.escape(os.path.basename(b.file)[:-3]) + r"(?!\d)", failures)]
+        return failing[0] if failing else None
+
+    def _fixed(self, bug: SeededBug) -> str:
+        with self._lock:
+            wrong = self._rng.random() < self.error_rate
+        return bug.buggy if wrong else bug.fixed
+
+    def reply(self, prompt: str) -> str:
+        if "Then FIX the bug in the same response" in prompt:
+            bug = self._pick(prompt)
+            if bug is None:
+                return json.dumps({"file": "", "line": 0, "bug_type": "LOGIC", "description": "nothing found"})
+            return json.dumps({"file": bug.file, "line": bug.line, "bug_type": bug.bug_type,
+                               "description": bug.description, "fix_action": f"fix {bug.bug_type.lower()}",
+                               "fixed_code": self._fixed(bug)})
+        if '"fixed_code"' in prompt:
+            target = re.search(r"^\s*File: (\S+)", prompt, re.MULTILINE)
+            bug = next((b for b in self.bugs if target and b.file == target.group(1)), None)
+            if bug is None:
+                return json.dumps({"fixed_code": "", "fix_action": "no-op"})
+            return json.dumps({"fixed_code": self._fixed(bug), "fix_action": f"fix {bug.bug_type.lower()}"})
+        bug = self._pick(prompt)
+        if bug is None:
+            return json.dumps({"file": "", "line": 0, "bug_type": "LOGIC", "description": "nothing found"})
+        return json.dumps({"file": bug.file, "line": bug.line, "bug_type": bug.bug_type, "description": bug.description})
+
+
+class Replay:
+    """Recorded responses (JSONL of {"kind": "debugger"|"fixer"|"fused", "text": ...}) served in order."""
+
+    def __init__(self, path: str):
+        self._queues: Dict[str, List[str]] = {}
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    self._queues.setdefault(item["kind"], []).append(item["text"])
+        self._lock = threading.Lock()
+
+    def reply(self, prompt: str) -> str:
+        kind = ("fused" if "Then FIX the bug in the same response" in prompt
+                else "fixer" if '"fixed_code"' in prompt else "debugger")
+        with self._lock:
+            queue = self._queues.get(kind) or []
+            if not queue:
+                raise LookupError(f"recording has no more '{kind}' responses")
+            return queue.pop(0)
+
+
+class FakeGemini:
+    """
+    Serves POST /v1beta/models/<model>:generateContent and :streamGenerateContent?alt=sse.
+    `latency_ms` delays the first byte; streamed replies arrive in `chunk_chars` pieces.
+    """
+
+    def __init__(self, responder, latency_ms: float = 0.0, chunk_chars: int = 256):
+        self.responder = responder
+        self.latency_ms = latency_ms
+        self.chunk_chars = chunk_chars
+        self.calls: List[str] = []   # model per call
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                match = re.search(r"/models/([^:/]+):(\w+)", self.path)
+                model, method = (match.group(1), match.group(2)) if match else ("", "")
+                prompt = "".join(p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", []))
+                fake.calls.append(model)
+                time.sleep(fake.latency_ms / 1000)
+                try:
+                    text = fake.responder.reply(prompt)
+                except LookupError as e:
+                    return self._send(500, "application/json", json.dumps({"error": {"code": 500, "message": str(e)}}))
+                usage = {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(text) // 4,
+                         "totalTokenCount": (len(prompt) + len(text)) // 4}
+                if method == "streamGenerateContent":
+                    pieces = [text[i:i + fake.chunk_chars] for i in range(0, len(text), fake.chunk_chars)] or [""]
+                    events = []
+                    for n, piece in enumerate(pieces):
+                        chunk = _candidate(piece, last=n == len(pieces) - 1)
+                        if n == len(pieces) - 1:
+                            chunk["usageMetadata"] = usage
+                        events.append(f"data: {json.dumps(chunk)}\r\n\r\n")
+                    return self._send(200, "text/event-stream", "".join(events))
+                return self._send(200, "application/json", json.dumps({**_candidate(text, last=True), "usageMetadata": usage}))
+
+            def _send(self, status: int, content_type: str, data: str):
+                raw = data.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-gemini", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _candidate(text: str, last: bool) -> dict:
+    candidate = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+    if last:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate]}
+
+
+# ── Local docker stand-in ────────────────────────────────────────
+
+class _LocalContainer:
+    def __init__(self, workdir: str, command: str):
+        self.workdir = workdir
+        self.command = command
+        self._result: Optional[subprocess.CompletedProcess] = None
+
+    def _run(self):
+        env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1",
+               "PYTHONPATH": os.pathsep.join([os.path.join(self.workdir, "src"), self.workdir])}
+        output = ""
+        if "flake8" in self.command and os.path.isdir(os.path.join(self.workdir, "src")):
+            lint = subprocess.run([sys.executable, "-m", "flake8", "src/", "--count",
+                                   "--select=F401,E9,F63,F7,F82", "--show-source", "--statistics"],
+                                  cwd=self.workdir, capture_output=True, text=True, env=env)
+            if "No module named flake8" not in lint.stderr:
+                output += lint.stdout + lint.stderr
+        if "pytest" in self.command:
+            args = [sys.executable, "-m", "pytest", "-v", "--tb=long", "-p", "no:cacheprovider"]
+        else:
+            args = [sys.executable, "main.py"]
+        proc = subprocess.run(args, cwd=self.workdir, capture_output=True, text=True, env=env)
+        self._result = subprocess.CompletedProcess(args, proc.returncode, output + proc.stdout + proc.stderr)
+
+    def wait(self, timeout=None):
+        if self._result is None:
+            self._run()
+        return {"StatusCode": self._result.returncode}
+
+    def logs(self, stdout=True, stderr=True, stream=False):
+        if self._result is None:
+            self._run()
+        output = self._result.stdout.encode()
+        return iter([output]) if stream else output
+
+    def remove(self):
+        pass
+
+
+class LocalDocker:
+    """Enough of docker.DockerClient for the Tester: containers.run(..., detach=True) + wait/logs/remove."""
+
+    def __init__(self):
+        self.containers = self
+        self.runs = 0
+
+    def ping(self):
+        return True
+
+    def run(self, image, command="", volumes=None, working_dir=None, detach=False, **kwargs):
+        self.runs += 1
+        host_path = next(iter(volumes or {}), os.getcwd())
+        container = _LocalContainer(host_path, command)
+        if not detach:
+            container.wait()
+            return container.logs()
+        return container
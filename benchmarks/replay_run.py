@@ -0,0 +1,97 @@
+"""
+Replays a recorded run (backend/utils/cassette.py) through the full graph at full speed.
+
+    # record, on the API or worker process:
+    CASSETTE_MODE=record CASSETTE_FILE=/tmp/slow-run.jsonl.gz python -m backend.worker
+
+    # replay it offline, against a local mirror of the target repo:
+    git clone --bare https://github.com/org/repo /tmp/repo.git
+    python -m benchmarks.replay_run /tmp/slow-run.jsonl.gz --repo-url /tmp/repo.git --repeat 5
+    python -m benchmarks.replay_run /tmp/slow-run.jsonl.gz --repo-url /tmp/repo.git --profile
+
+Gemini, GitHub REST and Docker answers come from the cassette without their
+latency, so the per-node times reported here are the pipeline's own overhead
+(prompt building, parsing, validation, git work, bookkeeping). --profile stores
+the usual per-node profile artifacts (backend/profiler.py) under a temp dir.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("cassette")
+    parser.add_argument("--repo-url", required=True, help="local mirror (path or file:// URL) of the recorded repo")
+    parser.add_argument("--run-id", help="recorded run to replay (default: the first one in the cassette)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--profile", action="store_true", help="also capture per-node profiles")
+    parser.add_argument("--verbose", action="store_true", help="show the nodes' output")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="rift-replay-")
+    os.environ.update({
+        "STORAGE_BACKEND": "none",
+        "RUN_STORE_DB": os.path.join(tmp, "runs.db"),
+        "ROUTING_DB": os.path.join(tmp, "routing.db"),
+        "CHECKPOINT_DB": os.path.join(tmp, "checkpoints.db"),
+        "RUN_CACHE_DB": os.path.join(tmp, "run_cache.db"),
+        "DEPENDENCY_CACHE_DIR": os.path.join(tmp, "dep_cache"),
+        "PROFILE_DIR": os.path.join(tmp, "profiles"),
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY") or "replay",
+        "LLM_REQUESTS_PER_MINUTE": "100000",
+    })
+    os.environ.pop("GITHUB_TOKEN", None)  # clone the mirror directly instead of the recorded fork
+    os.environ.pop("CASSETTE_MODE", None)
+
+    from backend.logger import flush_logs
+    from backend.main import HealingRequest, run_healing_workflow
+    from backend.nodes import discovery
+    from backend.telemetry import telemetry
+    from backend.utils.cassette import Cassette, use_cassette
+
+    recorded = Cassette(args.cassette, "replay").requests()
+    if not recorded:
+        sys.exit("Cassette has no recorded run request.")
+    run_id = args.run_id or recorded[0]["run_id"]
+    payload = next((r for r in recorded if r["run_id"] == run_id), None)
+    if payload is None:
+        sys.exit(f"Run {run_id} is not in the cassette.")
+    payload = {k: v for k, v in payload.items() if k != "run_id"}
+
+    walls, statuses = [], []
+    for i in range(args.repeat):
+        cassette = Cassette(args.cassette, "replay", run_id)
+        use_cassette(cassette)
+        discovery.WORK_DIR = os.path.join(tmp, f"workspaces-{i}")
+        # A fresh team name per replay gives each its own branch, so no replay rebases onto another's pushes
+        request = HealingRequest(**{**payload, "repo_url": args.repo_url, "profile": args.profile,
+                                    "team_name": f"{payload['team_name']}_REPLAY_{os.getpid()}_{i}"})
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+            entry = asyncio.run(run_healing_workflow(request))
+            flush_logs()
+        walls.append(time.perf_counter() - started)
+        statuses.append((entry.get("result") or {}).get("final_status", entry.get("status")))
+        leftover = {c: n for c, n in cassette.remaining().items() if n}
+        print(f"replay {i + 1}: {walls[-1]:.2f}s, {statuses[-1]}"
+              + (f", {len(cassette.mismatches)} mismatch(es)" if cassette.mismatches else "")
+              + (f", unused {leftover}" if leftover else ""))
+        if args.profile:
+            print(f"  profile: {os.path.join(os.environ['PROFILE_DIR'], entry['run_id'])}")
+
+    print(f"run {run_id}: {args.repeat} replays, wall p50 {statistics.median(walls):.2f}s, "
+          f"min {min(walls):.2f}s, statuses {sorted(set(map(str, statuses)))}")
+    for name, stats in telemetry.summary().items():
+        if name.startswith("node."):
+            print(f"  {name[5:]:12s} n={stats['count']:<4} avg={stats['avg_ms']:>8.1f} ms  p95={stats['p95_ms']:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
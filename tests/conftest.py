@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from git import Repo
+
+
+# ── Storage isolation ────────────────────────────────────────────────────────
+
+@pytest.fixture(autouse=True, scope="session")
+def _isolated_storage(tmp_path_factory):
+    """Keeps the default SQLite storage, routing table, blob store, checkpoints, run cache and package caches out of the project root during tests."""
+    os.environ.setdefault("STORAGE_DB", str(tmp_path_factory.mktemp("storage") / "storage.db"))
+    os.environ.setdefault("ROUTING_DB", str(tmp_path_factory.mktemp("routing") / "routing.db"))
+    os.environ.setdefault("BLOB_DIR", str(tmp_path_factory.mktemp("blobs")))
+    os.environ.setdefault("CHECKPOINT_DB", str(tmp_path_factory.mktemp("checkpoints") / "checkpoints.db"))
+    os.environ.setdefault("RUN_CACHE_DB", str(tmp_path_factory.mktemp("run_cache") / "run_cache.db"))
+    os.environ.setdefault("DEPENDENCY_CACHE_DIR", str(tmp_path_factory.mktemp("dep_cache")))
+    os.environ.setdefault("RUN_DEDUP", "0")  # no `git ls-remote` against the made-up URLs in API tests
+    yield
+
+
+# ── Local git remote ─────────────────────────────────────────────────────────
+
+@pytest.fixture
+def bare_remote(tmp_path):
+    """
+    A bare repo at <tmp>/remotes/octo/widgets.git seeded with a small Python project,
+    plus a workspace clone of it. Returns (workspace_path, bare_path).
+    """
+    seed_path = tmp_path / "seed"
+    seed = Repo.init(seed_path, initial_branch="main")
+    with seed.config_writer() as cw:
+        cw.set_value("user", "name", "Tester")
+        cw.set_value("user", "email", "tester@rift.local")
+    (seed_path / "src").mkdir()
+    (seed_path / "src" / "calc.py").write_text("def add(a, b):\n    return a - b\n")
+    seed.git.add(all=True)
+    seed.index.commit("initial")
+
+    bare_path = tmp_path / "remotes" / "octo" / "widgets.git"
+    seed.clone(str(bare_path), bare=True)
+
+    workspace = tmp_path / "workspace"
+    repo = Repo.clone_from(str(bare_path), str(workspace))
+    with repo.config_writer() as cw:
+        cw.set_value("user", "name", "Tester")
+        cw.set_value("user", "email", "tester@rift.local")
+    return str(workspace), str(bare_path)
+
+
+# ── Offline healing run ──────────────────────────────────────────────────────
+
+@pytest.fixture
+def offline(tmp_path, monkeypatch):
+    """Synthetic repo with a LOGIC and a SYNTAX bug, a scripted fake Gemini and local 'containers'."""
+    from benchmarks.offline import FakeGemini, LocalDocker, Oracle, make_target_repo
+    from backend import run_store
+    from backend.nodes import discovery
+    from backend.utils import clients
+
+    target = make_target_repo(str(tmp_path), modules=3, bug_types=["LOGIC", "SYNTAX"], seed=1)
+    gemini = FakeGemini(Oracle(target.bugs)).start()
+    monkeypatch.setenv("GOOGLE_GEMINI_BASE_URL", gemini.url)
+    monkeypatch.setenv("GOOGLE_API_KEY", f"offline-{gemini.url}")  # fresh client bound to this server
+    monkeypatch.setenv("STORAGE_BACKEND", "none")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.setattr(clients, "_docker_client", LocalDocker())
+    monkeypatch.setattr(discovery, "WORK_DIR", str(tmp_path / "workspaces"))
+    monkeypatch.setattr(run_store, "_store", run_store.RunStore(str(tmp_path / "runs.db"), legacy_results_file=None))
+    yield target, gemini
+    gemini.stop()
+
+
+# ── Fake GitHub REST API ─────────────────────────────────────────────────────
+
+class FakeGitHub:
+    """
+    Minimal stand-in for api.github.com. `routes` maps (METHOD, path) to a
+    (status, json_body) tuple or a callable(handler, body) returning one.
+    Every request is recorded in `requests` as (method, path, headers, body).
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else None
+                fake.requests.append((method, self.path, dict(self.headers), body))
+                route = fake.routes.get((method, self.path), (404, {"message": "Not Found"}))
+                if callable(route):
+                    route = route(self, body)
+                status, payload = route[0], route[1]
+                extra_headers = route[2] if len(route) > 2 else {}
+                data = b"" if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in extra_headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def calls(self, method, path):
+        return [r for r in self.requests if r[0] == method and r[1] == path]
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def fake_github(monkeypatch):
+    server = FakeGitHub().start()
+    monkeypatch.setenv("GITHUB_API_URL", server.url)
+    monkeypatch.setenv("GITHUB_TOKEN", "test-token")
+    yield server
+    server.stop()
@@ -27,23 +27,12 @@ async def test_end_to_end_healing():
     except Exception as e:
         pytest.fail(f"Workflow crashed during execution: {e}")
         
-    # Validation: Check results.json for the latest entry for this team
-    import os
-    import json
-    
-    # Path to results.json in project root
-    results_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "results.json")
-    
-    assert os.path.exists(results_path), "results.json was not created/found"
-    
-    with open(results_path, "r") as f:
-        results = json.load(f)
-        
-    # Find the most recent entry for our golden test bot
-    my_runs = [r for r in results if r.get('team_name') == team_name]
-    assert len(my_runs) > 0, f"No results found for {team_name} in results.json"
+    # Validation: Check the run store for the latest entry for this team
+    from backend.run_store import get_run_store
+
+    latest_run = get_run_store().latest_for_team(team_name)
+    assert latest_run is not None, f"No results found for {team_name} in the run store"
     
-    latest_run = my_runs[-1]
     status = latest_run.get('final_status')
     score = latest_run.get('final_score')
     
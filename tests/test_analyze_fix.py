@@ -0,0 +1,83 @@
+import json
+
+from backend import graph
+from backend.nodes import analyze_fix, fixer
+from backend.utils.llm_gateway import StreamResult
+
+LOGS = (
+    "FAILED tests/test_validate.py::test_validate_age - Failed: DID NOT RAISE <class 'ValueError'>\n"
+    "src/validate.py:3: in validate_age\n"
+)
+
+
+def _state(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "tests").mkdir()
+    (repo / "src" / "validate.py").write_text("def validate_age(age):\n    if age < 0:\n        return False\n    return True\n")
+    (repo / "tests" / "test_validate.py").write_text(
+        "import pytest\nfrom src.validate import validate_age\n\n\n"
+        "def test_validate_age():\n    with pytest.raises(ValueError):\n        validate_age(-1)\n"
+    )
+    return {"repo_path": str(repo), "run_id": "run-fused", "error_logs": LOGS, "fixes_applied": [],
+            "retry_count": 1, "model_routing": "fixed", "current_analysis": {}}
+
+
+def _fake_stream(responses, prompts):
+    def fake(prompt, model, on_text, config=None, run_id=None, api_key=None, timeout=None, node=None):
+        text = responses[len(prompts)]
+        prompts.append(prompt)
+        for i in range(0, len(text), 7):
+            on_text(text[i:i + 7])
+        return StreamResult(text, ttfb_ms=1.0, latency_ms=2.0, chunks=len(text) // 7 + 1)
+    return fake
+
+
+def _reply(fixed_code, file="src/validate.py"):
+    return json.dumps({"file": file, "line": 3, "bug_type": "SYNTAX", "description": "must raise",
+                       "fix_action": "raise ValueError", "fixed_code": fixed_code})
+
+
+def test_one_call_diagnoses_and_applies_with_guards(tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    prompts = []
+    good = "def validate_age(age):\n    if age < 0:\n        raise ValueError('negative')\n    return True\n"
+    responses = [
+        _reply("def validate_age(age):\n    return age >= 0\n"),  # exception guard: never raises -> regenerate
+        _reply(good),
+    ]
+    monkeypatch.setattr(fixer, "llm_generate_stream", _fake_stream(responses, prompts))
+
+    state = analyze_fix.analyze_fix_node(_state(tmp_path))
+
+    assert len(prompts) == 2
+    assert "CRITICAL EXCEPTION GUARD" in prompts[0] and '"fixed_code"' in prompts[0]
+    assert (tmp_path / "repo" / "src" / "validate.py").read_text() == good
+    assert not (tmp_path / "repo" / analyze_fix.FUSED_TMP_NAME).exists()
+    # Deterministic anchors from the debugger are applied to the fused answer
+    analysis = state["current_analysis"]
+    assert analysis["expected_exceptions"] == ["ValueError"] and analysis["bug_type"] == "LOGIC"
+    assert "fixed_code" not in analysis
+    assert state["current_step"] == "FIX_APPLIED"
+    assert state["fixes_applied"][0]["path"] == "src/validate.py"
+
+
+def test_hallucinated_file_is_blocked(tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    prompts = []
+    bogus = _reply("def boss():\n    raise ValueError()\n", file="src/boss.py")
+    monkeypatch.setattr(fixer, "llm_generate_stream", _fake_stream([bogus], prompts))
+
+    state = analyze_fix.analyze_fix_node(_state(tmp_path))
+
+    assert state["fixes_applied"] == []
+    assert not (tmp_path / "repo" / "src" / "boss.py").exists()
+    assert not (tmp_path / "repo" / analyze_fix.FUSED_TMP_NAME).exists()
+
+
+def test_fused_variant_replaces_debugger_and_fixer():
+    fused = graph.get_workflow("eager", "fused")
+    nodes = fused.get_graph().nodes
+    assert "analyze_fix" in nodes and "debugger" not in nodes and "fixer" not in nodes
+    assert graph.get_workflow("eager", "fused") is fused
+    assert graph.get_workflow("eager") is not fused
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from git import Repo
+
+from backend import main
+from backend.batch import probe_repo
+from backend.scheduler import RunScheduler
+from backend.utils.dependency_cache import dependency_hash, read_manifest
+
+
+def _remote(tmp_path, name, files):
+    seed = Repo.init(tmp_path / name, initial_branch="main")
+    for path, content in files.items():
+        (tmp_path / name / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name / path).write_text(content)
+    seed.git.add(all=True)
+    seed.git.execute(["git", "-c", "user.name=Tester", "-c", "user.email=tester@rift.local",
+                      "commit", "-q", "-m", "initial"])
+    bare = tmp_path / "remotes" / f"{name}.git"
+    seed.clone(str(bare), bare=True)
+    return str(bare)
+
+
+def test_probe_agrees_with_discovery_without_a_checkout(tmp_path):
+    remote = _remote(tmp_path, "api", {"requirements.txt": "requests==2.32.0\n", "tests/test_api.py": "x = 1\n"})
+
+    probe = probe_repo(remote)
+
+    assert probe == {"stack": "PYTHON", "dependency_hash": dependency_hash(read_manifest(str(tmp_path / "api")))}
+    assert probe_repo(str(tmp_path / "missing.git")) == {"stack": "UNKNOWN", "dependency_hash": None}
+
+
+@pytest.mark.asyncio
+async def test_batch_groups_by_dependencies_and_streams_results(tmp_path, monkeypatch):
+    python = {"requirements.txt": "requests==2.32.0\n", "tests/test_a.py": "x = 1\n"}
+    remotes = [_remote(tmp_path, "py1", python), _remote(tmp_path, "js", {"package.json": '{"scripts": {"test": "jest"}}'}),
+               _remote(tmp_path, "py2", python)]
+    timeline = []
+
+    async def runner(job):
+        timeline.append(("start", job.payload.repo_url))
+        await asyncio.sleep(0.02)
+        timeline.append(("end", job.payload.repo_url))
+        main._set_status(job.run_id, job.team_name, status="done",
+                         result={"final_status": "PASSED", "final_score": 100, "pr_url": None})
+
+    monkeypatch.setattr(main, "scheduler", RunScheduler(runner, max_workers=4))
+    monkeypatch.setattr(main, "BATCH_POLL_SECONDS", 0.01)
+    body = {"concurrency": 3, "runs": [{"repo_url": r, "team_name": f"T{i}", "leader_name": "L"}
+                                       for i, r in enumerate(remotes)]}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        accepted = (await client.post("/start-healing/batch", json=body)).json()
+        assert accepted["total"] == 3 and accepted["concurrency"] == 3
+        batch_id = accepted["batch_id"]
+        for _ in range(500):
+            summary = (await client.get(f"/batches/{batch_id}")).json()
+            if summary["status"] == "done":
+                break
+            await asyncio.sleep(0.01)
+
+        events = await client.get(f"/batches/{batch_id}/events")
+        missing = await client.get("/batches/nope")
+
+    assert summary["counts"] == {"done": 3} and summary["progress"] == 1.0
+    assert sorted(summary["groups"].values()) == [1, 2]
+    py_group = next(key for key, size in summary["groups"].items() if size == 2)
+    assert py_group.startswith("python-") and {r["group"] for r in summary["runs"]} == set(summary["groups"])
+    assert all(r["final_status"] == "PASSED" and r["run_id"] for r in summary["runs"])
+    # The Python group's second repo waits for the first to warm the cache; the Node repo does not
+    py_first = next(t for t in timeline if t[1] in (remotes[0], remotes[2]))[1]
+    py_second = remotes[2] if py_first == remotes[0] else remotes[0]
+    assert timeline.index(("end", py_first)) < timeline.index(("start", py_second))
+    assert timeline.index(("start", remotes[1])) < timeline.index(("end", py_first))
+
+    types = [json.loads(line[6:])["type"] for line in events.text.splitlines() if line.startswith("data: ")]
+    assert types == ["batch_grouped", "batch_run_end", "batch_run_end", "batch_run_end", "batch_end"]
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_empty_and_oversized_requests(monkeypatch):
+    monkeypatch.setattr("backend.batch.BATCH_MAX_RUNS", 2)
+    run = {"repo_url": "https://github.com/octo/widgets", "team_name": "T", "leader_name": "L"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        empty = await client.post("/start-healing/batch", json={"runs": []})
+        oversized = await client.post("/start-healing/batch", json={"runs": [run] * 3})
+
+    assert empty.status_code == 422 and oversized.status_code == 413
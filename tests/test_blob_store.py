@@ -0,0 +1,108 @@
+import os
+
+import httpx
+import pytest
+
+from backend import main
+from backend.nodes import tester
+from backend.utils import blob_store, clients
+from backend.utils.blob_store import BlobStore, LogWindow, capture_logs
+
+HEAD = b"============ test session starts ============\ncollected 40 items\n\n"
+TAIL = b"=========== 2 failed, 38 passed in 1.20s ===========\n"
+
+
+def _chatty_output(mb: int = 2):
+    yield HEAD
+    line = b"tests/test_noise.py::test_prints PASSED  " + b"x" * 80 + b"\n"
+    for _ in range(mb * 1024 * 1024 // len(line)):
+        yield line
+    yield b"FAILED tests/test_calc.py::test_add - assert -1 == 3\n" + TAIL
+
+
+class StreamingDocker:
+    """A container whose logs only exist as a chunk stream (like logs(stream=True) on a real daemon)."""
+
+    def __init__(self):
+        self.containers = self
+
+    def run(self, image, command=None, **kwargs):
+        return self
+
+    def wait(self, timeout=None):
+        return {"StatusCode": 1}
+
+    def logs(self, stdout=True, stderr=True, stream=False):
+        assert stream, "tester should stream container logs"
+        return _chatty_output()
+
+    def remove(self):
+        pass
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store, "_store", store)
+    return store
+
+
+def test_capture_keeps_a_head_tail_window_and_stores_the_full_log_once(store):
+    text, ref, total = capture_logs("run-b", _chatty_output())
+
+    assert total > 2 * 1024 * 1024
+    assert len(text) < blob_store.LOG_HEAD_BYTES + blob_store.LOG_TAIL_BYTES + 200
+    assert "collected 40 items" in text and text.rstrip().endswith(TAIL.decode().strip())
+    assert f"bytes omitted; full log: {ref}]" in text
+    assert store.get("run-b", ref) == b"".join(_chatty_output())
+
+    assert capture_logs("run-b", _chatty_output())[1] == ref  # content-addressed: stored once
+    assert os.listdir(store.run_dir("run-b")) == [ref.split(":")[1]]
+
+
+def test_small_output_is_kept_whole():
+    window = LogWindow(head=64, tail=64)
+    window.feed(b"collected 1 item\n")
+    window.feed(b"1 passed\n")
+
+    assert window.text("sha256:x") == "collected 1 item\n1 passed\n" and window.omitted == 0
+
+
+def test_tester_state_holds_the_window_and_a_reference(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(clients, "_docker_client", StreamingDocker())
+    monkeypatch.setattr(tester, "STATE_HISTORY_LIMIT", 3)
+    state = {"run_id": "run-t", "repo_path": str(tmp_path), "detected_stack": "PYTHON", "start_time": 0,
+             "timeline": [{"event": "OLD"}] * 5, "failure_history": [4, 3, 2], "fixes_applied": []}
+
+    state = tester.tester_node(state)
+
+    assert len(state["error_logs"]) < 100 * 1024
+    assert state["failure_count"] == 2 and state["failure_history"] == [3, 2, 2]
+    assert len(state["timeline"]) == 3 and state["timeline"][-1]["details"]["logs_ref"] == state["error_logs_ref"]
+    assert len(store.get("run-t", state["error_logs_ref"])) > 2 * 1024 * 1024
+
+
+@pytest.mark.asyncio
+async def test_blob_endpoint_serves_only_well_formed_refs(store):
+    ref = store.put("run-e", "full test output\n")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        found = await client.get(f"/runs/run-e/blobs/{ref}")
+        escaped = await client.get("/runs/run-e/blobs/sha256:..%2F..%2Fetc%2Fpasswd")
+        unknown = await client.get(f"/runs/run-x/blobs/{ref}")
+
+    assert found.status_code == 200 and found.text == "full test output\n"
+    assert escaped.status_code == unknown.status_code == 404
+
+
+def test_prune_removes_only_runs_idle_past_the_ttl(store):
+    old_ref, new_ref = store.put("run-old", b"old log"), store.put("run-new", b"new log")
+    week_ago = os.path.getmtime(store.run_dir("run-old")) - 8 * 24 * 3600
+    for path in (store.run_dir("run-old"), store.path("run-old", old_ref)):
+        os.utime(path, (week_ago, week_ago))
+
+    assert store.prune(ttl=0) == 0
+    assert store.prune(ttl=7 * 24 * 3600) == 1
+    assert store.get("run-old", old_ref) is None
+    assert store.get("run-new", new_ref) == b"new log"
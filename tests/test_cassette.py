@@ -0,0 +1,81 @@
+import pytest
+
+from benchmarks.offline import FakeGemini, LocalDocker, Oracle, make_target_repo
+from backend.main import HealingRequest, run_healing_workflow
+from backend.nodes import discovery
+from backend.run_store import RunStore
+from backend.utils import cassette as cassette_mod
+from backend.utils import clients
+from backend.utils.cassette import Cassette, CassetteDocker, CassetteMismatch, use_cassette
+from backend.utils.github_client import get_github_client, github_sync
+import backend.run_store as run_store
+
+
+@pytest.fixture
+def cassette_off():
+    yield
+    use_cassette(None)
+
+
+@pytest.mark.asyncio
+async def test_recorded_run_replays_without_model_or_docker(tmp_path, monkeypatch, cassette_off):
+    target = make_target_repo(str(tmp_path), modules=2, bug_types=["LOGIC"], seed=3)
+    gemini = FakeGemini(Oracle(target.bugs)).start()
+    monkeypatch.setenv("GOOGLE_GEMINI_BASE_URL", gemini.url)
+    monkeypatch.setenv("GOOGLE_API_KEY", f"cassette-{gemini.url}")
+    monkeypatch.setenv("STORAGE_BACKEND", "none")
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+    monkeypatch.setattr(run_store, "_store", RunStore(str(tmp_path / "runs.db"), legacy_results_file=None))
+    path = str(tmp_path / "run.jsonl.gz")
+    request = HealingRequest(repo_url=target.remote, team_name="CASSETTE", leader_name="Rec", max_iterations=4)
+
+    recording = Cassette(path, "record")
+    use_cassette(recording)
+    docker = LocalDocker()
+    monkeypatch.setattr(clients, "_docker_client", CassetteDocker(recording, docker))
+    monkeypatch.setattr(discovery, "WORK_DIR", str(tmp_path / "recorded"))
+    live = await run_healing_workflow(request)
+    gemini.stop()
+
+    [recorded_request] = Cassette(path, "replay").requests()
+    replay = Cassette(path, "replay", recorded_request["run_id"])
+    use_cassette(replay)
+    monkeypatch.setattr(discovery, "WORK_DIR", str(tmp_path / "replayed"))
+    replayed = await run_healing_workflow(request)
+
+    assert live["result"]["final_status"] == replayed["result"]["final_status"] == "PASSED"
+    assert docker.runs == 2 and len(gemini.calls) == 2  # nothing new reached either service
+    assert replayed["result"]["fixes_applied"] == live["result"]["fixes_applied"]
+    assert replay.remaining() == {"genai": 0, "github": 0, "docker": 0}
+    assert replay.mismatches == []
+    assert recorded_request["team_name"] == "CASSETTE"
+
+
+def test_github_calls_replay_and_divergence_is_reported(tmp_path, fake_github, cassette_off):
+    fake_github.routes[("GET", "/user")] = (200, {"login": "octo"})
+    path = str(tmp_path / "gh.jsonl")
+
+    use_cassette(Cassette(path, "record"))
+    live = github_sync(get_github_client().get("/user"))
+
+    replay = Cassette(path, "replay")
+    use_cassette(replay)
+    fake_github.routes.clear()
+    replayed = github_sync(get_github_client().get("/user"))
+
+    assert live.data == replayed.data == {"login": "octo"}
+    assert len(fake_github.requests) == 1
+
+    diverged = Cassette(path, "replay")
+    assert diverged.replay("github", {"kind": "GET", "path": "/repos/x", "body": None})["status_code"] == 200
+    assert diverged.mismatches == ["github GET differs from the recording in path"]
+    with pytest.raises(CassetteMismatch):
+        Cassette(path, "replay").replay("github", {"kind": "POST", "path": "/user", "body": None})
+
+
+def test_cassette_mode_comes_from_the_environment(tmp_path, monkeypatch, cassette_off):
+    monkeypatch.setenv("CASSETTE_MODE", "record")
+    monkeypatch.setenv("CASSETTE_FILE", str(tmp_path / "env.jsonl"))
+    monkeypatch.setattr(cassette_mod, "_configured", False)
+
+    assert cassette_mod.get_cassette().mode == "record"
@@ -0,0 +1,98 @@
+import uuid
+
+import httpx
+import pytest
+from git import Repo
+
+from backend import graph, main
+from backend.checkpoints import SQLiteCheckpointer, get_checkpointer
+from backend.events import event_bus
+from backend.main import HealingRequest, run_healing_workflow
+
+
+def test_saver_round_trips_state_and_tracks_the_workspace(tmp_path, bare_remote):
+    workspace, _ = bare_remote
+    saver = SQLiteCheckpointer(str(tmp_path / "cp.db"))
+    compiled = graph.create_workflow(checkpointer=saver)
+    config = {"configurable": {"thread_id": "run-rt"}}
+    values = {"run_id": "run-rt", "repo_path": workspace, "retry_count": 2, "fixes_applied": [{"file": "a.py"}]}
+
+    compiled.update_state(config, values, as_node="discovery")
+
+    snapshot = compiled.get_state(config)
+    assert snapshot.values["retry_count"] == 2 and snapshot.values["fixes_applied"] == [{"file": "a.py"}]
+    assert snapshot.next == ("tester",)
+    assert saver.last_checkpoint("run-rt")["workspace"] == {"path": workspace,
+                                                            "head": Repo(workspace).head.commit.hexsha}
+    saver.delete_thread("run-rt")
+    assert compiled.get_state(config).values == {}
+
+
+@pytest.mark.asyncio
+async def test_interrupted_run_resumes_without_recloning(offline, monkeypatch):
+    target, gemini = offline
+    calls = {"discovery": 0, "tester": 0}
+    discovery_node, tester_node = graph.discovery_node, graph.tester_node
+
+    def counting_discovery(state):
+        calls["discovery"] += 1
+        return discovery_node(state)
+
+    def crashing_tester(state):
+        calls["tester"] += 1
+        if calls["tester"] == 2:
+            raise RuntimeError("worker killed mid-run")
+        return tester_node(state)
+
+    monkeypatch.setattr(graph, "discovery_node", counting_discovery)
+    monkeypatch.setattr(graph, "tester_node", crashing_tester)
+    monkeypatch.setattr(graph, "_compiled", {})
+    run_id = str(uuid.uuid4())
+    request = HealingRequest(repo_url=target.remote, team_name="RESUME", leader_name="Bench", max_iterations=5)
+
+    crashed = await run_healing_workflow(request, run_id)
+    assert crashed["status"] == "error"
+    assert get_checkpointer().run_record(run_id)["status"] == "error"
+    calls_before = len(gemini.calls)
+
+    entry = await run_healing_workflow(request, run_id, resume=True)
+
+    result = entry["result"]
+    assert result["final_status"] == "PASSED"
+    assert calls["discovery"] == 1  # the clone and install were reused
+    assert result["recovery"]["resumed_at"] == ["tester"] and result["recovery"]["completed_steps"] > 0
+    assert result["recovery"]["restore_ms"] >= 0 and result["recovery"]["downtime_s"] >= 0
+    assert len(gemini.calls) == 4 and calls_before == 2  # the fix made before the crash was not asked for again
+    assert get_checkpointer().run_record(run_id)["status"] == "done"
+    events = [e async for e in event_bus.subscribe(run_id)]
+    assert [e["data"]["status"] for e in events if e["type"] == "run_end"] == ["done"]
+    assert events[-1]["type"] == "run_end"
+    assert get_checkpointer().last_checkpoint(run_id) is None
+
+
+@pytest.mark.asyncio
+async def test_resume_endpoint_refuses_a_moved_workspace(offline, monkeypatch):
+    target, _ = offline
+    tester_node = graph.tester_node
+
+    def crashing_tester(state):
+        raise RuntimeError("worker killed mid-run")
+
+    monkeypatch.setattr(graph, "tester_node", crashing_tester)
+    monkeypatch.setattr(graph, "_compiled", {})
+    run_id = str(uuid.uuid4())
+    request = HealingRequest(repo_url=target.remote, team_name="RESUME_MOVED", leader_name="Bench")
+    await run_healing_workflow(request, run_id)
+    monkeypatch.setattr(graph, "tester_node", tester_node)
+    monkeypatch.setattr(graph, "_compiled", {})
+    workspace = get_checkpointer().last_checkpoint(run_id)["workspace"]["path"]
+    Repo(workspace).git.execute(["git", "-c", "user.name=Other", "-c", "user.email=other@rift.local",
+                                 "commit", "--allow-empty", "-m", "someone else's commit"])
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        moved = await client.post(f"/runs/{run_id}/resume")
+        unknown = await client.post("/runs/no-such-run/resume")
+
+    assert moved.status_code == 409 and "moved from" in moved.json()["detail"]
+    assert unknown.status_code == 404
@@ -0,0 +1,23 @@
+import sys
+from types import SimpleNamespace
+
+from backend.utils import clients
+
+
+def test_named_pipe_fallback_is_cached_like_the_default_client(monkeypatch):
+    built = []
+
+    def from_env():
+        raise ConnectionError("no DOCKER_HOST socket")
+
+    def docker_client(base_url):
+        built.append(base_url)
+        return SimpleNamespace(ping=lambda: True)
+
+    monkeypatch.setitem(sys.modules, "docker", SimpleNamespace(from_env=from_env, DockerClient=docker_client))
+    monkeypatch.setattr(clients, "_docker_client", None)
+    monkeypatch.delenv("CASSETTE_MODE", raising=False)
+
+    first = clients.get_docker_client()
+    assert clients.get_docker_client() is first
+    assert built == ["npipe:////./pipe/docker_engine"]
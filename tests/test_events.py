@@ -0,0 +1,91 @@
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+
+from backend import main
+from backend.events import RunEventBus, event_bus
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_gets_replay_then_live_events():
+    bus = RunEventBus(buffer_size=3)
+    for i in range(5):
+        bus.publish("run-1", "node_end", node=f"n{i}")
+
+    received = []
+
+    async def consume():
+        async for event in bus.subscribe("run-1"):
+            received.append((event["id"], event["type"]))
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.01)
+    # Published from a node thread, like the real graph nodes
+    t = threading.Thread(target=lambda: (bus.publish("run-1", "tests", failed=0), bus.publish("run-1", "run_end")))
+    t.start()
+    t.join()
+    await asyncio.wait_for(task, timeout=2)
+
+    # Only the last 3 buffered events are replayed (bounded buffer), then the live ones
+    assert received == [(3, "node_end"), (4, "node_end"), (5, "node_end"), (6, "tests"), (7, "run_end")]
+
+
+@pytest.mark.asyncio
+async def test_resume_after_last_event_id_and_closed_run():
+    bus = RunEventBus()
+    for event_type in ("run_start", "node_start", "node_end", "run_end"):
+        bus.publish("run-2", event_type)
+
+    events = [e async for e in bus.subscribe("run-2", last_event_id=2)]
+    assert [e["type"] for e in events] == ["node_end", "run_end"]
+
+
+def test_bus_forgets_oldest_finished_runs():
+    bus = RunEventBus(max_runs=2)
+    bus.publish("a", "run_end")
+    bus.publish("b", "node_start")
+    bus.publish("c", "node_start")
+    assert not bus.has_run("a") and bus.has_run("b") and bus.has_run("c")
+
+
+@pytest.mark.asyncio
+async def test_bus_never_drops_a_live_run():
+    bus = RunEventBus(max_runs=1)
+    bus.publish("live", "node_start")
+    received = []
+
+    async def consume():
+        async for event in bus.subscribe("live"):
+            received.append(event["type"])
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.01)
+    bus.publish("other", "node_start")
+    assert bus.has_run("live") and bus.has_run("other")
+
+    bus.publish("live", "run_end")
+    await asyncio.wait_for(task, timeout=2)
+    assert received == ["node_start", "run_end"]
+    assert [e["type"] async for e in bus.subscribe("live")] == ["node_start", "run_end"]
+
+
+@pytest.mark.asyncio
+async def test_sse_endpoint_streams_run_events():
+    run_id = "sse-run"
+    event_bus.publish(run_id, "run_start", team_name="A")
+    event_bus.publish(run_id, "fix_applied", path="src/calc.py")
+    event_bus.publish(run_id, "run_end", status="done")
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get(f"/runs/{run_id}/events", headers={"Last-Event-ID": "1"})
+        missing = await client.get("/runs/nope/events")
+
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    frames = [f for f in resp.text.split("\n\n") if f]
+    assert frames[0].startswith("id: 2\nevent: fix_applied\n")
+    assert json.loads(frames[1].split("data: ", 1)[1])["data"] == {"status": "done"}
+    assert missing.status_code == 404
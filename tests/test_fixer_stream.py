@@ -0,0 +1,75 @@
+import json
+
+from backend.nodes import fixer
+from backend.utils.llm_gateway import StreamResult
+
+
+def _state(tmp_path):
+    src = tmp_path / "repo" / "src"
+    src.mkdir(parents=True)
+    (src / "calc.py").write_text("def add(a, b):\n    return a - b\n")
+    return {
+        "repo_path": str(tmp_path / "repo"),
+        "run_id": "run-fix",
+        "fixes_applied": [],
+        "error_logs": "src/calc.py:2: AssertionError",
+        "current_analysis": {"file": "src/calc.py", "line": 2, "bug_type": "LOGIC",
+                             "description": "add subtracts", "traceback_file": "src/calc.py"},
+    }
+
+
+def _fake_stream(responses, calls):
+    def fake(prompt, model, on_text, config=None, run_id=None, api_key=None, timeout=None, node=None):
+        text = responses[len(calls)]
+        calls.append(text)
+        for i in range(0, len(text), 5):
+            on_text(text[i:i + 5])  # MalformedStream raised here aborts the "stream"
+        return StreamResult(text, ttfb_ms=1.0, latency_ms=2.0, chunks=len(text) // 5 + 1)
+    return fake
+
+
+def test_malformed_and_invalid_streams_are_retried_before_applying(tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    calls = []
+    good = json.dumps({"fixed_code": "def add(a, b):\n    return a + b\n", "fix_action": "use +"})
+    responses = [
+        "I think the fix is " + good,                                     # prose: neither JSON nor code
+        json.dumps({"fixed_code": "def add(a, b)\n    return a + b\n"}),  # SyntaxError: regenerate
+        good,
+    ]
+    monkeypatch.setattr(fixer, "llm_generate_stream", _fake_stream(responses, calls))
+
+    state = fixer.fixer_node(_state(tmp_path))
+
+    assert len(calls) == 3
+    calc = tmp_path / "repo" / "src" / "calc.py"
+    assert calc.read_text() == "def add(a, b):\n    return a + b\n"
+    assert not (tmp_path / "repo" / "src" / "calc.py.rift-tmp").exists()
+    assert state["current_step"] == "FIX_APPLIED"
+    assert state["fixes_applied"][0]["commit_message"].endswith("use +")
+
+
+def test_gives_up_without_touching_the_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    calls = []
+    monkeypatch.setattr(fixer, "llm_generate_stream", _fake_stream(["```python\nprint(1"] * 3, calls))
+
+    state = fixer.fixer_node(_state(tmp_path))
+
+    assert len(calls) == fixer.FIX_STREAM_ATTEMPTS
+    assert (tmp_path / "repo" / "src" / "calc.py").read_text() == "def add(a, b):\n    return a - b\n"
+    assert not (tmp_path / "repo" / "src" / "calc.py.rift-tmp").exists()
+    assert state["fixes_applied"] == []
+
+
+def test_reply_that_is_not_json_is_taken_as_the_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test")
+    calls = []
+    raw = "```python\ndef add(a, b):\n    return a + b\n```"
+    monkeypatch.setattr(fixer, "llm_generate_stream", _fake_stream([raw], calls))
+
+    state = fixer.fixer_node(_state(tmp_path))
+
+    assert len(calls) == 1
+    assert (tmp_path / "repo" / "src" / "calc.py").read_text() == "def add(a, b):\n    return a + b"
+    assert state["current_step"] == "FIX_APPLIED"
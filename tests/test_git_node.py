@@ -0,0 +1,81 @@
+import os
+from git import Repo
+from backend.nodes.git_node import git_node
+from backend.utils.file_utils import configure_workspace_excludes
+
+
+def _make_repo(path):
+    repo = Repo.init(path)
+    with repo.config_writer() as cw:
+        cw.set_value("user", "name", "Tester")
+        cw.set_value("user", "email", "tester@rift.local")
+    os.makedirs(os.path.join(path, "src"))
+    for i in range(20):
+        with open(os.path.join(path, "src", f"mod_{i}.py"), "w") as f:
+            f.write(f"VALUE = {i}\n")
+    repo.git.add(all=True)
+    repo.index.commit("initial")
+    configure_workspace_excludes(path)
+    return repo
+
+
+def _state(repo_path, fixes, committed=0):
+    return {
+        "repo_path": repo_path,
+        "team_name": "Team Rocket",
+        "leader_name": "Jessie",
+        "fixes_applied": fixes,
+        "committed_fix_count": committed,
+    }
+
+
+def _fix(path):
+    return {"path": path, "bug_type": "LOGIC", "line": 1, "description": "d",
+            "commit_message": f"[AI-AGENT] LOGIC fix in {path} line 1: d"}
+
+
+def test_git_node_stages_only_fixed_paths(tmp_path):
+    repo_path = str(tmp_path / "repo")
+    repo = _make_repo(repo_path)
+
+    # A fixed file, an unrelated edit and generated artifacts
+    with open(os.path.join(repo_path, "src", "mod_3.py"), "w") as f:
+        f.write("VALUE = 42\n")
+    with open(os.path.join(repo_path, "src", "mod_7.py"), "w") as f:
+        f.write("VALUE = -1\n")
+    os.makedirs(os.path.join(repo_path, "src", "__pycache__"))
+    with open(os.path.join(repo_path, "src", "__pycache__", "mod_3.cpython-311.pyc"), "wb") as f:
+        f.write(b"\x00")
+
+    state = git_node(_state(repo_path, [_fix("src/mod_3.py")]))
+
+    head = repo.head.commit
+    assert head.message.startswith("[AI-AGENT] LOGIC fix in src/mod_3.py")
+    assert list(head.stats.files.keys()) == ["src/mod_3.py"]
+    assert state["committed_fix_count"] == 1
+    assert state["branch_name"] == "TEAM_ROCKET_JESSIE_AI_Fix"
+    assert not os.path.exists(os.path.join(repo_path, ".gitignore"))
+    assert "__pycache__" not in repo.git.status("--porcelain")
+
+
+def test_git_node_skips_already_committed_fixes(tmp_path):
+    repo_path = str(tmp_path / "repo")
+    repo = _make_repo(repo_path)
+    first = repo.head.commit.hexsha
+
+    with open(os.path.join(repo_path, "src", "mod_1.py"), "w") as f:
+        f.write("VALUE = 100\n")
+
+    # The fix for mod_1 was already committed in a previous iteration
+    git_node(_state(repo_path, [_fix("src/mod_1.py")], committed=1))
+    assert repo.head.commit.hexsha == first
+
+
+def test_configure_workspace_excludes_is_idempotent(tmp_path):
+    repo_path = str(tmp_path / "repo")
+    Repo.init(repo_path)
+    configure_workspace_excludes(repo_path)
+    configure_workspace_excludes(repo_path)
+    with open(os.path.join(repo_path, ".git", "info", "exclude")) as f:
+        lines = f.read().splitlines()
+    assert lines.count("__pycache__/") == 1
@@ -0,0 +1,79 @@
+from backend.nodes import discovery
+from backend.utils import github_client
+from backend.utils.github_client import GitHubClient, github_sync
+
+
+def test_ensure_fork_caches_user_and_waits_with_backoff(fake_github, monkeypatch):
+    probes = {"count": 0}
+
+    def fork_repo(handler, body):
+        probes["count"] += 1
+        # Missing for the existence check and the first two readiness probes
+        return (200, {"full_name": "bot/widgets"}) if probes["count"] > 3 else (404, {"message": "Not Found"})
+
+    fake_github.routes[("GET", "/user")] = (200, {"login": "bot"})
+    fake_github.routes[("GET", "/repos/bot/widgets")] = fork_repo
+    fake_github.routes[("POST", "/repos/octo/widgets/forks")] = (202, {"full_name": "bot/widgets"})
+    monkeypatch.setattr(github_client, "backoff_delay", lambda attempt, base=0.5, cap=8.0: 0.01)
+
+    fork_url = discovery._ensure_fork("https://github.com/octo/widgets", "test-token")
+    assert fork_url == "https://github.com/bot/widgets.git"
+    assert probes["count"] == 4
+
+    # Second run: /user is an immutable lookup and is not requested again
+    assert discovery._ensure_fork("https://github.com/octo/widgets", "test-token") == fork_url
+    assert len(fake_github.calls("GET", "/user")) == 1
+    assert fake_github.calls("GET", "/user")[0][2]["Authorization"] == "token test-token"
+
+
+def test_conditional_get_serves_304_from_cache(fake_github):
+    def repo(handler, body):
+        if handler.headers.get("If-None-Match") == '"v1"':
+            return (304, None, {"ETag": '"v1"'})
+        return (200, {"default_branch": "trunk"}, {"ETag": '"v1"'})
+
+    fake_github.routes[("GET", "/repos/octo/widgets")] = repo
+    client = GitHubClient("test-token", fake_github.url)
+
+    first = github_sync(client.get("/repos/octo/widgets"))
+    second = github_sync(client.get("/repos/octo/widgets"))
+
+    assert first.data == {"default_branch": "trunk"} and not first.from_cache
+    assert second.data == {"default_branch": "trunk"} and second.from_cache
+    assert fake_github.calls("GET", "/repos/octo/widgets")[1][2]["If-None-Match"] == '"v1"'
+
+
+def test_default_branch_is_cached(fake_github):
+    fake_github.routes[("GET", "/repos/octo/widgets")] = (200, {"default_branch": "dev"})
+    client = GitHubClient("test-token", fake_github.url)
+
+    assert github_sync(client.get_default_branch("octo", "widgets")) == "dev"
+    assert github_sync(client.get_default_branch("octo", "widgets")) == "dev"
+    assert len(fake_github.calls("GET", "/repos/octo/widgets")) == 1
+
+
+def test_rate_limited_request_is_retried(fake_github):
+    attempts = {"count": 0}
+
+    def pulls(handler, body):
+        attempts["count"] += 1
+        if attempts["count"] == 1:
+            return (403, {"message": "API rate limit exceeded"},
+                    {"Retry-After": "0", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "0"})
+        return (201, {"html_url": "https://github.com/octo/widgets/pull/7"})
+
+    fake_github.routes[("POST", "/repos/octo/widgets/pulls")] = pulls
+    client = GitHubClient("test-token", fake_github.url)
+
+    resp = github_sync(client.create_pull_request("octo", "widgets", {"head": "x", "base": "main"}))
+    assert resp.status_code == 201
+    assert resp.data["html_url"].endswith("/pull/7")
+    assert attempts["count"] == 2
+
+
+def test_forbidden_without_rate_limit_is_not_retried(fake_github):
+    fake_github.routes[("POST", "/repos/octo/widgets/forks")] = (403, {"message": "Forbidden"})
+    client = GitHubClient("test-token", fake_github.url)
+
+    assert github_sync(client.create_fork("octo", "widgets")).status_code == 403
+    assert len(fake_github.calls("POST", "/repos/octo/widgets/forks")) == 1
@@ -0,0 +1,41 @@
+import pytest
+
+from backend import graph
+
+
+def test_compiled_variants_are_cached_and_shared():
+    a = graph.get_workflow("eager")
+    assert graph.get_workflow("eager") is a
+    deferred = graph.get_workflow("deferred")
+    assert deferred is not a
+    assert "publish" in deferred.get_graph().nodes and "publish" not in a.get_graph().nodes
+    with pytest.raises(ValueError):
+        graph.get_workflow("sideways")
+
+
+def test_recursion_limit_follows_iteration_budget():
+    assert graph.get_workflow_config(10)["recursion_limit"] == graph.recursion_limit_for(10)
+    assert graph.recursion_limit_for(10) > graph.recursion_limit_for(5)
+    # The compiled graph carries a default limit for callers that pass no config
+    assert graph.get_workflow("eager").config["recursion_limit"] == graph.recursion_limit_for(graph.MAX_RETRIES)
+
+
+def test_loop_runs_to_max_iterations_without_recursion_error(monkeypatch):
+    """A run that never passes must end via max_retries, not GraphRecursionError."""
+    calls = {"tester": 0}
+
+    def tester(state):
+        calls["tester"] += 1
+        state["final_status"] = "FAILED"
+        state["retry_count"] = state.get("retry_count", 0) + 1
+        return state
+
+    passthrough = lambda state: state  # noqa: E731
+    for name in ("discovery_node", "debugger_node", "fixer_node", "git_node", "scoring_node"):
+        monkeypatch.setattr(graph, name, passthrough)
+    monkeypatch.setattr(graph, "tester_node", tester)
+
+    app = graph.create_workflow("eager")
+    app.invoke({"retry_count": 0, "max_iterations": 10, "current_step": "START"},
+               config=graph.get_workflow_config(10))
+    assert calls["tester"] == 10
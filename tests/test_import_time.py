@@ -0,0 +1,19 @@
+from benchmarks.bench_importtime import PROFILES, check
+
+
+def test_service_import_stays_lazy_and_within_budget():
+    for module in ("backend.main", "backend.worker"):
+        budget_ms, lazy = PROFILES[module]
+        # Generous multiplier: CI machines are noisy; the eager-import check is the strict part
+        ok, best_ms, eager = check(module, budget_ms * 2, lazy, repeat=1)
+        assert not eager, f"{module} imported {eager} eagerly"
+        assert ok, f"{module} took {best_ms:.0f} ms to import"
+
+
+def test_shared_clients_are_singletons(monkeypatch):
+    from backend.utils import clients
+
+    monkeypatch.setattr(clients, "_genai_clients", {})
+    a = clients.get_genai_client("key-a")
+    assert clients.get_genai_client("key-a") is a
+    assert clients.get_genai_client("key-b") is not a
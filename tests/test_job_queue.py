@@ -0,0 +1,133 @@
+import asyncio
+import threading
+
+import pytest
+
+from backend.job_queue import JobQueue
+from backend.scheduler import QueueFullError
+from backend.worker import Worker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"))
+
+
+def test_claim_order_respects_priority_then_fifo(queue):
+    queue.enqueue("a", {"n": 1}, job_id="j1")
+    queue.enqueue("b", {"n": 2}, job_id="j2")
+    queue.enqueue("c", {"n": 3}, priority=5, job_id="j3")
+
+    assert queue.position("j3") == 1 and queue.position("j2") == 3
+    assert [queue.claim("w")["id"] for _ in range(3)] == ["j3", "j1", "j2"]
+    assert queue.claim("w") is None
+
+
+def test_expired_lease_is_reclaimed_until_max_attempts(queue):
+    queue.enqueue("a", {}, job_id="j1", max_attempts=2)
+
+    assert queue.claim("dead-1", lease_seconds=-1)["attempts"] == 1
+    job = queue.claim("dead-2", lease_seconds=-1)
+    assert job["id"] == "j1" and job["attempts"] == 2
+    assert queue.heartbeat("j1", "dead-1") is False  # first worker lost its lease
+
+    assert queue.claim("w") is None
+    assert queue.get("j1")["status"] == "error"
+
+
+def test_requeue_only_reopens_finished_jobs(queue):
+    queue.enqueue("a", {}, job_id="j1")
+    queue.claim("w")
+    assert queue.requeue("j1") is False  # still running
+
+    queue.fail("j1", "w", "boom")
+    assert queue.requeue("j1") is True
+    job = queue.claim("w2")
+    assert job["id"] == "j1" and job["attempts"] == 1 and queue.get("j1")["error"] is None
+
+
+def test_concurrent_claims_never_hand_out_a_job_twice(queue):
+    for i in range(40):
+        queue.enqueue("t", {}, job_id=f"j{i}")
+    claimed, lock = [], threading.Lock()
+
+    def drain(wid):
+        while (job := queue.claim(wid)) is not None:
+            with lock:
+                claimed.append(job["id"])
+
+    threads = [threading.Thread(target=drain, args=(f"w{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(f"j{i}" for i in range(40))
+
+
+def test_enqueue_applies_admission_limit(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_queued=1)
+    queue.enqueue("a", {})
+    with pytest.raises(QueueFullError):
+        queue.enqueue("b", {})
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_job_heartbeats_progress_and_completes(queue):
+    queue.enqueue("team", {"repo_url": "x"}, job_id="run-1")
+
+    async def runner(job, on_progress):
+        on_progress({"current_step": "TESTING_COMPLETE", "retry_count": 1, "fixes_applied": [{}]})
+        await asyncio.sleep(0.1)
+        return {"status": "done", "result": {"final_status": "PASSED"}}
+
+    worker = Worker(queue, runner=runner, lease_seconds=0.06, poll_interval=0.01)
+    await worker.run(max_jobs=1)
+
+    job = queue.get("run-1")
+    assert job["status"] == "done"
+    assert job["result"]["result"]["final_status"] == "PASSED"
+    assert job["progress"] == {"current_step": "TESTING_COMPLETE", "retry_count": 1,
+                               "fixes_applied": 1, "final_status": None}
+
+
+@pytest.mark.asyncio
+async def test_worker_shutdown_releases_in_flight_job(queue):
+    queue.enqueue("team", {}, job_id="run-1")
+    started = asyncio.Event()
+
+    async def runner(job, on_progress):
+        started.set()
+        await asyncio.sleep(60)
+
+    worker = Worker(queue, runner=runner, poll_interval=0.01)
+    run = asyncio.create_task(worker.run())
+    await started.wait()
+    worker.stop()
+    await run
+
+    job = queue.get("run-1")
+    assert job["status"] == "queued" and job["attempts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_api_enqueues_into_durable_queue_in_worker_mode(queue, monkeypatch):
+    import httpx
+    from backend import main
+
+    monkeypatch.setattr(main, "EXECUTION_MODE", "worker")
+    monkeypatch.setattr(main, "_job_queue", queue)
+
+    body = {"repo_url": "https://github.com/octo/widgets", "team_name": "A", "leader_name": "L"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = (await client.post("/start-healing", json=body)).json()
+        assert resp["status"] == "queued" and resp["queue_position"] == 1
+
+        job = queue.claim("w")
+        assert job["id"] == resp["run_id"] and job["payload"]["repo_url"] == body["repo_url"]
+        queue.heartbeat(job["id"], "w", progress={"current_step": "DEBUG_COMPLETE"})
+
+        status = (await client.get("/status/A")).json()
+        assert status["status"] == "running"
+        assert status["progress"] == {"current_step": "DEBUG_COMPLETE"}
+        assert (await client.get("/queue")).json()["running"] == 1
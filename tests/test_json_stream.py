@@ -0,0 +1,65 @@
+import json
+import random
+
+import pytest
+
+from backend.utils.json_stream import JsonObjectStream, MalformedStream
+
+DOC = {
+    "fixed_code": 'def add(a, b):\n    """Adds \\ "quoted" é 😀"""\n    return a\t+ b\n',
+    "fix_action": "return a + b",
+    "meta": [1, {"brace": "}"}],
+    "ok": True,
+}
+
+
+def _chunks(text, rng):
+    i = 0
+    while i < len(text):
+        k = rng.randint(1, 7)
+        yield text[i:i + k]
+        i += k
+
+
+@pytest.mark.parametrize("wrapper", ["{}", "```json\n{}\n```", "  \n{}\n"])
+def test_any_chunking_yields_same_fields_and_streamed_text(wrapper):
+    text = wrapper.replace("{}", json.dumps(DOC))
+    rng = random.Random(7)
+    for _ in range(50):
+        streamed, ended = [], []
+        parser = JsonObjectStream(
+            on_field_chunk=lambda key, chunk: streamed.append(chunk) if key == "fixed_code" else None,
+            on_field_end=lambda key, value: ended.append(key),
+        )
+        for chunk in _chunks(text, rng):
+            parser.feed(chunk)
+        assert parser.close() == DOC
+        assert "".join(streamed) == DOC["fixed_code"]
+        assert ended == ["fixed_code", "fix_action", "meta", "ok"]
+
+
+def test_field_end_fires_before_the_object_closes():
+    seen = []
+    parser = JsonObjectStream(on_field_end=lambda key, value: seen.append((key, value)))
+    parser.feed('{"fixed_code": "x = 1\\n", "fix_act')
+    assert seen == [("fixed_code", "x = 1\n")] and not parser.done
+
+
+@pytest.mark.parametrize("bad, at", [
+    ("Sure! Here is the fixed code:", 0),
+    ('{"fixed_code" "x"}', 14),
+    ('{"fixed_code": }', 15),
+    ('{"a": "x"} and more', 11),
+])
+def test_malformed_streams_fail_at_the_first_bad_char(bad, at):
+    parser = JsonObjectStream()
+    with pytest.raises(MalformedStream, match=f"at char {at}"):
+        for ch in bad:
+            parser.feed(ch)
+
+
+def test_truncated_stream_is_malformed_on_close():
+    parser = JsonObjectStream()
+    parser.feed('{"fixed_code": "def f():\\n    ret')
+    with pytest.raises(MalformedStream):
+        parser.close()
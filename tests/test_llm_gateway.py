@@ -0,0 +1,188 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from backend.utils import llm_gateway
+from backend.utils.llm_gateway import FairLimiter, LLMGateway
+
+
+class RateLimited(Exception):
+    code = 429
+
+    def __str__(self):
+        return "429 RESOURCE_EXHAUSTED. {'retryDelay': '0.2s'}"
+
+
+class FakeGenai:
+    """Mimics client.aio.models.generate_content; `fail_first` calls raise a 429."""
+
+    def __init__(self, fail_first: int = 0):
+        self.calls = []
+        self.fail_first = fail_first
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self.generate_content))
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls.append((contents, time.monotonic()))
+        if len(self.calls) <= self.fail_first:
+            raise RateLimited()
+        return SimpleNamespace(text='{"ok": true}', usage_metadata=SimpleNamespace(total_token_count=10))
+
+
+@pytest.mark.asyncio
+async def test_runs_share_quota_round_robin():
+    # 20 requests/s with a burst of one: every call after the first waits for a token
+    client = FakeGenai()
+    gateway = LLMGateway(client, FairLimiter(requests_per_minute=1200, burst_seconds=0.05))
+
+    busy = [gateway.generate(f"A{i}", "m", run_id="run-a") for i in range(4)]
+    quiet = [gateway.generate(f"B{i}", "m", run_id="run-b") for i in range(2)]
+    await asyncio.gather(*busy, *quiet)
+
+    order = [prompt for prompt, _ in client.calls]
+    # run-b is not stuck behind run-a's backlog: its calls interleave with A's
+    assert order[:4] == ["A0", "B0", "A1", "B1"]
+    assert order[4:] == ["A2", "A3"]
+    gaps = [b - a for (_, a), (_, b) in zip(client.calls, client.calls[1:])]
+    assert min(gaps) >= 0.03
+
+
+@pytest.mark.asyncio
+async def test_429_pauses_all_runs_then_retries():
+    client = FakeGenai(fail_first=1)
+    gateway = LLMGateway(client, FairLimiter(requests_per_minute=6000), max_retries=3)
+
+    start = time.monotonic()
+    responses = await asyncio.gather(
+        gateway.generate("first", "m", run_id="run-a"),
+        gateway.generate("second", "m", run_id="run-b"),
+    )
+    assert all(r.text == '{"ok": true}' for r in responses)
+    assert gateway.stats["rate_limited"] == 1
+    # After the 429 (server asked for 0.2s), no call went out before the cooldown ended
+    first_fail = client.calls[0][1]
+    assert all(t - first_fail >= 0.19 for _, t in client.calls[2:])
+    assert time.monotonic() - start >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_errors_surface_immediately():
+    class Boom(Exception):
+        code = 400
+
+    client = FakeGenai()
+
+    async def bad(model, contents, config=None):
+        raise Boom("bad request")
+
+    client.aio.models.generate_content = bad
+    gateway = LLMGateway(client, FairLimiter(requests_per_minute=6000))
+    with pytest.raises(Boom):
+        await gateway.generate("x", "m")
+    assert gateway.stats["failed"] == 1
+
+
+def test_sync_wrapper_runs_on_shared_loop(monkeypatch):
+    client = FakeGenai()
+    monkeypatch.setattr(llm_gateway, "_gateways", {"k": LLMGateway(client)})
+    response = llm_gateway.llm_generate("hello", "m", api_key="k", run_id="r")
+    assert response.text == '{"ok": true}' and client.calls[0][0] == "hello"
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_ttfb_and_consumer_can_abort():
+    class StreamingGenai(FakeGenai):
+        async def generate_content_stream(self, model, contents, config=None):
+            async def chunks():
+                for part in ('{"fixed_', 'code": "x"}', "never sent"):
+                    await asyncio.sleep(0.02)
+                    yield SimpleNamespace(text=part, usage_metadata=None)
+            return chunks()
+
+    client = StreamingGenai()
+    client.aio.models.generate_content_stream = client.generate_content_stream
+    gateway = LLMGateway(client, FairLimiter(requests_per_minute=6000))
+
+    seen = []
+
+    def consume(text):
+        seen.append(text)
+        if text == "never sent":
+            raise ValueError("malformed")
+
+    with pytest.raises(ValueError):
+        await gateway.generate_stream("p", "m", consume)
+    assert seen[-1] == "never sent"
+
+    seen.clear()
+    client2 = StreamingGenai()
+
+    async def two_chunks(model, contents, config=None):
+        async def chunks():
+            for part in ('{"a": ', '"b"}'):
+                await asyncio.sleep(0.02)
+                yield SimpleNamespace(text=part, usage_metadata=SimpleNamespace(total_token_count=5))
+        return chunks()
+
+    client2.aio.models.generate_content_stream = two_chunks
+    result = await LLMGateway(client2, FairLimiter(requests_per_minute=6000)).generate_stream("p", "m", seen.append)
+    assert result.text == '{"a": "b"}' and result.chunks == 2 and result.total_tokens == 5
+    assert 15 <= result.ttfb_ms < result.latency_ms
+
+
+@pytest.mark.asyncio
+async def test_failed_and_cancelled_calls_return_their_reservation():
+    class Boom(Exception):
+        code = 400
+
+    client = FakeGenai()
+
+    async def bad(model, contents, config=None):
+        raise Boom("bad request")
+
+    client.aio.models.generate_content = bad
+    limiter = FairLimiter(requests_per_minute=6000, tokens_per_minute=100000)
+    gateway = LLMGateway(client, limiter)
+    with pytest.raises(Boom):
+        await gateway.generate("x" * 400, "m")
+    assert limiter.tokens.tokens == pytest.approx(limiter.tokens.capacity, rel=1e-3)
+
+    async def slow(model, contents, config=None):
+        if model == "slow":
+            await asyncio.sleep(5)
+        return SimpleNamespace(text="{}", usage_metadata=SimpleNamespace(total_token_count=10))
+
+    client.aio.models.generate_content = slow
+    limiter.tokens.tokens = limiter.tokens.capacity
+    _, used = await gateway.generate_hedged("x" * 400, "slow", "fast", hedge_after=0.05)
+    await asyncio.sleep(0)
+    # Only the winner's 10 tokens are spent; the cancelled primary gave its reservation back
+    assert used == "fast"
+    assert limiter.tokens.capacity - limiter.tokens.tokens <= 10
+
+
+def test_sync_timeout_cancels_the_call_and_returns_its_reservation(monkeypatch):
+    seen = []
+
+    class EndlessGenai(FakeGenai):
+        async def generate_content_stream(self, model, contents, config=None):
+            async def chunks():
+                while True:
+                    await asyncio.sleep(0.01)
+                    yield SimpleNamespace(text="x", usage_metadata=None)
+            return chunks()
+
+    client = EndlessGenai()
+    client.aio.models.generate_content_stream = client.generate_content_stream
+    limiter = FairLimiter(requests_per_minute=6000, tokens_per_minute=60000)
+    monkeypatch.setattr(llm_gateway, "_gateways", {"k": LLMGateway(client, limiter)})
+
+    with pytest.raises(TimeoutError):
+        llm_gateway.llm_generate_stream("p" * 400, "m", seen.append, api_key="k", timeout=0.1)
+    time.sleep(0.05)
+    streamed = len(seen)
+    time.sleep(0.1)
+    # The abandoned stream stopped and settled for what it streamed, not the full reservation
+    assert len(seen) == streamed
+    assert limiter.tokens.capacity - limiter.tokens.tokens <= 100 + streamed
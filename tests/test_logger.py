@@ -0,0 +1,52 @@
+import io
+import json
+import logging
+
+from backend import logger as log_mod
+from backend.logger import RateLimitFilter, SamplingFilter, flush_logs, get_logger, parse_sample_rates
+from backend.telemetry import span, telemetry
+
+
+def _record(msg, level=logging.INFO, name="tester_node"):
+    return logging.LogRecord(name, level, __file__, 1, msg, ("x",), None)
+
+
+def test_records_are_written_off_thread_with_the_run_id(monkeypatch):
+    flush_logs()  # earlier tests' records
+    out = io.StringIO()
+    monkeypatch.setattr(log_mod.sys, "stdout", out)
+    logger = get_logger("test_logger_pipeline")
+
+    with span("node.tester", run_id="run-log-1"):
+        logger.info("Testing Complete. Exit Code: %s", 1)
+    logger.info("outside any run")
+    flush_logs()
+
+    first, second = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert first["message"] == "Testing Complete. Exit Code: 1" and first["run_id"] == "run-log-1"
+    assert first["logger"] == "test_logger_pipeline" and "run_id" not in second
+
+
+def test_rate_limit_is_per_template_and_reports_what_it_suppressed(monkeypatch):
+    limiter = RateLimitFilter(limit=2, window=60)
+    clock = [100.0]
+    monkeypatch.setattr(log_mod.time, "monotonic", lambda: clock[0])
+
+    passed = [limiter.filter(_record("Container Logs: %s")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert limiter.filter(_record("Other message %s"))
+    assert limiter.filter(_record("Container Logs: %s", level=logging.ERROR))  # errors are never limited
+
+    clock[0] += 61
+    resumed = _record("Container Logs: %s")
+    assert limiter.filter(resumed) and resumed.suppressed == 3
+    assert 'rift_log_dropped_total{reason="rate_limited"}' in telemetry.render_prometheus()
+
+
+def test_sampling_applies_below_warning_only(monkeypatch):
+    sampler = SamplingFilter(parse_sample_rates("debug=0, INFO=1, WARNING=0"))
+    monkeypatch.setattr(log_mod.random, "random", lambda: 0.5)
+
+    assert not sampler.filter(_record("m", logging.DEBUG))
+    assert sampler.filter(_record("m", logging.INFO))
+    assert sampler.filter(_record("m", logging.WARNING))
@@ -0,0 +1,79 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from backend.utils import model_router
+from backend.utils.llm_gateway import FairLimiter, LLMGateway
+from backend.utils.model_router import RoutingTable, choose_model, note_attempt, settle_routes
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    table = RoutingTable(str(tmp_path / "routing.db"))
+    monkeypatch.setattr(model_router, "_table", table)
+    return table
+
+
+def _state(**kw):
+    return {"model_name": "gemini-2.5-flash", "model_routing": "cascade", "retry_count": 1,
+            "fixes_applied": [], "model_escalation": 0, "pending_routes": [], **kw}
+
+
+def test_cascade_starts_cheap_and_escalates_when_stuck(table):
+    state = _state()
+    assert choose_model(state, "debugger").tier == "fast"            # first attempt
+
+    state.update(retry_count=2, fixes_applied=[{"path": "src/calc.py"}])
+    assert choose_model(state, "fixer", "LINTING").tier == "fast"    # easy class
+    route = choose_model(state, "fixer", "LOGIC")
+    assert (route.tier, route.model) == ("standard", "gemini-2.5-flash")
+
+    note_attempt(state, route, route.model, latency_ms=120.0, tokens=1000)
+    settle_routes(state, improved=False)
+    assert state["pending_routes"] == [] and state["model_escalation"] == 1
+    assert choose_model(state, "fixer", "LOGIC").tier == "strong"
+
+    [row] = table.summary()
+    assert row["calls"] == 1 and row["success_rate"] == 0.0 and row["cost_usd"] > 0
+
+
+def test_fixed_routing_always_uses_model_name(table):
+    state = _state(model_routing="fixed", model_name="gemini-2.5-pro", model_escalation=3)
+    assert choose_model(state, "debugger").model == "gemini-2.5-pro"
+    settle_routes(state, improved=False)
+    assert state["model_escalation"] == 3
+
+
+def test_explicit_model_name_turns_the_cascade_off_unless_asked_for():
+    from backend.main import HealingRequest
+    base = {"repo_url": "https://github.com/octo/widgets", "team_name": "A", "leader_name": "L"}
+
+    assert HealingRequest(**base).model_routing == "cascade"
+    assert HealingRequest(**base, model_name="gemini-2.5-pro").model_routing == "fixed"
+    assert HealingRequest(**base, model_name="gemini-2.5-pro", model_routing="cascade").model_routing == "cascade"
+    # Survives the round trip through a durable job payload
+    assert HealingRequest(**HealingRequest(**base).model_dump()).model_routing == "cascade"
+
+
+def test_routing_table_skips_tiers_that_keep_failing(table):
+    for _ in range(model_router.MIN_SAMPLES):
+        table.record("fixer", "SYNTAX", "fast", "gemini-2.5-flash-lite", success=False)
+    assert choose_model(_state(), "fixer", "SYNTAX").tier == "standard"
+    assert choose_model(_state(), "fixer", "IMPORT").tier == "fast"
+
+
+@pytest.mark.asyncio
+async def test_hedge_fires_after_deadline_and_faster_model_wins():
+    async def generate_content(model, contents, config=None):
+        await asyncio.sleep(0.5 if model == "slow" else 0.01)
+        return SimpleNamespace(text=model, usage_metadata=None)
+
+    client = SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+    gateway = LLMGateway(client, FairLimiter(requests_per_minute=6000))
+
+    response, used = await gateway.generate_hedged("p", "slow", "fast", hedge_after=0.05)
+    assert (response.text, used) == ("fast", "fast") and gateway.stats["hedged"] == 1
+
+    response, used = await gateway.generate_hedged("p", "quick", "fast", hedge_after=0.2)
+    assert used == "quick" and gateway.stats["hedged"] == 1
@@ -0,0 +1,43 @@
+import pytest
+
+from benchmarks.bench_e2e import compare
+from backend.main import HealingRequest, run_healing_workflow
+
+
+@pytest.mark.asyncio
+async def test_full_graph_heals_synthetic_repo_offline(offline):
+    target, gemini = offline
+    request = HealingRequest(repo_url=target.remote, team_name="OFFLINE", leader_name="Bench", max_iterations=5)
+
+    entry = await run_healing_workflow(request)
+
+    result = entry["result"]
+    assert result["final_status"] == "PASSED"
+    assert {f["bug_type"] for f in result["fixes_applied"]} == {"LOGIC", "SYNTAX"}
+    assert len(gemini.calls) == 4  # debugger + fixer per bug
+    assert result["token_usage"]["calls"] == 4
+    assert set(result["token_usage"]["by_node"]) == {"debugger", "fixer"}
+    assert result["peak_rss_mb"] > 0
+
+
+@pytest.mark.asyncio
+async def test_token_budget_ends_the_run_early(offline):
+    target, gemini = offline
+    request = HealingRequest(repo_url=target.remote, team_name="OFFLINE_BUDGET", leader_name="Bench",
+                             max_iterations=5, token_budget=50)
+
+    entry = await run_healing_workflow(request)
+
+    assert entry["result"]["final_status"] == "TOKEN_BUDGET_EXCEEDED"
+    assert gemini.calls == []
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {"success_rate": 1.0, "iterations_to_green": 2, "wall_p50_s": 1.0, "peak_memory_mb": 40.0,
+                "nodes": {"tester": {"avg_ms": 400.0}}}
+    within = {**baseline, "wall_p50_s": 1.1, "nodes": {"tester": {"avg_ms": 450.0}}}
+    worse = {**baseline, "success_rate": 0.5, "wall_p50_s": 2.0, "nodes": {"tester": {"avg_ms": 900.0}}}
+
+    assert compare(within, baseline, tolerance=0.25, slack_ms=50) == []
+    problems = compare(worse, baseline, tolerance=0.25, slack_ms=50)
+    assert [p.split(":")[0] for p in problems] == ["success_rate", "wall_p50", "node.tester avg"]
@@ -0,0 +1,81 @@
+import os
+import pstats
+import time
+
+import httpx
+import pytest
+
+from backend import graph, main
+from backend import profiler
+
+
+def _busy_node(state):
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    state['current_step'] = "DONE"
+    return state
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_profiled_node_stores_pstats_collapsed_stacks_and_index(profile_dir):
+    wrapped = graph._instrument("busy", _busy_node)
+
+    state = wrapped({"run_id": "run-p", "profile": True, "retry_count": 2})
+
+    assert state['current_step'] == "DONE"
+    profile = profiler.load_profile("run-p")
+    [record] = profile["nodes"]
+    assert record["node"] == "busy" and record["iteration"] == 2
+    assert record["wall_ms"] >= 50 and record["samples"] > 0
+    assert profile["totals"]["busy"]["calls"] == 1
+    pstats.Stats(str(profile_dir / "run-p" / record["pstats"]))  # loadable by the stdlib
+    collapsed = (profile_dir / "run-p" / record["collapsed"]).read_text()
+    assert "test_profiler:_busy_node" in collapsed.split(";")[0]
+    assert any("_busy_node" in row["function"] for row in record["top"])
+
+
+def test_unprofiled_runs_skip_the_profiler(profile_dir, monkeypatch):
+    def fail(*args):
+        raise AssertionError("profiler used for a run without profile=True")
+    monkeypatch.setattr(profiler, "profile_node", fail)
+
+    graph._instrument("busy", _busy_node)({"run_id": "run-q"})
+
+    assert profiler.load_profile("run-q") is None
+
+
+@pytest.mark.asyncio
+async def test_profile_endpoints_list_and_serve_only_indexed_artifacts(profile_dir):
+    graph._instrument("busy", _busy_node)({"run_id": "run-r", "profile": True})
+    record = profiler.load_profile("run-r")["nodes"][0]
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        listing = await client.get("/runs/run-r/profile")
+        collapsed = await client.get(f"/runs/run-r/profile/{record['collapsed']}")
+        outside = await client.get("/runs/run-r/profile/index.jsonl")
+        missing = await client.get("/runs/nope/profile")
+
+    assert listing.status_code == 200 and listing.json()["nodes"][0]["node"] == "busy"
+    assert collapsed.status_code == 200 and "_busy_node" in collapsed.text
+    assert outside.status_code == 404
+    assert missing.status_code == 404
+
+
+def test_prune_drops_expired_profiles(profile_dir):
+    graph._instrument("busy", _busy_node)({"run_id": "run-e", "profile": True})
+    assert profiler.prune(ttl=3600) == 0
+
+    stale = time.time() - 7200
+    for root, dirs, files in os.walk(profile_dir):
+        for name in dirs + files:
+            os.utime(os.path.join(root, name), (stale, stale))
+    os.utime(profile_dir / "run-e", (stale, stale))
+    assert profiler.prune(ttl=3600) == 1
+    assert profiler.load_profile("run-e") is None
@@ -0,0 +1,153 @@
+import os
+import time
+
+import pytest
+from git import Repo
+from backend.nodes.git_node import git_node
+from backend.nodes.publish_node import publish_node
+from backend.utils import publisher
+
+BRANCH = "OCTO_TEAM_ALICE_AI_Fix"
+
+
+def _pr_routes(fake_github):
+    fake_github.routes[("GET", "/repos/octo/widgets")] = (200, {"default_branch": "main"})
+    fake_github.routes[("POST", "/repos/octo/widgets/pulls")] = (
+        201, {"html_url": "https://github.com/octo/widgets/pull/1"}
+    )
+
+
+def _run_iterations(state, count):
+    calc = os.path.join(state["repo_path"], "src", "calc.py")
+    for i in range(count):
+        with open(calc, "w") as f:
+            f.write(f"def add(a, b):\n    return a + b  # attempt {i}\n")
+        state["fixes_applied"].append({
+            "path": "src/calc.py", "bug_type": "LOGIC", "line": 2, "description": "d",
+            "commit_message": f"[AI-AGENT] LOGIC fix in src/calc.py line 2: attempt {i}",
+        })
+        state = git_node(state)
+    return state
+
+
+def _state(workspace, mode):
+    return {
+        "repo_path": workspace, "team_name": "Octo Team", "leader_name": "Alice",
+        "fixes_applied": [], "committed_fix_count": 0, "publish_mode": mode,
+    }
+
+
+def _remote_branch_commits(bare_path):
+    bare = Repo(bare_path)
+    if BRANCH not in [h.name for h in bare.heads]:
+        return None
+    return list(bare.iter_commits(BRANCH))
+
+
+def test_eager_mode_pushes_every_iteration(bare_remote, fake_github):
+    workspace, bare_path = bare_remote
+    _pr_routes(fake_github)
+
+    state = _run_iterations(_state(workspace, "eager"), 2)
+
+    assert len(_remote_branch_commits(bare_path)) == 3
+    assert state["pr_url"] == "https://github.com/octo/widgets/pull/1"
+    assert len(fake_github.calls("POST", "/repos/octo/widgets/pulls")) == 1
+
+
+def test_deferred_mode_keeps_commits_local_until_publish(bare_remote, fake_github):
+    workspace, bare_path = bare_remote
+    _pr_routes(fake_github)
+
+    state = _run_iterations(_state(workspace, "deferred"), 3)
+    assert _remote_branch_commits(bare_path) is None
+    assert fake_github.requests == []
+
+    state = publish_node(state)
+    assert len(_remote_branch_commits(bare_path)) == 4
+    assert state["branch_pushed"] is True
+    assert state["pr_url"] == "https://github.com/octo/widgets/pull/1"
+    pr_body = fake_github.calls("POST", "/repos/octo/widgets/pulls")[0][3]
+    assert pr_body["head"] == BRANCH and pr_body["base"] == "main"
+
+
+def test_background_mode_coalesces_pushes(bare_remote, fake_github, monkeypatch):
+    workspace, bare_path = bare_remote
+    _pr_routes(fake_github)
+    monkeypatch.setattr(publisher, "PUBLISH_DEBOUNCE_SECONDS", 30.0)
+
+    state = _run_iterations(_state(workspace, "background"), 3)
+    # Debounce window has not elapsed: nothing was pushed on the critical path
+    assert _remote_branch_commits(bare_path) is None
+
+    state = publish_node(state)
+    assert len(_remote_branch_commits(bare_path)) == 4
+    assert state["pr_url"] == "https://github.com/octo/widgets/pull/1"
+    assert len(fake_github.calls("POST", "/repos/octo/widgets/pulls")) == 1
+
+
+def test_background_mode_publishes_directly_when_its_publisher_is_gone(bare_remote, fake_github, monkeypatch):
+    workspace, bare_path = bare_remote
+    _pr_routes(fake_github)
+    monkeypatch.setattr(publisher, "PUBLISH_DEBOUNCE_SECONDS", 30.0)
+    state = _run_iterations(_state(workspace, "background"), 2)
+
+    publisher.pop_background_publisher(workspace)._timer.cancel()  # a restart loses the in-memory publisher
+    state = publish_node(state)
+
+    assert len(_remote_branch_commits(bare_path)) == 3
+    assert state["branch_pushed"] is True
+    assert state["pr_url"] == "https://github.com/octo/widgets/pull/1"
+
+
+def test_background_publisher_pushes_after_debounce(bare_remote, fake_github):
+    workspace, bare_path = bare_remote
+    _pr_routes(fake_github)
+    repo = Repo(workspace)
+    repo.create_head(BRANCH).checkout()
+    with open(os.path.join(workspace, "src", "calc.py"), "a") as f:
+        f.write("# fix\n")
+    repo.git.add("src/calc.py")
+    repo.index.commit("[AI-AGENT] fix")
+
+    pub = publisher.BackgroundPublisher(workspace, BRANCH, debounce=0.05)
+    pub.schedule(1)
+    pub.schedule(1)
+    deadline = time.time() + 5
+    while pub.push_count == 0 and time.time() < deadline:
+        time.sleep(0.02)
+    pushed, pr_url = pub.flush()
+
+    assert pushed is True
+    assert pub.push_count == 1
+    assert pr_url == "https://github.com/octo/widgets/pull/1"
+    assert len(_remote_branch_commits(bare_path)) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_run_drops_its_background_publisher(bare_remote, monkeypatch):
+    from backend import graph, main
+    workspace, bare_path = bare_remote
+    monkeypatch.setattr(publisher, "PUBLISH_DEBOUNCE_SECONDS", 0.5)
+    scheduled = []
+
+    class FailingGraph:
+        """Commits a fix in background mode, then the run fails before publish_node."""
+
+        async def astream(self, state, config=None, stream_mode=None):
+            state = _run_iterations({**state, **_state(workspace, "background")}, 1)
+            scheduled.append(publisher._publishers[workspace])
+            yield state
+            raise RuntimeError("tester crashed")
+
+    monkeypatch.setattr(graph, "get_workflow", lambda **kwargs: FailingGraph())
+    request = main.HealingRequest(repo_url=bare_path, team_name="Octo Team", leader_name="Alice",
+                                  publish_mode="background")
+
+    entry = await main.run_healing_workflow(request, "run-fails")
+
+    assert entry["status"] == "error"
+    assert workspace not in publisher._publishers
+    assert scheduled[0]._timer is None
+    time.sleep(0.7)
+    assert _remote_branch_commits(bare_path) is None  # the debounced push never fired
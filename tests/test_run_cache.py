@@ -0,0 +1,130 @@
+import asyncio
+
+import httpx
+import pytest
+from git import Repo
+
+from backend import graph, main, run_cache
+from backend import run_store as run_store_module
+from backend.run_cache import RunCache, resolve_head, run_key
+from backend.run_store import RunStore
+from backend.scheduler import RunScheduler
+
+
+@pytest.fixture
+def dedup(tmp_path, monkeypatch):
+    monkeypatch.setenv("RUN_DEDUP", "1")
+    cache = RunCache(str(tmp_path / "run_cache.db"), ttl=3600)
+    monkeypatch.setattr(run_cache, "_cache", cache)
+    monkeypatch.setattr(run_store_module, "_store", RunStore(str(tmp_path / "runs.db"), legacy_results_file=None))
+    return cache
+
+
+def test_key_ignores_scheduling_options_but_not_the_commit():
+    request = main.HealingRequest(repo_url="https://github.com/octo/widgets.git", team_name="A", leader_name="L")
+    same = request.model_copy(update={"repo_url": "https://github.com/octo/widgets/", "priority": 9})
+    other_model = request.model_copy(update={"model_name": "gemini-2.5-pro"})
+
+    assert run_key(request.model_dump(), "abc") == run_key(same.model_dump(), "abc")
+    assert run_key(request.model_dump(), "abc") != run_key(request.model_dump(), "def")
+    assert run_key(request.model_dump(), "abc") != run_key(other_model.model_dump(), "abc")
+
+
+def test_resolve_head_reads_the_remote(bare_remote, tmp_path):
+    workspace, bare = bare_remote
+
+    assert resolve_head(bare) == Repo(workspace).head.commit.hexsha
+    assert resolve_head(str(tmp_path / "missing.git")) is None
+
+
+@pytest.mark.asyncio
+async def test_identical_submissions_coalesce_then_hit_the_cache(dedup, bare_remote, monkeypatch):
+    workspace, bare = bare_remote
+    started, gate = [], asyncio.Event()
+
+    class PublishedGraph:
+        """Stands in for the compiled graph: the run ends with its branch pushed and a PR open."""
+
+        async def astream(self, state, config=None, stream_mode=None):
+            yield {**state, "final_status": "PASSED", "final_score": 100, "current_analysis": {},
+                   "branch_name": "A_L_AI_Fix", "pr_url": "https://github.com/octo/widgets/pull/7"}
+
+    async def runner(job):
+        started.append(job.run_id)
+        await gate.wait()
+        await main.run_healing_workflow(job.payload, job.run_id)
+
+    monkeypatch.setattr(graph, "get_workflow", lambda **kwargs: PublishedGraph())
+    monkeypatch.setattr(main, "scheduler", RunScheduler(runner, max_workers=4))
+    body = {"repo_url": bare, "team_name": "A", "leader_name": "L"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first, second, other_team = await asyncio.gather(
+            client.post("/start-healing", json=body),
+            client.post("/start-healing", json={**body, "priority": 5}),
+            client.post("/start-healing", json={**body, "team_name": "B"}),
+        )
+        first, second, other_team = first.json(), second.json(), other_team.json()
+        assert first["run_id"] == second["run_id"] != other_team["run_id"]
+        assert {first.get("dedup"), second.get("dedup")} == {"coalesced", None}
+        assert first["commit_sha"] == Repo(workspace).head.commit.hexsha
+
+        gate.set()
+        for _ in range(500):
+            if {main.run_status[r]["status"] for r in (first["run_id"], other_team["run_id"])} == {"done"}:
+                break
+            await asyncio.sleep(0.01)
+        cached = (await client.post("/start-healing", json=body)).json()
+        assert cached["dedup"] == "cached" and cached["run_id"] == first["run_id"]
+        assert cached["status"] == "done" and cached["pr_url"] == "https://github.com/octo/widgets/pull/7"
+        assert cached["result"]["branch_name"] == "A_L_AI_Fix"
+
+        repo = Repo(workspace)
+        with open(f"{workspace}/NEWS", "w") as f:
+            f.write("upstream moved\n")
+        repo.git.add(all=True)
+        repo.index.commit("upstream change")
+        repo.remote().push()
+        moved = (await client.post("/start-healing", json=body)).json()
+        assert "dedup" not in moved and moved["run_id"] not in (first["run_id"], other_team["run_id"])
+        await asyncio.sleep(0)
+        assert len(started) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_run_releases_its_key(dedup, bare_remote):
+    _, bare = bare_remote
+    request = main.HealingRequest(repo_url=bare, team_name="A", leader_name="L")
+
+    outcome, run_id, _ = await main._claim_run_key(request, "run-1")
+    assert outcome == "miss" and run_id == "run-1"
+    await main._release_run_key("run-1", cacheable=False)
+
+    assert (await main._claim_run_key(request, "run-2"))[:2] == ("miss", "run-2")
+    main._starting_runs.discard("run-2")
+    # A run whose process died no longer holds the key
+    assert (await main._claim_run_key(request, "run-3"))[:2] == ("miss", "run-3")
+    main._starting_runs.discard("run-3")
+
+
+@pytest.mark.asyncio
+async def test_submission_that_never_reaches_the_scheduler_releases_its_key(dedup, bare_remote, monkeypatch):
+    _, bare = bare_remote
+    request = main.HealingRequest(repo_url=bare, team_name="A", leader_name="L")
+
+    outcome, run_id, sha = await main._claim_run_key(request, "run-1")
+    # Still starting: an identical submission attaches without looking the run up
+    attached = await main._deduplicated_response(request, "coalesced", run_id, sha)
+    assert attached["status"] == "queued" and attached["run_id"] == "run-1"
+    await main._release_run_key("run-1", cacheable=False)
+
+    class Broken:
+        def submit(self, *args, **kwargs):
+            raise asyncio.CancelledError()
+
+    monkeypatch.setattr(main, "scheduler", Broken())
+    with pytest.raises(asyncio.CancelledError):
+        await main._admit_run(request)
+    assert not main._starting_runs
+    assert (await main._claim_run_key(request, "run-2"))[:2] == ("miss", "run-2")
+    main._starting_runs.discard("run-2")
@@ -0,0 +1,67 @@
+import json
+import threading
+
+from backend.run_store import RunStore
+
+
+def _entry(i, team="t", status="PASSED"):
+    return {"run_id": f"r{i:05d}", "team_name": team, "final_status": status, "final_score": i,
+            "completed_at": f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}"}
+
+
+def test_pagination_and_filters(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"), legacy_results_file=None)
+    store.append_many(_entry(i, team="a" if i % 2 else "b", status="FAILED" if i % 3 == 0 else "PASSED")
+                      for i in range(120))
+
+    page1 = store.query(limit=50)
+    page2 = store.query(limit=50, cursor=page1["next_cursor"])
+    page3 = store.query(limit=50, cursor=page2["next_cursor"])
+    ids = [e["run_id"] for e in page1["items"] + page2["items"] + page3["items"]]
+    assert ids == [f"r{i:05d}" for i in reversed(range(120))]
+    assert page3["next_cursor"] is None
+
+    team_a = store.query(team_name="a", limit=500)["items"]
+    assert len(team_a) == 60 and all(e["team_name"] == "a" for e in team_a)
+    failed = store.query(final_status="FAILED", since="2026-01-01T00:01:00", limit=500)["items"]
+    assert {e["final_score"] for e in failed} == {i for i in range(60, 120) if i % 3 == 0}
+
+    assert store.latest_for_team("b")["run_id"] == "r00118"
+    assert store.get("r00007")["final_score"] == 7
+
+
+def test_concurrent_appends_do_not_lose_updates(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"), legacy_results_file=None)
+
+    def write(offset):
+        for i in range(50):
+            store.append(_entry(offset + i))
+
+    threads = [threading.Thread(target=write, args=(n * 1000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.count() == 200
+
+
+def test_queries_are_served_from_indexes(tmp_path):
+    store = RunStore(str(tmp_path / "runs.db"), legacy_results_file=None)
+    conn = store._conn()
+    plans = {
+        "team": "SELECT entry FROM runs WHERE team_name = 'a' ORDER BY completed_at DESC, run_id DESC LIMIT 1",
+        "page": "SELECT entry FROM runs WHERE (completed_at, run_id) < ('x', 'y') "
+                "ORDER BY completed_at DESC, run_id DESC LIMIT 51",
+    }
+    for name, sql in plans.items():
+        detail = " ".join(r["detail"] for r in conn.execute("EXPLAIN QUERY PLAN " + sql))
+        assert "USING INDEX" in detail and "TEMP B-TREE" not in detail, (name, detail)
+
+
+def test_legacy_results_json_is_migrated_once(tmp_path):
+    legacy = tmp_path / "results.json"
+    legacy.write_text(json.dumps([{"team_name": "old", "completed_at": "2025-12-31T00:00:00"}]))
+
+    store = RunStore(str(tmp_path / "runs.db"), legacy_results_file=str(legacy))
+    assert store.latest_for_team("old")["run_id"] == "legacy-0"
+    assert not legacy.exists() and (tmp_path / "results.json.migrated").exists()
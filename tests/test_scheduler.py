@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend import main
+from backend.scheduler import RunScheduler, QueueFullError
+
+
+def _blocking_runner(started, gate):
+    async def runner(job):
+        started.append(job.run_id)
+        await gate.wait()
+    return runner
+
+
+@pytest.mark.asyncio
+async def test_scheduler_bounds_concurrency_and_rejects_overflow():
+    started, gate = [], asyncio.Event()
+    scheduler = RunScheduler(_blocking_runner(started, gate), max_workers=2, max_queue=2)
+
+    positions = [scheduler.submit(f"r{i}", "team", None) for i in range(4)]
+    await asyncio.sleep(0)
+    assert positions == [0, 0, 1, 2]
+    assert started == ["r0", "r1"]
+
+    with pytest.raises(QueueFullError) as exc:
+        scheduler.submit("r4", "team", None)
+    assert exc.value.queue_position == 3
+    assert scheduler.stats()["rejected"] == 1
+
+    gate.set()
+    for _ in range(20):
+        await asyncio.sleep(0)
+    assert started == ["r0", "r1", "r2", "r3"]
+    assert scheduler.stats()["completed"] == 4
+
+
+@pytest.mark.asyncio
+async def test_scheduler_round_robins_between_teams_and_honours_priority():
+    started, gate = [], asyncio.Event()
+    scheduler = RunScheduler(_blocking_runner(started, gate), max_workers=1, max_queue=10)
+
+    scheduler.submit("busy", "a", None)
+    await asyncio.sleep(0)
+    for i in range(3):
+        scheduler.submit(f"a{i}", "a", None)
+    scheduler.submit("b0", "b", None)
+    scheduler.submit("c0", "c", None)
+    scheduler.submit("urgent", "d", None, priority=5)
+
+    assert scheduler.position("urgent") == 1
+    assert scheduler.position("b0") == 3
+    assert scheduler.stats()["queued_by_team"] == {"a": 3, "b": 1, "c": 1, "d": 1}
+
+    gate.set()
+    for _ in range(40):
+        await asyncio.sleep(0)
+    assert started == ["busy", "urgent", "a0", "b0", "c0", "a1", "a2"]
+
+
+@pytest.mark.asyncio
+async def test_start_healing_returns_429_with_queue_position(monkeypatch):
+    started, gate = [], asyncio.Event()
+    monkeypatch.setattr(main, "scheduler", RunScheduler(_blocking_runner(started, gate), max_workers=1, max_queue=1))
+
+    body = {"repo_url": "https://github.com/octo/widgets", "team_name": "A", "leader_name": "L"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = (await client.post("/start-healing", json=body)).json()
+        await asyncio.sleep(0)
+        second = (await client.post("/start-healing", json={**body, "team_name": "B"})).json()
+        rejected = await client.post("/start-healing", json={**body, "team_name": "C"})
+
+        assert first["status"] == "running" and first["queue_position"] == 0
+        assert second["status"] == "queued" and second["queue_position"] == 1
+        assert rejected.status_code == 429
+        assert rejected.json()["detail"]["queue_position"] == 2
+        assert "Retry-After" in rejected.headers
+
+        status = (await client.get(f"/runs/{second['run_id']}")).json()
+        assert status["status"] == "queued" and status["queue_position"] == 1
+        assert (await client.get("/status/B")).json()["run_id"] == second["run_id"]
+        assert (await client.get("/queue")).json()["queued"] == 1
+    gate.set()
@@ -0,0 +1,50 @@
+from backend.utils import storage
+from backend.utils.storage import SQLiteBackend, get_storage_backend
+
+
+def test_sqlite_backend_records_runs_and_logs(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "storage.db"))
+    run_id = backend.create_run("Octo-Alice", "https://github.com/octo/widgets")
+    backend.update_node_status(run_id, "Fixer", "FIX_APPLIED", {"bug_type": "LOGIC", "path": "src/calc.py"})
+    backend.finalize_run(run_id, score=110, duration=12.5, status="SUCCESS", branch_name="OCTO_ALICE_AI_Fix")
+
+    conn = backend._conn()
+    run = dict(conn.execute("SELECT * FROM agent_runs WHERE id = ?", (run_id,)).fetchone())
+    assert run["status"] == "SUCCESS" and run["final_score"] == 110 and run["branch_name"] == "OCTO_ALICE_AI_Fix"
+    logs = conn.execute("SELECT node_name, log_type FROM node_logs WHERE run_id = ?", (run_id,)).fetchall()
+    assert [tuple(r) for r in logs] == [("Fixer", "FIX_APPLIED")]
+
+
+def test_sqlite_fix_memory_uses_index(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "storage.db"))
+    run_id = backend.create_run("r", "repo")
+    backend.update_node_status(run_id, "Fixer", "FIX_APPLIED",
+                               {"bug_type": "SYNTAX", "description": "missing colon after def add"})
+    backend.update_node_status(run_id, "Fixer", "FIX_APPLIED",
+                               {"bug_type": "LOGIC", "description": "add returns a - b instead of a + b"})
+
+    hit = backend.get_previous_fix("LOGIC", "add returns a - b")
+    assert hit and hit["bug_type"] == "LOGIC"
+    assert backend.get_previous_fix("LOGIC", "unrelated import error") is None
+    assert backend.get_previous_fix("TYPE_ERROR", "add returns a - b") is None
+
+    plan = " ".join(r["detail"] for r in backend._conn().execute(
+        "EXPLAIN QUERY PLAN SELECT content FROM node_logs WHERE log_type = 'FIX_APPLIED' "
+        "AND json_extract(content, '$.bug_type') = ? ORDER BY created_at", ("LOGIC",)
+    ).fetchall())
+    assert "idx_node_logs_memory" in plan
+
+
+def test_backend_selection(tmp_path, monkeypatch):
+    monkeypatch.setenv("STORAGE_DB", str(tmp_path / "s.db"))
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_KEY", raising=False)
+
+    assert get_storage_backend("auto").name == "sqlite"
+    assert get_storage_backend("none") is None
+    assert get_storage_backend("supabase") is None  # no credentials
+
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_KEY", "key")
+    monkeypatch.setattr(storage, "SupabaseBackend", lambda url, key: ("supabase", url))
+    assert get_storage_backend("auto") == ("supabase", "https://example.supabase.co")
@@ -0,0 +1,66 @@
+import json
+import httpx
+import pytest
+
+from backend import main
+from backend import telemetry as tm
+
+
+def test_spans_feed_histograms_and_prometheus_text():
+    t = tm.Telemetry(export_path=None)
+    with t.span("node.tester", "run-1"):
+        with t.span("docker.wait"):
+            pass
+    with pytest.raises(RuntimeError):
+        with t.span("docker.wait"):
+            raise RuntimeError("daemon gone")
+    t.inc("rift_runs_total", final_status="PASSED")
+
+    summary = t.summary()
+    assert summary["docker.wait"]["count"] == 2 and summary["docker.wait"]["errors"] == 1
+    assert summary["node.tester"]["count"] == 1
+
+    text = t.render_prometheus()
+    assert "# TYPE rift_span_duration_seconds histogram" in text
+    assert 'rift_span_duration_seconds_count{span="docker.wait",status="error"} 1' in text
+    assert 'rift_span_duration_seconds_bucket{span="node.tester",status="ok",le="+Inf"} 1' in text
+    assert 'rift_runs_total{final_status="PASSED"} 1.0' in text
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    h = tm.Histogram((0.1, 1.0, 10.0))
+    for v in [0.05] * 50 + [5.0] * 50:
+        h.observe(v)
+    assert h.quantile(0.5) == pytest.approx(0.1)
+    assert 1.0 < h.quantile(0.95) <= 10.0
+
+
+def test_otlp_export_links_children_to_the_run_trace(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    t = tm.Telemetry(export_path=str(path))
+    run_id = "6f1c1e0a-2b7d-4c1e-9a51-0d3c1d2b4e5f"
+    with t.span("node.fixer", run_id, iteration=2):
+        with t.span("llm.stream", model="gemini"):
+            pass
+    t.flush()
+
+    spans = [s for line in path.read_text().splitlines()
+             for rs in json.loads(line)["resourceSpans"] for ss in rs["scopeSpans"] for s in ss["spans"]]
+    child, parent = spans[0], spans[1]
+    assert parent["name"] == "node.fixer" and child["name"] == "llm.stream"
+    assert child["traceId"] == parent["traceId"] == run_id.replace("-", "")
+    assert child["parentSpanId"] == parent["spanId"] and "parentSpanId" not in parent
+    assert {"key": "run_id", "value": {"stringValue": run_id}} in child["attributes"]
+    assert int(parent["endTimeUnixNano"]) >= int(parent["startTimeUnixNano"])
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_the_process_registry():
+    with tm.span("git.push"):
+        pass
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert 'span="git.push"' in resp.text
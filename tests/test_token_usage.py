@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+from backend import graph
+from backend.telemetry import telemetry
+from backend.utils.llm_gateway import FairLimiter, LLMGateway
+from backend.utils.token_usage import BUDGET_EXCEEDED, TokenBudgetExceeded, ledger
+
+
+class MeteredGenai:
+    """generate_content that reports usage like the Gemini API (with a context-cache hit)."""
+
+    def __init__(self):
+        self.calls = 0
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content=self.generate_content))
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        usage = SimpleNamespace(prompt_token_count=400, candidates_token_count=80, thoughts_token_count=20,
+                                cached_content_token_count=300, total_token_count=500)
+        return SimpleNamespace(text='{"ok": true}', usage_metadata=usage)
+
+
+@pytest.mark.asyncio
+async def test_calls_are_accounted_per_run_node_and_model():
+    gateway = LLMGateway(MeteredGenai(), FairLimiter(requests_per_minute=6000))
+    ledger.open_run("run-usage")
+
+    await gateway.generate("diagnose", "gemini-2.5-flash-lite", run_id="run-usage", node="debugger")
+    await gateway.generate("fix", "gemini-2.5-pro", run_id="run-usage", node="fixer")
+    await gateway.generate("fix", "gemini-2.5-pro", run_id="run-usage", node="fixer")
+
+    usage = ledger.close_run("run-usage")
+    assert usage["calls"] == 3 and usage["total_tokens"] == 1500
+    assert usage["prompt_tokens"] == 1200 and usage["output_tokens"] == 300 and usage["cache_hits"] == 3
+    assert usage["by_node"]["fixer"]["calls"] == 2 and usage["by_node"]["debugger"]["total_tokens"] == 500
+    # two strong-tier calls, each priced at 25x the fast tier by default
+    assert usage["by_model"]["gemini-2.5-pro"]["cost_usd"] == pytest.approx(
+        50 * usage["by_model"]["gemini-2.5-flash-lite"]["cost_usd"])
+    assert ledger.snapshot("run-usage") is None
+    assert 'rift_llm_tokens_total{kind="output",model="gemini-2.5-pro",node="fixer"}' in telemetry.render_prometheus()
+
+
+@pytest.mark.asyncio
+async def test_budget_refuses_calls_before_they_are_sent():
+    client = MeteredGenai()
+    gateway = LLMGateway(client, FairLimiter(requests_per_minute=6000))
+    ledger.open_run("run-budget", budget=600)
+
+    await gateway.generate("first", "m", run_id="run-budget", node="debugger")  # 500 tokens
+    with pytest.raises(TokenBudgetExceeded):
+        await gateway.generate("x" * 800, "m", run_id="run-budget", node="fixer")  # ~200 more
+
+    assert client.calls == 1
+    assert ledger.close_run("run-budget")["budget_exceeded"] is True
+
+
+def test_exceeded_budget_stops_the_healing_loop():
+    ledger.open_run("run-stop", budget=10)
+    with pytest.raises(TokenBudgetExceeded):
+        ledger.check("run-stop", 50)
+
+    state = graph._instrument("debugger", lambda s: s)({"run_id": "run-stop", "current_step": "DEBUG_COMPLETE"})
+    ledger.close_run("run-stop")
+
+    assert state["current_step"] == BUDGET_EXCEEDED
+    assert state["token_usage"]["budget_exceeded"] is True
+    assert graph.check_test_status({**state, "final_status": "FAILED", "retry_count": 1}) == "max_retries"